@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly and daily usage rollups of a date range from ai_usage_logs.
+
+Each day is replaced in one transaction. If the backfill stops, the days
+before the reported one are rebuilt; rerun from that day.
+
+Usage:
+    python backfill_usage_rollups.py --since 2024-10-01 [--until 2024-11-01]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.database_service import DatabaseService
+from services.usage_rollups import RollupRebuildFailed, rebuild_usage_rollups
+
+
+async def run(args) -> int:
+    db_service = DatabaseService()
+    if not db_service.supabase:
+        print("Database not available. Set SUPABASE_URL and SUPABASE_SERVICE_KEY.")
+        return 1
+
+    try:
+        result = await rebuild_usage_rollups(
+            db_service,
+            datetime.fromisoformat(args.since),
+            datetime.fromisoformat(args.until) if args.until else datetime.now(timezone.utc),
+            page_size=args.page_size
+        )
+    except RollupRebuildFailed as e:
+        print(f"Backfill failed: {e}")
+        print(f"Rerun with: python backfill_usage_rollups.py --since {e.start_date.date()} --until {(e.end_date - timedelta(days=1)).date()}")
+        return 1
+    except Exception as e:
+        print(f"Backfill failed: {e}")
+        return 1
+    finally:
+        await db_service.close()
+
+    print(f"Rebuilt rollups from {result['start_date']} to {result['end_date']}")
+    print(f"  Usage logs scanned: {result['scanned']}")
+    print(f"  Rollup buckets:     {result['buckets']}")
+    return 0
+
+
+def main():
+    """Backfill usage rollups."""
+
+    parser = argparse.ArgumentParser(description="Rebuild AI usage rollups from the usage logs")
+    parser.add_argument("--since", required=True, help="First day to rebuild (ISO date)")
+    parser.add_argument("--until", help="Last day to rebuild (ISO date, default today)")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows read per page")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for DatabaseService.
+
+Runs concurrent get_project_context calls against the in-memory stand-in
+backend with simulated round-trip latency, once with blocking round trips
+(how the synchronous Supabase client behaved) and once with non-blocking
+ones, and reports requests per second for each.
+
+Usage:
+    python benchmarks/bench_database.py [--requests 200] [--concurrency 50] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+
+
+def make_tables(task_count: int = 50):
+    """Build a synthetic project."""
+    tasks = [
+        {
+            "id": f"t{i}", "project_id": "p1", "title": f"Task {i}",
+            "status": ("todo", "in_progress", "done")[i % 3],
+            "priority": ("low", "medium", "high")[i % 3],
+            "estimated_hours": i % 8, "deleted_at": None
+        }
+        for i in range(task_count)
+    ]
+    dependencies = [
+        {"id": f"d{i}", "task_id": f"t{i}", "depends_on_task_id": f"t{i - 1}", "dependency_type": "finish_to_start"}
+        for i in range(1, task_count)
+    ]
+    return {
+        "projects": [{"id": "p1", "name": "Benchmark", "status": "active"}],
+        "tasks": tasks,
+        "task_dependencies": dependencies,
+    }
+
+
+async def run(blocking: bool, requests: int, concurrency: int, latency: float) -> float:
+    """Return requests per second for one configuration."""
+
+    db_service = DatabaseService(client=InMemoryDatabaseClient(make_tables(), latency=latency, blocking=blocking))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await db_service.get_project_context("p1")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+
+    print("DatabaseService concurrency benchmark")
+    print(f"requests={args.requests} concurrency={args.concurrency} latency={args.latency_ms}ms per round trip")
+    print("=" * 50)
+
+    before = asyncio.run(run(True, args.requests, args.concurrency, latency))
+    after = asyncio.run(run(False, args.requests, args.concurrency, latency))
+
+    print(f"Blocking client (before):     {before:8.1f} req/s")
+    print(f"Non-blocking client (after):  {after:8.1f} req/s")
+    print(f"Speedup:                      {after / before:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DatabaseService.get_task_dependencies.
+
+Compares the previous two-step fetch (select task ids, then send them back
+in an ``in_`` filter) with the joined single-query fetch over synthetic
+projects of increasing size, using the in-memory backend with a simulated
+per-round-trip latency. Reports the wall time spent waiting on round trips
+(excluding the stand-in's own filtering CPU), round trips and the size of the
+request filter, which for the two-step fetch grows with the project (the
+old URL exceeds common 8 KB proxy limits at a few hundred tasks).
+
+Usage:
+    python benchmarks/bench_dependencies.py [--sizes 100 1000 10000] [--latency-ms 20] [--page-size 1000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import get_settings
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+
+
+def make_tables(task_count: int):
+    """Build a project whose tasks form chains of dependencies."""
+    task_ids = [str(uuid.uuid4()) for _ in range(task_count)]
+    tasks = [
+        {"id": task_id, "project_id": "p1", "title": f"Task {i}", "deleted_at": None}
+        for i, task_id in enumerate(task_ids)
+    ]
+    dependencies = [
+        {
+            "id": str(uuid.uuid4()), "task_id": task_ids[i], "depends_on_task_id": task_ids[i - 1],
+            "dependency_type": "finish_to_start"
+        }
+        for i in range(1, task_count)
+    ]
+    return {"tasks": tasks, "task_dependencies": dependencies}
+
+
+async def two_step_fetch(client: InMemoryDatabaseClient, project_id: str):
+    """The previous implementation: two round trips and an id list in the URL."""
+    tasks_result = await client.table("tasks").select("id").eq("project_id", project_id).execute()
+    task_ids = [task["id"] for task in (tasks_result.data or [])]
+    result = await client.table("task_dependencies").select(
+        "id, task_id, depends_on_task_id, dependency_type"
+    ).in_("task_id", task_ids).execute()
+    return result.data or [], len(",".join(task_ids))
+
+
+class TimedClient(InMemoryDatabaseClient):
+    """Stand-in client that records when simulated round trips are in flight."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.intervals = []
+
+    async def _round_trip(self):
+        # Record the simulated wire time only; resuming may be delayed by
+        # other coroutines' in-memory filtering, which is not network time.
+        start = time.perf_counter()
+        self.intervals.append((start, start + self.latency))
+        await super()._round_trip()
+
+    def network_time(self) -> float:
+        """Wall time during which at least one round trip was in flight."""
+        total, covered_until = 0.0, 0.0
+        for start, end in sorted(self.intervals):
+            start = max(start, covered_until)
+            if end > start:
+                total += end - start
+                covered_until = end
+        return total
+
+
+async def timed(fetch, tables, latency: float):
+    """Run a fetch and return (result, round trips, seconds spent waiting on round trips)."""
+    client = TimedClient(tables, latency=latency)
+    result = await fetch(client)
+    return result, client.request_count, client.network_time()
+
+
+async def run(task_count: int, latency: float, page_size: int):
+    tables = make_tables(task_count)
+
+    async def joined_fetch(client):
+        db_service = DatabaseService(client=client)
+        db_service.settings = get_settings().model_copy(update={"dependency_page_size": page_size})
+        return await db_service.get_task_dependencies("p1")
+
+    (old_rows, filter_bytes), old_trips, old_time = await timed(lambda c: two_step_fetch(c, "p1"), tables, latency)
+    new_rows, new_trips, new_time = await timed(joined_fetch, tables, latency)
+
+    assert len(new_rows) == len(old_rows)
+    return old_time, old_trips, filter_bytes, new_time, new_trips, len(new_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--page-size", type=int, default=get_settings().dependency_page_size)
+    args = parser.parse_args()
+
+    print("Task dependency fetch benchmark")
+    print(f"latency={args.latency_ms}ms per round trip, page size={args.page_size}")
+    print("=" * 78)
+    print(f"{'tasks':>7} {'deps':>7} | {'two-step ms':>11} {'trips':>5} {'filter KB':>9} | {'joined ms':>9} {'trips':>5}")
+
+    for size in args.sizes:
+        old_time, old_trips, filter_bytes, new_time, new_trips, rows = asyncio.run(
+            run(size, args.latency_ms / 1000, args.page_size)
+        )
+        print(
+            f"{size:>7} {rows:>7} | {old_time * 1000:>11.1f} {old_trips:>5} {filter_bytes / 1024:>9.1f} | "
+            f"{new_time * 1000:>9.1f} {new_trips:>5}"
+        )
+
+    print()
+    print("Note: against Supabase the two-step fetch is also silently truncated at the")
+    print("1000-row API cap, so its results are incomplete beyond that size.")
+
+
+if __name__ == "__main__":
+    main()
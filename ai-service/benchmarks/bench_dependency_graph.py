@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the dependency graph analysis.
+
+Builds synthetic projects of increasing size whose tasks form parallel
+chains with cross links (and a few cycles), and times building the graph and
+analyzing it. Time per edge should stay flat as projects grow, and the
+analysis section added to the assessment prompt stays the same size while
+the raw dependency list it replaces grows with the project.
+
+Usage:
+    python benchmarks/bench_dependency_graph.py [--sizes 1000 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.dependency_graph import DependencyGraph, format_dependency_analysis
+
+
+def make_project(task_count: int, seed: int = 7):
+    """Build tasks in 20 chains with cross links to earlier tasks and a cycle every 1000 tasks."""
+    rng = random.Random(seed)
+    tasks = [
+        {
+            "id": f"t{i}", "title": f"Task {i}", "estimated_hours": rng.choice([None, 1, 2, 4, 8]),
+            "status": "done" if rng.random() < 0.3 else "todo"
+        }
+        for i in range(task_count)
+    ]
+    dependencies = []
+    for i in range(20, task_count):
+        dependencies.append({"task_id": f"t{i}", "depends_on_task_id": f"t{i - 20}"})
+        if rng.random() < 0.5:
+            dependencies.append({"task_id": f"t{i}", "depends_on_task_id": f"t{rng.randrange(i)}"})
+    for i in range(1000, task_count, 1000):
+        dependencies.append({"task_id": f"t{i - 980}", "depends_on_task_id": f"t{i}"})
+    return tasks, dependencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Dependency graph analysis benchmark")
+    print("=" * 80)
+    print(f"{'tasks':>7} {'deps':>7} | {'build ms':>9} {'analyze ms':>10} {'ns/edge':>8} | {'cycles':>6} {'section ch':>10} {'raw ch':>9}")
+
+    for size in args.sizes:
+        tasks, dependencies = make_project(size)
+        build_times, analyze_times = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            graph = DependencyGraph(tasks, dependencies)
+            built = time.perf_counter()
+            analysis = graph.analyze()
+            build_times.append(built - started)
+            analyze_times.append(time.perf_counter() - built)
+
+        build, analyze = min(build_times), min(analyze_times)
+        section = format_dependency_analysis(analysis, tasks)
+        raw = sum(len(f"- Task {d['task_id']} depends on Task {d['depends_on_task_id']}\n") for d in dependencies)
+        print(
+            f"{size:>7} {len(dependencies):>7} | {build * 1000:>9.1f} {analyze * 1000:>10.1f} "
+            f"{(build + analyze) * 1e9 / max(len(dependencies), 1):>8.0f} | "
+            f"{len(analysis['cycles']):>6} {len(section):>10} {raw:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark for proposal persistence.
+
+Compares saving proposals one insert at a time (how _save_proposals and
+/assess-project used to write them) with DatabaseService.create_proposals,
+which writes the whole set in one insert, using the in-memory backend with a
+simulated per-round-trip latency.
+
+Usage:
+    python benchmarks/bench_proposals.py [--counts 1 15 100] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+
+
+def make_proposals(count: int):
+    """Build insight rows like /assess-project writes."""
+    return [
+        {
+            "project_id": "p1", "activity_type": "insight", "proposal_type": None,
+            "component_type": "task", "component_id": f"t{i}", "changes": {},
+            "rationale": f"Insight {i}", "confidence": 0.8, "evidence": [],
+            "estimated_impact": "medium", "status": "pending", "expires_at": None
+        }
+        for i in range(count)
+    ]
+
+
+async def per_row(db_service: DatabaseService, proposals):
+    """The previous implementation: one awaited insert per proposal."""
+    return [await db_service.create_proposal(proposal) for proposal in proposals]
+
+
+async def bulk(db_service: DatabaseService, proposals):
+    return await db_service.create_proposals(proposals)
+
+
+async def run(save, count: int, latency: float):
+    """Return (seconds, round trips) for saving count proposals."""
+    client = InMemoryDatabaseClient(latency=latency)
+    db_service = DatabaseService(client=client)
+
+    start = time.perf_counter()
+    saved = await save(db_service, make_proposals(count))
+    elapsed = time.perf_counter() - start
+
+    assert len(saved) == count and all(row.get("id") for row in saved)
+    return elapsed, client.request_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 15, 100])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+
+    print("Proposal persistence benchmark")
+    print(f"latency={args.latency_ms}ms per round trip")
+    print("=" * 60)
+    print(f"{'proposals':>9} | {'per-row ms':>10} {'trips':>5} | {'bulk ms':>8} {'trips':>5} | {'speedup':>7}")
+
+    for count in args.counts:
+        old_time, old_trips = asyncio.run(run(per_row, count, latency))
+        new_time, new_trips = asyncio.run(run(bulk, count, latency))
+        print(
+            f"{count:>9} | {old_time * 1000:>10.1f} {old_trips:>5} | "
+            f"{new_time * 1000:>8.1f} {new_trips:>5} | {old_time / new_time:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
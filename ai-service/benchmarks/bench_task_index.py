@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Q&A task retrieval index.
+
+Times, over synthetic projects of increasing size, building a project's
+BM25 index from scratch, re-syncing it after 1% of the tasks changed, and
+answering questions (median over a set of questions, top 20 tasks).
+
+Usage:
+    python benchmarks/bench_task_index.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.task_index import TaskIndex
+
+
+VERBS = ["install", "review", "design", "fix", "paint", "order", "measure", "test", "deploy", "plan", "document"]
+THINGS = [f"{word}{i}" for i in range(60) for word in ("roof", "door", "api", "window", "floor", "invoice", "report")]
+FILLER = ["the", "task", "team", "needs", "before", "after", "check", "update", "with", "client", "work", "site"]
+
+QUESTIONS = [
+    "Who is installing the roof3 and when?",
+    "What is left to do on api12?",
+    "Which door7 tasks still need a review?",
+    "Has the window25 been measured yet?",
+    "Is anything blocking the floor0 deploy?",
+    "When will invoice40 be sent to the client?",
+    "What work remains on the site before the report9 is written?"
+]
+
+
+def make_tasks(count: int, seed: int = 11):
+    """Build tasks with a few hundred distinct terms, some of them very common."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"t{i}",
+            "title": f"{rng.choice(VERBS).title()} the {rng.choice(THINGS)}",
+            "description": " ".join(rng.choice(FILLER + THINGS) for _ in range(rng.randint(5, 60)))
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("Task index benchmark (ms)")
+    print("=" * 64)
+    print(f"{'tasks':>7} | {'build':>9} | {'re-sync 1%':>10} | {'query p50':>9} {'query max':>9}")
+
+    for size in args.sizes:
+        tasks = make_tasks(size)
+
+        started = time.perf_counter()
+        index = TaskIndex()
+        index.sync(tasks)
+        build = (time.perf_counter() - started) * 1000
+
+        changed = [dict(task) for task in tasks]
+        for task in changed[::100]:
+            task["title"] += " (revised)"
+        started = time.perf_counter()
+        index.sync(changed)
+        resync = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for _ in range(args.repeat):
+            for question in QUESTIONS:
+                started = time.perf_counter()
+                index.search(question, top_k=20)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        print(
+            f"{size:>7} | {build:>9.1f} | {resync:>10.1f} | "
+            f"{statistics.median(timings):>9.2f} {max(timings):>9.2f}"
+        )
+
+    print()
+    print("Indexes are built once per project and re-synced only when the cached")
+    print("project context is reloaded; each question pays the query time only.")
+
+
+if __name__ == "__main__":
+    main()
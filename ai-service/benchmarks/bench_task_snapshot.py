@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the columnar task snapshots.
+
+Builds synthetic task rows shaped like get_project_tasks results (decoded
+from JSON, as the database client returns them) and compares them with the
+TaskSnapshot holding the same rows: memory per task, the one-off cost of
+building the snapshot, reading a field from every row, and computing the
+project statistics (from the rows, which parses every date, versus from the
+snapshot's columns).
+
+Usage:
+    python benchmarks/bench_task_snapshot.py [--sizes 1000 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.task_snapshot import TaskSnapshot, measure_bytes
+from services.task_stats import compute_task_stats
+
+
+def make_rows(count: int, seed: int = 5):
+    """Task rows with every column get_project_tasks selects."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    owners = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(20)]
+    rows = []
+    for i in range(count):
+        created = now - timedelta(days=rng.randint(0, 180), seconds=rng.randint(0, 86400), microseconds=rng.randint(0, 999999))
+        status = rng.choice(["todo", "in_progress", "done", "blocked"])
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Task {i}: {rng.choice(['Install', 'Review', 'Design', 'Fix'])} the {rng.choice(['roof', 'API', 'door'])}",
+            "description": rng.choice([None, "Measure twice, cut once. " * rng.randint(1, 6)]),
+            "status": status,
+            "priority": rng.choice(["low", "medium", "high", "critical"]),
+            "progress_percentage": rng.choice([0, 25, 50, 100]),
+            "estimated_hours": rng.choice([None, 1, 2.5, 8]),
+            "start_date": (created + timedelta(days=1)).date().isoformat(),
+            "end_date": (created + timedelta(days=rng.randint(2, 30))).date().isoformat(),
+            "due_date": rng.choice([None, (created + timedelta(days=30)).date().isoformat()]),
+            "completed_at": (created + timedelta(days=rng.randint(1, 40))).isoformat() if status == "done" else None,
+            "parent_task_id": rows[rng.randrange(i)]["id"] if i and rng.random() < 0.2 else None,
+            "owner_id": rng.choice(owners + [None]),
+            "created_at": created.isoformat(),
+            "updated_at": (created + timedelta(hours=rng.randint(0, 500))).isoformat()
+        })
+    return json.loads(json.dumps(rows))
+
+
+def best_of(repeat: int, function, *args) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000
+
+
+def read_field(tasks, field="status"):
+    for task in tasks:
+        task.get(field)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Task snapshot benchmark (times in ms, best of %d)" % args.repeat)
+    print("=" * 96)
+    print(
+        f"{'tasks':>7} | {'dict B/task':>11} {'snap B/task':>11} {'ratio':>6} | {'build':>8} | "
+        f"{'read dicts':>10} {'read snap':>9} | {'stats rows':>10} {'stats snap':>10}"
+    )
+
+    for size in args.sizes:
+        rows = make_rows(size)
+        snapshot = TaskSnapshot.from_rows(rows)
+        dict_bytes = measure_bytes(rows) / size
+        snapshot_bytes = measure_bytes(snapshot) / size
+
+        build = best_of(args.repeat, TaskSnapshot.from_rows, rows)
+        read_dicts = best_of(args.repeat, read_field, rows)
+        read_snapshot = best_of(args.repeat, read_field, snapshot)
+        stats_rows = best_of(args.repeat, compute_task_stats, rows)
+        # Statistics columns are derived once per snapshot and then reused
+        stats_snapshot = best_of(args.repeat, compute_task_stats, snapshot)
+
+        print(
+            f"{size:>7} | {dict_bytes:>11.0f} {snapshot_bytes:>11.0f} {dict_bytes / snapshot_bytes:>5.1f}x | {build:>8.1f} | "
+            f"{read_dicts:>10.2f} {read_snapshot:>9.2f} | {stats_rows:>10.1f} {stats_snapshot:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the project task statistics.
+
+Times, over synthetic projects of increasing size, the previous per-row loop
+(breakdowns, estimated hours and completion only), reading tasks into
+columns, and computing the full statistics (breakdowns, overdue, owner load,
+weekly velocity, schedule drift and progress distribution) from the columns
+with NumPy and with the pure-Python fallback.
+
+Usage:
+    python benchmarks/bench_task_stats.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the service directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.task_stats import NUMPY_AVAILABLE, TaskColumns, compute_task_stats
+
+
+def make_tasks(count: int, seed: int = 11):
+    """Build tasks with a realistic mix of statuses, owners, estimates and dates."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    owners = [None] + [f"user-{i}" for i in range(25)]
+    tasks = []
+    for _ in range(count):
+        start = now - timedelta(days=rng.randint(0, 180))
+        status = rng.choice(["todo", "todo", "in_progress", "done", "done", "blocked", "cancelled"])
+        tasks.append({
+            "status": status,
+            "priority": rng.choice(["low", "medium", "high", "critical"]),
+            "owner_id": rng.choice(owners),
+            "estimated_hours": rng.choice([None, 1, 2, 4, 8, 16]),
+            "progress_percentage": rng.choice([None, 0, 10, 40, 75, 100]),
+            "start_date": start.date().isoformat(),
+            "end_date": (start + timedelta(days=rng.randint(1, 30))).date().isoformat(),
+            "completed_at": (start + timedelta(days=rng.randint(1, 40))).isoformat() if status == "done" else None
+        })
+    return tasks
+
+
+def previous_stats(tasks):
+    """The per-row loop get_project_context used before."""
+    status_breakdown, priority_breakdown = {}, {}
+    total_estimated_hours = completed_tasks = 0
+    for task in tasks:
+        status = task.get("status", "unknown")
+        status_breakdown[status] = status_breakdown.get(status, 0) + 1
+        priority = task.get("priority", "unknown")
+        priority_breakdown[priority] = priority_breakdown.get(priority, 0) + 1
+        if task.get("estimated_hours"):
+            total_estimated_hours += task["estimated_hours"]
+        if task.get("status") == "done":
+            completed_tasks += 1
+    return status_breakdown, priority_breakdown, total_estimated_hours, completed_tasks
+
+
+def best_of(repeat: int, function, *args, **kwargs) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args, **kwargs)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("Task statistics benchmark (ms, best of %d)" % args.repeat)
+    print(f"NumPy available: {NUMPY_AVAILABLE}")
+    print("=" * 72)
+    print(f"{'tasks':>7} | {'previous':>9} | {'columns':>8} {'numpy':>8} {'python':>8} | {'total (numpy)':>13}")
+
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        previous = best_of(args.repeat, previous_stats, tasks)
+        extract = best_of(args.repeat, TaskColumns.from_tasks, tasks)
+        columns = TaskColumns.from_tasks(tasks)
+        vectorized = best_of(args.repeat, compute_task_stats, columns, use_numpy=True) if NUMPY_AVAILABLE else float("nan")
+        fallback = best_of(args.repeat, compute_task_stats, columns, use_numpy=False)
+        print(
+            f"{size:>7} | {previous:>9.2f} | {extract:>8.2f} {vectorized:>8.2f} {fallback:>8.2f} | "
+            f"{extract + vectorized:>13.2f}"
+        )
+
+    print()
+    print("The previous loop computed only breakdowns, hours and completion; the")
+    print("columns + numpy total also covers overdue, owner load, velocity, drift")
+    print("and progress distribution.")
+
+
+if __name__ == "__main__":
+    main()
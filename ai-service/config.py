@@ -21,30 +21,123 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = Field(default=None, description="OpenAI API key")
     anthropic_api_key: Optional[str] = Field(default=None, description="Anthropic API key")
     
+    # Health Check Configuration
+    health_probe_interval_seconds: float = Field(default=30.0, description="Interval between background AI provider and database health probes")
+    health_probe_timeout_seconds: float = Field(default=5.0, description="Timeout of each health probe")
+    
     # Database Configuration
     supabase_url: Optional[str] = Field(default=None, description="Supabase project URL")
     supabase_service_key: Optional[str] = Field(default=None, description="Supabase service role key")
+    database_pool_size: int = Field(default=20, description="Max pooled connections to the Supabase REST API")
+    database_timeout: int = Field(default=10, description="Database request timeout in seconds")
+    dependency_page_size: int = Field(default=1000, description="Rows per page when fetching task dependencies")
+    
+    # Project Context Cache Configuration
+    context_cache_enabled: bool = Field(default=True, description="Cache project contexts between requests")
+    context_cache_max_projects: int = Field(default=256, description="Max projects kept in the context cache")
+    context_cache_ttl_seconds: int = Field(default=300, description="Max age of a cached project context")
+    context_cache_probe_interval_seconds: int = Field(default=5, description="Age after which a cached context is re-checked with a version probe")
+    context_task_snapshots: bool = Field(default=True, description="Hold the tasks of project contexts in compact columnar snapshots")
+    
+    # Usage Log Writer Configuration
+    usage_log_batch_size: int = Field(default=100, description="Max usage log rows per multi-row insert")
+    usage_log_flush_interval_ms: int = Field(default=500, description="Max time a usage log row waits before being written")
+    usage_log_queue_size: int = Field(default=10000, description="Max usage log rows buffered in memory")
+    usage_log_enqueue_timeout_ms: int = Field(default=50, description="How long a request waits for queue space before spilling its usage row to disk")
+    usage_log_spill_path: str = Field(default="usage_log_spill.jsonl", description="File holding usage log rows that could not be written")
+    
+    # Usage Reporting Configuration
+    usage_stats_default_days: int = Field(default=30, description="Days of usage summarised when no start date is given")
+    usage_logs_max_page_size: int = Field(default=500, description="Max raw usage log rows returned per page")
+    usage_rollups_enabled: bool = Field(default=True, description="Maintain hourly/daily usage rollups as usage logs are written")
     
     # AI Service Configuration
     default_ai_provider: str = Field(default="openai", description="Default AI provider")
     default_ai_model: str = Field(default="gpt-4o-mini", description="Default AI model")
     max_tokens_per_request: int = Field(default=4000, description="Max tokens per AI request")
     request_timeout: int = Field(default=30, description="Request timeout in seconds")
+    assessment_prompt_token_budget: int = Field(default=6000, description="Max input tokens of a project assessment prompt")
+    prompt_description_chars: int = Field(default=300, description="Max characters of each task description included in prompts")
+    prompt_dependency_lines: int = Field(default=20, description="Max raw dependency lines in assessment prompts; the computed dependency analysis covers the full graph")
+    
+    # Question Answering Configuration
+    qa_retrieval_enabled: bool = Field(default=True, description="Add the tasks a question is about, found with a local keyword index, to Q&A prompts")
+    qa_retrieval_top_k: int = Field(default=20, description="Max tasks retrieved for a question")
+    qa_retrieval_token_budget: int = Field(default=1500, description="Max tokens of retrieved tasks in a Q&A prompt")
+    
+    # Assessment Job Queue Configuration
+    assessment_queue_backend: str = Field(default="memory", description="Assessment job store: memory (per process) or sqlite (durable, shared by workers)")
+    assessment_queue_path: str = Field(default="assessment_jobs.sqlite3", description="SQLite file used by the sqlite assessment job store")
+    assessment_workers: int = Field(default=4, description="Assessment jobs run concurrently per worker process")
+    assessment_job_timeout_seconds: float = Field(default=300.0, description="Max run time of one assessment job")
+    assessment_job_retention_seconds: int = Field(default=3600, description="How long finished assessment jobs can still be polled")
+    assessment_queue_poll_interval_ms: int = Field(default=1000, description="How often idle workers check the job store for jobs submitted by other processes")
+    
+    # Portfolio Assessment Configuration
+    portfolio_assessment_concurrency: int = Field(default=8, description="Projects assessed concurrently by a portfolio run")
+    portfolio_context_batch_size: int = Field(default=50, description="Projects whose contexts are loaded per bulk query in a portfolio run")
+    portfolio_insight_batch_size: int = Field(default=200, description="Insights buffered before a portfolio run saves them with one insert")
+    portfolio_rate_limit_retries: int = Field(default=5, description="Times a portfolio run waits out a rate limit for one project before giving up on it")
+    portfolio_max_runs: int = Field(default=20, description="Finished portfolio runs kept for status polling")
+    
+    # Cost Pre-flight Configuration
+    cost_preflight_enabled: bool = Field(default=True, description="Estimate AI request cost before calling the provider and enforce the per-request budget")
+    max_request_cost_usd: float = Field(default=0.25, description="Default max expected cost of one AI request (projects can override)")
+    cost_downgrade_enabled: bool = Field(default=True, description="Move over-budget requests to the provider's cheaper model instead of rejecting them")
+    expected_completion_tokens: int = Field(default=500, description="Completion tokens assumed when estimating a request's cost")
+    
+    # LLM Response Cache Configuration
+    llm_cache_enabled: bool = Field(default=True, description="Serve identical AI requests from the response cache")
+    llm_cache_backend: str = Field(default="memory", description="Response cache backend: memory (per process) or sqlite (shared by workers)")
+    llm_cache_max_entries: int = Field(default=1000, description="Max cached AI responses")
+    llm_cache_ttl_seconds: int = Field(default=3600, description="Max age of a cached AI response")
+    llm_cache_path: str = Field(default="llm_cache.sqlite3", description="SQLite file used by the sqlite response cache backend")
+    
+    # AI Provider Connection Pool Configuration
+    ai_http_pool_size: int = Field(default=20, description="Max concurrent connections per AI provider")
+    ai_http_keepalive_connections: int = Field(default=10, description="Idle keep-alive connections kept per AI provider")
+    ai_http_keepalive_expiry: float = Field(default=60.0, description="Seconds an idle provider connection is kept open")
+    ai_http2_enabled: bool = Field(default=True, description="Use HTTP/2 for AI provider connections when available")
+    
+    # AI Provider Failover Configuration
+    ai_failover_enabled: bool = Field(default=True, description="Retry failed AI calls on the fallback models")
+    ai_fallback_models: str = Field(default="", description="Comma-separated provider:model fallbacks tried in order, e.g. anthropic:claude-3-haiku-20240307")
+    ai_hedging_enabled: bool = Field(default=False, description="Send a second request to the next provider when a call is slower than usual")
+    ai_hedge_percentile: float = Field(default=95.0, description="Latency percentile of recent calls after which a call is hedged")
+    ai_hedge_min_samples: int = Field(default=20, description="Recent calls needed before hedging a provider/model")
+    ai_hedge_min_delay_ms: int = Field(default=500, description="Minimum wait before hedging a call")
+    ai_hedge_latency_window: int = Field(default=200, description="Recent call latencies kept per provider/model")
+    circuit_breaker_error_rate: float = Field(default=0.5, description="Error rate that opens a provider's circuit")
+    circuit_breaker_min_requests: int = Field(default=10, description="Calls in the window needed before a circuit can open")
+    circuit_breaker_window_seconds: int = Field(default=60, description="Window over which a provider's error rate is measured")
+    circuit_breaker_open_seconds: float = Field(default=30.0, description="How long an open circuit skips its provider before a probe call")
     
     # Cost Configuration
-    openai_gpt4o_mini_cost_per_1k_tokens: float = Field(default=0.00015, description="GPT-4o-mini cost per 1k tokens")
-    openai_gpt4o_cost_per_1k_tokens: float = Field(default=0.005, description="GPT-4o cost per 1k tokens")
-    anthropic_claude_3_haiku_cost_per_1k_tokens: float = Field(default=0.00025, description="Claude 3 Haiku cost per 1k tokens")
-    anthropic_claude_3_sonnet_cost_per_1k_tokens: float = Field(default=0.003, description="Claude 3 Sonnet cost per 1k tokens")
+    pricing_path: str = Field(default="pricing.json", description="JSON file of per-model input/cached-input/output prices with effective dates")
+    
+    # Request Coalescing Configuration
+    request_coalescing_enabled: bool = Field(default=True, description="Share one AI call between concurrent identical validation/assessment requests")
     
     # Validation Configuration
     max_validation_requests_per_minute: int = Field(default=60, description="Max validation requests per minute")
     proposal_expiry_hours: int = Field(default=24, description="Proposal expiry in hours")
     
+    # Rate Limiting Configuration
+    rate_limit_enabled: bool = Field(default=True, description="Enforce per-project and per-organization rate limits")
+    rate_limit_backend: str = Field(default="memory", description="Rate limit state backend: memory (per process) or sqlite (shared by workers)")
+    rate_limit_path: str = Field(default="rate_limits.sqlite3", description="SQLite file used by the sqlite rate limit backend")
+    max_project_tokens_per_minute: int = Field(default=100000, description="Max AI tokens per project per minute")
+    max_organization_requests_per_minute: int = Field(default=600, description="Max AI requests per organization per minute")
+    max_organization_tokens_per_minute: int = Field(default=1000000, description="Max AI tokens per organization per minute")
+    max_concurrent_provider_calls: int = Field(default=50, description="Max outstanding AI requests per worker")
+    provider_call_queue_timeout_ms: int = Field(default=100, description="How long a request waits for a free provider slot before being rejected")
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
+        # Settings removed in later releases (e.g. the old per-model cost rates) may linger in .env files
+        extra = "ignore"
 
 
 # Global settings instance
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Configurable stand-in for a provider AI service, shared by the tests.
+"""
+
+import asyncio
+from typing import List, Optional
+
+from models import AIProviderConfig, AIProvider, AIModel, AIProposal, TokenUsage, ValidationIssue
+from services.base_ai_service import BaseAIService
+
+
+class FakeAIService(BaseAIService):
+    """AI service that returns fixed responses after an optional delay.
+
+    Counts calls, cancelled calls and how many calls run at once. With
+    ``fail=True`` it answers ``"error"`` with zero token usage, the way the
+    real services report a failed request.
+    """
+
+    def __init__(
+        self,
+        provider: AIProvider = AIProvider.OPENAI,
+        model: AIModel = AIModel.GPT_4O_MINI,
+        delay: float = 0.0,
+        fail: bool = False,
+        issues: Optional[List[ValidationIssue]] = None,
+        proposals: Optional[List[AIProposal]] = None,
+        insights: str = "[]"
+    ):
+        super().__init__(AIProviderConfig(provider=provider, model=model, api_key="test-key", max_tokens=1000))
+        self.delay = delay
+        self.fail = fail
+        self.issues = issues or []
+        self.proposals = proposals or []
+        self.insights = insights
+        self.calls = 0
+        self.cancelled = 0
+        self.active = 0
+        self.max_active = 0
+
+    def _usage(self) -> TokenUsage:
+        if self.fail:
+            return TokenUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0, estimated_cost=0.0)
+        return TokenUsage(prompt_tokens=100, completion_tokens=50, total_tokens=150, estimated_cost=0.001)
+
+    async def _call(self):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+
+    async def validate_component(self, context, validation_scope="selective"):
+        await self._call()
+        return list(self.issues), list(self.proposals), self._usage()
+
+    async def answer_question(self, question, project_id, context_data=None):
+        await self._call()
+        if self.fail:
+            return "error", [], self._usage()
+        return f"answer from {self.config.provider.value}", ["Task: Buy wood"], self._usage()
+
+    async def test_connection(self):
+        return not self.fail
+
+    async def generate_insights(self, prompt, project_id, context_data=None):
+        await self._call()
+        return ("[]" if self.fail else self.insights), self._usage()
@@ -3,25 +3,47 @@ FastAPI main application for AI service.
 """
 
 import asyncio
-from datetime import datetime
-from typing import Dict, Any
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from config import get_settings
 from models import (
     AIValidationRequest, AIValidationResponse, HealthResponse,
-    ProposalActionRequest, ProposalResponse, QuestionRequest, QuestionAnswerResponse
+    ProposalActionRequest, ProposalResponse, QuestionRequest, QuestionAnswerResponse,
+    TokenUsage
 )
+from services.assessment_service import ProjectAssessmentService
+from services.container import ServiceContainer
+from services.cost_estimator import BudgetExceeded
+from services.job_queue import AssessmentJobQueue, job_status
+from services.portfolio_assessment import PortfolioAssessmentService
+from services.rate_limiter import RateLimiter, RateLimitExceeded, retry_after_header
+from services.usage_rollups import summarize_rollups
 from services.validator_service import ValidatorService
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared services on startup and release them on shutdown."""
+    container = ServiceContainer()
+    await container.start()
+    app.state.container = container
+    yield
+    await container.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Helm AI Service",
     description="AI-powered validation and proposal generation for project management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -33,38 +55,172 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global validator service
-validator_service = ValidatorService()
+
+def get_container(request: Request) -> ServiceContainer:
+    """Get the shared service container."""
+    return request.app.state.container
+
+
+def get_validator_service(container: ServiceContainer = Depends(get_container)) -> ValidatorService:
+    """Get the shared validator service."""
+    return container.validator_service
+
+
+def get_assessment_service(container: ServiceContainer = Depends(get_container)) -> ProjectAssessmentService:
+    """Get the shared project assessment service."""
+    return container.assessment_service
+
+
+def get_assessment_queue(container: ServiceContainer = Depends(get_container)) -> AssessmentJobQueue:
+    """Get the shared assessment job queue."""
+    return container.assessment_queue
+
+
+def get_portfolio_service(container: ServiceContainer = Depends(get_container)) -> PortfolioAssessmentService:
+    """Get the shared portfolio assessment service."""
+    return container.portfolio_service
+
+
+def get_rate_limiter(container: ServiceContainer = Depends(get_container)) -> RateLimiter:
+    """Get the shared rate limiter."""
+    return container.rate_limiter
+
+
+def get_organization_id(request: Request) -> Optional[str]:
+    """Get the caller's organization (sent by the backend), if any."""
+    return request.headers.get("X-Organization-Id")
+
+
+def budget_error(error: BudgetExceeded) -> HTTPException:
+    """Build the 402 response for a request over its cost budget."""
+    return HTTPException(
+        status_code=402,
+        detail={"message": str(error), "estimate": error.estimate.model_dump()}
+    )
+
+
+def rate_limit_error(error: RateLimitExceeded) -> HTTPException:
+    """Build the 429 response for a rejected request."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Rate limit exceeded ({error.scope})",
+        headers=retry_after_header(error)
+    )
 
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint."""
+async def health_check(container: ServiceContainer = Depends(get_container)):
+    """Health check endpoint (serves the latest background probe results)."""
     
-    # Test AI provider connections
-    ai_providers = await validator_service.test_ai_connections()
+    monitor = container.health_monitor
+    if monitor.checked_at is None:
+        status = "starting"
+    else:
+        status = "healthy" if monitor.is_ready() else "degraded"
     
     return HealthResponse(
-        status="healthy",
+        status=status,
         timestamp=datetime.utcnow(),
         version="1.0.0",
-        ai_providers=ai_providers
+        ai_providers={name: result["healthy"] for name, result in monitor.ai_providers.items()},
+        database=monitor.database.get("healthy") if monitor.database.get("configured") else None,
+        checked_at=monitor.checked_at
     )
 
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check(container: ServiceContainer = Depends(get_container)):
+    """Readiness probe: 503 until a fresh probe finds an AI provider and the database healthy."""
+    
+    snapshot = container.health_monitor.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+
+@app.get("/metrics")
+async def get_metrics(container: ServiceContainer = Depends(get_container)):
+    """Get service metrics."""
+    
+    context_cache = container.db_service.context_cache
+    response_cache = container.provider_registry.response_cache
+    
+    return {
+        "ai_provider_pools": container.provider_registry.metrics(),
+        "project_context_cache": context_cache.stats() if context_cache else None,
+        "usage_log_writer": container.usage_writer.stats(),
+        "llm_response_cache": await response_cache.stats() if response_cache else None,
+        "request_coalescing": {
+            "validation": container.validator_service.single_flight.stats(),
+            "assessment": container.assessment_service.single_flight.stats()
+        },
+        "rate_limiter": container.rate_limiter.stats(),
+        "assessment_jobs": await container.assessment_queue.stats(),
+        "portfolio_assessments": container.portfolio_service.stats(),
+        "provider_router": container.provider_registry.router.stats()
+    }
+
+
+@app.delete("/cache/context")
+async def invalidate_all_project_contexts(container: ServiceContainer = Depends(get_container)):
+    """Drop every cached project context."""
+    
+    invalidated = container.db_service.invalidate_project_context()
+    return {"invalidated": invalidated}
+
+
+@app.delete("/cache/context/{project_id}")
+async def invalidate_project_context(
+    project_id: str,
+    container: ServiceContainer = Depends(get_container)
+):
+    """Drop the cached context of a project (call after task or dependency changes)."""
+    
+    invalidated = container.db_service.invalidate_project_context(project_id)
+    return {"invalidated": invalidated}
+
+
+@app.delete("/cache/responses")
+async def clear_response_cache(container: ServiceContainer = Depends(get_container)):
+    """Drop every cached AI response."""
+    
+    response_cache = container.provider_registry.response_cache
+    if response_cache:
+        await response_cache.clear()
+    return {"cleared": response_cache is not None}
+
+
 @app.post("/validate", response_model=AIValidationResponse)
-async def validate_component(request: AIValidationRequest):
+async def validate_component(
+    request: AIValidationRequest,
+    validator_service: ValidatorService = Depends(get_validator_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    organization_id: Optional[str] = Depends(get_organization_id)
+):
     """Validate a component using AI."""
     
     try:
-        response = await validator_service.validate_component(request)
+        async with rate_limiter.admission(request.project_id, organization_id):
+            response = await validator_service.validate_component(request)
         return response
+    except RateLimitExceeded as e:
+        raise rate_limit_error(e)
+    except BudgetExceeded as e:
+        raise budget_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
 
 @app.post("/proposals/{proposal_id}/action", response_model=ProposalResponse)
-async def handle_proposal_action(proposal_id: str, request: ProposalActionRequest):
+async def handle_proposal_action(
+    proposal_id: str,
+    request: ProposalActionRequest,
+    validator_service: ValidatorService = Depends(get_validator_service)
+):
     """Handle proposal actions (accept, reject, modify, defer)."""
     
     try:
@@ -101,7 +257,8 @@ async def handle_proposal_action(proposal_id: str, request: ProposalActionReques
 async def get_proposals(
     project_id: str,
     status: str = None,
-    component_type: str = None
+    component_type: str = None,
+    validator_service: ValidatorService = Depends(get_validator_service)
 ):
     """Get proposals for a project."""
     
@@ -115,7 +272,10 @@ async def get_proposals(
 
 
 @app.get("/config/{project_id}")
-async def get_ai_config(project_id: str):
+async def get_ai_config(
+    project_id: str,
+    validator_service: ValidatorService = Depends(get_validator_service)
+):
     """Get AI configuration for a project."""
     
     try:
@@ -126,7 +286,11 @@ async def get_ai_config(project_id: str):
 
 
 @app.put("/config/{project_id}")
-async def update_ai_config(project_id: str, config_data: Dict[str, Any]):
+async def update_ai_config(
+    project_id: str,
+    config_data: Dict[str, Any],
+    validator_service: ValidatorService = Depends(get_validator_service)
+):
     """Update AI configuration for a project."""
     
     try:
@@ -138,141 +302,249 @@ async def update_ai_config(project_id: str, config_data: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=f"Failed to update config: {str(e)}")
 
 
+@app.get("/usage/rollups")
+async def get_usage_rollups(
+    granularity: str = Query(default="day", pattern="^(hour|day)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    project_id: Optional[List[str]] = Query(default=None),
+    validator_service: ValidatorService = Depends(get_validator_service)
+):
+    """Get hourly or daily usage rollups (tokens, cost, success rate, latency percentiles).
+    
+    Reads only the rollup table; repeat ``project_id`` to report on several
+    projects, e.g. all projects of an organization.
+    """
+    
+    db_service = validator_service.db_service
+    end_date = end_date or datetime.now(timezone.utc)
+    start_date = start_date or end_date - timedelta(days=db_service.settings.usage_stats_default_days)
+    
+    rows = await db_service.get_usage_rollups(granularity, start_date, end_date, project_id)
+    return {
+        "granularity": granularity,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        **summarize_rollups(rows)
+    }
+
+
 @app.get("/usage/{project_id}")
-async def get_usage_stats(project_id: str):
-    """Get AI usage statistics for a project."""
+async def get_usage_stats(
+    project_id: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    validator_service: ValidatorService = Depends(get_validator_service)
+):
+    """Get AI usage totals for a project, broken down by day, operation, provider and model."""
     
     try:
-        stats = await validator_service.db_service.get_usage_stats(project_id)
+        stats = await validator_service.db_service.get_usage_stats(project_id, start_date, end_date)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get usage stats: {str(e)}")
 
 
+@app.get("/usage/{project_id}/logs")
+async def get_usage_logs(
+    project_id: str,
+    limit: int = Query(default=100, ge=1),
+    offset: int = Query(default=0, ge=0),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    validator_service: ValidatorService = Depends(get_validator_service)
+):
+    """Get a page of a project's raw AI usage logs, newest first."""
+    
+    db_service = validator_service.db_service
+    limit = min(limit, db_service.settings.usage_logs_max_page_size)
+    return await db_service.get_usage_logs(project_id, limit, offset, start_date, end_date)
+
+
+async def build_question_context(
+    validator_service: ValidatorService,
+    project_id: str,
+    question: Optional[str] = None,
+    model: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the project context passed to the AI for Q&A.
+    
+    With a question and retrieval enabled, the tasks the question is about
+    are looked up in the project's task index and added as ``relevant_tasks``.
+    """
+    
+    # Get comprehensive project context
+    project_context = await validator_service.db_service.get_project_context(project_id)
+    
+    # If database is not available, create mock context for testing
+    if not project_context.get("project"):
+        print(f"[DEBUG] Database not available, using mock context for project {project_id}")
+        # Use the actual tasks visible in the UI
+        context_data = {
+            'project_name': 'Build a garden shed',
+            'project_description': 'A project to build a garden shed',
+            'project_status': 'active',
+            'task_count': 5,
+            'completed_tasks': 0,
+            'completion_percentage': 0.0,
+            'status_breakdown': {'todo': 4, 'in_progress': 1, 'done': 0},
+            'priority_breakdown': {'low': 0, 'medium': 5, 'high': 0},
+            'total_estimated_hours': 0,
+            'total_dependencies': 0,
+            'tasks': [
+                {'id': '1', 'title': 'Go to the shops and chat up an assistant', 'description': 'See if they are up for it!', 'status': 'todo', 'priority': 'medium'},
+                {'id': '2', 'title': 'red cat', 'status': 'in_progress', 'priority': 'medium'},
+                {'id': '3', 'title': 'rrr', 'status': 'todo', 'priority': 'medium'},
+                {'id': '4', 'title': 'gggggg', 'status': 'todo', 'priority': 'medium'},
+                {'id': '5', 'title': 'Go to B&Q and purchase the wood for the shed', 'description': 'Go to B&Q and purchase the wood for the shed', 'status': 'todo', 'priority': 'medium'}
+            ],
+            'dependencies': []
+        }
+    else:
+        # Format context data for AI
+        context_data = {
+            'project_name': project_context['project'].get('name'),
+            'project_description': project_context['project'].get('description'),
+            'project_status': project_context['project'].get('status'),
+            'task_count': project_context['stats']['total_tasks'],
+            'completed_tasks': project_context['stats']['completed_tasks'],
+            'completion_percentage': project_context['stats']['completion_percentage'],
+            'status_breakdown': project_context['stats']['status_breakdown'],
+            'priority_breakdown': project_context['stats']['priority_breakdown'],
+            'total_estimated_hours': project_context['stats']['total_estimated_hours'],
+            'total_dependencies': project_context['stats']['total_dependencies'],
+            'tasks': project_context['tasks'],
+            'dependencies': project_context['dependencies']
+        }
+        
+        if question and validator_service.task_retriever:
+            context_data['relevant_tasks'] = validator_service.task_retriever.select_tasks(
+                project_id,
+                question,
+                project_context['tasks'],
+                project_context['dependencies'],
+                model or validator_service.settings.default_ai_model
+            )
+    
+    return context_data
+
+
+async def save_question_answer(
+    validator_service: ValidatorService,
+    request: QuestionRequest,
+    ai_config: Dict[str, Any],
+    answer_text: str,
+    evidence: List[str],
+    token_usage: TokenUsage,
+    processing_time_ms: int
+) -> Tuple[str, str]:
+    """Save the question and answer proposals and queue the usage log.
+    
+    Returns:
+        tuple: (question_id, answer_id)
+    """
+    
+    import uuid
+    
+    # Save question to database as a proposal (if database available)
+    question_id = str(uuid.uuid4())
+    if validator_service.db_service.supabase:
+        question_proposal = await validator_service.db_service.create_proposal({
+            "project_id": request.project_id,
+            "activity_type": "question",
+            "rationale": request.question,
+            "evidence": [],
+            "status": "pending"
+        })
+        question_id = question_proposal.get("id", question_id)
+    
+    # Save answer to database as a proposal (if database available)
+    answer_id = str(uuid.uuid4())
+    if validator_service.db_service.supabase:
+        answer_proposal = await validator_service.db_service.create_proposal({
+            "project_id": request.project_id,
+            "activity_type": "answer",
+            "parent_id": question_id,
+            "rationale": answer_text,
+            "evidence": evidence,
+            "status": "pending"
+        })
+        answer_id = answer_proposal.get("id", answer_id)
+    
+    # Queue AI usage log (written in the background if database available)
+    if validator_service.db_service.supabase:
+        await validator_service.usage_writer.log({
+            "project_id": request.project_id,
+            "operation_type": "question_answer",
+            "ai_provider": token_usage.provider or ai_config['provider'],
+            "ai_model": token_usage.model or ai_config['model'],
+            "input_tokens": token_usage.prompt_tokens,
+            "output_tokens": token_usage.completion_tokens,
+            "total_tokens": token_usage.total_tokens,
+            "estimated_cost": token_usage.estimated_cost,
+            "latency_ms": processing_time_ms,
+            "success": True,
+            "proposal_ids": [question_id, answer_id]
+        })
+    
+    return question_id, answer_id
+
+
 @app.post("/answer-question", response_model=QuestionAnswerResponse)
-async def answer_question(request: QuestionRequest):
+async def answer_question(
+    request: QuestionRequest,
+    validator_service: ValidatorService = Depends(get_validator_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    organization_id: Optional[str] = Depends(get_organization_id)
+):
     """Answer a user question about their project."""
     
     import time
-    import uuid
     
     start_time = time.time()
     
     try:
-        # Get comprehensive project context
-        project_context = await validator_service.db_service.get_project_context(request.project_id)
+        async with rate_limiter.admission(request.project_id, organization_id):
+            # Get AI configuration for the project
+            ai_config = await validator_service.get_ai_config(request.project_id)
+            ai_service = validator_service.get_ai_service(ai_config)
         
-        # If database is not available, create mock context for testing
-        if not project_context.get("project"):
-            print(f"[DEBUG] Database not available, using mock context for project {request.project_id}")
-            # Use the actual tasks visible in the UI
-            context_data = {
-                'project_name': 'Build a garden shed',
-                'project_description': 'A project to build a garden shed',
-                'project_status': 'active',
-                'task_count': 5,
-                'completed_tasks': 0,
-                'completion_percentage': 0.0,
-                'status_breakdown': {'todo': 4, 'in_progress': 1, 'done': 0},
-                'priority_breakdown': {'low': 0, 'medium': 5, 'high': 0},
-                'total_estimated_hours': 0,
-                'total_dependencies': 0,
-                'tasks': [
-                    {'id': '1', 'title': 'Go to the shops and chat up an assistant', 'description': 'See if they are up for it!', 'status': 'todo', 'priority': 'medium'},
-                    {'id': '2', 'title': 'red cat', 'status': 'in_progress', 'priority': 'medium'},
-                    {'id': '3', 'title': 'rrr', 'status': 'todo', 'priority': 'medium'},
-                    {'id': '4', 'title': 'gggggg', 'status': 'todo', 'priority': 'medium'},
-                    {'id': '5', 'title': 'Go to B&Q and purchase the wood for the shed', 'description': 'Go to B&Q and purchase the wood for the shed', 'status': 'todo', 'priority': 'medium'}
-                ],
-                'dependencies': []
-            }
-        else:
-            # Format context data for AI
-            context_data = {
-                'project_name': project_context['project'].get('name'),
-                'project_description': project_context['project'].get('description'),
-                'project_status': project_context['project'].get('status'),
-                'task_count': project_context['stats']['total_tasks'],
-                'completed_tasks': project_context['stats']['completed_tasks'],
-                'completion_percentage': project_context['stats']['completion_percentage'],
-                'status_breakdown': project_context['stats']['status_breakdown'],
-                'priority_breakdown': project_context['stats']['priority_breakdown'],
-                'total_estimated_hours': project_context['stats']['total_estimated_hours'],
-                'total_dependencies': project_context['stats']['total_dependencies'],
-                'tasks': project_context['tasks'],
-                'dependencies': project_context['dependencies']
-            }
+            context_data = await build_question_context(
+                validator_service, request.project_id, request.question, ai_config['model']
+            )
         
-        # Get AI configuration for the project
-        ai_config = await validator_service.get_ai_config(request.project_id)
-        ai_service = validator_service.get_ai_service(ai_config)
+            # Call AI service to get answer
+            answer_text, evidence, token_usage = await ai_service.answer_question(
+                question=request.question,
+                project_id=request.project_id,
+                context_data=context_data
+            )
         
-        # Call AI service to get answer
-        answer_text, evidence, token_usage = await ai_service.answer_question(
-            question=request.question,
-            project_id=request.project_id,
-            context_data=context_data
-        )
+            processing_time_ms = int((time.time() - start_time) * 1000)
+            question_id, answer_id = await save_question_answer(
+                validator_service, request, ai_config, answer_text, evidence, token_usage, processing_time_ms
+            )
         
-        # Save question to database as a proposal (if database available)
-        question_id = str(uuid.uuid4())
-        if validator_service.db_service.supabase:
-            question_proposal = await validator_service.db_service.create_proposal({
-                "project_id": request.project_id,
-                "activity_type": "question",
-                "rationale": request.question,
-                "evidence": [],
-                "status": "pending"
-            })
-            question_id = question_proposal.get("id", question_id)
-        
-        # Save answer to database as a proposal (if database available)
-        answer_id = str(uuid.uuid4())
-        if validator_service.db_service.supabase:
-            answer_proposal = await validator_service.db_service.create_proposal({
-                "project_id": request.project_id,
-                "activity_type": "answer",
-                "parent_id": question_id,
-                "rationale": answer_text,
-                "evidence": evidence,
-                "status": "pending"
-            })
-            answer_id = answer_proposal.get("id", answer_id)
-        
-        # Log AI usage (if database available)
-        processing_time_ms = int((time.time() - start_time) * 1000)
-        if validator_service.db_service.supabase:
-            await validator_service.db_service.log_ai_usage({
-                "project_id": request.project_id,
-                "operation_type": "question_answer",
-                "ai_provider": ai_config['provider'],
-                "ai_model": ai_config['model'],
-                "input_tokens": token_usage.prompt_tokens,
-                "output_tokens": token_usage.completion_tokens,
-                "total_tokens": token_usage.total_tokens,
-                "estimated_cost": token_usage.estimated_cost,
-                "latency_ms": processing_time_ms,
-                "success": True,
-                "proposal_ids": [question_id, answer_id]
-            })
-        
-        return QuestionAnswerResponse(
-            success=True,
-            answer=answer_text,
-            evidence=evidence,
-            question_id=question_id,
-            answer_id=answer_id,
-            usage_stats={
-                "prompt_tokens": token_usage.prompt_tokens,
-                "completion_tokens": token_usage.completion_tokens,
-                "total_tokens": token_usage.total_tokens,
-                "estimated_cost": token_usage.estimated_cost,
-                "model": ai_config['model'],
-                "provider": ai_config['provider']
-            },
-            processing_time_ms=processing_time_ms
-        )
+            return QuestionAnswerResponse(
+                success=True,
+                answer=answer_text,
+                evidence=evidence,
+                question_id=question_id,
+                answer_id=answer_id,
+                usage_stats={
+                    "prompt_tokens": token_usage.prompt_tokens,
+                    "completion_tokens": token_usage.completion_tokens,
+                    "total_tokens": token_usage.total_tokens,
+                    "estimated_cost": token_usage.estimated_cost,
+                    "cache_hit": token_usage.cache_hit,
+                    "model": token_usage.model or ai_config['model'],
+                    "provider": token_usage.provider or ai_config['provider']
+                },
+                processing_time_ms=processing_time_ms
+            )
         
+    except RateLimitExceeded as e:
+        raise rate_limit_error(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -282,12 +554,127 @@ async def answer_question(request: QuestionRequest):
         raise HTTPException(status_code=500, detail=f"Failed to answer question: {str(e)}")
 
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/answer-question/stream")
+async def answer_question_stream(
+    request: QuestionRequest,
+    validator_service: ValidatorService = Depends(get_validator_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    organization_id: Optional[str] = Depends(get_organization_id)
+):
+    """Answer a user question, streaming the answer as Server-Sent Events.
+    
+    Emits ``answer`` events with pieces of answer text as the provider
+    generates them, then a ``done`` event with the evidence, saved proposal
+    ids and usage stats once the answer has been persisted (or an ``error``
+    event if the request fails).
+    
+    Rate limits are checked before the stream starts, so the client gets a
+    real 429. The provider call slot is taken inside the stream, so it is
+    only held while the body is being sent; if no slot frees up in time the
+    stream ends with an ``error`` event carrying ``status_code`` 429.
+    """
+    
+    import time
+    
+    start_time = time.time()
+    
+    try:
+        await rate_limiter.admit(request.project_id, organization_id)
+    except RateLimitExceeded as e:
+        raise rate_limit_error(e)
+    
+    async def events():
+        try:
+            await rate_limiter.acquire_slot()
+        except RateLimitExceeded as e:
+            yield sse_event("error", {
+                "detail": f"Rate limit exceeded ({e.scope})",
+                "status_code": 429,
+                "retry_after": retry_after_header(e)["Retry-After"]
+            })
+            return
+        
+        try:
+            ai_config = await validator_service.get_ai_config(request.project_id)
+            ai_service = validator_service.get_ai_service(ai_config)
+            context_data = await build_question_context(
+                validator_service, request.project_id, request.question, ai_config['model']
+            )
+            
+            first_token_ms = None
+            async for event in ai_service.answer_question_stream(
+                question=request.question,
+                project_id=request.project_id,
+                context_data=context_data
+            ):
+                if event["type"] == "answer":
+                    if first_token_ms is None:
+                        first_token_ms = int((time.time() - start_time) * 1000)
+                    yield sse_event("answer", {"text": event["text"]})
+                    continue
+                
+                token_usage = event["token_usage"]
+                processing_time_ms = int((time.time() - start_time) * 1000)
+                question_id, answer_id = await save_question_answer(
+                    validator_service, request, ai_config, event["answer"], event["evidence"],
+                    token_usage, processing_time_ms
+                )
+                
+                yield sse_event("done", {
+                    "success": True,
+                    "answer": event["answer"],
+                    "evidence": event["evidence"],
+                    "question_id": question_id,
+                    "answer_id": answer_id,
+                    "usage_stats": {
+                        "prompt_tokens": token_usage.prompt_tokens,
+                        "completion_tokens": token_usage.completion_tokens,
+                        "total_tokens": token_usage.total_tokens,
+                        "estimated_cost": token_usage.estimated_cost,
+                        "cache_hit": token_usage.cache_hit,
+                        "model": token_usage.model or ai_config['model'],
+                        "provider": token_usage.provider or ai_config['provider']
+                    },
+                    "time_to_first_token_ms": first_token_ms,
+                    "processing_time_ms": processing_time_ms
+                })
+        
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            yield sse_event("error", {"detail": f"Failed to answer question: {str(e)}"})
+        finally:
+            rate_limiter.release_slot()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/assess-project")
-async def assess_project(request: Dict[str, Any]):
-    """Assess a project and generate insights."""
+async def assess_project(
+    request: Dict[str, Any],
+    validator_service: ValidatorService = Depends(get_validator_service),
+    assessment_service: ProjectAssessmentService = Depends(get_assessment_service),
+    assessment_queue: AssessmentJobQueue = Depends(get_assessment_queue),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    organization_id: Optional[str] = Depends(get_organization_id)
+):
+    """Assess a project and generate insights.
+    
+    The assessment is queued and a job is returned at once (202); poll
+    GET /assess-project/jobs/{job_id}/result for the insights. While a job
+    for the project is queued or running, the same job is returned. Send
+    "wait": true to assess within the request instead.
+    """
     
     import time
-    import uuid
     
     start_time = time.time()
     
@@ -298,52 +685,37 @@ async def assess_project(request: Dict[str, Any]):
         if not project_id:
             raise HTTPException(status_code=400, detail="project_id is required")
         
-        # Get AI configuration for the project
-        ai_config = await validator_service.get_ai_config(project_id)
-        
-        # Import the assessment service
-        from services.assessment_service import ProjectAssessmentService
-        assessment_service = ProjectAssessmentService()
-        
-        # Generate insights
-        insights = await assessment_service.assess_project(project_id, ai_config)
+        if not request.get('wait') and not request.get('dry_run'):
+            job, created = await assessment_queue.submit(
+                project_id, organization_id, {"user_id": user_id},
+                admit=lambda: rate_limiter.admit(project_id, organization_id)
+            )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "success": True,
+                    **job_status(job),
+                    "deduplicated": not created,
+                    "status_url": f"/assess-project/jobs/{job['job_id']}",
+                    "result_url": f"/assess-project/jobs/{job['job_id']}/result"
+                }
+            )
         
-        # Save insights to database
-        saved_insights = []
-        for insight in insights:
-            insight_data = {
-                "project_id": project_id,
-                "activity_type": "insight",
-                "proposal_type": None,
-                "component_type": insight.component_type,
-                "component_id": insight.component_id,
-                "changes": insight.changes,
-                "rationale": insight.rationale,
-                "confidence": insight.confidence,
-                "evidence": insight.evidence,
-                "estimated_impact": insight.estimated_impact,
-                "status": "pending",
-                "expires_at": None
-            }
+        async with rate_limiter.admission(project_id, organization_id):
+            # Get AI configuration for the project
+            ai_config = await validator_service.get_ai_config(project_id)
             
-            if validator_service.db_service.supabase:
-                saved_insight = await validator_service.db_service.create_proposal(insight_data)
-                if saved_insight:
-                    saved_insights.append(saved_insight)
-            else:
-                # Mock response for testing
-                saved_insight = {
-                    "id": str(uuid.uuid4()),
-                    "project_id": project_id,
-                    "activity_type": "insight",
-                    "rationale": insight.rationale,
-                    "confidence": insight.confidence,
-                    "evidence": insight.evidence,
-                    "estimated_impact": insight.estimated_impact,
-                    "status": "pending",
-                    "created_at": datetime.utcnow().isoformat()
+            if request.get('dry_run'):
+                estimate = await assessment_service.estimate_assessment(project_id, ai_config)
+                return {
+                    "success": True,
+                    "insights": [],
+                    "usage_stats": assessment_service.cost_estimator.to_usage_stats(estimate),
+                    "processing_time_ms": int((time.time() - start_time) * 1000)
                 }
-                saved_insights.append(saved_insight)
+            
+            # Generate and save insights
+            saved_insights = await assessment_service.run_assessment(project_id, ai_config)
         
         # Calculate processing time
         processing_time_ms = int((time.time() - start_time) * 1000)
@@ -358,6 +730,10 @@ async def assess_project(request: Dict[str, Any]):
             "processing_time_ms": processing_time_ms
         }
         
+    except RateLimitExceeded as e:
+        raise rate_limit_error(e)
+    except BudgetExceeded as e:
+        raise budget_error(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -367,6 +743,88 @@ async def assess_project(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=f"Failed to assess project: {str(e)}")
 
 
+@app.get("/assess-project/jobs/{job_id}")
+async def get_assessment_job(
+    job_id: str,
+    assessment_queue: AssessmentJobQueue = Depends(get_assessment_queue)
+):
+    """Get the status of a queued assessment."""
+    
+    job = await assessment_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Assessment job not found")
+    
+    return job_status(job)
+
+
+@app.get("/assess-project/jobs/{job_id}/result")
+async def get_assessment_job_result(
+    job_id: str,
+    assessment_queue: AssessmentJobQueue = Depends(get_assessment_queue)
+):
+    """Get the result of a queued assessment.
+    
+    Returns 202 with the job status while it is queued or running, the
+    assessment response once it succeeded, and the job's error status once
+    it failed.
+    """
+    
+    job = await assessment_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Assessment job not found")
+    
+    if job["status"] == "succeeded":
+        return job["result"]
+    if job["status"] == "failed":
+        error = job["error"] or {}
+        raise HTTPException(status_code=error.get("status_code", 500), detail=error.get("detail"))
+    
+    return JSONResponse(status_code=202, content=job_status(job))
+
+
+@app.post("/assess-portfolio", status_code=202)
+async def assess_portfolio(
+    request: Dict[str, Any],
+    portfolio_service: PortfolioAssessmentService = Depends(get_portfolio_service),
+    organization_id: Optional[str] = Depends(get_organization_id)
+):
+    """Start assessing many projects in the background.
+    
+    Takes a list of project_ids, or an organization_id to assess all of its
+    projects. Poll GET /assess-portfolio/{run_id} for progress.
+    """
+    
+    project_ids = request.get('project_ids')
+    organization_id = request.get('organization_id') or organization_id
+    
+    if project_ids is not None and not isinstance(project_ids, list):
+        raise HTTPException(status_code=400, detail="project_ids must be a list")
+    if not project_ids and not request.get('organization_id'):
+        raise HTTPException(status_code=400, detail="project_ids or organization_id is required")
+    
+    try:
+        run = await portfolio_service.start_run(project_ids, organization_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return run.to_dict()
+
+
+@app.get("/assess-portfolio/{run_id}")
+async def get_portfolio_assessment(
+    run_id: str,
+    include_results: bool = True,
+    portfolio_service: PortfolioAssessmentService = Depends(get_portfolio_service)
+):
+    """Get the progress of a portfolio assessment run and its per-project results."""
+    
+    run = portfolio_service.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Portfolio run not found")
+    
+    return run.to_dict(include_results=include_results)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
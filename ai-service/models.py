@@ -4,7 +4,7 @@ Pydantic models for request/response validation.
 
 from typing import List, Optional, Dict, Any, Literal, Union
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 
 
 # Enums for type safety
@@ -72,6 +72,7 @@ class AIValidationRequest(BaseModel):
     ai_provider: AIProvider = Field(description="AI provider to use")
     ai_model: AIModel = Field(description="AI model to use")
     context_data: Optional[Dict[str, Any]] = Field(default=None, description="Additional context data")
+    dry_run: bool = Field(default=False, description="Only estimate tokens and cost; do not call the AI provider")
 
 
 class ProposalActionRequest(BaseModel):
@@ -156,6 +157,22 @@ class HealthResponse(BaseModel):
     timestamp: datetime = Field(description="Response timestamp")
     version: str = Field(description="Service version")
     ai_providers: Dict[str, bool] = Field(description="AI provider availability")
+    database: Optional[bool] = Field(default=None, description="Database availability (None if not configured)")
+    checked_at: Optional[datetime] = Field(default=None, description="Time of the background probe the results come from")
+
+
+class CostEstimate(BaseModel):
+    """Pre-flight token and cost estimate for an AI request."""
+    provider: str = Field(description="AI provider the request would go to")
+    model: str = Field(description="AI model the request would go to")
+    prompt_tokens: int = Field(description="Counted prompt tokens")
+    expected_completion_tokens: int = Field(description="Completion tokens assumed for the expected cost")
+    max_completion_tokens: int = Field(description="Completion token limit of the request")
+    expected_cost: float = Field(description="Expected cost in USD")
+    max_cost: float = Field(description="Cost in USD if the completion uses its full token limit")
+    budget: Optional[float] = Field(default=None, description="Per-request budget in USD, if enforced")
+    within_budget: bool = Field(default=True, description="Whether the expected cost fits the budget")
+    downgraded_from: Optional[str] = Field(default=None, description="Requested model, if a cheaper model was chosen to fit the budget")
 
 
 # Internal Models
@@ -165,6 +182,17 @@ class TokenUsage(BaseModel):
     completion_tokens: int = Field(description="Completion tokens used")
     total_tokens: int = Field(description="Total tokens used")
     estimated_cost: float = Field(description="Estimated cost in USD")
+    cache_hit: bool = Field(default=False, description="Whether the response was served from the LLM response cache")
+    provider: Optional[str] = Field(default=None, description="Fallback provider that served the request, if not the requested one")
+    model: Optional[str] = Field(default=None, description="Fallback model that served the request, if not the requested one")
+
+
+class ModelPrice(BaseModel):
+    """Price of a model from a given date, in USD per 1k tokens."""
+    effective_from: date = Field(description="Date the price took effect")
+    input: float = Field(description="Cost per 1k prompt tokens")
+    output: float = Field(description="Cost per 1k completion tokens")
+    cached_input: Optional[float] = Field(default=None, description="Cost per 1k prompt tokens served from the provider's prompt cache (defaults to input)")
 
 
 class AIProviderConfig(BaseModel):
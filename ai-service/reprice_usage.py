@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Recompute the estimated cost of logged AI usage from the pricing file.
+
+The usage rollups of the repriced days are rebuilt afterwards, unless
+--skip-rollups is given or rollups are disabled.
+
+Usage:
+    python reprice_usage.py [--since 2024-10-01] [--until 2024-11-01] [--dry-run] [--skip-rollups]
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.database_service import DatabaseService
+from services.pricing import get_pricing_registry, reprice_usage_logs
+from services.usage_rollups import RollupRebuildFailed
+
+
+async def run(args) -> int:
+    db_service = DatabaseService()
+    if not db_service.supabase:
+        print("Database not available. Set SUPABASE_URL and SUPABASE_SERVICE_KEY.")
+        return 1
+
+    try:
+        stats = await reprice_usage_logs(
+            db_service,
+            get_pricing_registry(),
+            start_date=datetime.fromisoformat(args.since) if args.since else None,
+            end_date=datetime.fromisoformat(args.until) if args.until else None,
+            page_size=args.page_size,
+            dry_run=args.dry_run,
+            rebuild_rollups=False if args.skip_rollups else None
+        )
+    except RollupRebuildFailed as e:
+        print(f"Usage costs were updated, but {e}")
+        print(f"Rebuild them with: python backfill_usage_rollups.py --since {e.start_date.date()} --until {(e.end_date - timedelta(days=1)).date()}")
+        return 1
+    finally:
+        await db_service.close()
+
+    print(f"Scanned {stats['scanned']} usage logs{' (dry run)' if args.dry_run else ''}")
+    print(f"  Updated:   {stats['updated']}")
+    print(f"  Unchanged: {stats['unchanged']}")
+    print(f"  Skipped:   {stats['skipped']} (no token split or unpriced model)")
+    print(f"  Failed:    {stats['failed']}")
+    print(f"Total cost: ${stats['cost_before']:.4f} -> ${stats['cost_after']:.4f}")
+    if stats["rollups"]:
+        rollups = stats["rollups"]
+        print(f"Rebuilt {rollups['buckets']} usage rollups from {rollups['start_date']} to {rollups['end_date']}")
+    return 1 if stats["failed"] else 0
+
+
+def main():
+    """Reprice usage logs."""
+
+    parser = argparse.ArgumentParser(description="Reprice AI usage logs from the pricing file")
+    parser.add_argument("--since", help="Only logs at or after this ISO date/time")
+    parser.add_argument("--until", help="Only logs at or before this ISO date/time")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows read per page")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    parser.add_argument("--skip-rollups", action="store_true", help="Do not rebuild the usage rollups of repriced days")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
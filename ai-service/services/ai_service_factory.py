@@ -2,7 +2,7 @@
 Factory for creating AI service instances.
 """
 
-from typing import Optional
+from typing import Optional, Any
 from models import AIProviderConfig, AIProvider, AIModel
 from .base_ai_service import BaseAIService
 from .openai_service import OpenAIService
@@ -19,7 +19,8 @@ class AIServiceFactory:
         api_key: str,
         max_tokens: int = 4000,
         temperature: float = 0.1,
-        timeout: int = 30
+        timeout: int = 30,
+        client: Optional[Any] = None
     ) -> BaseAIService:
         """Create an AI service instance."""
         
@@ -33,9 +34,9 @@ class AIServiceFactory:
         )
         
         if provider == AIProvider.OPENAI:
-            return OpenAIService(config)
+            return OpenAIService(config, client=client)
         elif provider == AIProvider.ANTHROPIC:
-            return AnthropicService(config)
+            return AnthropicService(config, client=client)
         else:
             raise ValueError(f"Unsupported AI provider: {provider}")
     
@@ -0,0 +1,153 @@
+"""
+Incremental parsing of streamed Q&A responses.
+
+The Q&A prompt asks the model for ``{"answer": "...", "evidence": [...]}``.
+When the response is streamed, ``AnswerStreamParser`` decodes the ``answer``
+string as its characters arrive so the text can be forwarded immediately;
+``evidence`` is read from the complete response once the stream ends.
+Responses that are not JSON are forwarded as plain text.
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def _hex4(text: str) -> Optional[int]:
+    """Value of a 4-digit hex escape, or None if the digits are malformed."""
+    if len(text) != 4 or not HEX_DIGITS.issuperset(text):
+        return None
+    return int(text, 16)
+
+
+class AnswerStreamParser:
+    """Extract the answer text from a streamed JSON response as it arrives."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.answer = ""
+        self.position = 0
+        self.mode: Optional[str] = None  # None until the response shape is known, then "json" or "text"
+        self.state = "seek"  # seek -> string -> done
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of the response and return any newly decoded answer text."""
+
+        self.buffer += chunk
+
+        if self.mode is None:
+            stripped = self.buffer.lstrip()
+            if not stripped:
+                return ""
+            if stripped.startswith("```"):
+                # Fenced JSON: wait for the fence line, then parse what follows
+                newline = stripped.find("\n")
+                if newline == -1:
+                    return ""
+                stripped = stripped[newline + 1:].lstrip()
+                if not stripped:
+                    return ""
+            self.mode = "json" if stripped.startswith("{") else "text"
+
+        if self.mode == "text":
+            delta = self.buffer[self.position:]
+            self.position = len(self.buffer)
+            self.answer += delta
+            return delta
+
+        if self.state == "seek":
+            key = self.buffer.find('"answer"', self.position)
+            if key == -1:
+                return ""
+            colon = self.buffer.find(":", key + len('"answer"'))
+            if colon == -1:
+                return ""
+            quote = self.buffer.find('"', colon + 1)
+            if quote == -1:
+                return ""
+            self.position = quote + 1
+            self.state = "string"
+
+        if self.state == "string":
+            return self._decode_string()
+
+        return ""
+
+    def finish(self) -> Tuple[str, List[str]]:
+        """Parse the complete response.
+
+        Returns:
+            tuple: (answer_text, evidence_list)
+        """
+
+        content = self.buffer.strip()
+        if content.startswith("```"):
+            content = content.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+
+        try:
+            parsed = json.loads(content)
+            return parsed.get("answer", self.buffer), parsed.get("evidence", [])
+        except (json.JSONDecodeError, AttributeError):
+            # If not valid JSON, use the whole response as answer
+            return self.answer if self.mode == "json" and self.answer else self.buffer, []
+
+    def _decode_string(self) -> str:
+        """Decode answer characters up to the end of the buffer or the closing quote."""
+
+        delta = []
+        buffer = self.buffer
+
+        while self.position < len(buffer):
+            char = buffer[self.position]
+
+            if char == '"':
+                self.position += 1
+                self.state = "done"
+                break
+
+            if char == "\\":
+                if self.position + 1 >= len(buffer):
+                    break  # escape split across chunks
+                escape = buffer[self.position + 1]
+                if escape == "u":
+                    if self.position + 6 > len(buffer):
+                        break
+                    code = _hex4(buffer[self.position + 2:self.position + 6])
+                    if code is None:
+                        # Malformed escape from the model: pass it through as text
+                        delta.append(buffer[self.position:self.position + 2])
+                        self.position += 2
+                        continue
+                    if 0xD800 <= code < 0xDC00:
+                        # High surrogate: needs the following \uXXXX low surrogate
+                        follows = buffer[self.position + 6:self.position + 8]
+                        if len(follows) < 2 or (follows == "\\u" and self.position + 12 > len(buffer)):
+                            break
+                        low = _hex4(buffer[self.position + 8:self.position + 12]) if follows == "\\u" else None
+                        if low is None or not 0xDC00 <= low < 0xE000:
+                            # Unpaired surrogate: pass its escape through as text
+                            delta.append(buffer[self.position:self.position + 6])
+                            self.position += 6
+                            continue
+                        delta.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                        self.position += 12
+                    elif 0xDC00 <= code < 0xE000:
+                        delta.append(buffer[self.position:self.position + 6])
+                        self.position += 6
+                    else:
+                        delta.append(chr(code))
+                        self.position += 6
+                    continue
+                delta.append(ESCAPES.get(escape, escape))
+                self.position += 2
+                continue
+
+            delta.append(char)
+            self.position += 1
+
+        text = "".join(delta)
+        self.answer += text
+        return text
@@ -5,21 +5,29 @@ Handles API calls, token counting, and cost calculation.
 
 import asyncio
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 import anthropic
+import httpx
 from anthropic import AsyncAnthropic
 
 from config import get_settings
 from models import TokenUsage, AIProviderConfig, ValidationContext, AIProposal, ValidationIssue
+from .answer_stream import AnswerStreamParser
 from .base_ai_service import BaseAIService
+from .task_index import format_relevant_tasks
+
+
+def _cached_tokens(usage: Any) -> int:
+    """Prompt tokens read from Anthropic's prompt cache, which ``input_tokens`` does not include."""
+    return getattr(usage, "cache_read_input_tokens", None) or 0
 
 
 class AnthropicService(BaseAIService):
     """Anthropic service implementation."""
     
-    def __init__(self, config: AIProviderConfig):
+    def __init__(self, config: AIProviderConfig, client: Optional[AsyncAnthropic] = None):
         super().__init__(config)
-        self.client = AsyncAnthropic(api_key=config.api_key)
+        self.client = client or AsyncAnthropic(api_key=config.api_key)
         self.settings = get_settings()
     
     async def validate_component(
@@ -51,11 +59,12 @@ class AnthropicService(BaseAIService):
             issues, proposals = self._parse_validation_response(content, context)
             
             # Calculate token usage and cost
-            prompt_tokens = response.usage.input_tokens
+            cached_tokens = _cached_tokens(response.usage)
+            prompt_tokens = response.usage.input_tokens + cached_tokens
             completion_tokens = response.usage.output_tokens
             total_tokens = prompt_tokens + completion_tokens
             
-            cost = self._calculate_cost(prompt_tokens, completion_tokens)
+            cost = self._calculate_cost(prompt_tokens, completion_tokens, cached_tokens)
             
             token_usage = TokenUsage(
                 prompt_tokens=prompt_tokens,
@@ -287,21 +296,6 @@ RIGHT - Do this instead:
             
             return issues, proposals
     
-    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
-        """Calculate the cost based on token usage."""
-        
-        # Get cost per 1k tokens based on model
-        if "haiku" in self.config.model.lower():
-            cost_per_1k = self.settings.anthropic_claude_3_haiku_cost_per_1k_tokens
-        elif "sonnet" in self.config.model.lower():
-            cost_per_1k = self.settings.anthropic_claude_3_sonnet_cost_per_1k_tokens
-        else:
-            # Default to Haiku pricing
-            cost_per_1k = self.settings.anthropic_claude_3_haiku_cost_per_1k_tokens
-        
-        total_tokens = prompt_tokens + completion_tokens
-        return (total_tokens / 1000) * cost_per_1k
-    
     def _format_component_data(self, data: Dict[str, Any]) -> str:
         """Format component data for the prompt."""
         formatted = []
@@ -324,6 +318,24 @@ RIGHT - Do this instead:
             print(f"Anthropic connection test failed: {e}")
             return False
     
+    async def check_reachability(self) -> bool:
+        """Check the Anthropic API is reachable by listing models (no tokens spent).
+
+        The pinned SDK has no models resource, so the request is sent as a raw
+        GET through the client, which carries the API key and shares the
+        registry's connection pool.
+        """
+        try:
+            await self.client.get(
+                "/v1/models",
+                cast_to=httpx.Response,
+                options={"timeout": 10, "max_retries": 0, "params": {"limit": 1}}
+            )
+            return True
+        except Exception as e:
+            print(f"Anthropic reachability check failed: {e}")
+            return False
+    
     async def answer_question(
         self,
         question: str,
@@ -339,30 +351,7 @@ RIGHT - Do this instead:
         start_time = time.time()
         
         try:
-            # Build context-aware prompt
-            context_info = ""
-            if context_data:
-                if 'project_name' in context_data:
-                    context_info += f"\nProject: {context_data['project_name']}"
-                if 'project_description' in context_data:
-                    context_info += f"\nDescription: {context_data['project_description']}"
-                if 'task_count' in context_data:
-                    context_info += f"\nTasks: {context_data['task_count']}"
-            
-            prompt = f"""
-User Question: {question}
-
-Project Context:{context_info}
-Project ID: {project_id}
-
-Please provide a helpful, concise answer to the user's question. If you reference specific information, list your sources as evidence.
-
-Return your response in this JSON format:
-{{
-  "answer": "your detailed answer here",
-  "evidence": ["source 1", "source 2"]
-}}
-"""
+            prompt = self._build_answer_prompt(question, project_id, context_data)
             
             # Make the API call
             response = await self.client.messages.create(
@@ -370,7 +359,7 @@ Return your response in this JSON format:
                 max_tokens=self.config.max_tokens,
                 temperature=0.7,  # Slightly higher for natural conversation
                 timeout=self.config.timeout,
-                system="You are a helpful project management assistant. Provide clear, actionable answers to user questions about their projects.",
+                system=self._get_answer_system_prompt(),
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
@@ -390,11 +379,12 @@ Return your response in this JSON format:
                 evidence = []
             
             # Calculate token usage and cost
-            prompt_tokens = response.usage.input_tokens
+            cached_tokens = _cached_tokens(response.usage)
+            prompt_tokens = response.usage.input_tokens + cached_tokens
             completion_tokens = response.usage.output_tokens
             total_tokens = prompt_tokens + completion_tokens
             
-            cost = self._calculate_cost(prompt_tokens, completion_tokens)
+            cost = self._calculate_cost(prompt_tokens, completion_tokens, cached_tokens)
             
             token_usage = TokenUsage(
                 prompt_tokens=prompt_tokens,
@@ -414,6 +404,105 @@ Return your response in this JSON format:
                 estimated_cost=0.0
             )
     
+    def _build_answer_prompt(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the Q&A prompt with project context."""
+        
+        # Build context-aware prompt
+        context_info = ""
+        if context_data:
+            if 'project_name' in context_data:
+                context_info += f"\nProject: {context_data['project_name']}"
+            if 'project_description' in context_data:
+                context_info += f"\nDescription: {context_data['project_description']}"
+            if 'task_count' in context_data:
+                context_info += f"\nTasks: {context_data['task_count']}"
+            if 'relevant_tasks' in context_data:
+                context_info += format_relevant_tasks(context_data['relevant_tasks'])
+        
+        prompt = f"""
+User Question: {question}
+
+Project Context:{context_info}
+Project ID: {project_id}
+
+Please provide a helpful, concise answer to the user's question. If you reference specific information, list your sources as evidence.
+
+Return your response in this JSON format:
+{{
+  "answer": "your detailed answer here",
+  "evidence": ["source 1", "source 2"]
+}}
+"""
+        
+        return prompt
+    
+    def _get_answer_system_prompt(self) -> str:
+        """Get the system prompt for Q&A."""
+        return "You are a helpful project management assistant. Provide clear, actionable answers to user questions about their projects."
+    
+    async def answer_question_stream(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a user question, yielding answer text as tokens arrive."""
+        
+        prompt = self._build_answer_prompt(question, project_id, context_data)
+        parser = AnswerStreamParser()
+        prompt_tokens = 0
+        completion_tokens = 0
+        
+        try:
+            stream = await self.client.messages.create(
+                model=self.config.model,
+                max_tokens=self.config.max_tokens,
+                temperature=0.7,  # Slightly higher for natural conversation
+                timeout=self.config.timeout,
+                system=self._get_answer_system_prompt(),
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            
+            async for event in stream:
+                if event.type == "message_start":
+                    prompt_tokens = event.message.usage.input_tokens
+                elif event.type == "content_block_delta":
+                    text = parser.feed(getattr(event.delta, "text", "") or "")
+                    if text:
+                        yield {"type": "answer", "text": text}
+                elif event.type == "message_delta":
+                    completion_tokens = event.usage.output_tokens
+        except Exception as e:
+            print(f"Anthropic Q&A stream error: {e}")
+            error_text = f"I'm sorry, I encountered an error while processing your question: {str(e)}"
+            yield {"type": "answer", "text": error_text, "error": True}
+            yield {"type": "complete", "answer": error_text, "evidence": [], "token_usage": TokenUsage(
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                estimated_cost=0.0
+            )}
+            return
+        
+        answer, evidence = parser.finish()
+        
+        token_usage = TokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            estimated_cost=self._calculate_cost(prompt_tokens, completion_tokens)
+        )
+        
+        yield {"type": "complete", "answer": answer, "evidence": evidence, "token_usage": token_usage}
+    
     async def generate_insights(
         self,
         prompt: str,
@@ -443,11 +532,12 @@ Return your response in this JSON format:
             content = response.content[0].text
             
             # Calculate token usage and cost
-            prompt_tokens = response.usage.input_tokens
+            cached_tokens = _cached_tokens(response.usage)
+            prompt_tokens = response.usage.input_tokens + cached_tokens
             completion_tokens = response.usage.output_tokens
             total_tokens = prompt_tokens + completion_tokens
             
-            cost = self._calculate_cost(prompt_tokens, completion_tokens)
+            cost = self._calculate_cost(prompt_tokens, completion_tokens, cached_tokens)
             
             token_usage = TokenUsage(
                 prompt_tokens=prompt_tokens,
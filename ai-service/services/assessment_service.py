@@ -11,28 +11,173 @@ This service analyzes project data to generate insights about:
 
 import json
 import time
+import uuid
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from models import AIProposal, ActivityType, ProposalType, ConfidenceLevel
+from models import AIProposal, ActivityType, ProposalType, ConfidenceLevel, CostEstimate
+from .cost_estimator import CostEstimator, BudgetExceeded
 from .database_service import DatabaseService
-from .ai_service_factory import AIServiceFactory
+from .dependency_graph import analyze_dependencies, format_dependency_analysis
+from .prompt_packer import PromptPacker
+from .task_stats import format_task_stats
+from .provider_registry import ProviderClientRegistry, get_provider_registry
+from .single_flight import SingleFlight, request_key
+from .usage_log_writer import UsageLogWriter
 from config import get_settings
 
 
 class ProjectAssessmentService:
     """Service for generating project assessment insights."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        db_service: Optional[DatabaseService] = None,
+        provider_registry: Optional[ProviderClientRegistry] = None,
+        usage_writer: Optional[UsageLogWriter] = None
+    ):
         self.settings = get_settings()
-        self.db_service = DatabaseService()
-        self.ai_services = {}
+        self.db_service = db_service or DatabaseService()
+        self.provider_registry = provider_registry or get_provider_registry()
+        self.usage_writer = usage_writer or UsageLogWriter(self.db_service)
+        self.single_flight = SingleFlight(self.settings.request_coalescing_enabled)
+        self.cost_estimator = CostEstimator(self.settings)
     
-    async def assess_project(self, project_id: str, ai_config: Dict[str, Any]) -> List[AIProposal]:
-        """Assess a project and generate insights."""
+    async def run_assessment(self, project_id: str, ai_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Assess a project and save the insights.
+        
+        Concurrent identical requests (e.g. retries) share one assessment
+        and receive the same saved insights.
+        """
+        
+        key = request_key("assess_project", project_id, ai_config)
+        return await self.single_flight.run(key, lambda: self._run_assessment(project_id, ai_config))
+    
+    async def _run_assessment(self, project_id: str, ai_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Assess a project and save the insights."""
+        insights = await self.assess_project(project_id, ai_config)
+        return await self.save_insights(project_id, insights)
+    
+    async def save_insights(self, project_id: str, insights: List[AIProposal]) -> List[Dict[str, Any]]:
+        """Save insights as proposals and return the saved rows."""
+        saved = await self.save_insights_batch({project_id: insights})
+        return saved[project_id]
+    
+    async def save_insights_batch(self, insights_by_project: Dict[str, List[AIProposal]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Save the insights of several projects with one insert.
+        
+        Returns:
+            dict: The saved rows per project id
+        """
+        
+        if self.db_service.supabase:
+            owners = []
+            insight_rows = []
+            for project_id, insights in insights_by_project.items():
+                for insight in insights:
+                    owners.append(project_id)
+                    insight_rows.append({
+                        "project_id": project_id,
+                        "activity_type": "insight",
+                        "proposal_type": None,
+                        "component_type": insight.component_type,
+                        "component_id": insight.component_id,
+                        "changes": insight.changes,
+                        "rationale": insight.rationale,
+                        "confidence": insight.confidence,
+                        "evidence": insight.evidence,
+                        "estimated_impact": insight.estimated_impact,
+                        "status": "pending",
+                        "expires_at": None
+                    })
+            
+            saved: Dict[str, List[Dict[str, Any]]] = {project_id: [] for project_id in insights_by_project}
+            saved_rows = await self.db_service.create_proposals(insight_rows) if insight_rows else []
+            for project_id, saved_insight in zip(owners, saved_rows):
+                if saved_insight:
+                    saved[project_id].append(saved_insight)
+            return saved
+        
+        # Mock response for testing
+        return {
+            project_id: [
+                {
+                    "id": str(uuid.uuid4()),
+                    "project_id": project_id,
+                    "activity_type": "insight",
+                    "rationale": insight.rationale,
+                    "confidence": insight.confidence,
+                    "evidence": insight.evidence,
+                    "estimated_impact": insight.estimated_impact,
+                    "status": "pending",
+                    "created_at": datetime.utcnow().isoformat()
+                }
+                for insight in insights
+            ]
+            for project_id, insights in insights_by_project.items()
+        }
+    
+    async def assess_project(
+        self,
+        project_id: str,
+        ai_config: Dict[str, Any],
+        preloaded: Optional[Dict[str, Any]] = None
+    ) -> List[AIProposal]:
+        """Assess a project and generate insights.
+        
+        Args:
+            preloaded: Project context and AI configuration already fetched in
+                bulk ({"context": ..., "configuration": ...}), e.g. by a portfolio run
+        
+        Raises:
+            BudgetExceeded: If the assessment's estimated cost is over the project's budget
+        """
+        
+        context_data, assessment_prompt, estimate = await self._prepare_assessment(project_id, ai_config, preloaded)
+        if not estimate.within_budget:
+            raise BudgetExceeded(estimate)
+        ai_config = {**ai_config, 'model': estimate.model}
+        
+        # Get AI service
+        ai_service = self._get_ai_service(ai_config)
+        
+        # Call AI service
+        insights_data, token_usage = await ai_service.generate_insights(
+            prompt=assessment_prompt,
+            project_id=project_id,
+            context_data=context_data
+        )
+        
+        # Parse insights
+        insights = self._parse_insights(insights_data)
+        
+        # Log usage
+        await self._log_usage(project_id, ai_config, token_usage)
+        
+        return insights
+    
+    async def estimate_assessment(self, project_id: str, ai_config: Dict[str, Any]) -> CostEstimate:
+        """Estimate an assessment's tokens and cost without calling the AI provider."""
+        _, _, estimate = await self._prepare_assessment(project_id, ai_config)
+        return estimate
+    
+    async def _prepare_assessment(
+        self,
+        project_id: str,
+        ai_config: Dict[str, Any],
+        preloaded: Optional[Dict[str, Any]] = None
+    ) -> tuple:
+        """Build the assessment context and prompt and estimate its cost.
+        
+        Returns:
+            tuple: (context_data, assessment_prompt, cost_estimate)
+        """
         
         # Get project context
-        project_context = await self.db_service.get_project_context(project_id)
+        if preloaded is not None:
+            project_context = preloaded["context"]
+        else:
+            project_context = await self.db_service.get_project_context(project_id)
         
         # If database is not available, create mock context for testing
         if not project_context.get("project"):
@@ -51,81 +196,64 @@ class ProjectAssessmentService:
                 'priority_breakdown': project_context['stats']['priority_breakdown'],
                 'total_estimated_hours': project_context['stats']['total_estimated_hours'],
                 'total_dependencies': project_context['stats']['total_dependencies'],
+                'task_stats': project_context['stats'],
                 'tasks': project_context['tasks'],
                 'dependencies': project_context['dependencies']
             }
+        context_data['dependency_analysis'] = analyze_dependencies(context_data['tasks'], context_data['dependencies'])
         
-        # Get AI service
-        ai_service = self._get_ai_service(ai_config)
-        
-        # Get custom prompts if available
-        custom_prompts = await self._get_custom_prompts(project_id)
+        # Get custom prompts if available, from the configuration the caller already fetched
+        if preloaded is not None:
+            config = preloaded.get("configuration")
+        elif 'configuration' in ai_config:
+            config = ai_config['configuration']
+        else:
+            config = await self._get_configuration(project_id)
+        custom_prompts = self._custom_prompts_from(config)
         
         # Build assessment prompt
-        assessment_prompt = self._build_assessment_prompt(context_data, custom_prompts)
+        assessment_prompt = self._build_assessment_prompt(context_data, custom_prompts, ai_config['model'])
         
-        # Call AI service
-        insights_data, token_usage = await ai_service.generate_insights(
-            prompt=assessment_prompt,
-            project_id=project_id,
-            context_data=context_data
-        )
+        estimate = self.cost_estimator.plan(ai_config['provider'], ai_config['model'], [assessment_prompt], config=config)
         
-        # Parse insights
-        insights = self._parse_insights(insights_data)
-        
-        # Log usage
-        await self._log_usage(project_id, ai_config, token_usage)
-        
-        return insights
+        return context_data, assessment_prompt, estimate
     
     def _get_ai_service(self, ai_config: Dict[str, Any]):
-        """Get AI service instance."""
-        provider = ai_config['provider']
-        model = ai_config['model']
-        
-        service_key = f"{provider}_{model}"
-        
-        if service_key not in self.ai_services:
-            # Get API key from settings
-            if provider == 'openai':
-                api_key = self.settings.openai_api_key
-            elif provider == 'anthropic':
-                api_key = self.settings.anthropic_api_key
-            else:
-                raise ValueError(f"Unsupported provider: {provider}")
-            
-            if not api_key:
-                raise ValueError(f"API key not configured for provider: {provider}")
-            
-            # Create service
-            self.ai_services[service_key] = AIServiceFactory.create_service(
-                provider=provider,
-                model=model,
-                api_key=api_key,
-                max_tokens=self.settings.max_tokens_per_request,
-                timeout=self.settings.request_timeout
-            )
-        
-        return self.ai_services[service_key]
+        """Get the AI service for the given config, with failover routing."""
+        return self.provider_registry.get_routed_service(ai_config['provider'], ai_config['model'])
     
-    async def _get_custom_prompts(self, project_id: str) -> Dict[str, Any]:
-        """Get custom prompts from AI configuration."""
+    async def _get_configuration(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Get a project's AI configuration."""
         try:
-            config = await self.db_service.get_ai_configuration(project_id)
-            if config:
-                return {
-                    'system_prompt': config.get('assessment_prompt_system'),
-                    'categories': config.get('assessment_prompt_categories'),
-                    'output_format': config.get('assessment_prompt_output_format')
-                }
+            return await self.db_service.get_ai_configuration(project_id)
         except Exception as e:
-            print(f"Error getting custom prompts: {e}")
+            print(f"Error getting AI configuration: {e}")
         
+        return None
+    
+    def _custom_prompts_from(self, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Extract the custom assessment prompts of an AI configuration."""
+        if config:
+            return {
+                'system_prompt': config.get('assessment_prompt_system'),
+                'categories': config.get('assessment_prompt_categories'),
+                'output_format': config.get('assessment_prompt_output_format')
+            }
         return {}
     
-    def _build_assessment_prompt(self, context_data: Dict[str, Any], custom_prompts: Dict[str, Any]) -> str:
-        """Build the assessment prompt with context data."""
+    def _build_assessment_prompt(
+        self,
+        context_data: Dict[str, Any],
+        custom_prompts: Dict[str, Any],
+        model: Optional[str] = None
+    ) -> str:
+        """Build the assessment prompt with context data.
+        
+        Tasks and dependencies are packed, most relevant first, into what is
+        left of the input token budget after the rest of the prompt. Cycles,
+        the critical path, bottlenecks and blocked tasks are computed from the
+        full dependency graph, so only a few raw dependency lines are included.
+        """
         
         # Use custom system prompt if available
         system_prompt = custom_prompts.get('system_prompt') or self._get_default_system_prompt()
@@ -136,8 +264,17 @@ class ProjectAssessmentService:
         # Use custom output format if available
         output_format = custom_prompts.get('output_format') or self._get_default_output_format()
         
+        tasks = context_data.get('tasks') or []
+        dependencies = context_data.get('dependencies') or []
+        analysis = context_data.get('dependency_analysis') or analyze_dependencies(tasks, dependencies)
+        analysis_text = format_dependency_analysis(analysis, tasks)
+        stats_text = format_task_stats(context_data.get('task_stats') or {})
+        if stats_text:
+            stats_text = "\n" + stats_text
+        
         # Build the complete prompt
-        prompt = f"""{system_prompt}
+        def render(tasks_text: str, dependencies_text: str) -> str:
+            return f"""{system_prompt}
 
 Project: {context_data['project_name']}
 Status: {context_data['project_status']}
@@ -150,13 +287,16 @@ Task Summary:
 - Status breakdown: {context_data['status_breakdown']}
 - Priority breakdown: {context_data['priority_breakdown']}
 - Estimated hours: {context_data['total_estimated_hours']}
-- Dependencies: {context_data['total_dependencies']}
+- Dependencies: {context_data['total_dependencies']}{stats_text}
 
 Tasks:
-{self._format_tasks(context_data['tasks'])}
+{tasks_text}
+
+Dependency Analysis (computed from the full dependency graph):
+{analysis_text}
 
 Dependencies:
-{self._format_dependencies(context_data['dependencies'])}
+{dependencies_text}
 
 Analysis Categories:
 {categories}
@@ -165,7 +305,15 @@ Analysis Categories:
 
 Focus on the most important 5-15 insights. Prioritize observations that could have significant impact on project success."""
         
-        return prompt
+        packer = PromptPacker(model or self.settings.default_ai_model, self.settings.prompt_description_chars)
+        packed = packer.pack(
+            tasks,
+            dependencies,
+            self.settings.assessment_prompt_token_budget - packer.count(render("", "")),
+            max_dependencies=self.settings.prompt_dependency_lines
+        )
+        
+        return render(packed["tasks_text"], packed["dependencies_text"])
     
     def _get_default_system_prompt(self) -> str:
         """Default system prompt for project assessment."""
@@ -186,14 +334,14 @@ Focus on patterns, risks, and opportunities that might not be immediately obviou
 - Unrealistic time estimates
 - Tasks stuck in progress
 
-**Dependency Concerns:**
+**Dependency Concerns** (use the Dependency Analysis, it is exact for the whole project):
 - Circular dependencies
-- Long dependency chains
+- Long dependency chains and the critical path
 - Bottleneck tasks
 - Missing dependencies
 - Blocked tasks
 
-**Velocity/Progress Patterns:**
+**Velocity/Progress Patterns** (use the computed weekly completions, drift and progress figures):
 - Completion rate trends
 - Tasks taking longer than estimated
 - Status distribution anomalies
@@ -238,34 +386,6 @@ Example:
   "estimated_impact": "At current velocity, the project may miss the deadline by 1-2 weeks"
 }"""
     
-    def _format_tasks(self, tasks: List[Dict]) -> str:
-        """Format tasks for the prompt."""
-        if not tasks:
-            return "No tasks found"
-        
-        formatted = []
-        for task in tasks[:20]:  # Limit to first 20 tasks
-            formatted.append(f"- {task.get('title', 'Untitled')} ({task.get('status', 'unknown')}) - {task.get('description', 'No description')[:100]}")
-        
-        if len(tasks) > 20:
-            formatted.append(f"... and {len(tasks) - 20} more tasks")
-        
-        return "\n".join(formatted)
-    
-    def _format_dependencies(self, dependencies: List[Dict]) -> str:
-        """Format dependencies for the prompt."""
-        if not dependencies:
-            return "No dependencies found"
-        
-        formatted = []
-        for dep in dependencies[:10]:  # Limit to first 10 dependencies
-            formatted.append(f"- Task {dep.get('task_id', 'unknown')} depends on {dep.get('depends_on_task_id', 'unknown')}")
-        
-        if len(dependencies) > 10:
-            formatted.append(f"... and {len(dependencies) - 10} more dependencies")
-        
-        return "\n".join(formatted)
-    
     def _create_mock_context(self) -> Dict[str, Any]:
         """Create mock context for testing when database is not available."""
         return {
@@ -348,8 +468,8 @@ Example:
             usage_data = {
                 "project_id": project_id,
                 "operation_type": "project_assessment",
-                "ai_provider": ai_config['provider'],
-                "ai_model": ai_config['model'],
+                "ai_provider": getattr(token_usage, 'provider', None) or ai_config['provider'],
+                "ai_model": getattr(token_usage, 'model', None) or ai_config['model'],
                 "input_tokens": getattr(token_usage, 'prompt_tokens', 0),
                 "output_tokens": getattr(token_usage, 'completion_tokens', 0),
                 "total_tokens": getattr(token_usage, 'total_tokens', 0),
@@ -359,7 +479,7 @@ Example:
                 "proposal_ids": []
             }
             
-            await self.db_service.log_ai_usage(usage_data)
+            await self.usage_writer.log(usage_data)
         
         except Exception as e:
             print(f"Error logging AI usage: {e}")
@@ -3,8 +3,9 @@ Base AI service class with common functionality.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from models import TokenUsage, AIProviderConfig, ValidationContext, AIProposal, ValidationIssue
+from .pricing import get_pricing_registry, UnknownModelPrice
 
 
 class BaseAIService(ABC):
@@ -36,11 +37,40 @@ class BaseAIService(ABC):
         """
         pass
     
+    async def answer_question_stream(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a user question, yielding the answer as it is generated.
+        
+        Yields ``{"type": "answer", "text": ...}`` events for each piece of
+        answer text, then one ``{"type": "complete", "answer": ...,
+        "evidence": [...], "token_usage": TokenUsage}`` event. An answer
+        event carrying an error message instead of answer text is marked
+        ``"error": True``. Providers without a streaming implementation
+        yield the whole answer at once.
+        """
+        answer, evidence, token_usage = await self.answer_question(question, project_id, context_data)
+        failed = not (token_usage.cache_hit or token_usage.total_tokens > 0)
+        yield {"type": "answer", "text": answer, "error": failed}
+        yield {"type": "complete", "answer": answer, "evidence": evidence, "token_usage": token_usage}
+    
     @abstractmethod
     async def test_connection(self) -> bool:
         """Test the AI service connection."""
         pass
     
+    async def check_reachability(self) -> bool:
+        """Check the provider is reachable, for background health probes.
+        
+        Providers that can be reached without spending tokens (e.g. by
+        looking up the model) override this; the default falls back to
+        test_connection().
+        """
+        return await self.test_connection()
+    
     @abstractmethod
     async def generate_insights(
         self,
@@ -62,3 +92,11 @@ class BaseAIService(ABC):
     def get_model_name(self) -> str:
         """Get the model name."""
         return self.config.model
+    
+    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """Calculate the cost of a call at the model's current prices."""
+        try:
+            return get_pricing_registry().cost(self.config.model, prompt_tokens, completion_tokens, cached_tokens)
+        except UnknownModelPrice:
+            print(f"No price for {self.config.model}; recording zero cost")
+            return 0.0
@@ -0,0 +1,98 @@
+"""
+Service container for the AI service.
+
+Creates the database service, provider registry and the services built on
+them once per process, so connection pools and caches stay warm across
+requests. The FastAPI lifespan starts the container and closes it on
+shutdown; endpoints receive services through dependency injection.
+"""
+
+import asyncio
+from typing import Optional
+
+from config import get_settings, Settings
+from models import AIProvider
+from .ai_service_factory import AIServiceFactory
+from .assessment_service import ProjectAssessmentService
+from .database_service import DatabaseService
+from .health_monitor import HealthMonitor
+from .job_queue import AssessmentJobQueue, assessment_job_handler
+from .portfolio_assessment import PortfolioAssessmentService
+from .pricing import get_pricing_registry
+from .provider_registry import ProviderClientRegistry, get_provider_registry
+from .rate_limiter import RateLimiter
+from .tokenizer import get_encoding
+from .usage_log_writer import UsageLogWriter
+from .validator_service import ValidatorService
+
+
+class ServiceContainer:
+    """Process-wide holder of shared service instances."""
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        db_service: Optional[DatabaseService] = None,
+        provider_registry: Optional[ProviderClientRegistry] = None
+    ):
+        self.settings = settings or get_settings()
+        self.db_service = db_service or DatabaseService()
+        self.provider_registry = provider_registry or get_provider_registry()
+        # Loaded here so a broken pricing file fails at startup rather than on the first call
+        self.pricing = get_pricing_registry(self.settings)
+        self.usage_writer = UsageLogWriter(self.db_service, self.settings)
+        self.rate_limiter = RateLimiter(self.settings)
+        self.health_monitor = HealthMonitor(self.provider_registry, self.db_service, self.settings)
+        self.usage_writer.add_listener(self.rate_limiter.record_usage)
+
+        self.validator_service = ValidatorService(
+            db_service=self.db_service,
+            provider_registry=self.provider_registry,
+            usage_writer=self.usage_writer
+        )
+        self.assessment_service = ProjectAssessmentService(
+            db_service=self.db_service,
+            provider_registry=self.provider_registry,
+            usage_writer=self.usage_writer
+        )
+        self.assessment_queue = AssessmentJobQueue(
+            assessment_job_handler(self.validator_service, self.assessment_service), self.settings
+        )
+        self.portfolio_service = PortfolioAssessmentService(
+            self.assessment_service, self.validator_service, self.rate_limiter, self.settings
+        )
+
+    async def start(self):
+        """Pre-warm provider clients, tokenizers and the database pool, and start the background workers."""
+
+        for provider in AIProvider:
+            try:
+                self.provider_registry.get_api_key(provider)
+            except ValueError:
+                continue
+
+            for model in AIServiceFactory.get_available_models(provider):
+                try:
+                    self.provider_registry.get_service(provider, model)
+                    if provider == AIProvider.OPENAI:
+                        await asyncio.to_thread(get_encoding, model.value)
+                except Exception as e:
+                    print(f"Warm-up failed for {provider.value}/{model.value}: {e}")
+
+        if self.db_service.supabase:
+            await self.db_service.ping()
+
+        await self.usage_writer.start()
+        await self.health_monitor.start()
+        await self.assessment_queue.start()
+
+    async def close(self):
+        """Flush pending usage logs, then close provider clients and the database pool."""
+
+        await self.health_monitor.close()
+        await self.assessment_queue.close()
+        await self.portfolio_service.close()
+        await self.usage_writer.close()
+        await self.rate_limiter.close()
+        await self.provider_registry.close()
+        await self.db_service.close()
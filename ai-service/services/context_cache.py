@@ -0,0 +1,115 @@
+"""
+In-process cache of project contexts.
+
+Entries are keyed by project id and bounded by an LRU size limit and a TTL.
+Each entry carries a version stamp (project updated_at, task count, latest
+task updated_at, dependency count and latest dependency created_at); once an
+entry is older than the probe interval the caller re-checks that stamp with
+cheap queries instead of reloading the full context. Since the probe reads the database, caches in separate workers
+never serve a changed project for longer than the probe interval.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+ContextVersion = Tuple[Any, ...]
+
+
+class CacheEntry:
+    """A cached project context and its version stamp."""
+
+    __slots__ = ("context", "version", "loaded_at", "validated_at")
+
+    def __init__(self, context: Dict[str, Any], version: ContextVersion, now: float):
+        self.context = context
+        self.version = version
+        self.loaded_at = now
+        self.validated_at = now
+
+
+class ProjectContextCache:
+    """LRU + TTL cache of project contexts with hit/miss/eviction counters."""
+
+    def __init__(self, max_projects: int = 256, ttl_seconds: float = 300.0, probe_interval_seconds: float = 5.0):
+        self.max_projects = max_projects
+        self.ttl_seconds = ttl_seconds
+        self.probe_interval_seconds = probe_interval_seconds
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, project_id: str) -> Tuple[Optional[CacheEntry], bool]:
+        """Find a live entry for a project.
+
+        Returns:
+            tuple: (entry or None, whether the entry must be revalidated by a version probe)
+        """
+        entry = self.entries.get(project_id)
+        if entry is None:
+            return None, False
+
+        now = time.monotonic()
+        if now - entry.loaded_at > self.ttl_seconds:
+            del self.entries[project_id]
+            self.expirations += 1
+            return None, False
+
+        self.entries.move_to_end(project_id)
+        return entry, now - entry.validated_at > self.probe_interval_seconds
+
+    def record_hit(self, entry: CacheEntry, revalidated: bool = False):
+        """Count a served entry, marking it as freshly validated if probed."""
+        self.hits += 1
+        if revalidated:
+            self.revalidations += 1
+            entry.validated_at = time.monotonic()
+
+    def record_miss(self, stale: bool = False):
+        """Count a lookup that required a full load."""
+        self.misses += 1
+        if stale:
+            self.stale += 1
+
+    def store(self, project_id: str, context: Dict[str, Any], version: ContextVersion):
+        """Cache a freshly loaded context, evicting the least recently used entries."""
+        self.entries[project_id] = CacheEntry(context, version, time.monotonic())
+        self.entries.move_to_end(project_id)
+
+        while len(self.entries) > self.max_projects:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, project_id: Optional[str] = None) -> int:
+        """Drop one project (or every project when no id is given)."""
+        if project_id is None:
+            removed = len(self.entries)
+            self.entries.clear()
+        else:
+            removed = 1 if self.entries.pop(project_id, None) is not None else 0
+
+        self.invalidations += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_projects": self.max_projects,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "stale": self.stale,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
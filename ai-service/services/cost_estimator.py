@@ -0,0 +1,138 @@
+"""
+Pre-flight token counting and cost estimation.
+
+Prompts are counted with the model's tokenizer (loaded once per process)
+before the provider is called, and priced at the model's current input and
+output rates from the pricing registry. A request whose expected cost is over the project's per-request
+budget is moved to the provider's cheaper model when that fits, and is
+rejected otherwise, so an oversized request never reaches the provider.
+
+Anthropic prompts are counted with the default tiktoken encoding, which is
+an approximation of Claude's tokenizer.
+"""
+
+from typing import List, Dict, Any, Optional, Union
+
+from config import get_settings, Settings
+from models import AIProvider, AIModel, CostEstimate
+from .pricing import get_pricing_registry, PricingRegistry
+from .prompt_packer import count_tokens, load_encoding
+
+
+# Cheaper model of the same provider to fall back to when a request is over budget
+CHEAPER_MODELS: Dict[AIModel, AIModel] = {
+    AIModel.GPT_4O: AIModel.GPT_4O_MINI,
+    AIModel.CLAUDE_3_SONNET: AIModel.CLAUDE_3_HAIKU,
+}
+
+# Tokens added per chat message for the role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class BudgetExceeded(Exception):
+    """Raised when a request's estimated cost is over its budget."""
+
+    def __init__(self, estimate: CostEstimate):
+        super().__init__(
+            f"Estimated cost ${estimate.expected_cost:.4f} exceeds the per-request budget of ${estimate.budget:.4f}"
+        )
+        self.estimate = estimate
+
+
+class CostEstimator:
+    """Counts prompt tokens and prices requests before they are sent."""
+
+    def __init__(self, settings: Optional[Settings] = None, pricing: Optional[PricingRegistry] = None):
+        self.settings = settings or get_settings()
+        self.pricing = pricing or get_pricing_registry(self.settings)
+
+    def count_message_tokens(self, model: Union[AIModel, str], messages: List[str]) -> int:
+        """Count the prompt tokens of a list of chat messages."""
+        encoding = load_encoding(AIModel(model).value)
+        return sum(count_tokens(message, encoding) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+    def price(self, model: Union[AIModel, str], prompt_tokens: int, completion_tokens: int) -> float:
+        """Price a number of input and output tokens."""
+        return self.pricing.cost(AIModel(model), prompt_tokens, completion_tokens)
+
+    def estimate(
+        self,
+        provider: Union[AIProvider, str],
+        model: Union[AIModel, str],
+        messages: List[str],
+        budget: Optional[float] = None
+    ) -> CostEstimate:
+        """Estimate the tokens and cost of a request to one model."""
+        model = AIModel(model)
+        prompt_tokens = self.count_message_tokens(model, messages)
+        max_completion_tokens = self.settings.max_tokens_per_request
+        expected_completion_tokens = min(self.settings.expected_completion_tokens, max_completion_tokens)
+        expected_cost = self.price(model, prompt_tokens, expected_completion_tokens)
+
+        return CostEstimate(
+            provider=AIProvider(provider).value,
+            model=model.value,
+            prompt_tokens=prompt_tokens,
+            expected_completion_tokens=expected_completion_tokens,
+            max_completion_tokens=max_completion_tokens,
+            expected_cost=round(expected_cost, 6),
+            max_cost=round(self.price(model, prompt_tokens, max_completion_tokens), 6),
+            budget=budget,
+            within_budget=budget is None or expected_cost <= budget
+        )
+
+    def plan(
+        self,
+        provider: Union[AIProvider, str],
+        model: Union[AIModel, str],
+        messages: List[str],
+        budget: Optional[float] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> CostEstimate:
+        """Estimate a request and fit it to the budget.
+
+        Without an explicit budget, the budget of the project's AI
+        configuration (as already fetched by the caller) applies.
+
+        Returns the estimate for the requested model if it is within budget,
+        else for the cheaper model of the same provider if that is within
+        budget, else the requested model's estimate marked over budget.
+        """
+        if budget is None:
+            budget = self.budget_from(config)
+        estimate = self.estimate(provider, model, messages, budget)
+        if estimate.within_budget or not self.settings.cost_downgrade_enabled:
+            return estimate
+
+        cheaper = CHEAPER_MODELS.get(AIModel(model))
+        if cheaper is not None:
+            downgraded = self.estimate(provider, cheaper, messages, budget)
+            if downgraded.within_budget:
+                downgraded.downgraded_from = AIModel(model).value
+                return downgraded
+
+        return estimate
+
+    def budget_from(self, config: Optional[Dict[str, Any]]) -> Optional[float]:
+        """Get a project's per-request budget in USD, or None when pre-flight checks are off.
+
+        Projects can override the default with ``max_request_cost_usd`` in
+        their (already fetched) AI configuration.
+        """
+        if not self.settings.cost_preflight_enabled:
+            return None
+
+        if config and config.get("max_request_cost_usd") is not None:
+            return float(config["max_request_cost_usd"])
+
+        return self.settings.max_request_cost_usd
+
+    @staticmethod
+    def to_usage_stats(estimate: CostEstimate) -> Dict[str, Any]:
+        """Usage stats reported by a dry run."""
+        return {
+            "dry_run": True,
+            "estimate": estimate.model_dump(),
+            "provider": estimate.provider,
+            "model": estimate.model
+        }
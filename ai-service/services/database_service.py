@@ -5,27 +5,120 @@ Handles Supabase interactions for proposals, usage logs, and configurations.
 
 import asyncio
 from typing import List, Dict, Any, Optional
-from datetime import datetime
-from supabase import create_client, Client
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from postgrest import AsyncPostgrestClient
 
 from config import get_settings
+from .context_cache import ProjectContextCache
+from .task_snapshot import TaskSnapshot
+from .task_stats import compute_task_stats
+from .usage_rollups import build_rollup_deltas
+
+
+TASK_COLUMNS = (
+    "id, title, description, status, priority, progress_percentage, "
+    "estimated_hours, start_date, end_date, due_date, completed_at, "
+    "parent_task_id, owner_id, created_at, updated_at"
+)
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client with a bounded keep-alive connection pool."""
+    
+    def __init__(self, base_url: str, api_key: str, pool_size: int, timeout: int):
+        self.limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size
+        )
+        super().__init__(
+            base_url,
+            headers={
+                "apikey": api_key,
+                "Authorization": f"Bearer {api_key}",
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            },
+            timeout=timeout
+        )
+    
+    def create_session(self, base_url, headers, timeout) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self.limits
+        )
 
 
 class DatabaseService:
     """Database service for AI operations."""
     
-    def __init__(self):
+    def __init__(self, client: Optional[Any] = None):
         self.settings = get_settings()
         
-        # Initialize Supabase client (optional for testing)
-        if self.settings.supabase_url and self.settings.supabase_service_key:
-            self.supabase: Client = create_client(
-                self.settings.supabase_url,
-                self.settings.supabase_service_key
+        # Initialize the async REST client (optional for testing). A client can be
+        # injected directly, e.g. the in-memory stand-in used by tests.
+        if client is not None:
+            self.supabase = client
+        elif self.settings.supabase_url and self.settings.supabase_service_key:
+            self.supabase = PooledPostgrestClient(
+                f"{self.settings.supabase_url.rstrip('/')}/rest/v1",
+                api_key=self.settings.supabase_service_key,
+                pool_size=self.settings.database_pool_size,
+                timeout=self.settings.database_timeout
             )
         else:
             self.supabase = None
             print("Warning: Supabase not configured. Database features disabled.")
+        
+        # Project context cache (shared by Q&A and assessments)
+        if self.settings.context_cache_enabled:
+            self.context_cache = ProjectContextCache(
+                max_projects=self.settings.context_cache_max_projects,
+                ttl_seconds=self.settings.context_cache_ttl_seconds,
+                probe_interval_seconds=self.settings.context_cache_probe_interval_seconds
+            )
+        else:
+            self.context_cache = None
+        
+        self.rollup_failures = 0
+    
+    async def close(self):
+        """Close the database connection pool."""
+        
+        if self.supabase:
+            await self.supabase.aclose()
+    
+    async def ping(self) -> bool:
+        """Run a trivial query to check (and warm) the connection pool."""
+        
+        if not self.supabase:
+            return False
+        
+        try:
+            await self.supabase.table("projects").select("id").limit(1).execute()
+            return True
+        except Exception as e:
+            print(f"Database ping failed: {e}")
+            return False
+    
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Get connection pool utilization of the REST client."""
+        
+        if not self.supabase:
+            return {"configured": False}
+        
+        session = getattr(self.supabase, "session", None)
+        pool = getattr(getattr(session, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        
+        return {
+            "configured": True,
+            "pool_size": self.settings.database_pool_size,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle())
+        }
     
     async def create_proposal(self, proposal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new proposal in the database."""
@@ -35,12 +128,47 @@ class DatabaseService:
             return {}
             
         try:
-            result = self.supabase.table("proposals").insert(proposal_data).execute()
+            result = await self.supabase.table("proposals").insert(proposal_data).execute()
             return result.data[0] if result.data else {}
         except Exception as e:
             print(f"Error creating proposal: {e}")
             return {}
     
+    async def create_proposals(self, proposals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several proposals with one insert.
+        
+        Rows are retried one at a time only if their bulk insert fails.
+        
+        Returns:
+            list: The saved proposals in input order, with an empty dict for
+            each proposal that could not be saved
+        """
+        
+        if not self.supabase:
+            print("Database not available. Skipping proposal creation.")
+            return [{} for _ in proposals]
+        
+        saved: List[Dict[str, Any]] = [{} for _ in proposals]
+        
+        async def insert_group(indexes: List[int]):
+            try:
+                result = await self.supabase.table("proposals").insert(
+                    [proposals[i] for i in indexes]
+                ).execute()
+                if result.data and len(result.data) == len(indexes):
+                    for i, row in zip(indexes, result.data):
+                        saved[i] = row
+                    return
+            except Exception as e:
+                print(f"Error creating proposals in bulk, retrying one by one: {e}")
+            
+            rows = await asyncio.gather(*[self.create_proposal(proposals[i]) for i in indexes])
+            for i, row in zip(indexes, rows):
+                saved[i] = row
+        
+        await asyncio.gather(*[insert_group(indexes) for indexes in _group_by_columns(proposals)])
+        return saved
+    
     async def get_proposals(
         self, 
         project_id: str, 
@@ -62,7 +190,7 @@ class DatabaseService:
             if component_type:
                 query = query.eq("component_type", component_type)
             
-            result = query.execute()
+            result = await query.execute()
             return result.data or []
         except Exception as e:
             print(f"Error getting proposals: {e}")
@@ -76,7 +204,7 @@ class DatabaseService:
         """Update a proposal."""
         
         try:
-            result = self.supabase.table("proposals").update(updates).eq("id", proposal_id).execute()
+            result = await self.supabase.table("proposals").update(updates).eq("id", proposal_id).execute()
             return result.data[0] if result.data else {}
         except Exception as e:
             print(f"Error updating proposal: {e}")
@@ -86,11 +214,175 @@ class DatabaseService:
         """Log AI usage to the database."""
         
         try:
-            result = self.supabase.table("ai_usage_logs").insert(usage_data).execute()
-            return result.data[0] if result.data else {}
+            result = await self.supabase.table("ai_usage_logs").insert(usage_data).execute()
         except Exception as e:
             print(f"Error logging AI usage: {e}")
             return {}
+        
+        if self.settings.usage_rollups_enabled:
+            await self.apply_usage_rollups(build_rollup_deltas([usage_data]))
+        return result.data[0] if result.data else {}
+    
+    async def log_ai_usage_batch(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Log several AI usage rows with one multi-row insert per column set.
+        
+        Returns:
+            list: The rows that could not be written (empty on success)
+        """
+        
+        # The validation, Q&A and assessment paths log different columns
+        groups = [[rows[i] for i in indexes] for indexes in _group_by_columns(rows)]
+        
+        results = await asyncio.gather(*[
+            self.supabase.table("ai_usage_logs").insert(group).execute()
+            for group in groups
+        ], return_exceptions=True)
+        
+        failed = []
+        written = []
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                print(f"Error logging AI usage batch: {result}")
+                failed.extend(group)
+            else:
+                written.extend(group)
+        
+        if written and self.settings.usage_rollups_enabled:
+            await self.apply_usage_rollups(build_rollup_deltas(written))
+        return failed
+    
+    async def get_usage_logs_page(
+        self,
+        offset: int,
+        limit: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get one page of usage logs across all projects, ordered by id.
+        
+        Returns:
+            list: The page's rows, or None if the logs could not be read
+        """
+        
+        if not self.supabase:
+            print("Database not available. Cannot read usage logs.")
+            return None
+        
+        try:
+            query = self.supabase.table("ai_usage_logs").select(
+                "id, project_id, ai_provider, ai_model, input_tokens, output_tokens, total_tokens, "
+                "estimated_cost, latency_ms, success, timestamp"
+            )
+            if start_date:
+                query = query.gte("timestamp", start_date.isoformat())
+            if end_date:
+                query = query.lte("timestamp", end_date.isoformat())
+            
+            result = await query.order("id").limit(limit).offset(offset).execute()
+            return result.data or []
+        except Exception as e:
+            print(f"Error getting usage logs: {e}")
+            return None
+    
+    async def update_usage_costs(self, costs: Dict[Any, float]) -> int:
+        """Set the estimated cost of many usage logs, with one update per distinct cost.
+    
+        Returns:
+            int: Number of rows whose update failed
+        """
+        
+        if not self.supabase:
+            print("Database not available. Skipping usage cost update.")
+            return len(costs)
+        
+        # Rows of the same model and token counts share a cost, so grouping keeps the update count low
+        ids_by_cost: Dict[float, List[Any]] = {}
+        for log_id, cost in costs.items():
+            ids_by_cost.setdefault(cost, []).append(log_id)
+    
+        async def update(cost: float, ids: List[Any]):
+            await self.supabase.table("ai_usage_logs").update({"estimated_cost": cost}).in_("id", ids).execute()
+        
+        groups = list(ids_by_cost.items())
+        results = await asyncio.gather(*[update(cost, ids) for cost, ids in groups], return_exceptions=True)
+    
+        failed = 0
+        for (cost, ids), result in zip(groups, results):
+            if isinstance(result, Exception):
+                print(f"Error updating usage log costs: {result}")
+                failed += len(ids)
+        return failed
+    
+    async def apply_usage_rollups(self, deltas: List[Dict[str, Any]]) -> bool:
+        """Add usage deltas to the hourly and daily rollups in one call.
+        
+        A failed update is reported but not retried; the affected range can
+        be rebuilt from the logs with ``backfill_usage_rollups.py``.
+        """
+        
+        if not deltas:
+            return True
+        
+        try:
+            await self.supabase.rpc("apply_ai_usage_rollups", {"deltas": deltas}).execute()
+            return True
+        except Exception as e:
+            self.rollup_failures += 1
+            print(f"Error updating usage rollups: {e}")
+            return False
+    
+    async def replace_usage_rollups(self, start_date: datetime, end_date: datetime, deltas: List[Dict[str, Any]]) -> bool:
+        """Replace the rollups of buckets starting in [start_date, end_date) in one transaction.
+        
+        Returns:
+            bool: Whether the rollups were replaced; if not, the range is unchanged
+        """
+        
+        if not self.supabase:
+            print("Database not available. Skipping usage rollup rebuild.")
+            return False
+        
+        try:
+            await self.supabase.rpc("replace_ai_usage_rollups", {
+                "start_param": start_date.isoformat(),
+                "end_param": end_date.isoformat(),
+                "deltas": deltas
+            }).execute()
+            return True
+        except Exception as e:
+            print(f"Error replacing usage rollups: {e}")
+            return False
+    
+    async def get_usage_rollups(
+        self,
+        granularity: str,
+        start_date: datetime,
+        end_date: datetime,
+        project_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get hourly or daily rollups in [start_date, end_date), optionally for some projects."""
+        
+        page_size = self.settings.dependency_page_size
+        rows: List[Dict[str, Any]] = []
+        
+        try:
+            while True:
+                query = self.supabase.table("ai_usage_rollups").select("*").eq(
+                    "granularity", granularity
+                ).gte("bucket_start", start_date.isoformat()).lt("bucket_start", end_date.isoformat())
+                if project_ids:
+                    query = query.in_("project_id", project_ids)
+                
+                result = await query.order("bucket_start").order("project_id").order("ai_provider").order(
+                    "ai_model"
+                ).limit(page_size).offset(len(rows)).execute()
+                page = result.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+        except Exception as e:
+            print(f"Error getting usage rollups: {e}")
+            return []
     
     async def get_ai_configuration(
         self, 
@@ -107,12 +399,31 @@ class DatabaseService:
             else:
                 query = query.is_("component_type", "null")
             
-            result = query.single().execute()
+            result = await query.single().execute()
             return result.data if result.data else None
         except Exception as e:
             print(f"Error getting AI configuration: {e}")
             return None
     
+    async def get_ai_configurations(self, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the project-level AI configurations of several projects with one query.
+        
+        Returns:
+            dict: Configuration per project id; projects without one are left out
+        """
+        
+        if not self.supabase or not project_ids:
+            return {}
+        
+        try:
+            result = await self.supabase.table("ai_configurations").select("*").in_(
+                "project_id", project_ids
+            ).is_("component_type", "null").execute()
+            return {row["project_id"]: row for row in result.data or []}
+        except Exception as e:
+            print(f"Error getting AI configurations: {e}")
+            return {}
+    
     async def update_ai_configuration(
         self, 
         project_id: str, 
@@ -126,7 +437,7 @@ class DatabaseService:
             config_data["component_type"] = component_type
             config_data["updated_at"] = datetime.utcnow().isoformat()
             
-            result = self.supabase.table("ai_configurations").upsert(
+            result = await self.supabase.table("ai_configurations").upsert(
                 config_data,
                 on_conflict="project_id,component_type"
             ).execute()
@@ -153,6 +464,12 @@ class DatabaseService:
                     "field": "description",
                     "value": 5000,
                     "message": "Description must be less than 5000 characters"
+                },
+                {
+                    "type": "date_order",
+                    "start_field": "start_date",
+                    "end_field": "end_date",
+                    "message": "End date must not be before start date"
                 }
             ]
         except Exception as e:
@@ -181,10 +498,47 @@ class DatabaseService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> Dict[str, Any]:
-        """Get AI usage statistics for a project."""
+        """Get AI usage statistics for a project, aggregated in the database.
+        
+        Uses the ``ai_usage_summary`` function (docs/architecture/AI_USAGE_SUMMARY.sql),
+        which returns one row per day, operation, provider and model, so the
+        response grows with the time range rather than the number of requests.
+        Without a start date the last ``usage_stats_default_days`` are summarised.
+        """
+        
+        end_date = end_date or datetime.now(timezone.utc)
+        start_date = start_date or end_date - timedelta(days=self.settings.usage_stats_default_days)
+        
+        try:
+            result = await self.supabase.rpc("ai_usage_summary", {
+                "project_id_param": project_id,
+                "start_param": start_date.isoformat(),
+                "end_param": end_date.isoformat()
+            }).execute()
+            summary = summarize_usage(result.data or [])
+        except Exception as e:
+            print(f"Error getting usage stats: {e}")
+            summary = summarize_usage([])
+        
+        summary["start_date"] = start_date.isoformat()
+        summary["end_date"] = end_date.isoformat()
+        return summary
+    
+    async def get_usage_logs(
+        self,
+        project_id: str,
+        limit: int,
+        offset: int = 0,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Get one page of a project's usage logs, newest first."""
         
         try:
-            query = self.supabase.table("ai_usage_logs").select("*").eq("project_id", project_id)
+            query = self.supabase.table("ai_usage_logs").select(
+                "id, operation_type, ai_provider, ai_model, input_tokens, output_tokens, "
+                "total_tokens, estimated_cost, latency_ms, success, timestamp"
+            ).eq("project_id", project_id)
             
             if start_date:
                 query = query.gte("timestamp", start_date.isoformat())
@@ -192,27 +546,14 @@ class DatabaseService:
             if end_date:
                 query = query.lte("timestamp", end_date.isoformat())
             
-            result = query.execute()
-            usage_logs = result.data or []
-            
-            # Calculate stats
-            total_tokens = sum(log.get("tokens_used", 0) for log in usage_logs)
-            total_cost = sum(log.get("estimated_cost", 0) for log in usage_logs)
+            # One extra row tells whether there is a next page without counting the history
+            result = await query.order("timestamp", desc=True).order("id", desc=True).limit(limit + 1).offset(offset).execute()
+            rows = result.data or []
             
-            return {
-                "total_requests": len(usage_logs),
-                "total_tokens": total_tokens,
-                "total_cost": total_cost,
-                "usage_logs": usage_logs
-            }
+            return {"logs": rows[:limit], "limit": limit, "offset": offset, "has_more": len(rows) > limit}
         except Exception as e:
-            print(f"Error getting usage stats: {e}")
-            return {
-                "total_requests": 0,
-                "total_tokens": 0,
-                "total_cost": 0.0,
-                "usage_logs": []
-            }
+            print(f"Error getting usage logs: {e}")
+            return {"logs": [], "limit": limit, "offset": offset, "has_more": False}
     
     async def get_project_details(self, project_id: str) -> Optional[Dict[str, Any]]:
         """Get project details."""
@@ -222,7 +563,7 @@ class DatabaseService:
             return None
             
         try:
-            result = self.supabase.table("projects").select("*").eq("id", project_id).single().execute()
+            result = await self.supabase.table("projects").select("*").eq("id", project_id).single().execute()
             return result.data if result.data else None
         except Exception as e:
             print(f"Error getting project details: {e}")
@@ -236,42 +577,285 @@ class DatabaseService:
             return []
             
         try:
-            result = self.supabase.table("tasks").select(
-                "id, title, description, status, priority, progress_percentage, "
-                "estimated_hours, start_date, end_date, due_date, completed_at, "
-                "parent_task_id, owner_id, created_at, updated_at"
-            ).eq("project_id", project_id).is_("deleted_at", "null").execute()
+            result = await self.supabase.table("tasks").select(TASK_COLUMNS).eq(
+                "project_id", project_id
+            ).is_("deleted_at", "null").execute()
             return result.data or []
         except Exception as e:
             print(f"Error getting project tasks: {e}")
             return []
     
     async def get_task_dependencies(self, project_id: str) -> List[Dict[str, Any]]:
-        """Get all task dependencies for a project."""
+        """Get all task dependencies for a project.
+        
+        Dependencies are joined to both of their tasks server-side (embedded
+        inner joins), so a project's graph comes back in a single round trip
+        and dependencies on soft-deleted tasks are excluded. Graphs larger than
+        one page (the API caps rows per response) are fetched as further pages
+        in parallel, using the total count returned with the first page.
+        """
         
         if not self.supabase:
             print("Database not available. Returning empty dependencies list.")
             return []
-            
+        
+        page_size = self.settings.dependency_page_size
+        
+        def page_query(offset: int, count: Optional[str] = None):
+            return self.supabase.table("task_dependencies").select(
+                "id, task_id, depends_on_task_id, dependency_type, created_at, "
+                "task:tasks!task_dependencies_task_id_fkey!inner(project_id, deleted_at), "
+                "depends_on:tasks!task_dependencies_depends_on_task_id_fkey!inner(deleted_at)",
+                count=count
+            ).eq("task.project_id", project_id).is_("task.deleted_at", "null").is_(
+                "depends_on.deleted_at", "null"
+            ).order("id").limit(page_size).offset(offset).execute()
+        
         try:
-            # First get all task IDs for this project
-            tasks_result = self.supabase.table("tasks").select("id").eq("project_id", project_id).execute()
-            task_ids = [task["id"] for task in (tasks_result.data or [])]
-            
-            if not task_ids:
-                return []
+            dependencies = []
+            for dependency in await self._fetch_all_pages(page_query):
+                dependency.pop("task", None)
+                dependency.pop("depends_on", None)
+                dependencies.append(dependency)
             
-            # Get dependencies for these tasks
-            result = self.supabase.table("task_dependencies").select(
-                "id, task_id, depends_on_task_id, dependency_type"
-            ).in_("task_id", task_ids).execute()
-            return result.data or []
+            return dependencies
         except Exception as e:
             print(f"Error getting task dependencies: {e}")
             return []
     
+    async def _fetch_all_pages(self, page_query) -> List[Dict[str, Any]]:
+        """Fetch every row of a paged query.
+        
+        ``page_query(offset, count=None)`` must return the awaitable query of
+        one page. The first page is fetched with an exact count and the
+        remaining pages are fetched in parallel.
+        """
+        
+        page_size = self.settings.dependency_page_size
+        first = await page_query(0, count="exact")
+        rows = list(first.data or [])
+        
+        total = first.count or 0
+        if total > page_size:
+            results = await asyncio.gather(*[
+                page_query(offset) for offset in range(page_size, total, page_size)
+            ])
+            for result in results:
+                rows.extend(result.data or [])
+        
+        return rows
+    
+    async def get_organization_project_ids(self, organization_id: str) -> List[str]:
+        """Get the ids of every project in an organization."""
+        
+        if not self.supabase:
+            print("Database not available. Returning empty project list.")
+            return []
+        
+        page_size = self.settings.dependency_page_size
+        
+        def page_query(offset: int, count: Optional[str] = None):
+            return self.supabase.table("projects").select("id", count=count).eq(
+                "organization_id", organization_id
+            ).order("id").limit(page_size).offset(offset).execute()
+        
+        try:
+            return [row["id"] for row in await self._fetch_all_pages(page_query)]
+        except Exception as e:
+            print(f"Error getting organization projects: {e}")
+            return []
+    
+    async def get_project_version(self, project_id: str) -> Optional[tuple]:
+        """Get a cheap version stamp for a project's context.
+        
+        The stamp is (project updated_at, task count, latest task updated_at,
+        dependency count, latest dependency created_at) and matches the stamp
+        computed from a loaded context by _context_version. Dependency rows are
+        never updated in place, so their count and newest created_at cover
+        additions and removals.
+        """
+        
+        if not self.supabase:
+            return None
+        
+        try:
+            # Postgres sorts NULL first in descending order; the stamp takes the max of non-null values
+            project_result, tasks_result, dependencies_result = await asyncio.gather(
+                self.supabase.table("projects").select("updated_at").eq("id", project_id).execute(),
+                self.supabase.table("tasks").select("updated_at", count="exact").eq(
+                    "project_id", project_id
+                ).is_("deleted_at", "null").order("updated_at.desc.nullslast").limit(1).execute(),
+                self.supabase.table("task_dependencies").select(
+                    "created_at, "
+                    "task:tasks!task_dependencies_task_id_fkey!inner(project_id, deleted_at), "
+                    "depends_on:tasks!task_dependencies_depends_on_task_id_fkey!inner(deleted_at)",
+                    count="exact"
+                ).eq("task.project_id", project_id).is_("task.deleted_at", "null").is_(
+                    "depends_on.deleted_at", "null"
+                ).order("created_at.desc.nullslast").limit(1).execute()
+            )
+            
+            project_updated_at = project_result.data[0].get("updated_at") if project_result.data else None
+            latest_task_updated_at = tasks_result.data[0].get("updated_at") if tasks_result.data else None
+            latest_dependency_created_at = (
+                dependencies_result.data[0].get("created_at") if dependencies_result.data else None
+            )
+            
+            return (
+                project_updated_at,
+                tasks_result.count or 0,
+                latest_task_updated_at,
+                dependencies_result.count or 0,
+                latest_dependency_created_at
+            )
+        except Exception as e:
+            print(f"Error getting project version: {e}")
+            return None
+    
+    def _context_version(self, context: Dict[str, Any]) -> tuple:
+        """Compute the version stamp of a loaded project context."""
+        
+        project = context.get("project") or {}
+        task_updates = [task["updated_at"] for task in context["tasks"] if task.get("updated_at")]
+        dependency_creations = [
+            dependency["created_at"] for dependency in context["dependencies"] if dependency.get("created_at")
+        ]
+        
+        return (
+            project.get("updated_at"),
+            len(context["tasks"]),
+            max(task_updates) if task_updates else None,
+            len(context["dependencies"]),
+            max(dependency_creations) if dependency_creations else None
+        )
+    
+    def invalidate_project_context(self, project_id: Optional[str] = None) -> int:
+        """Drop cached project context for one project, or for all projects."""
+        
+        if not self.context_cache:
+            return 0
+        
+        return self.context_cache.invalidate(project_id)
+    
     async def get_project_context(self, project_id: str) -> Dict[str, Any]:
-        """Get comprehensive project context for AI analysis."""
+        """Get comprehensive project context for AI analysis.
+        
+        Contexts are served from the context cache while their version stamp
+        still matches the database. The returned dict is shared with the cache
+        and must not be mutated by callers.
+        """
+        
+        if not self.context_cache or not self.supabase:
+            return await self._load_project_context(project_id)
+        
+        entry, needs_probe = self.context_cache.lookup(project_id)
+        
+        if entry and not needs_probe:
+            self.context_cache.record_hit(entry)
+            return entry.context
+        
+        if entry:
+            version = await self.get_project_version(project_id)
+            if version is not None and version == entry.version:
+                self.context_cache.record_hit(entry, revalidated=True)
+                return entry.context
+        
+        self.context_cache.record_miss(stale=entry is not None)
+        
+        context = await self._load_project_context(project_id)
+        if context["project"]:
+            self.context_cache.store(project_id, context, self._context_version(context))
+        
+        return context
+    
+    async def get_project_contexts(self, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the contexts of several projects, loading the uncached ones in bulk.
+        
+        Contexts still fresh in the context cache are served from it; the
+        others are loaded with one query per table for the whole batch
+        (paged like dependencies) instead of three per project, and cached.
+        Cached entries due for a version probe are reloaded with the batch,
+        which costs no more than probing them one by one.
+        
+        Returns:
+            dict: Context per project id, in the shape of get_project_context
+        """
+        
+        if not self.supabase:
+            return {project_id: await self._load_project_context(project_id) for project_id in project_ids}
+        
+        contexts: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for project_id in dict.fromkeys(project_ids):
+            entry, needs_probe = self.context_cache.lookup(project_id) if self.context_cache else (None, True)
+            if entry and not needs_probe:
+                self.context_cache.record_hit(entry)
+                contexts[project_id] = entry.context
+            else:
+                if self.context_cache:
+                    self.context_cache.record_miss(stale=entry is not None)
+                missing.append(project_id)
+        
+        if missing:
+            loaded = await self._load_project_contexts(missing)
+            for project_id, context in loaded.items():
+                if self.context_cache and context["project"]:
+                    self.context_cache.store(project_id, context, self._context_version(context))
+                contexts[project_id] = context
+        
+        return contexts
+    
+    async def _load_project_contexts(self, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load the contexts of several projects with one paged query per table."""
+        
+        page_size = self.settings.dependency_page_size
+        
+        def task_page(offset: int, count: Optional[str] = None):
+            return self.supabase.table("tasks").select(f"project_id, {TASK_COLUMNS}", count=count).in_(
+                "project_id", project_ids
+            ).is_("deleted_at", "null").order("id").limit(page_size).offset(offset).execute()
+        
+        def dependency_page(offset: int, count: Optional[str] = None):
+            return self.supabase.table("task_dependencies").select(
+                "id, task_id, depends_on_task_id, dependency_type, created_at, "
+                "task:tasks!task_dependencies_task_id_fkey!inner(project_id, deleted_at), "
+                "depends_on:tasks!task_dependencies_depends_on_task_id_fkey!inner(deleted_at)",
+                count=count
+            ).in_("task.project_id", project_ids).is_("task.deleted_at", "null").is_(
+                "depends_on.deleted_at", "null"
+            ).order("id").limit(page_size).offset(offset).execute()
+        
+        async def projects():
+            result = await self.supabase.table("projects").select("*").in_("id", project_ids).execute()
+            return result.data or []
+        
+        try:
+            project_rows, task_rows, dependency_rows = await asyncio.gather(
+                projects(), self._fetch_all_pages(task_page), self._fetch_all_pages(dependency_page)
+            )
+        except Exception as e:
+            print(f"Error loading project contexts in bulk, loading one by one: {e}")
+            contexts = await asyncio.gather(*[self._load_project_context(project_id) for project_id in project_ids])
+            return dict(zip(project_ids, contexts))
+        
+        tasks: Dict[str, List[Dict[str, Any]]] = {project_id: [] for project_id in project_ids}
+        for task in task_rows:
+            tasks[task.pop("project_id")].append(task)
+        
+        dependencies: Dict[str, List[Dict[str, Any]]] = {project_id: [] for project_id in project_ids}
+        for dependency in dependency_rows:
+            project_id = dependency.pop("task")["project_id"]
+            dependency.pop("depends_on", None)
+            dependencies[project_id].append(dependency)
+        
+        details = {row["id"]: row for row in project_rows}
+        return {
+            project_id: self._build_project_context(details.get(project_id), tasks[project_id], dependencies[project_id])
+            for project_id in project_ids
+        }
+    
+    async def _load_project_context(self, project_id: str) -> Dict[str, Any]:
+        """Load project context from the database and compute statistics."""
         
         # Fetch all data in parallel
         project_details, tasks, dependencies = await asyncio.gather(
@@ -280,43 +864,70 @@ class DatabaseService:
             self.get_task_dependencies(project_id)
         )
         
-        # Calculate statistics
-        status_breakdown = {}
-        priority_breakdown = {}
-        total_estimated_hours = 0
-        completed_tasks = 0
-        
-        for task in tasks:
-            # Status breakdown
-            status = task.get("status", "unknown")
-            status_breakdown[status] = status_breakdown.get(status, 0) + 1
-            
-            # Priority breakdown
-            priority = task.get("priority", "unknown")
-            priority_breakdown[priority] = priority_breakdown.get(priority, 0) + 1
-            
-            # Estimated hours
-            if task.get("estimated_hours"):
-                total_estimated_hours += task["estimated_hours"]
-            
-            # Completed count
-            if task.get("status") == "done":
-                completed_tasks += 1
-        
-        # Calculate completion percentage
-        completion_percentage = (completed_tasks / len(tasks) * 100) if tasks else 0
+        return self._build_project_context(project_details, tasks, dependencies)
+    
+    def _build_project_context(
+        self,
+        project_details: Optional[Dict[str, Any]],
+        tasks: List[Dict[str, Any]],
+        dependencies: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Assemble a project context and compute its statistics."""
+        if self.settings.context_task_snapshots:
+            tasks = TaskSnapshot.from_rows(tasks)
         
         return {
             "project": project_details,
             "tasks": tasks,
             "dependencies": dependencies,
             "stats": {
-                "total_tasks": len(tasks),
-                "status_breakdown": status_breakdown,
-                "priority_breakdown": priority_breakdown,
-                "total_estimated_hours": total_estimated_hours,
-                "completed_tasks": completed_tasks,
-                "completion_percentage": round(completion_percentage, 1),
+                **compute_task_stats(tasks),
                 "total_dependencies": len(dependencies)
             }
-        }
\ No newline at end of file
+        }
+
+
+def _group_by_columns(rows: List[Dict[str, Any]]) -> List[List[int]]:
+    """Group row indexes by column set, since a multi-row insert needs the same columns in every row."""
+    groups: Dict[tuple, List[int]] = {}
+    for i, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(i)
+    return list(groups.values())
+
+
+def summarize_usage(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build usage totals and per-day/operation/provider/model breakdowns from summary rows."""
+    
+    def bucket() -> Dict[str, Any]:
+        return {"requests": 0, "failures": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cost": 0.0}
+    
+    def add(target: Dict[str, Any], row: Dict[str, Any]):
+        target["requests"] += int(row.get("requests") or 0)
+        target["failures"] += int(row.get("failures") or 0)
+        target["input_tokens"] += int(row.get("input_tokens") or 0)
+        target["output_tokens"] += int(row.get("output_tokens") or 0)
+        target["total_tokens"] += int(row.get("total_tokens") or 0)
+        target["cost"] += float(row.get("estimated_cost") or 0)
+    
+    totals = bucket()
+    groups: Dict[str, Dict[str, Dict[str, Any]]] = {"by_day": {}, "by_operation": {}, "by_provider": {}, "by_model": {}}
+    for row in rows:
+        add(totals, row)
+        for name, key in (("by_day", "day"), ("by_operation", "operation_type"), ("by_provider", "ai_provider"), ("by_model", "ai_model")):
+            add(groups[name].setdefault(str(row.get(key) or "unknown"), bucket()), row)
+    
+    for group in [totals] + [item for values in groups.values() for item in values.values()]:
+        group["cost"] = round(group["cost"], 6)
+    
+    return {
+        "total_requests": totals["requests"],
+        "failed_requests": totals["failures"],
+        "total_input_tokens": totals["input_tokens"],
+        "total_output_tokens": totals["output_tokens"],
+        "total_tokens": totals["total_tokens"],
+        "total_cost": totals["cost"],
+        "daily": [dict(day=day, **values) for day, values in sorted(groups["by_day"].items())],
+        "by_operation": groups["by_operation"],
+        "by_provider": groups["by_provider"],
+        "by_model": groups["by_model"]
+    }
@@ -0,0 +1,316 @@
+"""
+Dependency graph analytics for project assessments.
+
+Builds the task dependency graph of a project context (as returned by
+``get_project_tasks`` and ``get_task_dependencies``) over integer task
+indexes, with successors and predecessors stored as compact CSR arrays
+(``array('i')`` offsets and targets), and computes in O(V + E):
+
+- cycles, as the strongly connected components found by Tarjan's algorithm
+  (iterative, so 10k-task chains do not hit the recursion limit),
+- a topological order (cycles collapsed into one step),
+- the critical path weighted by the remaining ``estimated_hours`` of open
+  tasks, and the longest chains by task count,
+- fan-out (tasks blocking many others) and fan-in hotspots,
+- blocked tasks (open tasks waiting on open prerequisites) and ready tasks.
+
+Edges point from a prerequisite (``depends_on_task_id``) to the task that
+depends on it. Tarjan emits components in reverse topological order, so the
+longest-path passes walk the components in emission order and every
+successor is final before it is read. The results are formatted into the
+assessment prompt, so the model is given exact facts about the full graph
+instead of inferring them from a handful of dependency lines.
+"""
+
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+
+from .prompt_packer import CLOSED_STATUSES
+
+
+def _csr(node_count: int, sources: array, targets: array) -> Tuple[array, array]:
+    """Group edges by source into (offsets, targets) adjacency arrays."""
+    offsets = array("i", bytes(4 * (node_count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for node in range(node_count):
+        offsets[node + 1] += offsets[node]
+
+    adjacency = array("i", bytes(4 * len(sources)))
+    cursor = array("i", offsets[:node_count])
+    for source, target in zip(sources, targets):
+        adjacency[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, adjacency
+
+
+class DependencyGraph:
+    """Task dependency graph over integer indexes with CSR adjacency."""
+
+    def __init__(self, tasks: List[Dict[str, Any]], dependencies: List[Dict[str, Any]]):
+        self.task_ids = [task.get("id") for task in tasks]
+        self.titles = [task.get("title") or "Untitled" for task in tasks]
+        self.index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        node_count = len(self.task_ids)
+
+        self.closed = bytearray(node_count)
+        # Remaining work: closed tasks and tasks without an estimate weigh nothing
+        self.hours = array("d", bytes(8 * node_count))
+        self.estimated = bytearray(node_count)
+        for i, task in enumerate(tasks):
+            if task.get("status") in CLOSED_STATUSES:
+                self.closed[i] = 1
+            elif task.get("estimated_hours") is not None:
+                self.hours[i] = float(task["estimated_hours"])
+                self.estimated[i] = 1
+
+        sources, targets = array("i"), array("i")
+        seen = set()
+        self.self_loops = bytearray(node_count)
+        self.unknown_dependencies = 0
+        for dependency in dependencies:
+            source = self.index.get(dependency.get("depends_on_task_id"))
+            target = self.index.get(dependency.get("task_id"))
+            if source is None or target is None:
+                self.unknown_dependencies += 1
+                continue
+            if source == target:
+                self.self_loops[source] = 1
+            key = source * node_count + target
+            if key in seen:
+                continue
+            seen.add(key)
+            sources.append(source)
+            targets.append(target)
+
+        self.edge_count = len(sources)
+        self.successor_offsets, self.successors = _csr(node_count, sources, targets)
+        self.predecessor_offsets, self.predecessors = _csr(node_count, targets, sources)
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def fan_out(self, node: int) -> int:
+        """Number of tasks that depend on a task."""
+        return self.successor_offsets[node + 1] - self.successor_offsets[node]
+
+    def fan_in(self, node: int) -> int:
+        """Number of tasks a task depends on."""
+        return self.predecessor_offsets[node + 1] - self.predecessor_offsets[node]
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """Tarjan's strongly connected components, in reverse topological order."""
+        node_count = len(self.task_ids)
+        offsets, successors = self.successor_offsets, self.successors
+        order = array("i", [-1]) * node_count
+        low = array("i", bytes(4 * node_count))
+        on_stack = bytearray(node_count)
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(node_count):
+            if order[root] != -1:
+                continue
+
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+
+            while work:
+                frame = work[-1]
+                node, edge = frame
+                if edge < offsets[node + 1]:
+                    frame[1] = edge + 1
+                    successor = successors[edge]
+                    if order[successor] == -1:
+                        order[successor] = low[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack[successor] = 1
+                        work.append([successor, offsets[successor]])
+                    elif on_stack[successor] and order[successor] < low[node]:
+                        low[node] = order[successor]
+                    continue
+
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    def topological_order(self, components: Optional[List[List[int]]] = None) -> List[Any]:
+        """Task ids in dependency order (prerequisites first); cycle members stay together."""
+        components = components if components is not None else self.strongly_connected_components()
+        return [self.task_ids[node] for component in reversed(components) for node in component]
+
+    def analyze(self, top: int = 5) -> Dict[str, Any]:
+        """Compute cycles, critical path, longest chains, hotspots and blocked tasks.
+
+        Returns:
+            dict: Graph facts with task ids; lists of hotspots and chains hold at most ``top`` entries
+        """
+        node_count = len(self.task_ids)
+        offsets, successors = self.successor_offsets, self.successors
+        components = self.strongly_connected_components()
+        component_of = array("i", bytes(4 * node_count))
+        for c, members in enumerate(components):
+            for node in members:
+                component_of[node] = c
+
+        cycles = [
+            members for members in components
+            if len(members) > 1 or self.self_loops[members[0]]
+        ]
+
+        # Longest paths over the condensation, walking sinks first
+        component_count = len(components)
+        path_hours = array("d", bytes(8 * component_count))
+        path_length = array("i", bytes(4 * component_count))
+        next_by_hours = array("i", [-1]) * component_count
+        next_by_length = array("i", [-1]) * component_count
+        has_predecessor = bytearray(component_count)
+
+        for c, members in enumerate(components):
+            best_hours, best_length = -1.0, -1
+            for node in members:
+                for edge in range(offsets[node], offsets[node + 1]):
+                    d = component_of[successors[edge]]
+                    if d == c:
+                        continue
+                    has_predecessor[d] = 1
+                    if path_hours[d] > best_hours:
+                        best_hours, next_by_hours[c] = path_hours[d], d
+                    if path_length[d] > best_length:
+                        best_length, next_by_length[c] = path_length[d], d
+            path_hours[c] = sum(self.hours[node] for node in members) + max(best_hours, 0.0)
+            path_length[c] = len(members) + max(best_length, 0)
+
+        def follow(start: int, links: array) -> List[int]:
+            nodes = []
+            while start != -1:
+                nodes.extend(reversed(components[start]))
+                start = links[start]
+            return nodes
+
+        critical_path: Dict[str, Any] = {"task_ids": [], "hours": 0.0, "unestimated_tasks": 0}
+        if component_count:
+            start = max(range(component_count), key=lambda c: (path_hours[c], path_length[c]))
+            nodes = follow(start, next_by_hours)
+            critical_path = {
+                "task_ids": [self.task_ids[node] for node in nodes],
+                "hours": round(path_hours[start], 2),
+                "unestimated_tasks": sum(1 for node in nodes if not self.closed[node] and not self.estimated[node])
+            }
+
+        roots = sorted(
+            (c for c in range(component_count) if not has_predecessor[c] and path_length[c] > 1),
+            key=lambda c: -path_length[c]
+        )[:top]
+        longest_chains = [
+            {"task_ids": [self.task_ids[node] for node in follow(c, next_by_length)], "length": path_length[c]}
+            for c in roots
+        ]
+
+        def hotspots(degree) -> List[Dict[str, Any]]:
+            ranked = sorted((node for node in range(node_count) if degree(node) > 1), key=lambda node: -degree(node))
+            return [{"task_id": self.task_ids[node], "count": degree(node)} for node in ranked[:top]]
+
+        blocked, ready = [], 0
+        predecessor_offsets, predecessors = self.predecessor_offsets, self.predecessors
+        for node in range(node_count):
+            if self.closed[node]:
+                continue
+            if any(not self.closed[predecessors[edge]] for edge in range(predecessor_offsets[node], predecessor_offsets[node + 1])):
+                blocked.append(self.task_ids[node])
+            else:
+                ready += 1
+
+        return {
+            "task_count": node_count,
+            "dependency_count": self.edge_count,
+            "unknown_dependencies": self.unknown_dependencies,
+            "is_acyclic": not cycles,
+            "cycles": [[self.task_ids[node] for node in reversed(members)] for members in cycles],
+            "critical_path": critical_path,
+            "longest_chains": longest_chains,
+            "fan_out_hotspots": hotspots(self.fan_out),
+            "fan_in_hotspots": hotspots(self.fan_in),
+            "blocked_tasks": blocked,
+            "ready_tasks": ready
+        }
+
+
+def analyze_dependencies(tasks: List[Dict[str, Any]], dependencies: List[Dict[str, Any]], top: int = 5) -> Dict[str, Any]:
+    """Build the dependency graph of a project and analyze it."""
+    return DependencyGraph(tasks, dependencies).analyze(top)
+
+
+def format_dependency_analysis(
+    analysis: Dict[str, Any],
+    tasks: List[Dict[str, Any]],
+    max_items: int = 10
+) -> str:
+    """Format graph facts as prompt lines, naming tasks by title."""
+    titles = {task.get("id"): task.get("title") or "Untitled" for task in tasks}
+
+    def names(task_ids: List[Any]) -> str:
+        shown = [titles.get(task_id, str(task_id)) for task_id in task_ids[:max_items]]
+        if len(task_ids) > max_items:
+            shown.append(f"... {len(task_ids) - max_items} more")
+        return ", ".join(shown)
+
+    def chain(task_ids: List[Any]) -> str:
+        if len(task_ids) <= max_items:
+            return " -> ".join(titles.get(task_id, str(task_id)) for task_id in task_ids)
+        head = [titles.get(task_id, str(task_id)) for task_id in task_ids[:max_items - 1]]
+        return " -> ".join(head + [f"... ({len(task_ids) - len(head) - 1} more) -> {titles.get(task_ids[-1], str(task_ids[-1]))}"])
+
+    if not analysis["dependency_count"]:
+        return "No dependencies between tasks."
+
+    lines = [f"- Graph: {analysis['task_count']} tasks, {analysis['dependency_count']} dependencies"]
+
+    if analysis["cycles"]:
+        lines.append(f"- Circular dependencies ({len(analysis['cycles'])}):")
+        lines.extend(f"  - {names(cycle)}" for cycle in analysis["cycles"][:max_items])
+    else:
+        lines.append("- Circular dependencies: none")
+
+    critical_path = analysis["critical_path"]
+    if critical_path["task_ids"]:
+        note = f", {critical_path['unestimated_tasks']} open tasks without estimates" if critical_path["unestimated_tasks"] else ""
+        lines.append(
+            f"- Critical path ({len(critical_path['task_ids'])} tasks, {critical_path['hours']:g} remaining hours{note}): "
+            f"{chain(critical_path['task_ids'])}"
+        )
+
+    for item in analysis["longest_chains"][:3]:
+        lines.append(f"- Dependency chain of {item['length']} tasks: {chain(item['task_ids'])}")
+
+    if analysis["fan_out_hotspots"]:
+        lines.append("- Bottlenecks (tasks others depend on): " + ", ".join(
+            f"{titles.get(item['task_id'], item['task_id'])} blocks {item['count']}" for item in analysis["fan_out_hotspots"]
+        ))
+    if analysis["fan_in_hotspots"]:
+        lines.append("- Tasks with many prerequisites: " + ", ".join(
+            f"{titles.get(item['task_id'], item['task_id'])} waits on {item['count']}" for item in analysis["fan_in_hotspots"]
+        ))
+
+    blocked = analysis["blocked_tasks"]
+    lines.append(f"- Blocked by open prerequisites: {len(blocked)} tasks" + (f" ({names(blocked)})" if blocked else ""))
+    lines.append(f"- Ready to start (no open prerequisites): {analysis['ready_tasks']} tasks")
+
+    return "\n".join(lines)
@@ -0,0 +1,144 @@
+"""
+Background health prober.
+
+Probing AI providers on every /health request sent a paid completion per
+probe. The monitor instead checks provider reachability (without spending
+tokens where the SDK allows) and the database on a fixed interval and keeps
+the latest results, so health endpoints only read a cached snapshot.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from config import get_settings, Settings
+from models import AIProvider
+from .ai_service_factory import AIServiceFactory
+from .database_service import DatabaseService
+from .provider_registry import ProviderClientRegistry
+
+
+class HealthMonitor:
+    """Periodically probes AI providers and the database and caches the results."""
+
+    def __init__(
+        self,
+        provider_registry: ProviderClientRegistry,
+        db_service: DatabaseService,
+        settings: Optional[Settings] = None
+    ):
+        self.provider_registry = provider_registry
+        self.db_service = db_service
+        self.settings = settings or get_settings()
+        self.interval = self.settings.health_probe_interval_seconds
+        self.timeout = self.settings.health_probe_timeout_seconds
+
+        self.ai_providers: Dict[str, Dict[str, Any]] = {}
+        self.database: Dict[str, Any] = {}
+        self.checked_at: Optional[datetime] = None
+        self.checked_monotonic: Optional[float] = None
+        self.probes = 0
+
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start probing in the background; the first probe runs immediately."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                print(f"Health probe error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def probe(self):
+        """Probe every configured AI provider and the database concurrently."""
+        providers = [provider for provider in AIProvider if self._has_api_key(provider)]
+        results = await asyncio.gather(
+            *[self._probe_provider(provider) for provider in providers],
+            self._probe_database()
+        )
+
+        self.ai_providers = {provider.value: {"healthy": False, "configured": False} for provider in AIProvider}
+        self.ai_providers.update({provider.value: result for provider, result in zip(providers, results)})
+        self.database = results[-1]
+        self.checked_at = datetime.utcnow()
+        self.checked_monotonic = time.monotonic()
+        self.probes += 1
+
+    def _has_api_key(self, provider: AIProvider) -> bool:
+        try:
+            self.provider_registry.get_api_key(provider)
+            return True
+        except ValueError:
+            return False
+
+    async def _timed(self, check) -> Dict[str, Any]:
+        started = time.monotonic()
+        error = None
+        try:
+            healthy = bool(await asyncio.wait_for(check(), timeout=self.timeout))
+        except asyncio.TimeoutError:
+            healthy, error = False, f"Timed out after {self.timeout}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        return {
+            "healthy": healthy,
+            "latency_ms": int((time.monotonic() - started) * 1000),
+            "checked_at": datetime.utcnow().isoformat(),
+            "error": error
+        }
+
+    async def _probe_provider(self, provider: AIProvider) -> Dict[str, Any]:
+        service = self.provider_registry.get_service(provider, AIServiceFactory.get_default_model(provider))
+        result = await self._timed(service.check_reachability)
+        result["configured"] = True
+        return result
+
+    async def _probe_database(self) -> Dict[str, Any]:
+        if not self.db_service.supabase:
+            return {"healthy": False, "configured": False, "pool": self.db_service.pool_metrics()}
+
+        result = await self._timed(self.db_service.ping)
+        result["configured"] = True
+        result["pool"] = self.db_service.pool_metrics()
+        return result
+
+    def is_stale(self) -> bool:
+        """Whether the last probe is missing or older than three probe intervals."""
+        return self.checked_monotonic is None or time.monotonic() - self.checked_monotonic > 3 * self.interval
+
+    def is_ready(self) -> bool:
+        """Whether the service can take traffic: a fresh probe found an AI provider and the database (if configured) healthy."""
+        if self.is_stale():
+            return False
+        if self.database.get("configured") and not self.database.get("healthy"):
+            return False
+        return any(result["healthy"] for result in self.ai_providers.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the latest probe results."""
+        return {
+            "ready": self.is_ready(),
+            "stale": self.is_stale(),
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "probe_interval_seconds": self.interval,
+            "probes": self.probes,
+            "ai_providers": self.ai_providers,
+            "database": self.database
+        }
@@ -0,0 +1,465 @@
+"""
+Background job queue for project assessments.
+
+``/assess-project`` enqueues an assessment and returns its job id at once;
+a bounded pool of workers runs queued jobs, and clients poll the job for its
+status and result. Only one job per project is queued or running at a time:
+submitting a project that already has an active job returns that job, so
+repeated clicks do not queue duplicate work.
+
+The memory store keeps jobs per process. The SQLite store keeps them in a
+file shared by every worker on the host, so a job can be polled from any
+worker, is claimed by exactly one of them, and survives a restart: jobs
+left running by a crashed worker are claimed again once their lease
+expires. Finished jobs are kept for ``assessment_job_retention_seconds``.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+
+from config import get_settings, Settings
+from .cost_estimator import BudgetExceeded
+
+
+def _new_job(project_id: str, organization_id: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "organization_id": organization_id,
+        "params": params,
+        "status": "queued",
+        "attempts": 0,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "lease_expires": None,
+        "result": None,
+        "error": None
+    }
+
+
+class MemoryJobStore:
+    """Per-process job store."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.queued: deque = deque()
+        self.active: Dict[str, str] = {}
+
+    async def submit(self, project_id: str, organization_id: Optional[str], params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        job_id = self.active.get(project_id)
+        if job_id is not None:
+            return dict(self.jobs[job_id]), False
+
+        job = _new_job(project_id, organization_id, params)
+        self.jobs[job["job_id"]] = job
+        self.queued.append(job["job_id"])
+        self.active[project_id] = job["job_id"]
+        return dict(job), True
+
+    async def find_active(self, project_id: str) -> Optional[Dict[str, Any]]:
+        job_id = self.active.get(project_id)
+        return dict(self.jobs[job_id]) if job_id is not None else None
+
+    async def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        while self.queued:
+            job = self.jobs.get(self.queued.popleft())
+            if job is not None and job["status"] == "queued":
+                now = time.time()
+                job.update(status="running", started_at=now, lease_expires=now + lease_seconds, attempts=job["attempts"] + 1)
+                return dict(job)
+        return None
+
+    async def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[Dict[str, Any]] = None):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.update(status=status, finished_at=time.time(), lease_expires=None, result=result, error=error)
+        if self.active.get(job["project_id"]) == job_id:
+            del self.active[job["project_id"]]
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def purge(self, finished_before: float) -> int:
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < finished_before
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        return len(expired)
+
+    async def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+    async def close(self):
+        return None
+
+
+class SQLiteJobStore:
+    """Job store in a SQLite file shared by every worker using the same path."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = asyncio.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS assessment_jobs ("
+                "job_id TEXT PRIMARY KEY, project_id TEXT NOT NULL, organization_id TEXT, params TEXT NOT NULL, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL, created_at REAL NOT NULL, started_at REAL, "
+                "finished_at REAL, lease_expires REAL, result TEXT, error TEXT)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_assessment_jobs_status ON assessment_jobs(status, created_at)"
+            )
+            # One queued or running job per project, across every worker
+            self.connection.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_assessment_jobs_active ON assessment_jobs(project_id) "
+                "WHERE status IN ('queued', 'running')"
+            )
+        return self.connection
+
+    def _row(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in ("params", "result", "error"):
+            job[column] = json.loads(job[column]) if job[column] is not None else None
+        return job
+
+    def _transaction(self, work):
+        connection = self._connect()
+        # BEGIN IMMEDIATE takes the write lock, so workers cannot interleave
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            value = work(connection)
+            connection.execute("COMMIT")
+            return value
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _submit(self, project_id: str, organization_id: Optional[str], params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        def work(connection):
+            existing = connection.execute(
+                "SELECT * FROM assessment_jobs WHERE project_id = ? AND status IN ('queued', 'running')", (project_id,)
+            ).fetchone()
+            if existing is not None:
+                return self._row(existing), False
+
+            job = _new_job(project_id, organization_id, params)
+            connection.execute(
+                "INSERT INTO assessment_jobs (job_id, project_id, organization_id, params, status, attempts, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["job_id"], project_id, organization_id, json.dumps(params), job["status"], 0, job["created_at"])
+            )
+            return job, True
+
+        return self._transaction(work)
+
+    def _find_active(self, project_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._connect().execute(
+            "SELECT * FROM assessment_jobs WHERE project_id = ? AND status IN ('queued', 'running')", (project_id,)
+        ).fetchone())
+
+    def _claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        def work(connection):
+            now = time.time()
+            row = connection.execute(
+                "SELECT job_id FROM assessment_jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_expires < ?) ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE assessment_jobs SET status = 'running', started_at = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE job_id = ?",
+                (now, now + lease_seconds, row["job_id"])
+            )
+            return self._row(connection.execute("SELECT * FROM assessment_jobs WHERE job_id = ?", (row["job_id"],)).fetchone())
+
+        return self._transaction(work)
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[Dict[str, Any]]):
+        self._connect().execute(
+            "UPDATE assessment_jobs SET status = ?, finished_at = ?, lease_expires = NULL, result = ?, error = ? "
+            "WHERE job_id = ?",
+            (
+                status, time.time(),
+                json.dumps(result, default=str) if result is not None else None,
+                json.dumps(error, default=str) if error is not None else None,
+                job_id
+            )
+        )
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._connect().execute("SELECT * FROM assessment_jobs WHERE job_id = ?", (job_id,)).fetchone())
+
+    def _purge(self, finished_before: float) -> int:
+        return self._connect().execute(
+            "DELETE FROM assessment_jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (finished_before,)
+        ).rowcount
+
+    def _counts(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM assessment_jobs GROUP BY status")
+        return {status: count for status, count in rows}
+
+    async def _call(self, function, *args):
+        # sqlite3 calls block, so run them off the event loop one at a time
+        async with self.lock:
+            return await asyncio.to_thread(function, *args)
+
+    async def submit(self, project_id: str, organization_id: Optional[str], params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        return await self._call(self._submit, project_id, organization_id, params)
+
+    async def find_active(self, project_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call(self._find_active, project_id)
+
+    async def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        return await self._call(self._claim, lease_seconds)
+
+    async def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[Dict[str, Any]] = None):
+        await self._call(self._finish, job_id, status, result, error)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call(self._get, job_id)
+
+    async def purge(self, finished_before: float) -> int:
+        return await self._call(self._purge, finished_before)
+
+    async def counts(self) -> Dict[str, int]:
+        return await self._call(self._counts)
+
+    async def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class JobFailed(Exception):
+    """Raised by a job handler to fail a job with an HTTP status code."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AssessmentJobQueue:
+    """Queues assessment jobs and runs them on a bounded pool of workers.
+
+    ``handler(job)`` runs one job and returns its JSON-serializable result;
+    it raises ``JobFailed`` to fail the job with a specific status code.
+    """
+
+    def __init__(self, handler, settings: Optional[Settings] = None, store: Optional[Any] = None):
+        self.handler = handler
+        self.settings = settings or get_settings()
+
+        if store is not None:
+            self.store = store
+        elif self.settings.assessment_queue_backend == "sqlite":
+            self.store = SQLiteJobStore(self.settings.assessment_queue_path)
+        elif self.settings.assessment_queue_backend == "memory":
+            self.store = MemoryJobStore()
+        else:
+            raise ValueError(f"Unsupported assessment queue backend: {self.settings.assessment_queue_backend}")
+
+        self.worker_count = max(1, self.settings.assessment_workers)
+        self.job_timeout = self.settings.assessment_job_timeout_seconds
+        self.retention = self.settings.assessment_job_retention_seconds
+        # Other processes sharing a SQLite store submit jobs this process is not woken for
+        self.poll_interval = self.settings.assessment_queue_poll_interval_ms / 1000
+
+        self.wakeup = asyncio.Event()
+        self.workers: List[asyncio.Task] = []
+        self.running = 0
+        self.closing = False
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    async def start(self):
+        """Start the worker pool; jobs left in a durable store are picked up."""
+        if not self.workers:
+            self.closing = False
+            self.workers = [asyncio.create_task(self._run()) for _ in range(self.worker_count)]
+            self.wakeup.set()
+
+    async def close(self):
+        """Stop the workers. Jobs they were running stay claimed until their lease expires."""
+        # asyncio.wait_for can swallow a cancellation that races with its result,
+        # so workers also stop on the flag
+        self.closing = True
+        workers = [worker for worker in self.workers if not worker.done()]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.workers = []
+        await self.store.close()
+
+    async def submit(
+        self,
+        project_id: str,
+        organization_id: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        admit: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Queue an assessment, or return the project's queued or running job.
+
+        ``admit()`` (e.g. a rate limit check) is awaited only when no job is
+        active for the project, so returning an existing job costs nothing;
+        whatever it raises is passed on and no job is queued.
+
+        Returns:
+            tuple: (job, whether a new job was created)
+        """
+        if admit is not None:
+            job = await self.store.find_active(project_id)
+            if job is not None:
+                self.deduplicated += 1
+                return job, False
+            await admit()
+
+        job, created = await self.store.submit(project_id, organization_id, params or {})
+        if created:
+            self.submitted += 1
+            self.wakeup.set()
+        else:
+            self.deduplicated += 1
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+
+    async def _run(self):
+        while not self.closing:
+            # Cleared before claiming, so a job submitted meanwhile is not missed
+            self.wakeup.clear()
+            try:
+                job = await self.store.claim(self.job_timeout + 30)
+            except Exception as e:
+                print(f"Error claiming assessment job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Another job may be waiting; let an idle worker look for it
+            self.wakeup.set()
+            await self._execute(job)
+
+    async def _execute(self, job: Dict[str, Any]):
+        self.running += 1
+        try:
+            result = await asyncio.wait_for(self.handler(job), timeout=self.job_timeout)
+            await self.store.finish(job["job_id"], "succeeded", result=result)
+            self.succeeded += 1
+        except asyncio.CancelledError:
+            raise
+        except JobFailed as e:
+            await self.store.finish(job["job_id"], "failed", error={"status_code": e.status_code, "detail": e.detail})
+            self.failed += 1
+        except asyncio.TimeoutError:
+            await self.store.finish(
+                job["job_id"], "failed", error={"status_code": 504, "detail": "Assessment timed out"}
+            )
+            self.failed += 1
+        except Exception as e:
+            print(f"Assessment job {job['job_id']} failed: {e}")
+            await self.store.finish(
+                job["job_id"], "failed", error={"status_code": 500, "detail": f"Failed to assess project: {e}"}
+            )
+            self.failed += 1
+        finally:
+            self.running -= 1
+
+        try:
+            await self.store.purge(time.time() - self.retention)
+        except Exception as e:
+            print(f"Error purging finished assessment jobs: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            jobs = await self.store.counts()
+        except Exception as e:
+            print(f"Error counting assessment jobs: {e}")
+            jobs = {}
+
+        return {
+            "workers": len(self.workers),
+            "running": self.running,
+            "jobs": jobs,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "succeeded": self.succeeded,
+            "failed": self.failed
+        }
+
+
+def assessment_job_handler(validator_service: Any, assessment_service: Any):
+    """Build the handler that runs a queued /assess-project job."""
+
+    async def handler(job: Dict[str, Any]) -> Dict[str, Any]:
+        start_time = time.time()
+        project_id = job["project_id"]
+        ai_config = await validator_service.get_ai_config(project_id)
+
+        try:
+            saved_insights = await assessment_service.run_assessment(project_id, ai_config)
+        except BudgetExceeded as e:
+            raise JobFailed(402, {"message": str(e), "estimate": e.estimate.model_dump()})
+
+        return {
+            "success": True,
+            "insights": saved_insights,
+            "usage_stats": {
+                "model": ai_config['model'],
+                "provider": ai_config['provider']
+            },
+            "processing_time_ms": int((time.time() - start_time) * 1000)
+        }
+
+    return handler
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job, without its result."""
+
+    def timestamp(value: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(value, timezone.utc).isoformat() if value else None
+
+    return {
+        "job_id": job["job_id"],
+        "project_id": job["project_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": timestamp(job["created_at"]),
+        "started_at": timestamp(job["started_at"]),
+        "finished_at": timestamp(job["finished_at"]),
+        "error": job["error"]
+    }
@@ -0,0 +1,445 @@
+"""
+In-memory stand-in for the Supabase REST client.
+
+Implements the subset of the PostgREST query builder used by DatabaseService
+so the service can be exercised in tests and benchmarks without a database.
+Embedded resources of the form ``alias:table!fk_hint!inner(columns)`` are
+resolved by foreign key and can be filtered with ``alias.column``.
+Database functions called with ``rpc`` are emulated by the Python
+equivalents in ``RPC_FUNCTIONS``. Written rows and function parameters are
+JSON-encoded like PostgREST does, so values it cannot send (e.g. datetimes)
+fail here too.
+An optional per-request latency simulates network round trips; with
+``blocking=True`` the latency is spent in ``time.sleep`` to emulate the old
+synchronous client stalling the event loop.
+"""
+
+import asyncio
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Callable
+
+
+# alias:table!hint!inner(columns)
+EMBED_PATTERN = re.compile(r"^(?:(\w+):)?(\w+)!(\w+)(!inner)?\((.*)\)$")
+
+
+class InMemoryResponse:
+    """Response object mirroring postgrest's APIResponse."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class InMemoryQueryBuilder:
+    """Chainable query builder over a single in-memory table."""
+
+    def __init__(self, client: "InMemoryDatabaseClient", table: str):
+        self.client = client
+        self.table_name = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.on_conflict = ""
+        self.filters: List[tuple] = []
+        self.order_by: List[tuple] = []
+        self.row_limit: Optional[int] = None
+        self.row_offset = 0
+        self.single_row = False
+        self.count_mode: Optional[str] = None
+
+    # Operations
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "InMemoryQueryBuilder":
+        self.columns = ",".join(columns) or "*"
+        self.count_mode = count
+        return self
+
+    def insert(self, rows: Any) -> "InMemoryQueryBuilder":
+        self.operation = "insert"
+        self.payload = rows
+        return self
+
+    def upsert(self, rows: Any, *, on_conflict: str = "") -> "InMemoryQueryBuilder":
+        self.operation = "upsert"
+        self.payload = rows
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "InMemoryQueryBuilder":
+        self.operation = "update"
+        self.payload = values
+        return self
+
+    def delete(self) -> "InMemoryQueryBuilder":
+        self.operation = "delete"
+        return self
+
+    # Filters (column may be "alias.column" to filter on an embedded resource)
+
+    def eq(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        self.filters.append((column, lambda v: v == value))
+        return self
+
+    def neq(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        self.filters.append((column, lambda v: v != value))
+        return self
+
+    def is_(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        if value in (None, "null"):
+            self.filters.append((column, lambda v: v is None))
+        else:
+            self.filters.append((column, lambda v: v is value))
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> "InMemoryQueryBuilder":
+        allowed = set(values)
+        self.filters.append((column, lambda v: v in allowed))
+        return self
+
+    def gt(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        self.filters.append((column, lambda v: v is not None and v > value))
+        return self
+
+    def gte(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        self.filters.append((column, lambda v: v is not None and v >= value))
+        return self
+
+    def lt(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        self.filters.append((column, lambda v: v is not None and v < value))
+        return self
+
+    def lte(self, column: str, value: Any) -> "InMemoryQueryBuilder":
+        self.filters.append((column, lambda v: v is not None and v <= value))
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False) -> "InMemoryQueryBuilder":
+        # PostgREST modifiers may be given in the column too, e.g. "updated_at.desc.nullslast"
+        column, *modifiers = column.split(".")
+        desc = desc or "desc" in modifiers
+        # Postgres puts NULL last in ascending and first in descending order unless told otherwise
+        nulls_first = nullsfirst or "nullsfirst" in modifiers or (desc and "nullslast" not in modifiers)
+        self.order_by.append((column, desc, nulls_first))
+        return self
+
+    def limit(self, size: int) -> "InMemoryQueryBuilder":
+        self.row_limit = size
+        return self
+
+    def offset(self, size: int) -> "InMemoryQueryBuilder":
+        self.row_offset = size
+        return self
+
+    def single(self) -> "InMemoryQueryBuilder":
+        self.single_row = True
+        return self
+
+    async def execute(self) -> InMemoryResponse:
+        """Run the query against the in-memory tables."""
+        await self.client._round_trip()
+
+        rows = self.client.tables.setdefault(self.table_name, [])
+
+        if self.operation in ("insert", "upsert"):
+            return InMemoryResponse(self._write(rows))
+
+        columns, embeds = self._parse_columns()
+        related = {table: self.client._id_index(table) for _, table, _, _, _ in embeds}
+
+        matched = []
+        for row in rows:
+            view = dict(row)
+            for alias, table, fk_column, inner, _ in embeds:
+                view[alias] = related[table].get(row.get(fk_column))
+            if all(self._matches(view, column, predicate) for column, predicate in self.filters):
+                matched.append((row, view))
+
+        if self.operation != "select":
+            matched = [row for row, _ in matched]
+
+        if self.operation == "update":
+            payload = _encode(self.payload)
+            for row in matched:
+                row.update(payload)
+            return InMemoryResponse([dict(row) for row in matched])
+
+        if self.operation == "delete":
+            self.client.tables[self.table_name] = [row for row in rows if row not in matched]
+            return InMemoryResponse([dict(row) for row in matched])
+
+        for column, desc, nulls_first in reversed(self.order_by):
+            present = [item for item in matched if item[0].get(column) is not None]
+            missing = [item for item in matched if item[0].get(column) is None]
+            present.sort(key=lambda item: item[0].get(column), reverse=desc)
+            matched = missing + present if nulls_first else present + missing
+
+        total = len(matched)
+        matched = matched[self.row_offset:]
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+
+        data = [self._project(view, columns, embeds) for _, view in matched]
+
+        if self.single_row:
+            if len(data) != 1:
+                raise ValueError(f"Expected a single row from {self.table_name}, got {len(data)}")
+            return InMemoryResponse(data[0])
+
+        return InMemoryResponse(data, total if self.count_mode else None)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert or upsert the payload, returning the stored rows."""
+        payload = _encode(self.payload if isinstance(self.payload, list) else [self.payload])
+        conflict_keys = [key.strip() for key in self.on_conflict.split(",") if key.strip()]
+
+        written = []
+        for item in payload:
+            record = dict(item)
+            record.setdefault("id", str(uuid.uuid4()))
+            record.setdefault("created_at", datetime.utcnow().isoformat())
+
+            existing = None
+            if self.operation == "upsert" and conflict_keys:
+                existing = next(
+                    (row for row in rows if all(row.get(k) == record.get(k) for k in conflict_keys)),
+                    None
+                )
+
+            if existing is not None:
+                record.pop("id", None)
+                record.pop("created_at", None)
+                existing.update(record)
+                written.append(dict(existing))
+            else:
+                rows.append(record)
+                written.append(dict(record))
+
+        return written
+
+    def _parse_columns(self) -> tuple:
+        """Split the select list into plain columns and embedded resources."""
+        columns, embeds = [], []
+        depth, current = 0, ""
+        for char in self.columns + ",":
+            if char == "," and depth == 0:
+                item = current.strip()
+                current = ""
+                if not item:
+                    continue
+                match = EMBED_PATTERN.match(item)
+                if match:
+                    alias, table, hint, inner, embed_columns = match.groups()
+                    embeds.append((alias or table, table, self._fk_column(hint), bool(inner), embed_columns))
+                else:
+                    columns.append(item)
+                continue
+            depth += (char == "(") - (char == ")")
+            current += char
+        return columns, embeds
+
+    def _fk_column(self, hint: str) -> str:
+        """Map a foreign key hint (constraint or column name) to the local column."""
+        prefix = f"{self.table_name}_"
+        if hint.startswith(prefix) and hint.endswith("_fkey"):
+            return hint[len(prefix):-len("_fkey")]
+        return hint
+
+    def _matches(self, view: Dict[str, Any], column: str, predicate: Callable[[Any], bool]) -> bool:
+        """Evaluate a filter against a row and its embedded resources."""
+        if "." in column:
+            alias, column = column.split(".", 1)
+            embedded = view.get(alias)
+            return embedded is not None and predicate(embedded.get(column))
+        return predicate(view.get(column))
+
+    def _project(self, view: Dict[str, Any], columns: List[str], embeds: List[tuple]) -> Dict[str, Any]:
+        """Apply the select list to a row."""
+        if columns == ["*"] and not embeds:
+            return {key: value for key, value in view.items()}
+        aliases = {alias for alias, _, _, _, _ in embeds}
+        projected = {}
+        for column in columns:
+            if column == "*":
+                projected.update({key: value for key, value in view.items() if key not in aliases})
+            else:
+                projected[column] = view.get(column)
+        for alias, _, _, _, embed_columns in embeds:
+            embedded = view.get(alias)
+            if embedded is None:
+                projected[alias] = None
+            elif embed_columns.strip() == "*":
+                projected[alias] = dict(embedded)
+            else:
+                names = [name.strip() for name in embed_columns.split(",") if name.strip()]
+                projected[alias] = {name: embedded.get(name) for name in names}
+        return projected
+
+
+class InMemoryRpcBuilder:
+    """Call of an emulated database function."""
+
+    def __init__(self, client: "InMemoryDatabaseClient", name: str, params: Dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    async def execute(self) -> InMemoryResponse:
+        await self.client._round_trip()
+        function = RPC_FUNCTIONS.get(self.name)
+        if function is None:
+            raise ValueError(f"Unknown database function {self.name}")
+        return InMemoryResponse(function(self.client.tables, _encode(self.params)))
+
+
+class InMemoryDatabaseClient:
+    """Drop-in replacement for the async PostgREST client used by DatabaseService."""
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        latency: float = 0.0,
+        blocking: bool = False
+    ):
+        self.tables: Dict[str, List[Dict[str, Any]]] = tables if tables is not None else {}
+        self.latency = latency
+        self.blocking = blocking
+        self.request_count = 0
+        self._indexes: Dict[str, tuple] = {}
+
+    def table(self, name: str) -> InMemoryQueryBuilder:
+        return InMemoryQueryBuilder(self, name)
+
+    def from_(self, name: str) -> InMemoryQueryBuilder:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> InMemoryRpcBuilder:
+        return InMemoryRpcBuilder(self, name, params or {})
+
+    def _id_index(self, table: str) -> Dict[Any, Dict[str, Any]]:
+        """Rows of a table keyed by id, rebuilt when the table changes size."""
+        rows = self.tables.get(table, [])
+        cached = self._indexes.get(table)
+        if cached is None or cached[0] is not rows or cached[1] != len(rows):
+            cached = (rows, len(rows), {row.get("id"): row for row in rows})
+            self._indexes[table] = cached
+        return cached[2]
+
+    async def _round_trip(self):
+        """Account for one request and simulate its latency."""
+        self.request_count += 1
+        if self.latency:
+            if self.blocking:
+                time.sleep(self.latency)
+            else:
+                await asyncio.sleep(self.latency)
+
+    async def aclose(self):
+        """Nothing to release; present for interface parity."""
+        return None
+
+
+def _encode(payload: Any) -> Any:
+    """Round-trip a request payload through JSON, as PostgREST sends it.
+
+    Raises:
+        TypeError: If the payload holds a value JSON cannot encode
+    """
+    return json.loads(json.dumps(payload))
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _ai_usage_summary(tables: Dict[str, List[Dict[str, Any]]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Python equivalent of the ai_usage_summary function (docs/architecture/AI_USAGE_SUMMARY.sql)."""
+    start = _parse_timestamp(params.get("start_param"))
+    end = _parse_timestamp(params.get("end_param"))
+
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for row in tables.get("ai_usage_logs", []):
+        if row.get("project_id") != params.get("project_id_param"):
+            continue
+        # Rows without an explicit timestamp get the column default, like created_at here
+        timestamp = _parse_timestamp(row.get("timestamp") or row.get("created_at"))
+        if (start and timestamp < start) or (end and timestamp > end):
+            continue
+
+        key = (timestamp.date().isoformat(), row.get("operation_type"), row.get("ai_provider"), row.get("ai_model"))
+        group = groups.setdefault(key, {
+            "day": key[0], "operation_type": key[1], "ai_provider": key[2], "ai_model": key[3],
+            "requests": 0, "failures": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0,
+            "estimated_cost": 0.0
+        })
+        input_tokens = row.get("input_tokens") or 0
+        output_tokens = row.get("output_tokens") or 0
+        total_tokens = row.get("total_tokens")
+        group["requests"] += 1
+        group["failures"] += row.get("success") is False
+        group["input_tokens"] += input_tokens
+        group["output_tokens"] += output_tokens
+        group["total_tokens"] += total_tokens if total_tokens is not None else input_tokens + output_tokens
+        group["estimated_cost"] += row.get("estimated_cost") or 0
+
+    return [groups[key] for key in sorted(groups, key=lambda key: tuple(str(part) for part in key))]
+
+
+ROLLUP_KEY = ("granularity", "bucket_start", "project_id", "ai_provider", "ai_model")
+ROLLUP_COUNTERS = (
+    "requests", "failures", "input_tokens", "output_tokens", "total_tokens",
+    "estimated_cost", "latency_count", "latency_sum_ms"
+)
+
+
+def _apply_ai_usage_rollups(tables: Dict[str, List[Dict[str, Any]]], params: Dict[str, Any]) -> int:
+    """Python equivalent of the apply_ai_usage_rollups function (docs/architecture/AI_USAGE_ROLLUPS.sql)."""
+    rollups = tables.setdefault("ai_usage_rollups", [])
+    index = {tuple(row[key] for key in ROLLUP_KEY): row for row in rollups}
+
+    for delta in params.get("deltas", []):
+        key = tuple(delta[name] for name in ROLLUP_KEY)
+        row = index.get(key)
+        if row is None:
+            row = {name: delta[name] for name in ROLLUP_KEY}
+            row.update({counter: 0 for counter in ROLLUP_COUNTERS})
+            row["latency_buckets"] = []
+            rollups.append(row)
+            index[key] = row
+
+        for counter in ROLLUP_COUNTERS:
+            row[counter] += delta.get(counter) or 0
+        stored, added = row["latency_buckets"], delta.get("latency_buckets") or []
+        row["latency_buckets"] = [
+            (stored[i] if i < len(stored) else 0) + (added[i] if i < len(added) else 0)
+            for i in range(max(len(stored), len(added)))
+        ]
+        row["updated_at"] = datetime.utcnow().isoformat()
+
+    return len(params.get("deltas", []))
+
+
+def _replace_ai_usage_rollups(tables: Dict[str, List[Dict[str, Any]]], params: Dict[str, Any]) -> int:
+    """Python equivalent of the replace_ai_usage_rollups function (docs/architecture/AI_USAGE_ROLLUPS.sql)."""
+    start = _parse_timestamp(params.get("start_param"))
+    end = _parse_timestamp(params.get("end_param"))
+    tables["ai_usage_rollups"] = [
+        row for row in tables.get("ai_usage_rollups", [])
+        if not start <= _parse_timestamp(row["bucket_start"]) < end
+    ]
+    return _apply_ai_usage_rollups(tables, params)
+
+
+RPC_FUNCTIONS: Dict[str, Callable[[Dict[str, List[Dict[str, Any]]], Dict[str, Any]], Any]] = {
+    "ai_usage_summary": _ai_usage_summary,
+    "apply_ai_usage_rollups": _apply_ai_usage_rollups,
+    "replace_ai_usage_rollups": _replace_ai_usage_rollups,
+}
@@ -5,25 +5,37 @@ Handles API calls, token counting, and cost calculation.
 
 import asyncio
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 import openai
 from openai import AsyncOpenAI
-import tiktoken
 
 from config import get_settings
 from models import TokenUsage, AIProviderConfig, ValidationContext, AIProposal, ValidationIssue
+from .answer_stream import AnswerStreamParser
 from .base_ai_service import BaseAIService
+from .task_index import format_relevant_tasks
+from .tokenizer import get_encoding
+
+
+def _cached_tokens(usage: Any) -> int:
+    """Prompt tokens served from OpenAI's prompt cache (reported by newer API versions)."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
 
 
 class OpenAIService(BaseAIService):
     """OpenAI service implementation."""
     
-    def __init__(self, config: AIProviderConfig):
+    def __init__(self, config: AIProviderConfig, client: Optional[AsyncOpenAI] = None):
         super().__init__(config)
-        self.client = AsyncOpenAI(api_key=config.api_key)
-        self.encoding = tiktoken.encoding_for_model(config.model)
+        self.client = client or AsyncOpenAI(api_key=config.api_key)
         self.settings = get_settings()
     
+    @property
+    def encoding(self):
+        """Tokenizer for the configured model (loaded once per process)."""
+        return get_encoding(self.config.model)
+    
     async def validate_component(
         self, 
         context: ValidationContext,
@@ -58,7 +70,7 @@ class OpenAIService(BaseAIService):
             completion_tokens = response.usage.completion_tokens
             total_tokens = response.usage.total_tokens
             
-            cost = self._calculate_cost(prompt_tokens, completion_tokens)
+            cost = self._calculate_cost(prompt_tokens, completion_tokens, _cached_tokens(response.usage))
             
             token_usage = TokenUsage(
                 prompt_tokens=prompt_tokens,
@@ -205,21 +217,6 @@ Example for title-description mismatch:
             print(f"Error parsing OpenAI response: {e}")
             return [], []
     
-    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
-        """Calculate the cost based on token usage."""
-        
-        # Get cost per 1k tokens based on model
-        if self.config.model == "gpt-4o-mini":
-            cost_per_1k = self.settings.openai_gpt4o_mini_cost_per_1k_tokens
-        elif self.config.model == "gpt-4o":
-            cost_per_1k = self.settings.openai_gpt4o_cost_per_1k_tokens
-        else:
-            # Default to gpt-4o-mini pricing
-            cost_per_1k = self.settings.openai_gpt4o_mini_cost_per_1k_tokens
-        
-        total_tokens = prompt_tokens + completion_tokens
-        return (total_tokens / 1000) * cost_per_1k
-    
     def _format_component_data(self, data: Dict[str, Any]) -> str:
         """Format component data for the prompt."""
         formatted = []
@@ -242,6 +239,15 @@ Example for title-description mismatch:
             print(f"OpenAI connection test failed: {e}")
             return False
     
+    async def check_reachability(self) -> bool:
+        """Check the OpenAI API is reachable by looking up the model (no tokens spent)."""
+        try:
+            await self.client.models.retrieve(self.config.model, timeout=10)
+            return True
+        except Exception as e:
+            print(f"OpenAI reachability check failed: {e}")
+            return False
+    
     async def answer_question(
         self,
         question: str,
@@ -257,53 +263,12 @@ Example for title-description mismatch:
         start_time = time.time()
         
         try:
-            # Build context-aware prompt
-            context_info = ""
-            print(f"[DEBUG] Context data received: {context_data}")
-            if context_data:
-                if 'project_name' in context_data:
-                    context_info += f"\nProject: {context_data['project_name']}"
-                if 'project_description' in context_data:
-                    context_info += f"\nDescription: {context_data['project_description']}"
-                if 'task_count' in context_data:
-                    context_info += f"\nTotal Tasks: {context_data['task_count']}"
-                if 'completed_tasks' in context_data:
-                    context_info += f"\nCompleted Tasks: {context_data['completed_tasks']}"
-                if 'completion_percentage' in context_data:
-                    context_info += f"\nCompletion: {context_data['completion_percentage']}%"
-                if 'status_breakdown' in context_data:
-                    context_info += f"\nStatus Breakdown: {context_data['status_breakdown']}"
-                if 'priority_breakdown' in context_data:
-                    context_info += f"\nPriority Breakdown: {context_data['priority_breakdown']}"
-                if 'tasks' in context_data and context_data['tasks']:
-                    context_info += f"\n\nTask Details:"
-                    for task in context_data['tasks']:
-                        context_info += f"\n- {task.get('title', 'Untitled')} (Status: {task.get('status', 'unknown')}, Priority: {task.get('priority', 'unknown')})"
-            
-            print(f"[DEBUG] Context info built: {context_info}")
-            
-            prompt = f"""
-User Question: {question}
-
-Project Context:{context_info}
-Project ID: {project_id}
-
-Please provide a helpful, concise answer to the user's question. If you reference specific information, list your sources as evidence.
-
-Return your response in this JSON format:
-{{
-  "answer": "your detailed answer here",
-  "evidence": ["source 1", "source 2"]
-}}
-"""
+            prompt = self._build_answer_prompt(question, project_id, context_data)
             
             # Make the API call
             response = await self.client.chat.completions.create(
                 model=self.config.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful project management assistant with access to project data including tasks, status, priorities, and progress. You can view and analyze tasks, provide insights about project progress, and answer questions about specific tasks or overall project status. Be specific and reference actual task data when available."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_answer_messages(prompt),
                 max_tokens=self.config.max_tokens,
                 temperature=0.7,  # Slightly higher for natural conversation
                 timeout=self.config.timeout
@@ -327,7 +292,7 @@ Return your response in this JSON format:
             completion_tokens = response.usage.completion_tokens
             total_tokens = response.usage.total_tokens
             
-            cost = self._calculate_cost(prompt_tokens, completion_tokens)
+            cost = self._calculate_cost(prompt_tokens, completion_tokens, _cached_tokens(response.usage))
             
             token_usage = TokenUsage(
                 prompt_tokens=prompt_tokens,
@@ -347,6 +312,119 @@ Return your response in this JSON format:
                 estimated_cost=0.0
             )
     
+    def _build_answer_prompt(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the Q&A prompt with project context."""
+        
+        # Build context-aware prompt
+        context_info = ""
+        if context_data:
+            if 'project_name' in context_data:
+                context_info += f"\nProject: {context_data['project_name']}"
+            if 'project_description' in context_data:
+                context_info += f"\nDescription: {context_data['project_description']}"
+            if 'task_count' in context_data:
+                context_info += f"\nTotal Tasks: {context_data['task_count']}"
+            if 'completed_tasks' in context_data:
+                context_info += f"\nCompleted Tasks: {context_data['completed_tasks']}"
+            if 'completion_percentage' in context_data:
+                context_info += f"\nCompletion: {context_data['completion_percentage']}%"
+            if 'status_breakdown' in context_data:
+                context_info += f"\nStatus Breakdown: {context_data['status_breakdown']}"
+            if 'priority_breakdown' in context_data:
+                context_info += f"\nPriority Breakdown: {context_data['priority_breakdown']}"
+            if 'relevant_tasks' in context_data:
+                context_info += format_relevant_tasks(context_data['relevant_tasks'])
+            elif 'tasks' in context_data and context_data['tasks']:
+                context_info += f"\n\nTask Details:"
+                for task in context_data['tasks']:
+                    context_info += f"\n- {task.get('title', 'Untitled')} (Status: {task.get('status', 'unknown')}, Priority: {task.get('priority', 'unknown')})"
+        
+        prompt = f"""
+User Question: {question}
+
+Project Context:{context_info}
+Project ID: {project_id}
+
+Please provide a helpful, concise answer to the user's question. If you reference specific information, list your sources as evidence.
+
+Return your response in this JSON format:
+{{
+  "answer": "your detailed answer here",
+  "evidence": ["source 1", "source 2"]
+}}
+"""
+        
+        return prompt
+    
+    def _build_answer_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Build the chat messages for a Q&A prompt."""
+        return [
+            {"role": "system", "content": "You are a helpful project management assistant with access to project data including tasks, status, priorities, and progress. You can view and analyze tasks, provide insights about project progress, and answer questions about specific tasks or overall project status. Be specific and reference actual task data when available."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    async def answer_question_stream(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a user question, yielding answer text as tokens arrive."""
+        
+        prompt = self._build_answer_prompt(question, project_id, context_data)
+        messages = self._build_answer_messages(prompt)
+        parser = AnswerStreamParser()
+        
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.config.model,
+                messages=messages,
+                max_tokens=self.config.max_tokens,
+                temperature=0.7,  # Slightly higher for natural conversation
+                timeout=self.config.timeout,
+                stream=True
+            )
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    text = parser.feed(content)
+                    if text:
+                        yield {"type": "answer", "text": text}
+        except Exception as e:
+            print(f"OpenAI Q&A stream error: {e}")
+            error_text = f"I'm sorry, I encountered an error while processing your question: {str(e)}"
+            yield {"type": "answer", "text": error_text, "error": True}
+            yield {"type": "complete", "answer": error_text, "evidence": [], "token_usage": TokenUsage(
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                estimated_cost=0.0
+            )}
+            return
+        
+        answer, evidence = parser.finish()
+        
+        # Streamed responses carry no usage block, so count tokens locally
+        prompt_tokens = sum(len(self.encoding.encode(message["content"])) + 4 for message in messages) + 3
+        completion_tokens = len(self.encoding.encode(parser.buffer))
+        
+        token_usage = TokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            estimated_cost=self._calculate_cost(prompt_tokens, completion_tokens)
+        )
+        
+        yield {"type": "complete", "answer": answer, "evidence": evidence, "token_usage": token_usage}
+    
     async def generate_insights(
         self,
         prompt: str,
@@ -382,7 +460,7 @@ Return your response in this JSON format:
             completion_tokens = response.usage.completion_tokens
             total_tokens = response.usage.total_tokens
             
-            cost = self._calculate_cost(prompt_tokens, completion_tokens)
+            cost = self._calculate_cost(prompt_tokens, completion_tokens, _cached_tokens(response.usage))
             
             token_usage = TokenUsage(
                 prompt_tokens=prompt_tokens,
@@ -0,0 +1,249 @@
+"""
+Bulk assessment of a portfolio of projects.
+
+A portfolio run assesses many projects (a list of ids, or every project of
+an organization) in the background. Contexts and AI configurations are
+loaded in chunks with a handful of queries per chunk, the next chunk being
+prefetched while the current one is assessed. A fixed pool of workers makes
+the provider calls, each admitted by the rate limiter like a single
+/assess-project request and retried after the advertised delay when a limit
+is hit. Insights are buffered and saved with one insert per batch. Progress
+is kept per run and can be polled while the run is going.
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from config import get_settings, Settings
+from models import AIProposal
+from .assessment_service import ProjectAssessmentService
+from .cost_estimator import BudgetExceeded
+from .database_service import DatabaseService
+from .rate_limiter import RateLimiter, RateLimitExceeded
+from .validator_service import ValidatorService
+
+
+class PortfolioRun:
+    """Progress and per-project results of one portfolio run."""
+
+    def __init__(self, project_ids: List[str], organization_id: Optional[str] = None):
+        self.run_id = str(uuid.uuid4())
+        self.organization_id = organization_id
+        self.project_ids = project_ids
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.completed = 0
+        self.failed = 0
+        self.insights_saved = 0
+        self.rate_limit_waits = 0
+
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def record(self, project_id: str, status: str, **details: Any):
+        self.results[project_id] = {"status": status, **details}
+        if status == "completed":
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def to_dict(self, include_results: bool = False) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at:
+            elapsed = int(((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds() * 1000)
+
+        summary = {
+            "run_id": self.run_id,
+            "status": self.status,
+            "organization_id": self.organization_id,
+            "total_projects": len(self.project_ids),
+            "completed_projects": self.completed,
+            "failed_projects": self.failed,
+            "pending_projects": len(self.project_ids) - self.completed - self.failed,
+            "insights_saved": self.insights_saved,
+            "rate_limit_waits": self.rate_limit_waits,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed_ms": elapsed,
+            "error": self.error
+        }
+        if include_results:
+            summary["results"] = self.results
+        return summary
+
+
+class PortfolioAssessmentService:
+    """Runs and tracks bulk project assessments."""
+
+    def __init__(
+        self,
+        assessment_service: ProjectAssessmentService,
+        validator_service: ValidatorService,
+        rate_limiter: RateLimiter,
+        settings: Optional[Settings] = None
+    ):
+        self.assessment_service = assessment_service
+        self.validator_service = validator_service
+        self.db_service: DatabaseService = assessment_service.db_service
+        self.rate_limiter = rate_limiter
+        self.settings = settings or get_settings()
+
+        self.concurrency = max(1, self.settings.portfolio_assessment_concurrency)
+        self.chunk_size = max(1, self.settings.portfolio_context_batch_size)
+        self.insight_batch_size = max(1, self.settings.portfolio_insight_batch_size)
+        self.max_retries = self.settings.portfolio_rate_limit_retries
+
+        self.runs: "OrderedDict[str, PortfolioRun]" = OrderedDict()
+
+    async def start_run(
+        self,
+        project_ids: Optional[List[str]] = None,
+        organization_id: Optional[str] = None
+    ) -> PortfolioRun:
+        """Start assessing a list of projects, or every project of an organization, in the background.
+
+        Raises:
+            ValueError: If neither projects nor an organization are given
+        """
+        if project_ids:
+            project_ids = list(dict.fromkeys(project_ids))
+        elif organization_id:
+            project_ids = await self.db_service.get_organization_project_ids(organization_id)
+        else:
+            raise ValueError("project_ids or organization_id is required")
+
+        run = PortfolioRun(project_ids, organization_id)
+        self.runs[run.run_id] = run
+        self._evict_finished_runs()
+        run.task = asyncio.create_task(self.execute(run))
+        return run
+
+    def get_run(self, run_id: str) -> Optional[PortfolioRun]:
+        return self.runs.get(run_id)
+
+    def _evict_finished_runs(self):
+        finished = [run_id for run_id, run in self.runs.items() if run.done]
+        for run_id in finished[:max(0, len(self.runs) - self.settings.portfolio_max_runs)]:
+            del self.runs[run_id]
+
+    async def execute(self, run: PortfolioRun):
+        """Assess every project of a run and save their insights."""
+        run.status = "running"
+        run.started_at = datetime.utcnow()
+
+        chunks = [run.project_ids[i:i + self.chunk_size] for i in range(0, len(run.project_ids), self.chunk_size)]
+        loads: Dict[int, asyncio.Task] = {}
+        pending: Dict[str, List[AIProposal]] = {}
+        save_lock = asyncio.Lock()
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, project_id in enumerate(run.project_ids):
+            queue.put_nowait((index // self.chunk_size, project_id))
+
+        def load(chunk_index: int) -> asyncio.Task:
+            if chunk_index not in loads and chunk_index < len(chunks):
+                loads[chunk_index] = asyncio.create_task(self._load_chunk(chunks[chunk_index]))
+                # Every project two chunks back has been taken by a worker already
+                loads.pop(chunk_index - 2, None)
+            return loads.get(chunk_index)
+
+        async def flush(force: bool = False):
+            async with save_lock:
+                if not pending or (not force and sum(map(len, pending.values())) < self.insight_batch_size):
+                    return
+                batch = dict(pending)
+                pending.clear()
+                saved = await self.assessment_service.save_insights_batch(batch)
+                for project_id, rows in saved.items():
+                    run.insights_saved += len(rows)
+                    run.results[project_id]["insights_saved"] = len(rows)
+
+        async def worker():
+            while not queue.empty():
+                chunk_index, project_id = queue.get_nowait()
+                # Prefetch the next chunk while this one is being assessed
+                load(chunk_index + 1)
+                try:
+                    preloaded = await load(chunk_index)
+                    insights = await self._assess(run, project_id, preloaded)
+                    pending[project_id] = insights
+                    run.record(project_id, "completed", insights=len(insights), insights_saved=0)
+                except BudgetExceeded as e:
+                    run.record(project_id, "failed", error=str(e), reason="budget_exceeded")
+                except RateLimitExceeded as e:
+                    run.record(project_id, "failed", error=str(e), reason="rate_limited")
+                except Exception as e:
+                    print(f"Error assessing project {project_id} in portfolio run {run.run_id}: {e}")
+                    run.record(project_id, "failed", error=str(e), reason="error")
+                    continue
+                await flush()
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(min(self.concurrency, len(run.project_ids)))])
+            await flush(force=True)
+            run.status = "completed"
+        except asyncio.CancelledError:
+            run.status = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Portfolio run {run.run_id} failed: {e}")
+            run.status = "failed"
+            run.error = str(e)
+        finally:
+            for task in loads.values():
+                task.cancel()
+            run.finished_at = datetime.utcnow()
+
+    async def _load_chunk(self, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load the contexts and AI configurations of a chunk of projects."""
+        contexts, configurations = await asyncio.gather(
+            self.db_service.get_project_contexts(project_ids),
+            self.db_service.get_ai_configurations(project_ids)
+        )
+        return {
+            project_id: {"context": contexts[project_id], "configuration": configurations.get(project_id)}
+            for project_id in project_ids
+        }
+
+    async def _assess(self, run: PortfolioRun, project_id: str, preloaded: Dict[str, Dict[str, Any]]) -> List[AIProposal]:
+        """Assess one project, waiting out rate limits up to the retry limit."""
+        project = preloaded[project_id]
+        if not project["context"].get("project"):
+            raise ValueError("Project not found")
+
+        ai_config = self.validator_service.resolve_ai_config(project["configuration"])
+        attempt = 0
+        while True:
+            try:
+                async with self.rate_limiter.admission(project_id, run.organization_id):
+                    return await self.assessment_service.assess_project(project_id, ai_config, project)
+            except RateLimitExceeded as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                run.rate_limit_waits += 1
+                await asyncio.sleep(e.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": len(self.runs),
+            "running": sum(1 for run in self.runs.values() if run.status == "running")
+        }
+
+    async def close(self):
+        """Cancel runs still in progress."""
+        tasks = [run.task for run in self.runs.values() if run.task and not run.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,202 @@
+"""
+Model pricing registry and usage repricing.
+
+Per-model input, cached-input and output rates (USD per 1k tokens) are
+loaded once per process from ``PRICING_PATH`` and shared by every
+provider and the cost pre-flight. Each model lists its prices with the date
+they took effect, so a call is priced at the rate in force when it was made.
+
+``reprice_usage_logs`` recomputes ``estimated_cost`` for logged usage from
+the registry, e.g. after a price table fix. Usage logs do not record cached
+prompt tokens, so logged prompts are repriced at the full input rate.
+"""
+
+import json
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
+
+from config import get_settings, Settings
+from models import AIModel, ModelPrice
+from .usage_rollups import rebuild_usage_rollups
+
+
+class UnknownModelPrice(KeyError):
+    """Raised when the pricing registry has no price for a model."""
+
+
+def _model_key(model: Union[AIModel, str]) -> str:
+    return model.value if isinstance(model, AIModel) else str(model)
+
+
+def _to_date(value: Union[date, datetime, str, None]) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        return (value.astimezone(timezone.utc) if value.tzinfo else value).date()
+    return value
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class PricingRegistry:
+    """Per-model prices with effective dates."""
+
+    def __init__(self, prices: Dict[str, List[ModelPrice]]):
+        self.prices = {
+            model: sorted(entries, key=lambda entry: entry.effective_from)
+            for model, entries in prices.items() if entries
+        }
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "PricingRegistry":
+        """Load a registry from a JSON file of the form ``{"models": {model: [price, ...]}}``."""
+        data = json.loads(Path(path).read_text())
+        return cls({
+            model: [ModelPrice(**entry) for entry in entries]
+            for model, entries in data["models"].items()
+        })
+
+    def rate(self, model: Union[AIModel, str], at: Union[date, datetime, str, None] = None) -> ModelPrice:
+        """Get the model's price in force on a date (today by default).
+
+        Dates before the first known price use the first price.
+        """
+        entries = self.prices.get(_model_key(model))
+        if not entries:
+            raise UnknownModelPrice(_model_key(model))
+
+        day = _to_date(at) or datetime.now(timezone.utc).date()
+        current = entries[0]
+        for entry in entries:
+            if entry.effective_from > day:
+                break
+            current = entry
+        return current
+
+    def cost(
+        self,
+        model: Union[AIModel, str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        at: Union[date, datetime, str, None] = None
+    ) -> float:
+        """Price a call in USD; ``cached_tokens`` of the prompt are billed at the cached-input rate."""
+        rate = self.rate(model, at)
+        cached = min(max(cached_tokens, 0), prompt_tokens)
+        cached_rate = rate.cached_input if rate.cached_input is not None else rate.input
+        return (
+            (prompt_tokens - cached) * rate.input
+            + cached * cached_rate
+            + completion_tokens * rate.output
+        ) / 1000
+
+
+@lru_cache(maxsize=None)
+def _load_registry(path: str) -> PricingRegistry:
+    registry = PricingRegistry.from_file(path)
+    missing = [model.value for model in AIModel if model.value not in registry.prices]
+    if missing:
+        print(f"Warning: no prices for {', '.join(missing)} in {path}")
+    return registry
+
+
+def get_pricing_registry(settings: Optional[Settings] = None) -> PricingRegistry:
+    """Get the pricing registry for the configured pricing file, loading it at most once."""
+    settings = settings or get_settings()
+    path = Path(settings.pricing_path)
+    if not path.is_absolute():
+        path = Path(__file__).parent.parent / path
+    return _load_registry(str(path))
+
+
+async def reprice_usage_logs(
+    db_service: Any,
+    pricing: Optional[PricingRegistry] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    page_size: int = 1000,
+    dry_run: bool = False,
+    rebuild_rollups: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Recompute ``estimated_cost`` of usage logs from the pricing registry.
+
+    Rows are priced at the rate in force on their timestamp. Rows without an
+    input/output token split or with an unpriced model are skipped, and rows
+    whose cost is unchanged are not written.
+
+    The usage rollups of the days holding repriced rows are then rebuilt, so
+    they report the new costs too. This is on by default when rollups are
+    enabled (``usage_rollups_enabled``).
+
+    Returns:
+        dict: scanned, updated, unchanged, skipped and failed row counts, the
+        total cost before and after repricing, and the rebuilt rollup range
+        (``rollups``, None if nothing was rebuilt)
+    """
+    pricing = pricing or get_pricing_registry()
+    stats = {
+        "scanned": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0,
+        "cost_before": 0.0, "cost_after": 0.0, "rollups": None
+    }
+    if rebuild_rollups is None:
+        rebuild_rollups = db_service.settings.usage_rollups_enabled
+    repriced_timestamps: List[str] = []
+
+    offset = 0
+    while True:
+        rows = await db_service.get_usage_logs_page(offset, page_size, start_date, end_date)
+        if rows is None:
+            raise RuntimeError("Failed to read usage logs")
+        offset += len(rows)
+
+        costs: Dict[Any, float] = {}
+        for row in rows:
+            stats["scanned"] += 1
+            old_cost = float(row.get("estimated_cost") or 0)
+            if row.get("input_tokens") is None or row.get("output_tokens") is None:
+                stats["skipped"] += 1
+                continue
+            try:
+                cost = round(pricing.cost(
+                    row.get("ai_model"), row["input_tokens"], row["output_tokens"], at=row.get("timestamp")
+                ), 6)
+            except (UnknownModelPrice, ValueError):
+                stats["skipped"] += 1
+                continue
+
+            stats["cost_before"] += old_cost
+            stats["cost_after"] += cost
+            if abs(cost - old_cost) < 1e-9:
+                stats["unchanged"] += 1
+            else:
+                costs[row["id"]] = cost
+                if row.get("timestamp"):
+                    repriced_timestamps.append(str(row["timestamp"]))
+
+        if costs:
+            failed = 0 if dry_run else await db_service.update_usage_costs(costs)
+            stats["failed"] += failed
+            stats["updated"] += len(costs) - failed
+
+        if len(rows) < page_size:
+            break
+
+    if rebuild_rollups and not dry_run and stats["updated"] and repriced_timestamps:
+        stats["rollups"] = await rebuild_usage_rollups(
+            db_service,
+            _parse_timestamp(min(repriced_timestamps)),
+            _parse_timestamp(max(repriced_timestamps)),
+            page_size
+        )
+
+    stats["cost_before"] = round(stats["cost_before"], 6)
+    stats["cost_after"] = round(stats["cost_after"], 6)
+    return stats
+
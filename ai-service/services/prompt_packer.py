@@ -0,0 +1,252 @@
+"""
+Token-budgeted packing of project tasks and dependencies into prompts.
+
+Instead of cutting the task list at a fixed count, tasks are ranked by how
+much they matter for an assessment (overdue, in progress, high priority,
+blocking other tasks) and added in that order while they fit a token budget
+counted with the model's tokenizer. Whatever does not fit is summarised in
+one line, so large projects get the most relevant detail and prompt size
+stays predictable.
+
+Anthropic models have no tiktoken encoding; their tokens are counted with
+the default encoding, which is close enough for budgeting. If no encoding
+can be loaded (tiktoken downloads its BPE files on first use), tokens are
+estimated from the text length instead.
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+import tiktoken
+
+from .tokenizer import get_encoding
+
+
+# Characters per token assumed when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+PRIORITY_SCORES = {"critical": 4, "urgent": 4, "high": 3, "medium": 1, "low": 0}
+CLOSED_STATUSES = {"done", "completed", "cancelled"}
+
+
+def count_tokens(text: str, encoding: Optional[tiktoken.Encoding]) -> int:
+    """Count the tokens of a text, estimating from its length without an encoding."""
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=None)
+def load_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Get the model's encoding, or None if it cannot be loaded (remembered, so it is tried once)."""
+    try:
+        return get_encoding(model)
+    except Exception as e:
+        print(f"Tokenizer unavailable for {model}, estimating token counts: {e}")
+        return None
+
+
+def _parse_due(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        due = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return due if due.tzinfo else due.replace(tzinfo=timezone.utc)
+
+
+def _is_overdue(task: Dict[str, Any], now: datetime) -> bool:
+    due = _parse_due(task.get("due_date") or task.get("end_date"))
+    return due is not None and due < now and task.get("status") not in CLOSED_STATUSES
+
+
+def rank_tasks(
+    tasks: List[Dict[str, Any]],
+    dependencies: List[Dict[str, Any]],
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Order tasks by relevance for an assessment, most relevant first.
+
+    Open work outranks closed work; overdue, in-progress, blocked and
+    high-priority tasks rank higher, as do tasks other tasks depend on.
+    Ties keep the original order.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    dependents: Dict[Any, int] = {}
+    prerequisites = set()
+    for dependency in dependencies:
+        dependents[dependency.get("depends_on_task_id")] = dependents.get(dependency.get("depends_on_task_id"), 0) + 1
+        prerequisites.add(dependency.get("task_id"))
+
+    def score(task: Dict[str, Any]) -> int:
+        status = task.get("status")
+        value = PRIORITY_SCORES.get(str(task.get("priority", "")).lower(), 0)
+        if status in CLOSED_STATUSES:
+            return value - 10
+        if _is_overdue(task, now):
+            value += 4
+        if status == "in_progress":
+            value += 3
+        if status == "blocked":
+            value += 3
+        value += min(dependents.get(task.get("id"), 0), 3)
+        if task.get("id") in prerequisites:
+            value += 1
+        return value
+
+    return sorted(tasks, key=score, reverse=True)
+
+
+def format_task(task: Dict[str, Any], description_chars: int, now: Optional[datetime] = None) -> str:
+    """Format one task as a prompt line."""
+    now = now or datetime.now(timezone.utc)
+    details = [task.get("status", "unknown")]
+    if task.get("priority"):
+        details.append(f"{task['priority']} priority")
+    if task.get("due_date"):
+        details.append(f"due {str(task['due_date'])[:10]}")
+    if _is_overdue(task, now):
+        details.append("OVERDUE")
+
+    description = (task.get("description") or "No description").strip()
+    if len(description) > description_chars:
+        description = description[:description_chars].rstrip() + "..."
+
+    return f"- {task.get('title', 'Untitled')} ({', '.join(details)}) - {description}"
+
+
+def _breakdown(tasks: List[Dict[str, Any]], field: str) -> str:
+    counts: Dict[str, int] = {}
+    for task in tasks:
+        value = str(task.get(field) or "unknown")
+        counts[value] = counts.get(value, 0) + 1
+    return ", ".join(f"{value}: {count}" for value, count in sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def _pack_lines(
+    lines: List[str],
+    budget: int,
+    encoding: Optional[tiktoken.Encoding],
+    overflow: Any
+) -> Tuple[List[str], int]:
+    """Take lines in order while they fit the budget, leaving room for the overflow summary.
+
+    Returns:
+        tuple: (packed lines including any overflow summary, number of lines taken)
+    """
+    costs = [count_tokens(line + "\n", encoding) for line in lines]
+    if sum(costs) <= budget:
+        return list(lines), len(lines)
+
+    # The summary of every line is at least as long as the summary of any tail
+    reserve = count_tokens(overflow(len(lines)), encoding)
+    packed: List[str] = []
+    used = 0
+    for line, cost in zip(lines, costs):
+        if used + cost + reserve > budget:
+            break
+        packed.append(line)
+        used += cost
+
+    taken = len(packed)
+    if taken < len(lines):
+        packed.append(overflow(len(lines) - taken))
+    return packed, taken
+
+
+class PromptPacker:
+    """Packs tasks and dependencies into a token budget for one model."""
+
+    def __init__(self, model: str, description_chars: int = 300):
+        self.encoding = load_encoding(model)
+        self.description_chars = description_chars
+
+    def count(self, text: str) -> int:
+        """Count tokens with the model's tokenizer."""
+        return count_tokens(text, self.encoding)
+
+    def pack_in_order(
+        self,
+        tasks: List[Dict[str, Any]],
+        budget: int,
+        now: Optional[datetime] = None
+    ) -> Tuple[str, int]:
+        """Pack tasks that are already in order of relevance into the budget, without re-ranking them.
+
+        Returns:
+            tuple: (tasks text, number of tasks included)
+        """
+        now = now or datetime.now(timezone.utc)
+        task_lines = [format_task(task, self.description_chars, now) for task in tasks]
+        packed, included = _pack_lines(
+            task_lines, max(budget, 0), self.encoding, lambda count: f"... and {count} more relevant tasks not shown"
+        )
+        return "\n".join(packed), included
+
+    def pack(
+        self,
+        tasks: List[Dict[str, Any]],
+        dependencies: List[Dict[str, Any]],
+        budget: int,
+        now: Optional[datetime] = None,
+        max_dependencies: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Pack tasks (up to three quarters of the budget) and then dependencies into the budget.
+
+        Dependencies between tasks that made it into the prompt come first, at
+        most ``max_dependencies`` of them when given.
+
+        Returns:
+            dict: tasks_text, dependencies_text, tasks_included, dependencies_included, tokens
+        """
+        now = now or datetime.now(timezone.utc)
+        budget = max(budget, 0)
+
+        ranked = rank_tasks(tasks, dependencies, now)
+        task_lines = [format_task(task, self.description_chars, now) for task in ranked]
+
+        def task_overflow(count: int) -> str:
+            hidden = ranked[len(ranked) - count:]
+            return (
+                f"... and {count} more tasks not shown "
+                f"(status: {_breakdown(hidden, 'status')}; priority: {_breakdown(hidden, 'priority')})"
+            )
+
+        packed_tasks, tasks_included = _pack_lines(task_lines, budget * 3 // 4, self.encoding, task_overflow)
+        tasks_text = "\n".join(packed_tasks) if tasks else "No tasks found"
+        tasks_tokens = self.count(tasks_text)
+
+        titles = {task.get("id"): task.get("title", "Untitled") for task in tasks}
+        included_ids = {task.get("id") for task in ranked[:tasks_included]}
+        ordered_dependencies = sorted(
+            dependencies,
+            key=lambda dep: (dep.get("task_id") in included_ids) + (dep.get("depends_on_task_id") in included_ids),
+            reverse=True
+        )
+        dependency_lines = [
+            f"- {titles.get(dep.get('task_id'), dep.get('task_id', 'unknown'))} "
+            f"depends on {titles.get(dep.get('depends_on_task_id'), dep.get('depends_on_task_id', 'unknown'))}"
+            for dep in ordered_dependencies[:max_dependencies]
+        ]
+        capped = len(dependencies) - len(dependency_lines)
+
+        packed_dependencies, dependencies_included = _pack_lines(
+            dependency_lines,
+            budget - tasks_tokens,
+            self.encoding,
+            lambda count: f"... and {count + capped} more dependencies not shown"
+        )
+        if capped and dependencies_included == len(dependency_lines):
+            packed_dependencies.append(f"... and {capped} more dependencies not shown")
+        dependencies_text = "\n".join(packed_dependencies) if dependencies else "No dependencies found"
+
+        return {
+            "tasks_text": tasks_text,
+            "dependencies_text": dependencies_text,
+            "tasks_included": tasks_included,
+            "dependencies_included": dependencies_included,
+            "tokens": tasks_tokens + self.count(dependencies_text)
+        }
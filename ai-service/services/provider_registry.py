@@ -0,0 +1,238 @@
+"""
+Process-wide registry of AI provider clients.
+
+Each provider gets one long-lived SDK client backed by a keep-alive
+connection pool, and each (provider, model) pair gets one service instance
+sharing that client. ValidatorService, ProjectAssessmentService and the
+health check all resolve services through the same registry, so TLS
+sessions and tokenizers are reused across requests. When the LLM response
+cache is enabled, services are wrapped so they share one response cache.
+Routed services add failover, hedging and per-provider circuit breakers on
+top (see provider_router.py).
+"""
+
+from typing import Dict, Any, Optional, Union
+
+import httpx
+from openai import AsyncOpenAI
+from anthropic import AsyncAnthropic
+
+from config import get_settings, Settings
+from models import AIProvider, AIModel
+from .base_ai_service import BaseAIService
+from .ai_service_factory import AIServiceFactory
+from .provider_router import ProviderRouter, RoutedAIService
+from .response_cache import ResponseCache, CachedAIService
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response stream that reports back when the response is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that tracks in-flight requests for pool metrics."""
+
+    def __init__(self, pool_size: int, **kwargs):
+        super().__init__(**kwargs)
+        self.pool_size = pool_size
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+
+        response.stream = _TrackedStream(response.stream, self._release)
+        return response
+
+    def _release(self):
+        self.in_flight -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get pool utilization metrics."""
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+
+        return {
+            "pool_size": self.pool_size,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_requests": self.total_requests,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "utilization": round(self.in_flight / self.pool_size, 3) if self.pool_size else 0.0
+        }
+
+
+class ProviderClientRegistry:
+    """Shared AI provider clients and service instances."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.clients: Dict[AIProvider, Any] = {}
+        self.transports: Dict[AIProvider, InstrumentedTransport] = {}
+        self.services: Dict[str, BaseAIService] = {}
+        self.response_cache = ResponseCache(self.settings) if self.settings.llm_cache_enabled else None
+        self.router = ProviderRouter(self.settings)
+
+    def get_api_key(self, provider: AIProvider) -> str:
+        """Get the configured API key for a provider."""
+
+        if provider == AIProvider.OPENAI:
+            api_key = self.settings.openai_api_key
+        elif provider == AIProvider.ANTHROPIC:
+            api_key = self.settings.anthropic_api_key
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+
+        if not api_key:
+            raise ValueError(f"API key not configured for provider: {provider}")
+
+        return api_key
+
+    def get_client(self, provider: Union[AIProvider, str]) -> Any:
+        """Get or create the shared SDK client for a provider."""
+
+        provider = AIProvider(provider)
+
+        if provider not in self.clients:
+            api_key = self.get_api_key(provider)
+            http_client = self._create_http_client(provider)
+
+            if provider == AIProvider.OPENAI:
+                self.clients[provider] = AsyncOpenAI(api_key=api_key, http_client=http_client)
+            else:
+                self.clients[provider] = AsyncAnthropic(api_key=api_key, http_client=http_client)
+
+        return self.clients[provider]
+
+    def get_service(self, provider: Union[AIProvider, str], model: Union[AIModel, str]) -> BaseAIService:
+        """Get or create the AI service for a provider/model pair."""
+
+        provider = AIProvider(provider)
+        model = AIModel(model)
+        service_key = f"{provider.value}_{model.value}"
+
+        if service_key not in self.services:
+            service = AIServiceFactory.create_service(
+                provider=provider,
+                model=model,
+                api_key=self.get_api_key(provider),
+                max_tokens=self.settings.max_tokens_per_request,
+                timeout=self.settings.request_timeout,
+                client=self.get_client(provider)
+            )
+            if self.response_cache:
+                service = CachedAIService(service, self.response_cache)
+            self.services[service_key] = service
+
+        return self.services[service_key]
+
+    def get_routed_service(self, provider: Union[AIProvider, str], model: Union[AIModel, str]) -> BaseAIService:
+        """Get the AI service for a provider/model pair behind failover routing.
+        
+        Fallbacks whose provider has no API key configured are left out.
+        """
+
+        provider = AIProvider(provider)
+        model = AIModel(model)
+        services = [self.get_service(provider, model)]
+
+        for fallback_provider, fallback_model in self.router.fallbacks:
+            if (fallback_provider, fallback_model) == (provider, model):
+                continue
+            try:
+                services.append(self.get_service(fallback_provider, fallback_model))
+            except ValueError:
+                continue
+
+        return RoutedAIService(services, self.router)
+
+    def _create_http_client(self, provider: AIProvider) -> httpx.AsyncClient:
+        """Create a keep-alive HTTP client sized from settings."""
+
+        pool_size = self.settings.ai_http_pool_size
+        transport = InstrumentedTransport(
+            pool_size=pool_size,
+            http2=self.settings.ai_http2_enabled and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=self.settings.ai_http_keepalive_connections,
+                keepalive_expiry=self.settings.ai_http_keepalive_expiry
+            )
+        )
+        self.transports[provider] = transport
+
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=self.settings.request_timeout,
+            follow_redirects=True
+        )
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get connection pool metrics per provider."""
+        return {
+            provider.value: transport.metrics()
+            for provider, transport in self.transports.items()
+        }
+
+    async def close(self):
+        """Close all provider clients and their connection pools."""
+
+        for provider, client in list(self.clients.items()):
+            try:
+                await client.close()
+            except Exception as e:
+                print(f"Error closing {provider.value} client: {e}")
+
+        self.clients.clear()
+        self.transports.clear()
+        self.services.clear()
+
+        if self.response_cache:
+            await self.response_cache.close()
+
+
+# Global registry instance
+_provider_registry: Optional[ProviderClientRegistry] = None
+
+
+def get_provider_registry() -> ProviderClientRegistry:
+    """Get the global provider client registry."""
+    global _provider_registry
+
+    if _provider_registry is None:
+        _provider_registry = ProviderClientRegistry()
+
+    return _provider_registry
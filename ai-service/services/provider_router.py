@@ -0,0 +1,403 @@
+"""
+Provider failover, hedged requests and circuit breakers.
+
+RoutedAIService sends each call to the project's configured provider/model
+and, when that call fails, to the fallbacks listed in AI_FALLBACK_MODELS in
+order. The provider services report failures by returning empty results
+with zero token usage instead of raising, so a call counts as failed when it
+raises or reports no tokens without being a cache hit.
+
+Each provider has a circuit breaker over a sliding window of call outcomes.
+When the error rate reaches the threshold the circuit opens and the provider
+is skipped, so a degraded provider stops costing every request a full
+timeout. After a cool-down the circuit lets one probe call through
+(half-open); its outcome closes or re-opens the circuit.
+
+With hedging enabled, a call still running after the configured percentile
+of the primary's recent latencies gets a second request to the next
+available provider. The first successful response wins and the other call
+is cancelled. Streamed answers fail over but are not hedged.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, Deque, AsyncIterator, Callable, Awaitable
+
+from config import get_settings, Settings
+from models import AIProvider, AIModel, TokenUsage, ValidationContext, ValidationIssue, AIProposal
+from .base_ai_service import BaseAIService
+
+
+UNAVAILABLE_ANSWER = "The AI provider is temporarily unavailable. Please try again shortly."
+
+
+def parse_fallback_models(value: str) -> List[Tuple[AIProvider, AIModel]]:
+    """Parse a comma-separated list of provider:model pairs, skipping invalid entries."""
+    fallbacks = []
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            provider, model = entry.split(":", 1)
+            fallbacks.append((AIProvider(provider.strip()), AIModel(model.strip())))
+        except ValueError:
+            print(f"Skipping invalid fallback model: {entry}")
+    return fallbacks
+
+
+def _zero_usage() -> TokenUsage:
+    return TokenUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0, estimated_cost=0.0)
+
+
+def _succeeded(token_usage: TokenUsage) -> bool:
+    return token_usage.cache_hit or token_usage.total_tokens > 0
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker for one provider."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, error_rate: float, min_requests: int, window_seconds: float, open_seconds: float):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+
+        self.state = self.CLOSED
+        self.outcomes: Deque[Tuple[float, bool]] = deque()
+        self.opened_at = 0.0
+        self.probing = False
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now.
+
+        In the half-open state only one probe call is let through at a time;
+        its outcome must be reported with record() or release().
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self.probing = False
+
+        if self.state == self.HALF_OPEN:
+            if self.probing:
+                return False
+            self.probing = True
+
+        return True
+
+    def record(self, success: bool):
+        """Record the outcome of a call that allow() let through."""
+        now = time.monotonic()
+
+        if self.state == self.HALF_OPEN:
+            self.probing = False
+            if success:
+                self.state = self.CLOSED
+                self.outcomes.clear()
+            else:
+                self._open(now)
+            return
+
+        self.outcomes.append((now, success))
+        while self.outcomes and now - self.outcomes[0][0] > self.window_seconds:
+            self.outcomes.popleft()
+
+        if not success and self.state == self.CLOSED and len(self.outcomes) >= self.min_requests:
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            if failures / len(self.outcomes) >= self.error_rate:
+                self._open(now)
+
+    def release(self):
+        """Forget a call that was cancelled before it finished."""
+        if self.state == self.HALF_OPEN:
+            self.probing = False
+
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.outcomes.clear()
+        self.times_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the breaker state and recent error rate."""
+        failures = sum(1 for _, ok in self.outcomes if not ok)
+        return {
+            "state": self.state,
+            "recent_calls": len(self.outcomes),
+            "recent_error_rate": round(failures / len(self.outcomes), 3) if self.outcomes else 0.0,
+            "times_opened": self.times_opened
+        }
+
+
+class ProviderRouter:
+    """Circuit breakers, latency history and routing counters shared by every routed service."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.fallbacks = parse_fallback_models(self.settings.ai_fallback_models) if self.settings.ai_failover_enabled else []
+        self.hedging_enabled = self.settings.ai_hedging_enabled
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, Deque[float]] = {}
+
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+
+    def breaker(self, service: BaseAIService) -> CircuitBreaker:
+        """Get the circuit breaker of a service's provider."""
+        provider = service.config.provider.value
+        if provider not in self.breakers:
+            self.breakers[provider] = CircuitBreaker(
+                error_rate=self.settings.circuit_breaker_error_rate,
+                min_requests=self.settings.circuit_breaker_min_requests,
+                window_seconds=self.settings.circuit_breaker_window_seconds,
+                open_seconds=self.settings.circuit_breaker_open_seconds
+            )
+        return self.breakers[provider]
+
+    def record(self, service: BaseAIService, success: bool, latency: Optional[float] = None):
+        """Record a call outcome, and its latency when it reached the provider."""
+        self.breaker(service).record(success)
+        if success and latency is not None:
+            key = _service_key(service)
+            if key not in self.latencies:
+                self.latencies[key] = deque(maxlen=self.settings.ai_hedge_latency_window)
+            self.latencies[key].append(latency)
+
+    def hedge_delay(self, service: BaseAIService) -> Optional[float]:
+        """Seconds to wait for a service before hedging, or None without enough history."""
+        if not self.hedging_enabled:
+            return None
+
+        samples = self.latencies.get(_service_key(service))
+        if not samples or len(samples) < self.settings.ai_hedge_min_samples:
+            return None
+
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.settings.ai_hedge_percentile / 100))
+        return max(ordered[index], self.settings.ai_hedge_min_delay_ms / 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker states and routing counters."""
+        return {
+            "fallbacks": [f"{provider.value}:{model.value}" for provider, model in self.fallbacks],
+            "hedging_enabled": self.hedging_enabled,
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "short_circuited": self.short_circuited,
+            "breakers": {provider: breaker.stats() for provider, breaker in self.breakers.items()}
+        }
+
+
+def _service_key(service: BaseAIService) -> str:
+    return f"{service.config.provider.value}_{service.config.model.value}"
+
+
+class RoutedAIService(BaseAIService):
+    """AI service that fails over and hedges across a primary service and its fallbacks."""
+
+    def __init__(self, services: List[BaseAIService], router: ProviderRouter):
+        super().__init__(services[0].config)
+        self.services = services
+        self.primary = services[0]
+        self.router = router
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose the primary service's client, encoding, helpers, etc.
+        return getattr(self.primary, name)
+
+    def _served_by(self, service: BaseAIService, token_usage: TokenUsage):
+        if service is not self.primary:
+            token_usage.provider = service.config.provider.value
+            token_usage.model = service.config.model.value
+
+    async def _call(self, invoke: Callable[[BaseAIService], Awaitable[tuple]], unavailable: Callable[[], tuple]) -> tuple:
+        """Call the services in order until one succeeds, hedging slow calls.
+
+        Every result ends with its TokenUsage. Returns the last failed result
+        when no service succeeds, or unavailable() when every circuit is open.
+        """
+
+        candidates = iter(self.services)
+        pending: Dict[asyncio.Task, Tuple[BaseAIService, float]] = {}
+        result = None
+        hedged = False
+
+        def launch() -> bool:
+            for service in candidates:
+                if self.router.breaker(service).allow():
+                    pending[asyncio.create_task(invoke(service))] = (service, time.monotonic())
+                    return True
+                self.router.short_circuited += 1
+            return False
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and len(pending) == 1:
+                    service, started = next(iter(pending.values()))
+                    delay = self.router.hedge_delay(service)
+                    if delay is not None:
+                        timeout = max(0.0, started + delay - time.monotonic())
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The call is slower than usual: race it against the next provider
+                    hedged = True
+                    if launch():
+                        self.router.hedges += 1
+                    continue
+
+                for task in done:
+                    service, started = pending.pop(task)
+                    if task.exception() is not None:
+                        print(f"AI call to {_service_key(service)} failed: {task.exception()}")
+                        self.router.record(service, False)
+                        continue
+
+                    value = task.result()
+                    token_usage = value[-1]
+                    if _succeeded(token_usage):
+                        self.router.record(service, True, None if token_usage.cache_hit else time.monotonic() - started)
+                        if service is not self.primary:
+                            if hedged and pending:
+                                self.router.hedge_wins += 1
+                            else:
+                                self.router.failovers += 1
+                        self._served_by(service, token_usage)
+                        return value
+
+                    self.router.record(service, False)
+                    result = value
+
+                if not pending:
+                    launch()
+        finally:
+            for task, (service, _) in pending.items():
+                task.cancel()
+                self.router.breaker(service).release()
+
+        return result if result is not None else unavailable()
+
+    async def validate_component(
+        self,
+        context: ValidationContext,
+        validation_scope: str = "selective"
+    ) -> tuple[List[ValidationIssue], List[AIProposal], TokenUsage]:
+        """Validate a component, failing over to fallback providers."""
+        return await self._call(
+            lambda service: service.validate_component(context, validation_scope),
+            lambda: ([], [], _zero_usage())
+        )
+
+    async def answer_question(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, List[str], TokenUsage]:
+        """Answer a question, failing over to fallback providers."""
+        return await self._call(
+            lambda service: service.answer_question(question, project_id, context_data),
+            lambda: (UNAVAILABLE_ANSWER, [], _zero_usage())
+        )
+
+    async def generate_insights(
+        self,
+        prompt: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, TokenUsage]:
+        """Generate insights, failing over to fallback providers."""
+        return await self._call(
+            lambda service: service.generate_insights(prompt, project_id, context_data),
+            lambda: ("[]", _zero_usage())
+        )
+
+    async def answer_question_stream(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an answer, failing over while nothing has been sent to the client.
+
+        Answer text is forwarded as soon as it arrives. Only an error answer
+        sent before any text is held back until its completion, so a provider
+        that fails straight away can be replaced by the next provider unseen.
+        """
+
+        failed_events: List[Dict[str, Any]] = []
+        for service in self.services:
+            breaker = self.router.breaker(service)
+            if not breaker.allow():
+                self.router.short_circuited += 1
+                continue
+
+            started = time.monotonic()
+            held = None
+            streamed = False
+            recorded = False
+            try:
+                async for event in service.answer_question_stream(question, project_id, context_data):
+                    if event["type"] == "complete":
+                        token_usage = event["token_usage"]
+                        success = _succeeded(token_usage)
+                        self.router.record(service, success, None if token_usage.cache_hit else time.monotonic() - started)
+                        recorded = True
+                        if success or streamed:
+                            if success and service is not self.primary:
+                                self.router.failovers += 1
+                                self._served_by(service, token_usage)
+                            if held is not None:
+                                yield held
+                            yield event
+                            return
+                        failed_events = [held, event] if held is not None else [event]
+                        break
+
+                    if event.get("error") and not streamed:
+                        held = event
+                        continue
+                    if held is not None:
+                        yield held
+                        held = None
+                    yield event
+                    streamed = True
+            except Exception as e:
+                print(f"AI stream from {_service_key(service)} failed: {e}")
+                self.router.record(service, False)
+                recorded = True
+                if streamed:
+                    raise
+            finally:
+                if not recorded:
+                    breaker.release()
+
+        if not failed_events:
+            failed_events = [
+                {"type": "answer", "text": UNAVAILABLE_ANSWER},
+                {"type": "complete", "answer": UNAVAILABLE_ANSWER, "evidence": [], "token_usage": _zero_usage()}
+            ]
+        for event in failed_events:
+            yield event
+
+    async def test_connection(self) -> bool:
+        """Test the primary service's connection."""
+        return await self.primary.test_connection()
+
+    async def check_reachability(self) -> bool:
+        """Check the primary service is reachable."""
+        return await self.primary.check_reachability()
@@ -0,0 +1,308 @@
+"""
+Admission control for AI endpoints.
+
+Each project (and, when the caller identifies it, each organization) has
+two token buckets: one for requests per minute and one for AI tokens per
+minute. A request is admitted only if its request buckets have a full token
+and its token buckets are not in debt; AI tokens actually used are debited
+afterwards from the usage log stream, so a project that burns through its
+token budget is held back until the bucket refills. A per-process semaphore
+caps outstanding provider calls; when no slot frees up within the queue
+timeout the request is rejected instead of queueing.
+
+The memory backend keeps buckets per process. The SQLite backend keeps them
+in a file shared by every worker on the host, so limits hold across
+multiple uvicorn workers.
+"""
+
+import asyncio
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple
+
+from config import get_settings, Settings
+
+
+# (bucket key, capacity per minute, cost, minimum level required after the cost)
+BucketCheck = Tuple[str, float, float, float]
+
+# A bucket left alone this long has refilled to capacity even from its deepest
+# debt (one minute's capacity), so dropping it changes nothing
+IDLE_BUCKET_SECONDS = 120.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is not admitted."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def _refill(level: float, updated: float, capacity: float, now: float) -> float:
+    """Bucket level after refilling at capacity per minute since the last update."""
+    return min(capacity, level + (now - updated) * capacity / 60.0)
+
+
+def _try_consume(buckets: Dict[str, Tuple[float, float]], checks: List[BucketCheck], now: float) -> Tuple[Optional[str], float, Dict[str, Tuple[float, float]]]:
+    """Consume from every bucket, or from none if any would drop below its minimum.
+
+    Returns:
+        tuple: (key of the limiting bucket or None, seconds until it allows the request, updated levels)
+    """
+    updates = {}
+    for key, capacity, cost, minimum in checks:
+        level, updated = buckets.get(key, (capacity, now))
+        level = _refill(level, updated, capacity, now)
+        if level - cost < minimum:
+            return key, (minimum + cost - level) * 60.0 / capacity, {}
+        updates[key] = (level - cost, now)
+    return None, 0.0, updates
+
+
+def _debit(buckets: Dict[str, Tuple[float, float]], key: str, capacity: float, amount: float, now: float) -> Tuple[float, float]:
+    """Bucket state after debiting an amount, with debt limited to one minute's capacity."""
+    level, updated = buckets.get(key, (capacity, now))
+    return max(-capacity, _refill(level, updated, capacity, now) - amount), now
+
+
+class MemoryRateLimitBackend:
+    """Per-process bucket store."""
+
+    def __init__(self):
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.swept = time.time()
+
+    def _sweep(self, now: float):
+        """Drop full buckets, at most once per idle period."""
+        if now - self.swept < IDLE_BUCKET_SECONDS:
+            return
+        self.swept = now
+        idle = [key for key, (_, updated) in self.buckets.items() if now - updated > IDLE_BUCKET_SECONDS]
+        for key in idle:
+            del self.buckets[key]
+
+    async def consume(self, checks: List[BucketCheck]) -> Tuple[Optional[str], float]:
+        now = time.time()
+        self._sweep(now)
+        limited, retry_after, updates = _try_consume(self.buckets, checks, now)
+        self.buckets.update(updates)
+        return limited, retry_after
+
+    async def debit(self, key: str, capacity: float, amount: float):
+        self.buckets[key] = _debit(self.buckets, key, capacity, amount, time.time())
+
+    async def close(self):
+        return None
+
+
+class SQLiteRateLimitBackend:
+    """Bucket store in a SQLite file shared by every worker using the same path."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = asyncio.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_buckets_updated ON buckets(updated)")
+        return self.connection
+
+    def _load(self, connection: sqlite3.Connection, keys: List[str]) -> Dict[str, Tuple[float, float]]:
+        placeholders = ",".join("?" for _ in keys)
+        rows = connection.execute(f"SELECT key, level, updated FROM buckets WHERE key IN ({placeholders})", keys)
+        return {key: (level, updated) for key, level, updated in rows}
+
+    def _save(self, connection: sqlite3.Connection, updates: Dict[str, Tuple[float, float]]):
+        # Full buckets are dropped as other buckets are written
+        connection.execute("DELETE FROM buckets WHERE updated < ?", (time.time() - IDLE_BUCKET_SECONDS,))
+        connection.executemany(
+            "INSERT OR REPLACE INTO buckets (key, level, updated) VALUES (?, ?, ?)",
+            [(key, level, updated) for key, (level, updated) in updates.items()]
+        )
+
+    def _consume(self, checks: List[BucketCheck]) -> Tuple[Optional[str], float]:
+        connection = self._connect()
+        # BEGIN IMMEDIATE takes the write lock, so workers cannot interleave
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            buckets = self._load(connection, [check[0] for check in checks])
+            limited, retry_after, updates = _try_consume(buckets, checks, time.time())
+            self._save(connection, updates)
+            connection.execute("COMMIT")
+            return limited, retry_after
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _debit(self, key: str, capacity: float, amount: float):
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            buckets = self._load(connection, [key])
+            self._save(connection, {key: _debit(buckets, key, capacity, amount, time.time())})
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def consume(self, checks: List[BucketCheck]) -> Tuple[Optional[str], float]:
+        async with self.lock:
+            return await asyncio.to_thread(self._consume, checks)
+
+    async def debit(self, key: str, capacity: float, amount: float):
+        async with self.lock:
+            await asyncio.to_thread(self._debit, key, capacity, amount)
+
+    async def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class RateLimiter:
+    """Per-project and per-organization rate limits plus a provider concurrency cap."""
+
+    def __init__(self, settings: Optional[Settings] = None, backend: Optional[Any] = None):
+        self.settings = settings or get_settings()
+        self.enabled = self.settings.rate_limit_enabled
+
+        if backend is not None:
+            self.backend = backend
+        elif self.settings.rate_limit_backend == "sqlite":
+            self.backend = SQLiteRateLimitBackend(self.settings.rate_limit_path)
+        elif self.settings.rate_limit_backend == "memory":
+            self.backend = MemoryRateLimitBackend()
+        else:
+            raise ValueError(f"Unsupported rate limit backend: {self.settings.rate_limit_backend}")
+
+        self.max_concurrent = self.settings.max_concurrent_provider_calls
+        self.slots = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.queue_timeout = self.settings.provider_call_queue_timeout_ms / 1000
+
+        # Usage rows carry only the project, so remember each project's organization
+        # (for the most recently admitted projects)
+        self.max_projects = self.settings.context_cache_max_projects
+        self.project_organizations: "OrderedDict[str, str]" = OrderedDict()
+
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+
+    def _checks(self, project_id: str, organization_id: Optional[str]) -> List[BucketCheck]:
+        checks = [
+            (f"project:{project_id}:requests", self.settings.max_validation_requests_per_minute, 1, 0),
+            (f"project:{project_id}:tokens", self.settings.max_project_tokens_per_minute, 0, 0)
+        ]
+        if organization_id:
+            checks += [
+                (f"organization:{organization_id}:requests", self.settings.max_organization_requests_per_minute, 1, 0),
+                (f"organization:{organization_id}:tokens", self.settings.max_organization_tokens_per_minute, 0, 0)
+            ]
+        return checks
+
+    async def admit(self, project_id: str, organization_id: Optional[str] = None):
+        """Take one request from the project's (and organization's) buckets.
+
+        Raises:
+            RateLimitExceeded: If any bucket is empty or in token debt
+        """
+        if not self.enabled:
+            return
+
+        if organization_id:
+            self.project_organizations[project_id] = organization_id
+            self.project_organizations.move_to_end(project_id)
+            while len(self.project_organizations) > self.max_projects:
+                self.project_organizations.popitem(last=False)
+
+        limited, retry_after = await self.backend.consume(self._checks(project_id, organization_id))
+        if limited:
+            # e.g. "project:<id>:tokens" -> "project_tokens"
+            scope = f"{limited.split(':', 1)[0]}_{limited.rsplit(':', 1)[1]}"
+            self.rejected[scope] = self.rejected.get(scope, 0) + 1
+            raise RateLimitExceeded(scope, retry_after)
+
+        self.admitted += 1
+
+    async def record_usage(self, usage_data: Dict[str, Any]):
+        """Debit the AI tokens of a usage log row from its project's token buckets."""
+        if not self.enabled:
+            return
+
+        project_id = usage_data.get("project_id")
+        tokens = usage_data.get("total_tokens", usage_data.get("tokens_used")) or 0
+        if not project_id or tokens <= 0:
+            return
+
+        try:
+            await self.backend.debit(f"project:{project_id}:tokens", self.settings.max_project_tokens_per_minute, tokens)
+            organization_id = self.project_organizations.get(project_id)
+            if organization_id:
+                await self.backend.debit(
+                    f"organization:{organization_id}:tokens", self.settings.max_organization_tokens_per_minute, tokens
+                )
+        except Exception as e:
+            print(f"Error recording rate limit usage: {e}")
+
+    async def acquire_slot(self):
+        """Take a provider call slot, waiting at most the queue timeout.
+
+        Raises:
+            RateLimitExceeded: If no slot frees up in time
+        """
+        if not self.enabled:
+            return
+
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected["concurrency"] = self.rejected.get("concurrency", 0) + 1
+            raise RateLimitExceeded("concurrency", max(self.queue_timeout, 1.0))
+        self.in_flight += 1
+
+    def release_slot(self):
+        """Return a provider call slot."""
+        if self.enabled:
+            self.in_flight -= 1
+            self.slots.release()
+
+    @asynccontextmanager
+    async def admission(self, project_id: str, organization_id: Optional[str] = None):
+        """Admit a request and hold a provider call slot while it runs."""
+        await self.admit(project_id, organization_id)
+        await self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get admission counters."""
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "provider_calls_in_flight": self.in_flight,
+            "max_concurrent_provider_calls": self.max_concurrent
+        }
+
+    async def close(self):
+        """Release the backend."""
+        await self.backend.close()
+
+
+def retry_after_header(error: RateLimitExceeded) -> Dict[str, str]:
+    """Retry-After header (whole seconds) for a rejected request."""
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
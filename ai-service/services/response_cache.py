@@ -0,0 +1,356 @@
+"""
+Exact-match cache of AI provider responses.
+
+Responses are keyed by a hash of the operation, provider, model, temperature
+and the whitespace-normalized prompt, so repeated identical requests (a task
+title edited back and forth, the same question asked twice) are served
+without a provider call. Entries expire after a TTL and the cache is bounded
+by LRU eviction. The in-memory backend is per process; the SQLite backend
+keeps entries in a file that every worker on the host can share.
+
+Cached results are reported with zero tokens and zero cost and
+``cache_hit=True`` in their ``TokenUsage``.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+from config import get_settings, Settings
+from models import TokenUsage, ValidationContext, ValidationIssue, AIProposal
+from .base_ai_service import BaseAIService
+
+
+class MemoryCacheBackend:
+    """Per-process LRU + TTL store."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if time.time() > expires_at:
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float):
+        self.entries[key] = (value, time.time() + ttl_seconds)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def clear(self):
+        self.entries.clear()
+
+    async def size(self) -> int:
+        return len(self.entries)
+
+    async def close(self):
+        return None
+
+
+class SQLiteCacheBackend:
+    """File-backed LRU + TTL store shared by every worker using the same path."""
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = asyncio.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self.connection.commit()
+        return self.connection
+
+    async def _run(self, operation, *args):
+        # sqlite3 calls block, so run them off the event loop one at a time
+        async with self.lock:
+            return await asyncio.to_thread(operation, *args)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        connection = self._connect()
+        now = time.time()
+        row = connection.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        if now > row[1]:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            connection.commit()
+            return None
+
+        connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        connection.commit()
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Dict[str, Any], ttl_seconds: float):
+        connection = self._connect()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + ttl_seconds, now)
+        )
+
+        count = connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            excess = count - self.max_entries
+            connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+        connection.commit()
+
+    def _clear(self):
+        connection = self._connect()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
+
+    def _size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float):
+        await self._run(self._set, key, value, ttl_seconds)
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    async def size(self) -> int:
+        return await self._run(self._size)
+
+    async def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class ResponseCache:
+    """Response cache with hit/miss counters over a pluggable backend."""
+
+    def __init__(self, settings: Optional[Settings] = None, backend: Optional[Any] = None):
+        self.settings = settings or get_settings()
+        self.ttl_seconds = self.settings.llm_cache_ttl_seconds
+
+        if backend is not None:
+            self.backend = backend
+        elif self.settings.llm_cache_backend == "sqlite":
+            self.backend = SQLiteCacheBackend(self.settings.llm_cache_path, self.settings.llm_cache_max_entries)
+        elif self.settings.llm_cache_backend == "memory":
+            self.backend = MemoryCacheBackend(self.settings.llm_cache_max_entries)
+        else:
+            raise ValueError(f"Unsupported LLM cache backend: {self.settings.llm_cache_backend}")
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(operation: str, provider: str, model: str, temperature: float, prompt: str) -> str:
+        """Hash the request parameters and whitespace-normalized prompt."""
+        normalized = " ".join(prompt.split())
+        material = json.dumps([operation, provider, model, temperature, normalized])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response, counting the hit or miss."""
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            print(f"LLM cache read error: {e}")
+            self.errors += 1
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store a response."""
+        try:
+            await self.backend.set(key, value, self.ttl_seconds)
+            self.stores += 1
+        except Exception as e:
+            print(f"LLM cache write error: {e}")
+            self.errors += 1
+
+    async def clear(self):
+        """Drop every cached response."""
+        await self.backend.clear()
+
+    async def close(self):
+        """Release the backend."""
+        await self.backend.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": await self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.backend.evictions,
+            "errors": self.errors
+        }
+
+
+def cached_usage() -> TokenUsage:
+    """Token usage reported for a cached response."""
+    return TokenUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0, estimated_cost=0.0, cache_hit=True)
+
+
+class CachedAIService(BaseAIService):
+    """AI service wrapper that serves repeated requests from a ResponseCache.
+
+    Only successful provider responses are cached; the services report
+    failures with zero token usage, and those are never stored.
+    """
+
+    def __init__(self, service: BaseAIService, cache: ResponseCache):
+        super().__init__(service.config)
+        self.service = service
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose the wrapped service's client, encoding, helpers, etc.
+        return getattr(self.service, name)
+
+    def _key(self, operation: str, prompt: str, temperature: Optional[float] = None) -> str:
+        return self.cache.make_key(
+            operation,
+            self.config.provider.value,
+            self.config.model.value,
+            self.config.temperature if temperature is None else temperature,
+            prompt
+        )
+
+    async def validate_component(
+        self,
+        context: ValidationContext,
+        validation_scope: str = "selective"
+    ) -> tuple[List[ValidationIssue], List[AIProposal], TokenUsage]:
+        """Validate a component, using a cached result for an identical prompt."""
+
+        build_prompt = getattr(self.service, "_build_validation_prompt", None)
+        if build_prompt is None:
+            return await self.service.validate_component(context, validation_scope)
+
+        key = self._key("validate_component", build_prompt(context, validation_scope))
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return (
+                [ValidationIssue(**issue) for issue in cached["issues"]],
+                [AIProposal(**proposal) for proposal in cached["proposals"]],
+                cached_usage()
+            )
+
+        issues, proposals, token_usage = await self.service.validate_component(context, validation_scope)
+        if token_usage.total_tokens:
+            await self.cache.set(key, {
+                "issues": [issue.model_dump(mode="json") for issue in issues],
+                "proposals": [proposal.model_dump(mode="json") for proposal in proposals]
+            })
+        return issues, proposals, token_usage
+
+    async def answer_question(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, List[str], TokenUsage]:
+        """Answer a question, using a cached answer for an identical prompt."""
+
+        build_prompt = getattr(self.service, "_build_answer_prompt", None)
+        if build_prompt is None:
+            return await self.service.answer_question(question, project_id, context_data)
+
+        key = self._key("answer_question", build_prompt(question, project_id, context_data), 0.7)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached["answer"], cached["evidence"], cached_usage()
+
+        answer, evidence, token_usage = await self.service.answer_question(question, project_id, context_data)
+        if token_usage.total_tokens:
+            await self.cache.set(key, {"answer": answer, "evidence": evidence})
+        return answer, evidence, token_usage
+
+    async def answer_question_stream(
+        self,
+        question: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an answer, replaying a cached answer in one event when available."""
+
+        build_prompt = getattr(self.service, "_build_answer_prompt", None)
+        key = None
+        if build_prompt is not None:
+            key = self._key("answer_question", build_prompt(question, project_id, context_data), 0.7)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                yield {"type": "answer", "text": cached["answer"]}
+                yield {"type": "complete", "answer": cached["answer"], "evidence": cached["evidence"], "token_usage": cached_usage()}
+                return
+
+        async for event in self.service.answer_question_stream(question, project_id, context_data):
+            if event["type"] == "complete" and key and event["token_usage"].total_tokens:
+                await self.cache.set(key, {"answer": event["answer"], "evidence": event["evidence"]})
+            yield event
+
+    async def test_connection(self) -> bool:
+        """Test the wrapped service's connection (never cached)."""
+        return await self.service.test_connection()
+
+    async def check_reachability(self) -> bool:
+        """Check the wrapped service is reachable (never cached)."""
+        return await self.service.check_reachability()
+
+    async def generate_insights(
+        self,
+        prompt: str,
+        project_id: str,
+        context_data: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, TokenUsage]:
+        """Generate insights, using cached insights for an identical prompt."""
+
+        key = self._key("generate_insights", prompt, 0.3)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached["insights"], cached_usage()
+
+        insights, token_usage = await self.service.generate_insights(prompt, project_id, context_data)
+        if token_usage.total_tokens:
+            await self.cache.set(key, {"insights": insights})
+        return insights, token_usage
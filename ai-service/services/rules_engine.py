@@ -0,0 +1,183 @@
+"""
+Local rules engine for deterministic component validation.
+
+Project rules (as returned by ``DatabaseService.get_project_rules``) are
+compiled once into plain Python checks and evaluated in-process, so
+RULES_ONLY validation needs no provider call and SELECTIVE/FULL validation
+can reject trivially invalid input before spending tokens.
+
+Supported rule types::
+
+    {"type": "required_field", "field": "title"}
+    {"type": "max_length", "field": "description", "value": 5000}
+    {"type": "min_length", "field": "title", "value": 3}
+    {"type": "pattern", "field": "code", "value": "^[A-Z]+-[0-9]+$"}
+    {"type": "enum", "field": "priority", "value": ["low", "medium", "high"]}
+    {"type": "date_order", "start_field": "start_date", "end_field": "end_date"}
+
+Every rule may also set ``message``, ``severity`` ("error", "warning" or
+"info", default "error") and ``component_type`` to apply only to one type of
+component. Rules of unknown types are skipped.
+"""
+
+import json
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Callable
+
+from models import ValidationIssue
+
+
+Check = Callable[[Dict[str, Any]], Optional[ValidationIssue]]
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or value == [] or value == {}
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    """Parse a date or datetime value, returning None if it is not one."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+def _enum_key(value: Any) -> Any:
+    """Set key of an enum value; unhashable values (lists, dicts) compare by their JSON."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("json", json.dumps(value, sort_keys=True, default=str))
+
+
+def _issue(rule: Dict[str, Any], field: str, issue_type: str, message: str) -> ValidationIssue:
+    return ValidationIssue(
+        field=field,
+        issue_type=issue_type,
+        message=rule.get("message") or message,
+        severity=rule.get("severity", "error"),
+        suggestion=rule.get("suggestion")
+    )
+
+
+def _compile_rule(rule: Dict[str, Any]) -> Optional[Check]:
+    """Compile one rule into a check function."""
+
+    rule_type = rule.get("type")
+    field = rule.get("field", "")
+    value = rule.get("value")
+
+    if rule_type == "required_field":
+        def check(data):
+            if _is_blank(data.get(field)):
+                return _issue(rule, field, "required_field", f"{field} is required")
+        return check
+
+    if rule_type in ("max_length", "min_length"):
+        limit = int(value)
+        too_long = rule_type == "max_length"
+
+        def check(data):
+            current = data.get(field)
+            if current is None or not hasattr(current, "__len__"):
+                return None
+            if (too_long and len(current) > limit) or (not too_long and len(current) < limit):
+                bound = "less than" if too_long else "at least"
+                return _issue(rule, field, rule_type, f"{field} must be {bound} {limit} characters")
+        return check
+
+    if rule_type == "pattern":
+        regex = re.compile(value)
+
+        def check(data):
+            current = data.get(field)
+            if current is not None and not regex.search(str(current)):
+                return _issue(rule, field, "pattern", f"{field} has an invalid format")
+        return check
+
+    if rule_type == "enum":
+        allowed = frozenset(map(_enum_key, value))
+        allowed_text = ", ".join(sorted({str(option) for option in value}))
+
+        def check(data):
+            current = data.get(field)
+            if current is not None and _enum_key(current) not in allowed:
+                return _issue(rule, field, "enum", f"{field} must be one of: {allowed_text}")
+        return check
+
+    if rule_type == "date_order":
+        start_field = rule.get("start_field", "start_date")
+        end_field = rule.get("end_field", "end_date")
+
+        def check(data):
+            start_value, end_value = data.get(start_field), data.get(end_field)
+            if _is_blank(start_value) or _is_blank(end_value):
+                return None
+
+            start, end = _parse_date(start_value), _parse_date(end_value)
+            if start is None or end is None:
+                bad_field = start_field if start is None else end_field
+                return _issue(rule, bad_field, "date_format", f"{bad_field} is not a valid date")
+
+            if (start.tzinfo is None) != (end.tzinfo is None):
+                start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+            if start > end:
+                return _issue(rule, end_field, "date_order", f"{end_field} must not be before {start_field}")
+        return check
+
+    print(f"Skipping unsupported rule type: {rule_type}")
+    return None
+
+
+class CompiledRules:
+    """A project's rules compiled into check functions."""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.checks: List[tuple] = []
+        for rule in rules:
+            try:
+                check = _compile_rule(rule)
+            except (TypeError, ValueError, re.error) as e:
+                print(f"Skipping invalid rule {rule}: {e}")
+                continue
+            if check:
+                self.checks.append((rule.get("component_type"), check))
+
+    def evaluate(self, component_data: Dict[str, Any], component_type: Optional[str] = None) -> List[ValidationIssue]:
+        """Run every check that applies to the component type."""
+        issues = []
+        for rule_component_type, check in self.checks:
+            if rule_component_type and component_type and rule_component_type != component_type:
+                continue
+            issue = check(component_data)
+            if issue:
+                issues.append(issue)
+        return issues
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(rules_key: str) -> CompiledRules:
+    return CompiledRules(json.loads(rules_key))
+
+
+def compile_rules(rules: Optional[List[Dict[str, Any]]]) -> CompiledRules:
+    """Compile a rule list, reusing the compiled form of identical rule lists."""
+    return _compile_cached(json.dumps(rules or [], sort_keys=True, default=str))
+
+
+def evaluate_rules(
+    rules: Optional[List[Dict[str, Any]]],
+    component_data: Dict[str, Any],
+    component_type: Optional[str] = None
+) -> List[ValidationIssue]:
+    """Evaluate project rules against component data."""
+    return compile_rules(rules).evaluate(component_data, component_type)
@@ -0,0 +1,85 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one in-flight execution: the first
+caller (the leader) starts the work as a separate task and later callers
+await the same task instead of starting their own. The shared task is
+shielded from the cancellation of any one caller, so a leader whose client
+disconnects does not fail the requests waiting on it; it is only cancelled
+when every caller waiting on it has gone away.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+
+def request_key(*parts: Any) -> str:
+    """Hash request parameters into a coalescing key."""
+    material = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """An in-flight execution and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent executions that share a key."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.calls: Dict[str, _Call] = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def run(self, key: Optional[str], factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once for all concurrent callers with the same key."""
+
+        if not self.enabled or key is None:
+            return await factory()
+
+        call = self.calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(factory()))
+            self.calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller went away: nobody needs the result. Forget the
+                # call now, so a new caller starts afresh rather than joining
+                # a task that is being cancelled.
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: str, call: _Call):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters and current waiters per key."""
+        return {
+            "in_flight": len(self.calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "waiters": {key[:16]: call.waiters for key, call in self.calls.items()}
+        }
@@ -0,0 +1,274 @@
+"""
+Keyword retrieval over project tasks for question answering.
+
+Each project gets a BM25 index over its task titles and descriptions, held
+in process next to the context cache. A question is tokenized the same way
+as the tasks, scored against the postings of its terms only, and the top-k
+tasks are formatted into the Q&A prompt under a token budget, so answers can
+reference the tasks a question is about without sending the whole project.
+
+Indexes are kept in sync incrementally: when a project's context is
+reloaded, only tasks whose title or description changed are re-tokenized,
+removed tasks are dropped from their postings and their slots reused. While
+the cached context is unchanged the index is reused as is. Everything runs
+locally; no embeddings or network calls are involved.
+"""
+
+import heapq
+import math
+import re
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+from .prompt_packer import PromptPacker, rank_tasks
+
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Title terms count this many times towards a task's term frequencies
+TITLE_WEIGHT = 2
+
+STOPWORDS = frozenset("""
+    a about above after again all also am an and any are as at be been before being below between both but by
+    can could did do does doing done during each few for from had has have having he her here hers him his how
+    i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out
+    over own same she should so some such than that the their theirs them then there these they this those
+    through to too under until up very was we were what when where which while who whom why will with would
+    you your yours
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    """Strip common English suffixes, so "doors" and "door" or "measuring" and "measure" match."""
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            word = word[:-len(suffix)]
+            break
+    if word.endswith("e") and len(word) >= 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase, stemmed terms without stopwords."""
+    if not text:
+        return []
+    return [_stem(word) for word in _TOKEN.findall(str(text).lower()) if word not in STOPWORDS]
+
+
+def _term_frequencies(title: Any, description: Any) -> Dict[str, int]:
+    frequencies = Counter(tokenize(description))
+    for term in tokenize(title):
+        frequencies[term] += TITLE_WEIGHT
+    return frequencies
+
+
+class TaskIndex:
+    """BM25 inverted index over the tasks of one project.
+
+    Tasks occupy integer slots; postings map each term to the slots it
+    occurs in and its frequency there.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.slots: Dict[Any, int] = {}
+        self.texts: List[Optional[Tuple[Any, Any]]] = []
+        self.terms: List[Optional[Dict[str, int]]] = []
+        self.rows: List[Any] = []
+        self.lengths = array("i")
+        self.free: List[int] = []
+        self.total_length = 0
+        # Per-slot BM25 length normalisation, recomputed after a sync changes the average length
+        self.norms: Optional[array] = None
+        self.source: Any = None
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def sync(self, tasks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Bring the index in line with a project's current tasks.
+
+        Returns:
+            dict: added, updated and removed task counts
+        """
+        # Release removed tasks first, so new tasks can take their slots
+        current = {task.get("id") for task in tasks}
+        removed = [task_id for task_id in self.slots if task_id not in current]
+        for task_id in removed:
+            self._release(task_id)
+
+        added = updated = 0
+        for task in tasks:
+            task_id = task.get("id")
+            text = (task.get("title"), task.get("description"))
+            slot = self.slots.get(task_id)
+            if slot is None:
+                slot = self._allocate(task_id)
+                added += 1
+            elif self.texts[slot] != text:
+                self._remove_terms(slot)
+                updated += 1
+            else:
+                self.rows[slot] = task
+                continue
+
+            self.rows[slot] = task
+            self.texts[slot] = text
+            self._add_terms(slot, _term_frequencies(*text))
+
+        if added or updated or removed:
+            self.norms = None
+        self.source = tasks
+        return {"added": added, "updated": updated, "removed": len(removed)}
+
+    def _allocate(self, task_id: Any) -> int:
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.rows)
+            self.rows.append(None)
+            self.texts.append(None)
+            self.terms.append(None)
+            self.lengths.append(0)
+        self.slots[task_id] = slot
+        return slot
+
+    def _release(self, task_id: Any):
+        slot = self.slots.pop(task_id)
+        self._remove_terms(slot)
+        self.rows[slot] = None
+        self.texts[slot] = None
+        self.free.append(slot)
+
+    def _add_terms(self, slot: int, frequencies: Dict[str, int]):
+        postings = self.postings
+        for term, frequency in frequencies.items():
+            postings[term][slot] = frequency
+
+        length = sum(frequencies.values())
+        self.terms[slot] = frequencies
+        self.lengths[slot] = length
+        self.total_length += length
+
+    def _remove_terms(self, slot: int):
+        frequencies = self.terms[slot]
+        if not frequencies:
+            return
+        for term in frequencies:
+            posting = self.postings[term]
+            del posting[slot]
+            if not posting:
+                del self.postings[term]
+
+        self.total_length -= self.lengths[slot]
+        self.terms[slot] = None
+        self.lengths[slot] = 0
+
+    def _length_norms(self) -> array:
+        if self.norms is None:
+            average = self.total_length / len(self.slots) if self.slots else 0.0
+            if average:
+                self.norms = array("d", (K1 * (1 - B + B * length / average) for length in self.lengths))
+            else:
+                self.norms = array("d", [K1] * len(self.lengths))
+        return self.norms
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[Any, float]]:
+        """Find the tasks that best match a query.
+
+        Returns:
+            list: (task, score) pairs, best first; only tasks sharing a term with the query
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.slots:
+            return []
+
+        norms = self._length_norms()
+        document_count = len(self.slots)
+        scores: Dict[int, float] = {}
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            frequency_count = len(posting)
+            weight = math.log(1 + (document_count - frequency_count + 0.5) / (frequency_count + 0.5)) * (K1 + 1)
+            for slot, frequency in posting.items():
+                scores[slot] = scores.get(slot, 0.0) + weight * frequency / (frequency + norms[slot])
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.rows[slot], round(score, 4)) for slot, score in best]
+
+
+class TaskRetriever:
+    """Per-project task indexes (LRU-bounded) and the Q&A task selection built on them."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.max_projects = settings.context_cache_max_projects
+        self.indexes: "OrderedDict[str, TaskIndex]" = OrderedDict()
+
+    def get_index(self, project_id: str, tasks: List[Dict[str, Any]]) -> TaskIndex:
+        """Get a project's index, synced with the given tasks.
+
+        Cached contexts hand out the same task list until the project
+        changes, so a list the index was last synced with is not re-read.
+        """
+        index = self.indexes.get(project_id)
+        if index is None:
+            index = self.indexes[project_id] = TaskIndex()
+            while len(self.indexes) > self.max_projects:
+                self.indexes.popitem(last=False)
+        self.indexes.move_to_end(project_id)
+
+        if index.source is not tasks:
+            index.sync(tasks)
+        return index
+
+    def select_tasks(
+        self,
+        project_id: str,
+        question: str,
+        tasks: List[Dict[str, Any]],
+        dependencies: List[Dict[str, Any]],
+        model: str,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Pick the tasks a question is about and format them under the Q&A token budget.
+
+        Tasks matching the question's terms come first, best match first. When
+        nothing matches, the tasks ranked most important for the project are used instead.
+
+        Returns:
+            dict: text, included, matched (tasks found by the search), task_count
+        """
+        now = now or datetime.now(timezone.utc)
+        top_k = self.settings.qa_retrieval_top_k
+        index = self.get_index(project_id, tasks)
+
+        selected = [task for task, _ in index.search(question, top_k)]
+        matched = len(selected)
+        if not selected:
+            selected = rank_tasks(tasks, dependencies, now)[:top_k]
+
+        packer = PromptPacker(model, self.settings.prompt_description_chars)
+        text, included = packer.pack_in_order(selected, self.settings.qa_retrieval_token_budget, now)
+        return {"text": text, "included": included, "matched": matched, "task_count": len(index)}
+
+
+def format_relevant_tasks(selection: Optional[Dict[str, Any]]) -> str:
+    """Format selected tasks as a Q&A prompt section, or "" when there are none."""
+    if not selection or not selection["included"]:
+        return ""
+    if selection["matched"]:
+        heading = f"Tasks Relevant to the Question ({selection['included']} of {selection['task_count']} tasks, best match first):"
+    else:
+        heading = f"Most Important Tasks (no task matched the question; {selection['included']} of {selection['task_count']} tasks):"
+    return f"\n\n{heading}\n{selection['text']}"
@@ -0,0 +1,393 @@
+"""
+Compact columnar snapshots of project tasks.
+
+Project contexts used to hold their tasks as a list of dicts, one per task
+with ~15 string keys and a separate string object per date. A TaskSnapshot
+stores the same rows column by column instead:
+
+- status, priority, owner and parent ids as interned codes (``array('i')``
+  indexes into a small per-snapshot label list),
+- estimated hours and progress as ``array('d')`` (NaN for missing),
+- dates as ``array('q')`` microseconds since the epoch plus one byte telling
+  a date from an aware or naive timestamp,
+- ids, titles, descriptions and any other field as plain lists.
+
+Rows are read through TaskView objects (``__slots__``, read-only Mapping), so
+code written against task dicts (``task.get("status")``, ``task["title"]``,
+``dict(task)``) keeps working; views compare equal to the dicts they were
+built from. Values a column cannot reproduce exactly (a date in another
+format or time zone, a number sent as a string) are kept as given in a small
+overrides table, so a snapshot is lossless. Rows are expected to share their
+keys, as query results do; a key missing from a row reads as None.
+
+The statistics module reads the code and number columns directly
+(``stats_columns``) instead of re-parsing every row.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import date, datetime, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from .task_stats import SECONDS_PER_DAY, TaskColumns, UNASSIGNED
+
+NAN = float("nan")
+MISSING_DATE = -(2 ** 63)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_NAIVE = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+MICROS_PER_DAY = 86_400_000_000
+
+_MICROSECOND = datetime.resolution
+_NO_OVERRIDE = object()
+
+# Date kinds
+AWARE, DATE_ONLY, NAIVE = 0, 1, 2
+
+CODE_FIELDS = ("status", "priority", "owner_id", "parent_task_id", "project_id")
+NUMBER_FIELDS = ("estimated_hours", "progress_percentage")
+DATE_FIELDS = ("start_date", "end_date", "due_date", "completed_at", "created_at", "updated_at")
+
+
+class _ObjectColumn:
+    """Values kept as given."""
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        self.values: List[Any] = []
+
+    def fill(self, values: List[Any]) -> Dict[int, Any]:
+        self.values = values
+        return {}
+
+    def get(self, row: int) -> Any:
+        return self.values[row]
+
+
+class _CodeColumn:
+    """Interned values: one int code per row and a label list."""
+
+    __slots__ = ("codes", "labels")
+
+    def __init__(self, reserve_none: bool = False):
+        self.codes = array("i")
+        self.labels: List[Any] = [None] if reserve_none else []
+
+    def fill(self, values: List[Any]) -> Dict[int, Any]:
+        index = {label: code for code, label in enumerate(self.labels)}
+        overrides = {}
+        try:
+            codes = [index.setdefault(value, len(index)) for value in values]
+        except TypeError:
+            # Unhashable values: code their repr and read them from the overrides
+            codes = []
+            for row, value in enumerate(values):
+                try:
+                    codes.append(index.setdefault(value, len(index)))
+                except TypeError:
+                    codes.append(index.setdefault(repr(value), len(index)))
+                    overrides[row] = value
+        self.codes = array("i", codes)
+        self.labels = [sys.intern(label) if isinstance(label, str) else label for label in index]
+        return overrides
+
+    def get(self, row: int) -> Any:
+        return self.labels[self.codes[row]]
+
+
+class _NumberColumn:
+    """Floats with NaN for None; read back as ints while every value is an int."""
+
+    __slots__ = ("values", "integral")
+
+    def __init__(self):
+        self.values = array("d")
+        self.integral = True
+
+    def fill(self, values: List[Any]) -> Dict[int, Any]:
+        overrides = {}
+        try:
+            self.values = array("d", [NAN if value is None else value for value in values])
+        except TypeError:
+            floats = []
+            for row, value in enumerate(values):
+                if value is None or isinstance(value, (int, float)):
+                    floats.append(NAN if value is None else value)
+                    continue
+                # Numbers sent as strings: the float is used by the statistics
+                overrides[row] = value
+                try:
+                    floats.append(float(value))
+                except (TypeError, ValueError):
+                    floats.append(NAN)
+            self.values = array("d", floats)
+        self.integral = not any(isinstance(value, float) for value in values)
+        return overrides
+
+    def get(self, row: int) -> Any:
+        value = self.values[row]
+        if value != value:
+            return None
+        return int(value) if self.integral else value
+
+
+def _parse_date(value: Any) -> Tuple[int, int, bool]:
+    """Parse an ISO date or timestamp into (microseconds, kind, reproduced exactly)."""
+    if not isinstance(value, str):
+        return MISSING_DATE, AWARE, False
+    try:
+        if len(value) == 10:
+            parsed_date = date.fromisoformat(value)
+            micros = (parsed_date.toordinal() - EPOCH_ORDINAL) * MICROS_PER_DAY
+            return micros, DATE_ONLY, parsed_date.isoformat() == value
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return MISSING_DATE, AWARE, False
+    if parsed.tzinfo is None:
+        return (parsed - EPOCH_NAIVE) // _MICROSECOND, NAIVE, parsed.isoformat() == value
+    # Read back in UTC, so other offsets are kept verbatim
+    return (parsed - EPOCH) // _MICROSECOND, AWARE, _is_canonical_utc(value, parsed)
+
+
+def _is_canonical_utc(value: str, parsed: datetime) -> bool:
+    """Whether a parsed timestamp reads back as the same string in UTC."""
+    # Fast path for YYYY-MM-DDTHH:MM:SS[.ffffff]+00:00, formatting is slow
+    if (
+        value.endswith("+00:00") and value[10] == "T" and value[4] == value[7] == "-"
+        and value[13] == value[16] == ":" and (len(value) == 25 or (len(value) == 32 and value[19] == "." and parsed.microsecond))
+    ):
+        return True
+    return not parsed.utcoffset() and parsed.isoformat() == value
+
+
+class _DateColumn:
+    """ISO dates and timestamps as microseconds since the epoch."""
+
+    __slots__ = ("micros", "kinds")
+
+    def __init__(self):
+        self.micros = array("q")
+        self.kinds = bytearray()
+
+    def fill(self, values: List[Any]) -> Dict[int, Any]:
+        overrides = {}
+        micros, kinds = [], bytearray()
+        missing = (MISSING_DATE, AWARE, True)
+        # Plain dates repeat a lot within a project, timestamps rarely do
+        dates: Dict[str, Tuple[int, int, bool]] = {}
+        for row, value in enumerate(values):
+            if value is None:
+                result = missing
+            elif type(value) is str and len(value) == 10:
+                result = dates.get(value)
+                if result is None:
+                    result = dates[value] = _parse_date(value)
+            else:
+                result = _parse_date(value)
+            micros.append(result[0])
+            kinds.append(result[1])
+            if not result[2]:
+                overrides[row] = value
+        self.micros = array("q", micros)
+        self.kinds = kinds
+        return overrides
+
+    def get(self, row: int) -> Any:
+        micros = self.micros[row]
+        if micros == MISSING_DATE:
+            return None
+        kind = self.kinds[row]
+        if kind == DATE_ONLY:
+            return date.fromordinal(EPOCH_ORDINAL + micros // MICROS_PER_DAY).isoformat()
+        moment = (EPOCH_NAIVE if kind == NAIVE else EPOCH) + micros * _MICROSECOND
+        return moment.isoformat()
+
+    def days(self, row: int) -> float:
+        """Days since the epoch, as the statistics compute them from the ISO value."""
+        micros = self.micros[row]
+        return NAN if micros == MISSING_DATE else micros / 1e6 / SECONDS_PER_DAY
+
+
+def _column_for(field: str):
+    if field in CODE_FIELDS:
+        # Code 0 of owners means unassigned, as in the statistics columns
+        return _CodeColumn(reserve_none=field == "owner_id")
+    if field in NUMBER_FIELDS:
+        return _NumberColumn()
+    if field in DATE_FIELDS:
+        return _DateColumn()
+    return _ObjectColumn()
+
+
+class TaskView(Mapping):
+    """Read-only dict-like view of one row of a TaskSnapshot."""
+
+    __slots__ = ("snapshot", "row")
+
+    def __init__(self, snapshot: "TaskSnapshot", row: int):
+        self.snapshot = snapshot
+        self.row = row
+
+    def __getitem__(self, field: str) -> Any:
+        snapshot = self.snapshot
+        column = snapshot.columns[field]
+        if snapshot.overrides:
+            override = snapshot.overrides.get((self.row, field), _NO_OVERRIDE)
+            if override is not _NO_OVERRIDE:
+                return override
+        return column.get(self.row)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field not in self.snapshot.columns:
+            return default
+        return self[field]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.snapshot.columns)
+
+    def __len__(self) -> int:
+        return len(self.snapshot.columns)
+
+    def __contains__(self, field: object) -> bool:
+        return field in self.snapshot.columns
+
+    def __repr__(self) -> str:
+        return f"TaskView({dict(self)!r})"
+
+
+class TaskSnapshot:
+    """Tasks of a project stored column by column; a read-only sequence of TaskViews."""
+
+    __slots__ = ("columns", "overrides", "count", "_stats_columns")
+
+    def __init__(self):
+        self.columns: Dict[str, Any] = {}
+        self.overrides: Dict[Tuple[int, str], Any] = {}
+        self.count = 0
+        self._stats_columns: Optional[TaskColumns] = None
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping]) -> "TaskSnapshot":
+        """Build a snapshot from task rows (dicts as returned by the database)."""
+        rows = rows if isinstance(rows, list) else list(rows)
+        snapshot = cls()
+        snapshot.count = len(rows)
+
+        fields: Dict[str, None] = {}
+        for row in rows:
+            fields.update(row)
+
+        for field in fields:
+            column = snapshot.columns[field] = _column_for(field)
+            for row, value in column.fill([row.get(field) for row in rows]).items():
+                snapshot.overrides[(row, field)] = value
+        return snapshot
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TaskView(self, row) for row in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("task snapshot index out of range")
+        return TaskView(self, index)
+
+    def __iter__(self) -> Iterator[TaskView]:
+        for row in range(self.count):
+            yield TaskView(self, row)
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (TaskSnapshot, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(view == row for view, row in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"TaskSnapshot({self.count} tasks)"
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize the rows as plain dicts."""
+        return [dict(view) for view in self]
+
+    def stats_columns(self) -> TaskColumns:
+        """The statistics columns, sharing this snapshot's code and number arrays."""
+        if self._stats_columns is None:
+            self._stats_columns = self._build_stats_columns()
+        return self._stats_columns
+
+    def _build_stats_columns(self) -> TaskColumns:
+        columns = TaskColumns()
+        rows = range(self.count)
+
+        def codes(field: str, missing: Any) -> Tuple[array, List[Any]]:
+            column = self.columns.get(field)
+            if column is None:
+                return array("i", bytes(4 * self.count)), [missing]
+            return column.codes, column.labels
+
+        def numbers(field: str) -> array:
+            column = self.columns.get(field)
+            return column.values if column is not None else array("d", [NAN]) * self.count
+
+        def days(field: str) -> array:
+            column = self.columns.get(field)
+            if column is None:
+                return array("d", [NAN]) * self.count
+            values = array("d", (column.days(row) for row in rows))
+            for (row, name), value in self.overrides.items():
+                if name == field:
+                    values[row] = _override_days(value)
+            return values
+
+        columns.status, columns.status_labels = codes("status", "unknown")
+        columns.priority, columns.priority_labels = codes("priority", "unknown")
+        columns.owner, owner_labels = codes("owner_id", None)
+        columns.owner_labels = [UNASSIGNED] + owner_labels[1:]
+
+        columns.estimated_hours = numbers("estimated_hours")
+        columns.progress = numbers("progress_percentage")
+        columns.start = days("start_date")
+        columns.completed = days("completed_at")
+        end, due = days("end_date"), days("due_date")
+        columns.end = array("d", (e if e == e else d for e, d in zip(end, due)))
+        return columns
+
+
+def _override_days(value: Any) -> float:
+    """Days since the epoch of a date the column could not reproduce verbatim."""
+    if not value:
+        return NAN
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return NAN
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp() / SECONDS_PER_DAY
+
+
+def measure_bytes(value: Any, seen: Optional[set] = None) -> int:
+    """Approximate memory held by an object graph, counting shared objects once."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(measure_bytes(key, seen) + measure_bytes(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(measure_bytes(item, seen) for item in value)
+    elif hasattr(value, "__slots__") and not isinstance(value, (str, bytes, bytearray, array)):
+        for cls in type(value).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(value, name):
+                    size += measure_bytes(getattr(value, name), seen)
+    return size
@@ -0,0 +1,358 @@
+"""
+Columnar task statistics for project contexts.
+
+Tasks are read once into columns (interned status/priority/owner codes and
+float columns of hours, progress and dates as days since the epoch, with NaN
+for missing values), and every statistic is then computed over whole
+columns: status and priority breakdowns, estimated hours and completion,
+overdue tasks from ``end_date`` (or ``due_date``), per-owner load from
+``owner_id``, weekly completion velocity from ``completed_at``, schedule
+drift (planned ``start_date``..``end_date`` against the actual completion)
+and the progress distribution of open tasks.
+
+NumPy is used when it is installed (``bincount`` for breakdowns and per-owner
+sums, masks for the rest); otherwise the same statistics are computed with
+plain Python over the same columns, with identical results.
+"""
+
+import math
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Sequence
+
+from .prompt_packer import CLOSED_STATUSES
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+NAN = float("nan")
+SECONDS_PER_DAY = 86400.0
+VELOCITY_WEEKS = 8
+PROGRESS_BUCKETS = ("0%", "1-24%", "25-49%", "50-74%", "75-99%", "100%")
+UNASSIGNED = "unassigned"
+
+
+def _to_days(value: Any, memo: Dict[Any, float]) -> float:
+    """Days since the epoch of an ISO date/timestamp (naive values are UTC), or NaN."""
+    if not value:
+        return NAN
+    days = memo.get(value)
+    if days is None:
+        try:
+            if isinstance(value, datetime):
+                parsed = value
+            else:
+                parsed = datetime.fromisoformat(str(value))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            days = parsed.timestamp() / SECONDS_PER_DAY
+        except (TypeError, ValueError):
+            days = NAN
+        memo[value] = days
+    return days
+
+
+def _to_float(value: Any) -> float:
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _number(value: float) -> Any:
+    """Round a statistic for output, keeping whole numbers as ints."""
+    value = round(float(value), 2)
+    return int(value) if value.is_integer() else value
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of sorted values, as numpy.percentile computes it."""
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class TaskColumns:
+    """Task fields used by the statistics, one typed array per field."""
+
+    def __init__(self):
+        self.status = array("i")
+        self.priority = array("i")
+        self.owner = array("i")
+        self.status_labels: List[Any] = []
+        self.priority_labels: List[Any] = []
+        self.owner_labels: List[Any] = [UNASSIGNED]
+        self.estimated_hours = array("d")
+        self.progress = array("d")
+        self.start = array("d")
+        self.end = array("d")
+        self.completed = array("d")
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Dict[str, Any]]) -> "TaskColumns":
+        """Read task rows into columns in one pass."""
+        status_codes: Dict[Any, int] = {}
+        priority_codes: Dict[Any, int] = {}
+        owner_codes: Dict[Any, int] = {None: 0}
+        dates: Dict[Any, float] = {}
+        status, priority, owner = [], [], []
+        hours, progress, start, end, completed = [], [], [], [], []
+
+        for task in tasks:
+            status.append(status_codes.setdefault(task.get("status", "unknown"), len(status_codes)))
+            priority.append(priority_codes.setdefault(task.get("priority", "unknown"), len(priority_codes)))
+            owner.append(owner_codes.setdefault(task.get("owner_id"), len(owner_codes)))
+            hours.append(_to_float(task.get("estimated_hours")))
+            progress.append(_to_float(task.get("progress_percentage")))
+            start.append(_to_days(task.get("start_date"), dates))
+            end.append(_to_days(task.get("end_date") or task.get("due_date"), dates))
+            completed.append(_to_days(task.get("completed_at"), dates))
+
+        columns = cls()
+        columns.status_labels = list(status_codes)
+        columns.priority_labels = list(priority_codes)
+        columns.owner_labels = [UNASSIGNED] + list(owner_codes)[1:]
+        columns.status, columns.priority, columns.owner = array("i", status), array("i", priority), array("i", owner)
+        columns.estimated_hours, columns.progress = array("d", hours), array("d", progress)
+        columns.start, columns.end, columns.completed = array("d", start), array("d", end), array("d", completed)
+        return columns
+
+
+def compute_task_stats(
+    tasks: Any,
+    now: Optional[datetime] = None,
+    weeks: int = VELOCITY_WEEKS,
+    use_numpy: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Compute task statistics for a project context.
+
+    Args:
+        tasks: Task rows, TaskColumns already read from them, or a TaskSnapshot
+        now: Reference time for overdue tasks and velocity (defaults to the current time)
+        weeks: Number of past weeks of completion velocity
+        use_numpy: Force the NumPy (True) or pure-Python (False) implementation
+
+    Returns:
+        dict: Statistics merged into the context's ``stats``
+    """
+    if isinstance(tasks, TaskColumns):
+        columns = tasks
+    elif hasattr(tasks, "stats_columns"):
+        columns = tasks.stats_columns()
+    else:
+        columns = TaskColumns.from_tasks(tasks)
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    today = now.timestamp() / SECONDS_PER_DAY
+
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    compute = _compute_numpy if use_numpy else _compute_python
+    stats = compute(columns, today, weeks)
+
+    count = len(columns)
+    stats["completion_percentage"] = round(stats["completed_tasks"] / count * 100, 1) if count else 0
+    stats["weekly_velocity"] = [
+        {"week_start": (now - timedelta(days=7 * (weeks - i))).date().isoformat(), "completed": completed}
+        for i, completed in enumerate(stats["weekly_velocity"])
+    ]
+    return stats
+
+
+def _closed_codes(columns: TaskColumns) -> List[int]:
+    return [code for code, label in enumerate(columns.status_labels) if label in CLOSED_STATUSES]
+
+
+def _drift_summary(days_late: List[float], ratios: List[float]) -> Dict[str, Any]:
+    days_late, ratios = sorted(days_late), sorted(ratios)
+    return {
+        "completed_with_end_date": len(days_late),
+        "late": sum(1 for days in days_late if days > 0),
+        "median_days_late": _number(_percentile(days_late, 50)) if days_late else None,
+        "p90_days_late": _number(_percentile(days_late, 90)) if days_late else None,
+        "median_duration_ratio": _number(_percentile(ratios, 50)) if ratios else None
+    }
+
+
+def _owner_load(columns: TaskColumns, open_tasks, remaining_hours, overdue) -> Dict[Any, Dict[str, Any]]:
+    return {
+        columns.owner_labels[code]: {
+            "open_tasks": int(open_tasks[code]),
+            "remaining_hours": _number(remaining_hours[code]),
+            "overdue_tasks": int(overdue[code])
+        }
+        for code in sorted(range(len(columns.owner_labels)), key=lambda code: (-open_tasks[code], code))
+        if open_tasks[code]
+    }
+
+
+def _compute_numpy(columns: TaskColumns, today: float, weeks: int) -> Dict[str, Any]:
+    # The array columns are read in place through the buffer protocol
+    status = np.frombuffer(columns.status, dtype=np.int32)
+    priority = np.frombuffer(columns.priority, dtype=np.int32)
+    owner = np.frombuffer(columns.owner, dtype=np.int32)
+    hours = np.frombuffer(columns.estimated_hours, dtype=np.float64)
+    progress = np.frombuffer(columns.progress, dtype=np.float64)
+    start = np.frombuffer(columns.start, dtype=np.float64)
+    end = np.frombuffer(columns.end, dtype=np.float64)
+    completed = np.frombuffer(columns.completed, dtype=np.float64)
+
+    status_counts = np.bincount(status, minlength=len(columns.status_labels))
+    priority_counts = np.bincount(priority, minlength=len(columns.priority_labels))
+    done_code = columns.status_labels.index("done") if "done" in columns.status_labels else -1
+    open_mask = ~np.isin(status, _closed_codes(columns))
+    overdue_mask = open_mask & (end < today)
+    known_hours = np.nan_to_num(hours)
+
+    owner_count = len(columns.owner_labels)
+    open_owners = owner[open_mask]
+    overdue_owners = owner[overdue_mask]
+
+    age_weeks = np.floor((today - completed) / 7)
+    recent = age_weeks[(age_weeks >= 0) & (age_weeks < weeks)].astype(np.int64)
+    velocity = np.bincount(recent, minlength=weeks)[::-1]
+
+    finished = ~np.isnan(completed)
+    with_end = finished & ~np.isnan(end)
+    days_late = np.floor(completed[with_end]) - np.floor(end[with_end])
+    planned = finished & ~np.isnan(start) & (end > start)
+    ratios = (completed[planned] - start[planned]) / (end[planned] - start[planned])
+
+    open_progress = progress[open_mask]
+    open_progress = open_progress[~np.isnan(open_progress)]
+    buckets = (
+        (open_progress > 0).astype(np.int64) + (open_progress >= 25) + (open_progress >= 50)
+        + (open_progress >= 75) + (open_progress >= 100)
+    )
+    progress_counts = np.bincount(buckets, minlength=len(PROGRESS_BUCKETS))
+
+    return {
+        "total_tasks": len(columns),
+        "status_breakdown": {label: int(status_counts[code]) for code, label in enumerate(columns.status_labels)},
+        "priority_breakdown": {label: int(priority_counts[code]) for code, label in enumerate(columns.priority_labels)},
+        "total_estimated_hours": _number(known_hours.sum()),
+        "completed_tasks": int(status_counts[done_code]) if done_code >= 0 else 0,
+        "open_tasks": int(open_mask.sum()),
+        "remaining_estimated_hours": _number(known_hours[open_mask].sum()),
+        "unestimated_open_tasks": int((open_mask & np.isnan(hours)).sum()),
+        "overdue_tasks": int(overdue_mask.sum()),
+        "owner_load": _owner_load(
+            columns,
+            np.bincount(open_owners, minlength=owner_count),
+            np.bincount(open_owners, weights=known_hours[open_mask], minlength=owner_count),
+            np.bincount(overdue_owners, minlength=owner_count)
+        ),
+        "weekly_velocity": [int(count) for count in velocity],
+        "schedule_drift": _drift_summary(days_late.tolist(), ratios.tolist()),
+        "progress_distribution": dict(zip(PROGRESS_BUCKETS, (int(count) for count in progress_counts)))
+    }
+
+
+def _compute_python(columns: TaskColumns, today: float, weeks: int) -> Dict[str, Any]:
+    status_counts = [0] * len(columns.status_labels)
+    priority_counts = [0] * len(columns.priority_labels)
+    owner_count = len(columns.owner_labels)
+    owner_open, owner_hours, owner_overdue = [0] * owner_count, [0.0] * owner_count, [0] * owner_count
+    closed = set(_closed_codes(columns))
+    velocity = [0] * weeks
+    progress_counts = [0] * len(PROGRESS_BUCKETS)
+    days_late: List[float] = []
+    ratios: List[float] = []
+    total_hours = remaining_hours = 0.0
+    open_count = overdue_count = unestimated = 0
+
+    for i, status in enumerate(columns.status):
+        status_counts[status] += 1
+        priority_counts[columns.priority[i]] += 1
+        hours = columns.estimated_hours[i]
+        known_hours = 0.0 if hours != hours else hours
+        total_hours += known_hours
+        start, end, completed = columns.start[i], columns.end[i], columns.completed[i]
+
+        if status not in closed:
+            owner = columns.owner[i]
+            open_count += 1
+            remaining_hours += known_hours
+            unestimated += hours != hours
+            owner_open[owner] += 1
+            owner_hours[owner] += known_hours
+            if end < today:
+                overdue_count += 1
+                owner_overdue[owner] += 1
+            progress = columns.progress[i]
+            if progress == progress:
+                progress_counts[(progress > 0) + (progress >= 25) + (progress >= 50) + (progress >= 75) + (progress >= 100)] += 1
+
+        if completed == completed:
+            age = math.floor((today - completed) / 7)
+            if 0 <= age < weeks:
+                velocity[weeks - 1 - age] += 1
+            if end == end:
+                days_late.append(float(math.floor(completed) - math.floor(end)))
+                if start == start and end > start:
+                    ratios.append((completed - start) / (end - start))
+
+    done_code = columns.status_labels.index("done") if "done" in columns.status_labels else -1
+
+    return {
+        "total_tasks": len(columns),
+        "status_breakdown": dict(zip(columns.status_labels, status_counts)),
+        "priority_breakdown": dict(zip(columns.priority_labels, priority_counts)),
+        "total_estimated_hours": _number(total_hours),
+        "completed_tasks": status_counts[done_code] if done_code >= 0 else 0,
+        "open_tasks": open_count,
+        "remaining_estimated_hours": _number(remaining_hours),
+        "unestimated_open_tasks": unestimated,
+        "overdue_tasks": overdue_count,
+        "owner_load": _owner_load(columns, owner_open, owner_hours, owner_overdue),
+        "weekly_velocity": velocity,
+        "schedule_drift": _drift_summary(days_late, ratios),
+        "progress_distribution": dict(zip(PROGRESS_BUCKETS, progress_counts))
+    }
+
+
+def format_task_stats(stats: Dict[str, Any], max_owners: int = 5) -> str:
+    """Format the computed statistics as prompt lines (empty if they were not computed)."""
+    if "weekly_velocity" not in stats:
+        return ""
+
+    velocity = [week["completed"] for week in stats["weekly_velocity"]]
+    lines = [
+        f"- Open: {stats['open_tasks']} tasks, {stats['remaining_estimated_hours']} estimated hours remaining "
+        f"({stats['unestimated_open_tasks']} open tasks without estimates)",
+        f"- Overdue (open past end date): {stats['overdue_tasks']}",
+        f"- Completed per week, oldest first (last {len(velocity)} weeks): {', '.join(map(str, velocity))}"
+    ]
+
+    drift = stats["schedule_drift"]
+    if drift["completed_with_end_date"]:
+        ratio = f", median actual/planned duration {drift['median_duration_ratio']}" if drift["median_duration_ratio"] is not None else ""
+        lines.append(
+            f"- Schedule drift: {drift['late']} of {drift['completed_with_end_date']} completed tasks finished late, "
+            f"median {drift['median_days_late']} days, p90 {drift['p90_days_late']} days{ratio}"
+        )
+
+    if any(stats["progress_distribution"].values()):
+        lines.append("- Open task progress: " + ", ".join(
+            f"{bucket}: {count}" for bucket, count in stats["progress_distribution"].items()
+        ))
+
+    owners = list(stats["owner_load"].items())
+    if owners:
+        lines.append("- Open work per owner: " + "; ".join(
+            f"{owner}: {load['open_tasks']} tasks, {load['remaining_hours']}h, {load['overdue_tasks']} overdue"
+            for owner, load in owners[:max_owners]
+        ) + (f"; {len(owners) - max_owners} more owners" if len(owners) > max_owners else ""))
+
+    return "\n".join(lines)
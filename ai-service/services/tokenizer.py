@@ -0,0 +1,28 @@
+"""
+Process-wide tokenizer cache.
+
+Loading a tiktoken encoding parses a large BPE file, so encodings are loaded
+once per process and shared by every service instance.
+"""
+
+from functools import lru_cache
+
+import tiktoken
+
+
+# Encoding used for models tiktoken cannot map (e.g. gpt-4o on older tiktoken releases)
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model, loading it at most once."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return _get_named_encoding(DEFAULT_ENCODING)
+
+
+@lru_cache(maxsize=None)
+def _get_named_encoding(name: str) -> tiktoken.Encoding:
+    return tiktoken.get_encoding(name)
@@ -0,0 +1,290 @@
+"""
+Write-behind writer for ai_usage_logs.
+
+Usage rows are queued in memory and written by a background task as
+multi-row inserts, either every flush interval or as soon as a full batch
+is queued, so request handlers never wait on the usage-log round trip.
+Rows that cannot be written (database unreachable, queue full for longer
+than the enqueue timeout) are appended to a local JSONL spill file, which
+is replayed on the next start and after the next successful flush.
+
+Each process spills to its own file (the configured path suffixed with the
+pid), since uvicorn workers would otherwise append to a file another worker
+is rewriting. Files left by processes that are gone are adopted on replay.
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, date, timezone
+from enum import Enum
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Awaitable, Callable
+
+from config import get_settings, Settings
+from .database_service import DatabaseService
+
+
+# Queued by close() behind every logged row; the flush loop exits once it reaches it
+_STOP = object()
+
+
+class UsageLogWriter:
+    """Batched, non-blocking writer for AI usage logs."""
+
+    def __init__(self, db_service: DatabaseService, settings: Optional[Settings] = None):
+        self.db_service = db_service
+        self.settings = settings or get_settings()
+
+        self.batch_size = self.settings.usage_log_batch_size
+        self.flush_interval = self.settings.usage_log_flush_interval_ms / 1000
+        self.enqueue_timeout = self.settings.usage_log_enqueue_timeout_ms / 1000
+        configured_path = Path(self.settings.usage_log_spill_path)
+        self.spill_path = configured_path.with_name(f"{configured_path.stem}.{os.getpid()}{configured_path.suffix}")
+        self.configured_spill_path = configured_path
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.spill_lock = asyncio.Lock()
+        self.listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    async def start(self):
+        """Replay spilled rows and start the background flush loop."""
+
+        if self.task:
+            return
+
+        self.queue = asyncio.Queue(maxsize=self.settings.usage_log_queue_size)
+        await self.replay_spill()
+        self.task = asyncio.create_task(self._run())
+
+    async def log(self, usage_data: Dict[str, Any]):
+        """Queue a usage row without waiting for the database.
+
+        When the queue is full the caller waits up to the enqueue timeout
+        (backpressure); after that the row goes straight to the spill file.
+        """
+
+        for listener in self.listeners:
+            await listener(usage_data)
+
+        if not self.db_service.supabase:
+            return
+
+        row = _jsonable(usage_data)
+        # Stamped now rather than at insert, so a row lands in the right rollup bucket even if written late
+        row.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+
+        if self.queue is None:
+            # Writer not running (e.g. scripts and tests): write inline
+            await self._write([row])
+            return
+
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(row), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                await self._spill([row])
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Register a coroutine called with every usage row as it is logged."""
+        self.listeners.append(listener)
+
+    async def flush(self):
+        """Write everything currently queued."""
+
+        while self.queue is not None and not self.queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self._write(batch)
+
+    async def close(self):
+        """Stop the flush loop and write (or spill) any queued rows.
+
+        The loop is stopped with a sentinel rather than cancelled, so the
+        batch it holds and any insert in flight are finished first.
+        """
+
+        if self.task:
+            if not self.task.done():
+                await self.queue.put(_STOP)
+                await self.task
+            self.task = None
+
+        await self.flush()
+        self.queue = None
+
+    async def replay_spill(self):
+        """Re-insert rows from the spill file, keeping any that still fail."""
+
+        if not self.db_service.supabase:
+            return
+
+        async with self.spill_lock:
+            self._adopt_orphaned_spills()
+            if not self.spill_path.exists() or self.spill_path.stat().st_size == 0:
+                return
+
+            rows = []
+            with self.spill_path.open("r", encoding="utf-8") as spill_file:
+                for line in spill_file:
+                    line = line.strip()
+                    if line:
+                        try:
+                            rows.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            print(f"Skipping corrupt usage log spill line: {line[:100]}")
+
+            remaining = []
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                failed = await self.db_service.log_ai_usage_batch(batch)
+                self.replayed += len(batch) - len(failed)
+                if failed:
+                    remaining.extend(failed + rows[start + self.batch_size:])
+                    break
+
+            self._rewrite_spill(remaining)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get writer counters."""
+        return {
+            "queued": self.queue.qsize() if self.queue else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "rollup_failures": self.db_service.rollup_failures
+        }
+
+    async def _run(self):
+        """Flush a batch whenever it fills up or the flush interval elapses."""
+
+        stopping = False
+        while not stopping:
+            row = await self.queue.get()
+            if row is _STOP:
+                return
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            try:
+                await self._write(batch)
+            except Exception as e:
+                print(f"Usage log writer error: {e}")
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        """Insert a batch, spilling it to disk on failure."""
+
+        if not batch:
+            return
+
+        failed = await self.db_service.log_ai_usage_batch(batch)
+        self.written += len(batch) - len(failed)
+        self.batches += 1
+
+        if failed:
+            await self._spill(failed)
+        elif self.spill_path.exists() and self.spill_path.stat().st_size > 0:
+            await self.replay_spill()
+
+    async def _spill(self, rows: List[Dict[str, Any]]):
+        """Append rows to the spill file."""
+
+        async with self.spill_lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", encoding="utf-8") as spill_file:
+                for row in rows:
+                    spill_file.write(json.dumps(row) + "\n")
+                spill_file.flush()
+                os.fsync(spill_file.fileno())
+            self.spilled += len(rows)
+
+    def _adopt_orphaned_spills(self):
+        """Move rows from spill files of exited processes into this process's spill file.
+
+        A file is claimed by renaming it first, so two workers starting
+        together cannot both replay it.
+        """
+
+        base = self.configured_spill_path
+        candidates = [base] + sorted(base.parent.glob(f"{base.stem}.*{base.suffix}"))
+        for path in candidates:
+            if path == self.spill_path or not path.exists():
+                continue
+            pid = path.name[len(base.stem) + 1:len(path.name) - len(base.suffix)]
+            if path != base and (not pid.isdigit() or _process_alive(int(pid))):
+                continue
+
+            claimed = self.spill_path.with_name(f"{path.name}.{os.getpid()}.claimed")
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+
+            with claimed.open("r", encoding="utf-8") as source, self.spill_path.open("a", encoding="utf-8") as target:
+                for line in source:
+                    if line.strip():
+                        target.write(line if line.endswith("\n") else line + "\n")
+                target.flush()
+                os.fsync(target.fileno())
+            claimed.unlink()
+
+    def _rewrite_spill(self, rows: List[Dict[str, Any]]):
+        """Replace the spill file with the rows that are still unwritten."""
+
+        if not rows:
+            self.spill_path.unlink(missing_ok=True)
+            return
+
+        temp_path = self.spill_path.with_suffix(".tmp")
+        with temp_path.open("w", encoding="utf-8") as spill_file:
+            for row in rows:
+                spill_file.write(json.dumps(row) + "\n")
+        os.replace(temp_path, self.spill_path)
+
+
+def _process_alive(pid: int) -> bool:
+    """Check whether a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert enums and datetimes so rows can be sent as JSON and spilled."""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
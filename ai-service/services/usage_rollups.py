@@ -0,0 +1,229 @@
+"""
+Hourly and daily rollups of AI usage.
+
+Each written batch of ``ai_usage_logs`` rows is folded into per-bucket
+deltas (project, provider, model, hour or day) that the database adds to
+``ai_usage_rollups`` with one ``apply_ai_usage_rollups`` call
+(docs/architecture/AI_USAGE_ROLLUPS.sql), so reports read a few rollup rows
+instead of scanning the log history. Latencies are kept as a fixed-bucket
+histogram, which can be summed across rows and still gives percentiles.
+
+``rebuild_usage_rollups`` recomputes the rollups of a time range from the
+logs, for backfilling existing data or repairing a range after a failed
+rollup update. Each day is replaced in one transaction
+(``replace_ai_usage_rollups``), so a failed rebuild leaves every day either
+rebuilt or as it was, and reports the days still to rebuild.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+
+GRANULARITIES = ("hour", "day")
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket counts anything slower
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 30000, 60000)
+
+COUNTERS = (
+    "requests", "failures", "input_tokens", "output_tokens", "total_tokens",
+    "estimated_cost", "latency_count", "latency_sum_ms"
+)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return _as_utc(parsed)
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour or day bucket holding a timestamp, in UTC."""
+    timestamp = timestamp.astimezone(timezone.utc)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def latency_bucket(latency_ms: float) -> int:
+    """Index of the histogram bucket for a latency."""
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def latency_percentile(buckets: List[int], percentile: float) -> Optional[int]:
+    """Estimate a latency percentile (ms) as the upper bound of the bucket it falls in."""
+    total = sum(buckets)
+    if not total:
+        return None
+
+    rank = total * percentile / 100
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if count and seen >= rank:
+            return LATENCY_BUCKETS_MS[min(index, len(LATENCY_BUCKETS_MS) - 1)]
+    return LATENCY_BUCKETS_MS[-1]
+
+
+def _merge_buckets(target: List[int], source: List[int]) -> List[int]:
+    size = max(len(target), len(source))
+    return [
+        (target[i] if i < len(target) else 0) + (source[i] if i < len(source) else 0)
+        for i in range(size)
+    ]
+
+
+def build_rollup_deltas(
+    rows: List[Dict[str, Any]],
+    deltas: Optional[Dict[Tuple, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """Fold usage log rows into one delta per rollup bucket and granularity.
+
+    Rows without a timestamp are counted at the current time. Latency is only
+    counted for rows that recorded one. Passing the same ``deltas`` dict
+    across calls keeps folding into the same buckets.
+    """
+    now = datetime.now(timezone.utc)
+    deltas = {} if deltas is None else deltas
+
+    for row in rows:
+        timestamp = _parse_timestamp(row.get("timestamp")) or now
+        input_tokens = row.get("input_tokens") or 0
+        output_tokens = row.get("output_tokens") or 0
+        total_tokens = row.get("total_tokens")
+        latency_ms = row.get("latency_ms")
+
+        for granularity in GRANULARITIES:
+            key = (
+                granularity,
+                bucket_start(timestamp, granularity).isoformat(),
+                str(row.get("project_id")),
+                str(row.get("ai_provider") or "unknown"),
+                str(row.get("ai_model") or "unknown")
+            )
+            delta = deltas.get(key)
+            if delta is None:
+                delta = dict(zip(("granularity", "bucket_start", "project_id", "ai_provider", "ai_model"), key))
+                delta.update({counter: 0 for counter in COUNTERS})
+                delta["latency_buckets"] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                deltas[key] = delta
+
+            delta["requests"] += 1
+            delta["failures"] += row.get("success") is False
+            delta["input_tokens"] += input_tokens
+            delta["output_tokens"] += output_tokens
+            delta["total_tokens"] += total_tokens if total_tokens is not None else input_tokens + output_tokens
+            delta["estimated_cost"] += row.get("estimated_cost") or 0
+            if latency_ms:
+                delta["latency_count"] += 1
+                delta["latency_sum_ms"] += int(latency_ms)
+                delta["latency_buckets"][latency_bucket(latency_ms)] += 1
+
+    return list(deltas.values())
+
+
+def summarize_rollups(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a time series and per-project/provider/model totals from rollup rows."""
+
+    def empty() -> Dict[str, Any]:
+        values = {counter: 0 for counter in COUNTERS}
+        values["latency_buckets"] = []
+        return values
+
+    def add(target: Dict[str, Any], row: Dict[str, Any]):
+        for counter in COUNTERS:
+            target[counter] += row.get(counter) or 0
+        target["latency_buckets"] = _merge_buckets(target["latency_buckets"], row.get("latency_buckets") or [])
+
+    def finish(values: Dict[str, Any]) -> Dict[str, Any]:
+        buckets = values.pop("latency_buckets")
+        latency_count = values.pop("latency_count")
+        latency_sum = values.pop("latency_sum_ms")
+        values["estimated_cost"] = round(float(values["estimated_cost"]), 6)
+        values["success_rate"] = (
+            round((values["requests"] - values["failures"]) / values["requests"], 4) if values["requests"] else None
+        )
+        values["avg_latency_ms"] = round(latency_sum / latency_count) if latency_count else None
+        for percentile in (50, 95, 99):
+            values[f"p{percentile}_latency_ms"] = latency_percentile(buckets, percentile)
+        return values
+
+    totals = empty()
+    series: Dict[str, Dict[str, Any]] = {}
+    groups: Dict[str, Dict[str, Dict[str, Any]]] = {"by_project": {}, "by_provider": {}, "by_model": {}}
+    for row in rows:
+        add(totals, row)
+        add(series.setdefault(str(row.get("bucket_start")), empty()), row)
+        for name, key in (("by_project", "project_id"), ("by_provider", "ai_provider"), ("by_model", "ai_model")):
+            add(groups[name].setdefault(str(row.get(key)), empty()), row)
+
+    return {
+        "totals": finish(totals),
+        "series": [dict(bucket_start=start, **finish(values)) for start, values in sorted(series.items())],
+        **{name: {key: finish(values) for key, values in group.items()} for name, group in groups.items()}
+    }
+
+
+class RollupRebuildFailed(RuntimeError):
+    """Raised when a rebuild stops; days from ``start_date`` to ``end_date`` were not rebuilt."""
+
+    def __init__(self, message: str, start_date: datetime, end_date: datetime):
+        super().__init__(f"{message}; rollups from {start_date.isoformat()} to {end_date.isoformat()} were not rebuilt")
+        self.start_date = start_date
+        self.end_date = end_date
+
+
+async def rebuild_usage_rollups(
+    db_service: Any,
+    start_date: datetime,
+    end_date: datetime,
+    page_size: int = 1000
+) -> Dict[str, Any]:
+    """Recompute the rollups of whole days between two dates from the usage logs.
+
+    The range is widened to whole UTC days. Day by day, the logs are folded
+    into rollups that replace the day's rollups in one database call. Rows
+    logged into the range while it is being rebuilt may be missed, so
+    rebuild past ranges.
+
+    Returns:
+        dict: start and end of the rebuilt range, rows scanned, buckets written
+
+    Raises:
+        RollupRebuildFailed: If a day could not be read or written; earlier
+            days are rebuilt, that day and later ones are unchanged
+    """
+    start = bucket_start(_as_utc(start_date), "day")
+    end = bucket_start(_as_utc(end_date), "day") + timedelta(days=1)
+
+    scanned = written = 0
+    day = start
+    while day < end:
+        next_day = day + timedelta(days=1)
+        buckets: Dict[Tuple, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = await db_service.get_usage_logs_page(offset, page_size, day, next_day - timedelta(microseconds=1))
+            if page is None:
+                raise RollupRebuildFailed("Failed to read usage logs", day, end)
+            build_rollup_deltas(page, buckets)
+            offset += len(page)
+            if len(page) < page_size:
+                break
+
+        if not await db_service.replace_usage_rollups(day, next_day, list(buckets.values())):
+            raise RollupRebuildFailed("Failed to write usage rollups", day, end)
+        scanned += offset
+        written += len(buckets)
+        day = next_day
+
+    return {"start_date": start.isoformat(), "end_date": end.isoformat(), "scanned": scanned, "buckets": written}
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
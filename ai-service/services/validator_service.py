@@ -11,36 +11,96 @@ from config import get_settings
 from models import (
     ValidationContext, AIValidationRequest, AIValidationResponse,
     ValidationIssue, AIProposal, TokenUsage, AIProvider, AIModel,
-    AIProviderConfig
+    AIProviderConfig, ValidationScope, CostEstimate
 )
-from .ai_service_factory import AIServiceFactory
+from .cost_estimator import CostEstimator, BudgetExceeded
 from .database_service import DatabaseService
+from .provider_registry import ProviderClientRegistry, get_provider_registry
+from .rules_engine import evaluate_rules
+from .single_flight import SingleFlight, request_key
+from .task_index import TaskRetriever
+from .usage_log_writer import UsageLogWriter
 
 
 class ValidatorService:
     """Main validation service."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        db_service: Optional[DatabaseService] = None,
+        provider_registry: Optional[ProviderClientRegistry] = None,
+        usage_writer: Optional[UsageLogWriter] = None
+    ):
         self.settings = get_settings()
-        self.db_service = DatabaseService()
-        self.ai_services = {}
+        self.db_service = db_service or DatabaseService()
+        self.provider_registry = provider_registry or get_provider_registry()
+        self.usage_writer = usage_writer or UsageLogWriter(self.db_service)
+        self.single_flight = SingleFlight(self.settings.request_coalescing_enabled)
+        self.cost_estimator = CostEstimator(self.settings)
+        self.task_retriever = TaskRetriever(self.settings) if self.settings.qa_retrieval_enabled else None
     
     async def validate_component(self, request: AIValidationRequest) -> AIValidationResponse:
+        """Validate a component using AI.
+        
+        Concurrent identical requests (e.g. retries) share one validation
+        and receive the same response.
+        """
+        
+        key = request_key("validate_component", request.model_dump(mode="json"))
+        return await self.single_flight.run(key, lambda: self._validate_component(request))
+    
+    async def _validate_component(self, request: AIValidationRequest) -> AIValidationResponse:
         """Validate a component using AI."""
         
         start_time = time.time()
         
         try:
-            # Get or create AI service
-            ai_service = await self._get_ai_service(request.ai_provider, request.ai_model)
-            
             # Build validation context
             context = await self._build_validation_context(request)
             
+            # Check project rules locally first
+            rule_issues = evaluate_rules(context.project_rules, context.component_data, request.component_type)
+            rules_failed = any(issue.severity == "error" for issue in rule_issues)
+            
+            if request.validation_scope == ValidationScope.RULES_ONLY or rules_failed:
+                # No provider call: rules-only scope, or input that fails the rules outright
+                return AIValidationResponse(
+                    success=True,
+                    issues=rule_issues,
+                    proposals=[],
+                    usage_stats={
+                        "tokens_used": 0,
+                        "estimated_cost": 0.0,
+                        "cache_hit": False,
+                        "rules_only": True,
+                        "provider": request.ai_provider,
+                        "model": request.ai_model
+                    },
+                    processing_time_ms=int((time.time() - start_time) * 1000)
+                )
+            
+            # Estimate tokens and cost before calling the provider
+            estimate = await self._estimate_validation(request, context)
+            if request.dry_run:
+                return AIValidationResponse(
+                    success=True,
+                    issues=rule_issues,
+                    proposals=[],
+                    usage_stats=self.cost_estimator.to_usage_stats(estimate),
+                    processing_time_ms=int((time.time() - start_time) * 1000)
+                )
+            if not estimate.within_budget:
+                raise BudgetExceeded(estimate)
+            model = AIModel(estimate.model)
+            
+            # Get or create AI service
+            ai_service = await self._get_ai_service(request.ai_provider, model)
+            
             # Perform validation
             issues, proposals, token_usage = await ai_service.validate_component(
                 context, request.validation_scope
             )
+            issues = rule_issues + issues
             
             # Save proposals to database
             saved_proposals = await self._save_proposals(
@@ -49,7 +109,7 @@ class ValidatorService:
             
             # Log usage
             await self._log_usage(
-                request.project_id, request.ai_provider, request.ai_model,
+                request.project_id, request.ai_provider, model,
                 token_usage, request.validation_scope
             )
             
@@ -62,12 +122,17 @@ class ValidatorService:
                 usage_stats={
                     "tokens_used": token_usage.total_tokens,
                     "estimated_cost": token_usage.estimated_cost,
-                    "provider": request.ai_provider,
-                    "model": request.ai_model
+                    "cache_hit": token_usage.cache_hit,
+                    "rules_only": False,
+                    "provider": token_usage.provider or request.ai_provider,
+                    "model": token_usage.model or model,
+                    "downgraded_from": estimate.downgraded_from
                 },
                 processing_time_ms=processing_time
             )
             
+        except BudgetExceeded:
+            raise
         except Exception as e:
             print(f"Validation error: {e}")
             return AIValidationResponse(
@@ -79,32 +144,25 @@ class ValidatorService:
             )
     
     async def _get_ai_service(self, provider: AIProvider, model: AIModel) -> Any:
-        """Get or create an AI service instance."""
+        """Get the AI service for a provider/model, with failover routing."""
         
-        service_key = f"{provider}_{model}"
+        return self.provider_registry.get_routed_service(provider, model)
+    
+    async def _estimate_validation(self, request: AIValidationRequest, context: ValidationContext) -> CostEstimate:
+        """Count the validation prompt's tokens and fit the request to the project's budget."""
         
-        if service_key not in self.ai_services:
-            # Get API key from settings
-            if provider == AIProvider.OPENAI:
-                api_key = self.settings.openai_api_key
-            elif provider == AIProvider.ANTHROPIC:
-                api_key = self.settings.anthropic_api_key
-            else:
-                raise ValueError(f"Unsupported provider: {provider}")
-            
-            if not api_key:
-                raise ValueError(f"API key not configured for provider: {provider}")
-            
-            # Create service
-            self.ai_services[service_key] = AIServiceFactory.create_service(
-                provider=provider,
-                model=model,
-                api_key=api_key,
-                max_tokens=self.settings.max_tokens_per_request,
-                timeout=self.settings.request_timeout
-            )
+        service = await self._get_ai_service(request.ai_provider, request.ai_model)
+        build_prompt = getattr(service, "_build_validation_prompt", None)
+        system_prompt = getattr(service, "_get_system_prompt", None)
+        if build_prompt is not None and system_prompt is not None:
+            messages = [system_prompt(), build_prompt(context, request.validation_scope)]
+        else:
+            messages = [context.model_dump_json()]
         
-        return self.ai_services[service_key]
+        config = None
+        if self.settings.cost_preflight_enabled and self.db_service.supabase:
+            config = await self.db_service.get_ai_configuration(request.project_id)
+        return self.cost_estimator.plan(request.ai_provider, request.ai_model, messages, config=config)
     
     async def _build_validation_context(self, request: AIValidationRequest) -> ValidationContext:
         """Build validation context from request."""
@@ -133,10 +191,9 @@ class ValidatorService:
     ) -> List[Dict[str, Any]]:
         """Save proposals to database and return saved data."""
         
-        saved_proposals = []
-        
-        for proposal in proposals:
-            proposal_data = {
+        expires_at = (datetime.utcnow() + timedelta(hours=self.settings.proposal_expiry_hours)).isoformat()
+        proposal_rows = [
+            {
                 "project_id": project_id,
                 "proposal_type": proposal.proposal_type,
                 "component_type": component_type,
@@ -147,11 +204,17 @@ class ValidatorService:
                 "evidence": proposal.evidence,
                 "estimated_impact": proposal.estimated_impact,
                 "status": "pending",
-                "expires_at": datetime.utcnow() + timedelta(hours=self.settings.proposal_expiry_hours)
+                "expires_at": expires_at
             }
-            
-            saved_proposal = await self.db_service.create_proposal(proposal_data)
-            
+            for proposal in proposals
+        ]
+        
+        # One insert for the whole set instead of one per proposal
+        saved_rows = await self.db_service.create_proposals(proposal_rows)
+        
+        saved_proposals = []
+        
+        for proposal, saved_proposal in zip(proposals, saved_rows):
             # If database is not available, return the original proposal data
             if not saved_proposal:
                 saved_proposal = {
@@ -167,7 +230,7 @@ class ValidatorService:
                     "estimated_impact": proposal.estimated_impact,
                     "status": "pending",
                     "created_at": datetime.utcnow().isoformat(),
-                    "expires_at": (datetime.utcnow() + timedelta(hours=self.settings.proposal_expiry_hours)).isoformat()
+                    "expires_at": expires_at
                 }
             
             saved_proposals.append(saved_proposal)
@@ -186,58 +249,50 @@ class ValidatorService:
         
         usage_data = {
             "project_id": project_id,
-            "ai_provider": provider,
-            "ai_model": model,
+            "ai_provider": token_usage.provider or provider,
+            "ai_model": token_usage.model or model,
             "operation_type": "validation",
             "validation_scope": validation_scope,
-            "tokens_used": token_usage.total_tokens,
+            "input_tokens": token_usage.prompt_tokens,
+            "output_tokens": token_usage.completion_tokens,
+            "total_tokens": token_usage.total_tokens,
             "estimated_cost": token_usage.estimated_cost,
             "timestamp": datetime.utcnow()
         }
         
-        await self.db_service.log_ai_usage(usage_data)
+        await self.usage_writer.log(usage_data)
     
     async def get_ai_config(self, project_id: str) -> Dict[str, Any]:
         """Get AI configuration for a project."""
         
         # Try to get project-specific config
         config = await self.db_service.get_ai_configuration(project_id)
+        return self.resolve_ai_config(config)
+    
+    def resolve_ai_config(self, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Get the provider and model of a project's (already fetched) AI configuration.
+        
+        The configuration itself is passed along as ``configuration``, so its
+        budget and custom prompts are not fetched again.
+        """
         
         if config:
             return {
                 'provider': config.get('ai_provider', self.settings.default_ai_provider),
-                'model': config.get('ai_model', self.settings.default_ai_model)
+                'model': config.get('ai_model', self.settings.default_ai_model),
+                'configuration': config
             }
         
         # Fall back to default settings
         return {
             'provider': self.settings.default_ai_provider,
-            'model': self.settings.default_ai_model
+            'model': self.settings.default_ai_model,
+            'configuration': None
         }
     
     def get_ai_service(self, ai_config: Dict[str, Any]):
-        """Get AI service instance for the given config."""
-        provider = AIProvider(ai_config['provider'])
-        model = AIModel(ai_config['model'])
-        
-        # Create service synchronously (we'll handle async in the caller)
-        if provider == AIProvider.OPENAI:
-            api_key = self.settings.openai_api_key
-        elif provider == AIProvider.ANTHROPIC:
-            api_key = self.settings.anthropic_api_key
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
-        
-        if not api_key:
-            raise ValueError(f"API key not configured for provider: {provider}")
-        
-        return AIServiceFactory.create_service(
-            provider=provider,
-            model=model,
-            api_key=api_key,
-            max_tokens=self.settings.max_tokens_per_request,
-            timeout=self.settings.request_timeout
-        )
+        """Get the AI service for the given config, with failover routing."""
+        return self.provider_registry.get_routed_service(ai_config['provider'], ai_config['model'])
     
     async def test_ai_connections(self) -> Dict[str, bool]:
         """Test connections to all configured AI providers."""
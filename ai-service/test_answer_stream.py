@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed Q&A answers: the incremental answer parser and the
+/answer-question/stream Server-Sent Events endpoint.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from services.answer_stream import AnswerStreamParser
+from services.container import ServiceContainer
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+
+
+RESPONSE = json.dumps({
+    "answer": "Buy \"treated\" wood\nthen build the frame é✓ \U0001F528",
+    "evidence": ["Task: Buy wood"]
+})
+
+
+def feed_in_chunks(content: str, size: int):
+    """Feed a response through a parser in fixed-size chunks."""
+    parser = AnswerStreamParser()
+    deltas = [parser.feed(content[i:i + size]) for i in range(0, len(content), size)]
+    return parser, deltas
+
+
+def test_answer_decoded_incrementally():
+    """The answer is surfaced chunk by chunk, whatever the chunk boundaries."""
+
+    expected = json.loads(RESPONSE)
+    for size in (1, 2, 3, 7, len(RESPONSE)):
+        parser, deltas = feed_in_chunks(RESPONSE, size)
+        assert "".join(deltas) == expected["answer"], size
+        assert parser.finish() == (expected["answer"], expected["evidence"])
+
+    # The first answer character is surfaced as soon as it arrives
+    parser, deltas = feed_in_chunks(RESPONSE, 1)
+    first = next(i for i, delta in enumerate(deltas) if delta)
+    assert first == len('{"answer": "') and deltas[first] == "B"
+    print("Answer decoded incrementally across chunk boundaries")
+
+
+def test_plain_text_and_fenced_responses():
+    """Non-JSON responses stream as text; fenced JSON is unwrapped."""
+
+    parser, deltas = feed_in_chunks("Just a sentence.", 4)
+    assert "".join(deltas) == "Just a sentence."
+    assert parser.finish() == ("Just a sentence.", [])
+
+    fenced = "```json\n" + RESPONSE + "\n```"
+    parser, deltas = feed_in_chunks(fenced, 5)
+    assert "".join(deltas) == json.loads(RESPONSE)["answer"]
+    assert parser.finish()[1] == ["Task: Buy wood"]
+    print("Plain text and fenced responses handled")
+
+
+class ScriptedAIService(FakeAIService):
+    """AI service that streams a fixed response."""
+
+    def __init__(self, content: str):
+        super().__init__()
+        self.content = content
+
+    async def answer_question_stream(self, question, project_id, context_data=None):
+        parser = AnswerStreamParser()
+        for i in range(0, len(self.content), 8):
+            text = parser.feed(self.content[i:i + 8])
+            if text:
+                yield {"type": "answer", "text": text}
+        answer, evidence = parser.finish()
+        yield {"type": "complete", "answer": answer, "evidence": evidence, "token_usage": self._usage()}
+
+
+def test_stream_endpoint_persists_after_completion():
+    """The endpoint streams answer events, then saves the Q&A and usage log."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Garden shed"}], "tasks": []})
+    registry = ProviderClientRegistry(Settings(openai_api_key="test-key"))
+    registry.services["openai_gpt-4o-mini"] = ScriptedAIService(RESPONSE)
+    container = ServiceContainer(db_service=DatabaseService(client=client), provider_registry=registry)
+
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            response = test_client.post("/answer-question/stream", json={"project_id": "p1", "question": "What next?"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+
+    answer_events = [data["text"] for event, data in events if event == "answer"]
+    assert len(answer_events) > 1
+    assert "".join(answer_events) == json.loads(RESPONSE)["answer"]
+
+    event, done = events[-1]
+    assert event == "done"
+    assert done["evidence"] == ["Task: Buy wood"]
+    assert done["usage_stats"]["total_tokens"] == 150
+    assert done["time_to_first_token_ms"] is not None
+
+    proposals = {row["id"]: row for row in client.tables["proposals"]}
+    assert proposals[done["answer_id"]]["parent_id"] == done["question_id"]
+    assert client.tables["ai_usage_logs"][0]["proposal_ids"] == [done["question_id"], done["answer_id"]]
+    print("Streamed answer persisted after completion")
+
+
+def test_malformed_escapes_pass_through():
+    """Truncated or malformed unicode escapes are emitted as raw text instead of ending the stream."""
+
+    content = '{"answer": "bad \\uZZ9x, lone \\ud83d then \\u00e9 and \\udc00 end", "evidence": []}'
+    for size in (1, 4, len(content)):
+        parser, deltas = feed_in_chunks(content, size)
+        assert "".join(deltas) == "bad \\uZZ9x, lone \\ud83d then \u00e9 and \\udc00 end", size
+
+    parser, deltas = feed_in_chunks('{"answer": "cut off \\u12', 3)
+    assert "".join(deltas) == "cut off " and parser.finish()[0] == "cut off "
+    print("Malformed escapes passed through")
+
+
+def test_stream_slot_held_only_while_streaming():
+    """The provider slot is taken by the stream body, so an unread response holds none."""
+
+    import asyncio
+    from main import answer_question_stream
+    from models import QuestionRequest
+    from services.rate_limiter import RateLimiter
+    from services.validator_service import ValidatorService
+
+    settings = Settings(openai_api_key="test-key", max_concurrent_provider_calls=1, provider_call_queue_timeout_ms=20)
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Garden shed"}], "tasks": []})
+    registry = ProviderClientRegistry(settings)
+    registry.services["openai_gpt-4o-mini"] = ScriptedAIService(RESPONSE)
+    validator = ValidatorService(db_service=DatabaseService(client=client), provider_registry=registry)
+    request = QuestionRequest(project_id="p1", question="What next?")
+
+    async def body(response):
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    async def run():
+        limiter = RateLimiter(settings)
+        # Responses that are never sent (e.g. the client left) take no slot
+        for _ in range(3):
+            await answer_question_stream(request, validator, limiter, None)
+        assert limiter.in_flight == 0
+
+        text = await body(await answer_question_stream(request, validator, limiter, None))
+        assert "event: done" in text and limiter.in_flight == 0
+
+        await limiter.acquire_slot()
+        text = await body(await answer_question_stream(request, validator, limiter, None))
+        limiter.release_slot()
+        assert text.startswith("event: error") and '"status_code": 429' in text
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
+    print("Stream slot held only while streaming")
+
+
+def main():
+    """Run all answer streaming tests."""
+
+    print("Helm AI Service - Answer Streaming Tests")
+    print("=" * 50)
+
+    tests = [
+        test_answer_decoded_incrementally,
+        test_plain_text_and_fenced_responses,
+        test_stream_endpoint_persists_after_completion,
+        test_malformed_escapes_pass_through,
+        test_stream_slot_held_only_while_streaming
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
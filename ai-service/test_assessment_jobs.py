@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Tests for the background assessment job queue.
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from models import AIModel
+from services.database_service import DatabaseService
+from services.job_queue import AssessmentJobQueue, JobFailed, MemoryJobStore, SQLiteJobStore
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+
+
+def make_settings(**overrides):
+    values = {
+        "openai_api_key": "test-key", "anthropic_api_key": None, "llm_cache_enabled": False,
+        "assessment_workers": 2, "assessment_queue_poll_interval_ms": 20
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+async def wait_for_status(queue, job_id, statuses=("succeeded", "failed"), timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = await queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}")
+
+
+def test_jobs_run_on_bounded_pool_and_deduplicate():
+    """Jobs run on at most the configured workers; an active project's job is reused."""
+
+    async def run():
+        active = {"now": 0, "max": 0}
+        release = asyncio.Event()
+
+        async def handler(job):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await release.wait()
+            active["now"] -= 1
+            return {"project_id": job["project_id"]}
+
+        queue = AssessmentJobQueue(handler, make_settings(), store=MemoryJobStore())
+        await queue.start()
+
+        jobs = [await queue.submit(f"p{i}") for i in range(4)]
+        duplicate, created = await queue.submit("p0")
+        assert all(created for _, created in jobs) and not created
+        assert duplicate["job_id"] == jobs[0][0]["job_id"]
+
+        await asyncio.sleep(0.05)
+        assert active["max"] == 2 and queue.running == 2
+        release.set()
+
+        for job, _ in jobs:
+            finished = await wait_for_status(queue, job["job_id"])
+            assert finished["status"] == "succeeded" and finished["result"] == {"project_id": job["project_id"]}
+
+        # Finished jobs no longer deduplicate
+        again, created = await queue.submit("p0")
+        assert created and again["job_id"] != jobs[0][0]["job_id"]
+
+        stats = await queue.stats()
+        assert stats["submitted"] == 5 and stats["deduplicated"] == 1
+        await queue.close()
+
+    asyncio.run(run())
+    print("Jobs ran on a bounded pool and were deduplicated")
+
+
+def test_submit_admits_only_new_jobs():
+    """The admission check runs only when a job is created; a deduplicated submit is free."""
+
+    async def handler(job):
+        return {}
+
+    async def check(store):
+        queue = AssessmentJobQueue(handler, make_settings(), store=store)
+        admitted = []
+
+        async def admit():
+            admitted.append(True)
+
+        job, created = await queue.submit("p1", admit=admit)
+        same, created_again = await queue.submit("p1", admit=admit)
+        assert created and not created_again and same["job_id"] == job["job_id"]
+        assert len(admitted) == 1
+
+        async def reject():
+            raise RuntimeError("rate limited")
+
+        try:
+            await queue.submit("p2", admit=reject)
+            raise AssertionError("a rejected submit should raise")
+        except RuntimeError:
+            pass
+        assert await store.find_active("p2") is None
+        assert (await queue.stats())["submitted"] == 1 and (await queue.stats())["deduplicated"] == 1
+        await store.close()
+
+    async def run():
+        await check(MemoryJobStore())
+        with tempfile.TemporaryDirectory() as directory:
+            await check(SQLiteJobStore(str(Path(directory) / "jobs.sqlite3")))
+
+    asyncio.run(run())
+    print("Only new jobs admitted")
+
+
+def test_job_failures_and_timeouts():
+    """Handler errors fail the job with their status code; slow jobs time out."""
+
+    async def run():
+        async def handler(job):
+            if job["project_id"] == "over-budget":
+                raise JobFailed(402, {"message": "Over budget"})
+            if job["project_id"] == "broken":
+                raise RuntimeError("provider down")
+            await asyncio.sleep(5)
+
+        queue = AssessmentJobQueue(
+            handler, make_settings(assessment_workers=3, assessment_job_timeout_seconds=0.05), store=MemoryJobStore()
+        )
+        await queue.start()
+        over_budget, _ = await queue.submit("over-budget")
+        broken, _ = await queue.submit("broken")
+        slow, _ = await queue.submit("slow")
+
+        assert (await wait_for_status(queue, over_budget["job_id"]))["error"] == {"status_code": 402, "detail": {"message": "Over budget"}}
+        assert (await wait_for_status(queue, broken["job_id"]))["error"]["status_code"] == 500
+        assert (await wait_for_status(queue, slow["job_id"]))["error"]["status_code"] == 504
+        assert queue.failed == 3
+        await queue.close()
+
+    asyncio.run(run())
+    print("Failures and timeouts recorded")
+
+
+def test_sqlite_store_is_shared_and_durable():
+    """Workers sharing a SQLite file see one job per project, claim it once and recover crashed jobs."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "jobs.sqlite3")
+            worker_a, worker_b = SQLiteJobStore(path), SQLiteJobStore(path)
+
+            job, created = await worker_a.submit("p1", "o1", {"user_id": "u1"})
+            same, created_again = await worker_b.submit("p1", None, {})
+            assert created and not created_again and same["job_id"] == job["job_id"]
+            assert same["params"] == {"user_id": "u1"}
+
+            claimed = await worker_b.claim(lease_seconds=0.05)
+            assert claimed["job_id"] == job["job_id"] and claimed["attempts"] == 1
+            assert await worker_a.claim(lease_seconds=60) is None
+
+            # worker_b "crashes"; after the lease expires the job is claimed again
+            await worker_b.close()
+            await asyncio.sleep(0.06)
+            reclaimed = await worker_a.claim(lease_seconds=60)
+            assert reclaimed["job_id"] == job["job_id"] and reclaimed["attempts"] == 2
+
+            await worker_a.finish(job["job_id"], "succeeded", result={"insights": [1, 2]})
+            await worker_a.close()
+
+            reopened = SQLiteJobStore(path)
+            finished = await reopened.get(job["job_id"])
+            assert finished["status"] == "succeeded" and finished["result"] == {"insights": [1, 2]}
+            assert (await reopened.counts()) == {"succeeded": 1}
+            assert await reopened.purge(time.time() + 1) == 1
+            await reopened.close()
+
+    asyncio.run(run())
+    print("SQLite job store shared and durable")
+
+
+def test_assess_project_endpoint_returns_job():
+    """/assess-project returns a job at once; its result is polled; wait=true stays synchronous."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+    from services.container import ServiceContainer
+
+    settings = make_settings()
+    registry = ProviderClientRegistry(settings)
+    insights = [{"rationale": "Nothing is in progress", "confidence": "high", "evidence": [], "estimated_impact": "Slow start"}]
+    service = FakeAIService(delay=0.02, insights=json.dumps(insights))
+    registry.services[f"openai_{AIModel.GPT_4O_MINI.value}"] = service
+    client = InMemoryDatabaseClient({
+        "projects": [{"id": "p1", "name": "Garden shed", "status": "active"}],
+        "tasks": [{"id": "t1", "project_id": "p1", "title": "Buy wood", "status": "todo", "deleted_at": None}],
+        "task_dependencies": []
+    })
+    container = ServiceContainer(settings=settings, db_service=DatabaseService(client=client), provider_registry=registry)
+
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            test_client.portal.call(container.assessment_queue.start)
+            first = test_client.post("/assess-project", json={"project_id": "p1"})
+            second = test_client.post("/assess-project", json={"project_id": "p1"})
+            job_id = first.json()["job_id"]
+            pending = test_client.get(f"/assess-project/jobs/{job_id}/result")
+            for _ in range(100):
+                result = test_client.get(f"/assess-project/jobs/{job_id}/result")
+                if result.status_code != 202:
+                    break
+                test_client.portal.call(asyncio.sleep, 0.01)
+            status = test_client.get(f"/assess-project/jobs/{job_id}").json()
+            missing = test_client.get("/assess-project/jobs/unknown/result")
+            synchronous = test_client.post("/assess-project", json={"project_id": "p1", "wait": True})
+            test_client.portal.call(container.assessment_queue.close)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 202 and first.json()["status"] == "queued"
+    assert first.json()["result_url"] == f"/assess-project/jobs/{job_id}/result"
+    assert second.json()["job_id"] == job_id and second.json()["deduplicated"]
+    assert pending.status_code == 202
+    assert result.status_code == 200 and len(result.json()["insights"]) == 1
+    assert status["status"] == "succeeded" and status["attempts"] == 1
+    assert missing.status_code == 404
+    assert synchronous.status_code == 200 and len(synchronous.json()["insights"]) == 1
+    assert service.calls == 2
+    # The deduplicated submit took no request token
+    assert container.rate_limiter.stats()["admitted"] == 2
+    print("Assessment endpoint queued the job")
+
+
+def main():
+    """Run all assessment job tests."""
+
+    print("Helm AI Service - Assessment Job Queue Tests")
+    print("=" * 50)
+
+    tests = [
+        test_jobs_run_on_bounded_pool_and_deduplicate,
+        test_submit_admits_only_new_jobs,
+        test_job_failures_and_timeouts,
+        test_sqlite_store_is_shared_and_durable,
+        test_assess_project_endpoint_returns_job
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared service container and its FastAPI wiring.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from services.container import ServiceContainer
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+
+
+def test_services_share_dependencies():
+    """Validator and assessment services share one database and registry."""
+
+    container = ServiceContainer(
+        db_service=DatabaseService(client=InMemoryDatabaseClient()),
+        provider_registry=ProviderClientRegistry(Settings(anthropic_api_key="test-key", openai_api_key=None))
+    )
+
+    assert container.validator_service.db_service is container.db_service
+    assert container.assessment_service.db_service is container.db_service
+    assert container.assessment_service.provider_registry is container.provider_registry
+    print("Services share the container's database and provider registry")
+
+
+def test_start_prewarms_configured_providers():
+    """Startup creates services for every model of configured providers."""
+
+    registry = ProviderClientRegistry(Settings(anthropic_api_key="test-key", openai_api_key=None))
+    container = ServiceContainer(
+        db_service=DatabaseService(client=InMemoryDatabaseClient()),
+        provider_registry=registry
+    )
+
+    asyncio.run(container.start())
+    assert sorted(registry.services) == ["anthropic_claude-3-haiku-20240307", "anthropic_claude-3-sonnet-20240229"]
+
+    asyncio.run(container.close())
+    assert registry.services == {}
+    print("Configured providers pre-warmed on startup")
+
+
+def test_app_lifespan():
+    """The FastAPI app builds one container for its lifetime."""
+
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        container = app.state.container
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "ai_provider_pools" in response.json()
+        assert app.state.container is container
+    print("Container created by the app lifespan")
+
+
+def main():
+    """Run all container tests."""
+
+    print("Helm AI Service - Service Container Tests")
+    print("=" * 50)
+
+    tests = [
+        test_services_share_dependencies,
+        test_start_prewarms_configured_providers,
+        test_app_lifespan
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
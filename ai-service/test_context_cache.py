@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the project context cache.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.context_cache import ProjectContextCache
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+
+
+def make_service():
+    """Build a database service over a one-project in-memory backend."""
+    client = InMemoryDatabaseClient({
+        "projects": [{"id": "p1", "name": "Garden shed", "updated_at": "2024-01-01T00:00:00"}],
+        "tasks": [
+            {"id": "t1", "project_id": "p1", "title": "Buy wood", "status": "done", "deleted_at": None, "updated_at": "2024-01-02T00:00:00"},
+            {"id": "t2", "project_id": "p1", "title": "Build frame", "status": "todo", "deleted_at": None, "updated_at": "2024-01-03T00:00:00"},
+        ],
+        "task_dependencies": [],
+    })
+    return DatabaseService(client=client), client
+
+
+def test_cache_hit_skips_database():
+    """A second fetch inside the probe interval makes no queries."""
+
+    async def run():
+        db_service, client = make_service()
+        await db_service.get_project_context("p1")
+        requests = client.request_count
+        context = await db_service.get_project_context("p1")
+        assert client.request_count == requests
+        assert context["stats"]["total_tasks"] == 2
+        assert db_service.context_cache.hits == 1
+
+    asyncio.run(run())
+    print("Cached context served without queries")
+
+
+def test_probe_revalidates_unchanged_project():
+    """Past the probe interval, an unchanged version stamp keeps the entry."""
+
+    async def run():
+        db_service, client = make_service()
+        db_service.context_cache.probe_interval_seconds = -1
+        await db_service.get_project_context("p1")
+        requests = client.request_count
+        await db_service.get_project_context("p1")
+        assert client.request_count == requests + 3  # project, task and dependency probes
+        assert db_service.context_cache.revalidations == 1
+
+    asyncio.run(run())
+    print("Version probe revalidated unchanged project")
+
+
+def test_probe_detects_task_change():
+    """A task update changes the version stamp and forces a reload."""
+
+    async def run():
+        db_service, client = make_service()
+        db_service.context_cache.probe_interval_seconds = -1
+        await db_service.get_project_context("p1")
+
+        client.tables["tasks"][1].update({"status": "done", "updated_at": "2024-02-01T00:00:00"})
+        context = await db_service.get_project_context("p1")
+
+        assert context["stats"]["completed_tasks"] == 2
+        assert db_service.context_cache.stale == 1
+
+    asyncio.run(run())
+    print("Version probe detected task change")
+
+
+def test_probe_detects_dependency_change():
+    """Adding or removing a dependency changes the version stamp and forces a reload."""
+
+    async def run():
+        db_service, client = make_service()
+        db_service.context_cache.probe_interval_seconds = -1
+        context = await db_service.get_project_context("p1")
+        assert context["dependencies"] == []
+
+        client.tables["task_dependencies"].append(
+            {"id": "d1", "task_id": "t2", "depends_on_task_id": "t1", "created_at": "2024-01-04T00:00:00"}
+        )
+        context = await db_service.get_project_context("p1")
+        assert [dependency["id"] for dependency in context["dependencies"]] == ["d1"]
+
+        client.tables["task_dependencies"].clear()
+        context = await db_service.get_project_context("p1")
+        assert context["dependencies"] == [] and db_service.context_cache.stale == 2
+
+    asyncio.run(run())
+    print("Version probe detected dependency changes")
+
+
+def test_probe_ignores_null_timestamps():
+    """A task without updated_at does not make an unchanged project look stale."""
+
+    async def run():
+        db_service, client = make_service()
+        client.tables["tasks"].append({"id": "t3", "project_id": "p1", "title": "Paint", "deleted_at": None, "updated_at": None})
+        db_service.context_cache.probe_interval_seconds = -1
+        await db_service.get_project_context("p1")
+        await db_service.get_project_context("p1")
+        assert db_service.context_cache.revalidations == 1 and db_service.context_cache.stale == 0
+
+    asyncio.run(run())
+    print("Version probe ignored null timestamps")
+
+
+def test_lru_eviction_and_invalidation():
+    """The cache is size bounded and supports explicit invalidation."""
+
+    cache = ProjectContextCache(max_projects=2)
+    for project_id in ("a", "b", "c"):
+        cache.store(project_id, {}, ())
+
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.evictions == 1
+
+    assert cache.invalidate("b") == 1
+    assert cache.invalidate("missing") == 0
+    assert cache.invalidate() == 1
+    assert cache.stats()["invalidations"] == 2
+    print("LRU eviction and invalidation work")
+
+
+def main():
+    """Run all context cache tests."""
+
+    print("Helm AI Service - Project Context Cache Tests")
+    print("=" * 50)
+
+    tests = [
+        test_cache_hit_skips_database,
+        test_probe_revalidates_unchanged_project,
+        test_probe_detects_task_change,
+        test_probe_detects_dependency_change,
+        test_probe_ignores_null_timestamps,
+        test_lru_eviction_and_invalidation
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
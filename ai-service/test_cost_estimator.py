@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for pre-flight token counting, cost estimation and budget enforcement.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from models import AIModel, AIValidationRequest
+from services.cost_estimator import CostEstimator, BudgetExceeded
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+from services.assessment_service import ProjectAssessmentService
+from services.validator_service import ValidatorService
+
+
+def make_validator(**overrides):
+    settings = Settings(openai_api_key="test-key", llm_cache_enabled=False, **overrides)
+    registry = ProviderClientRegistry(settings)
+    services = {model: FakeAIService(model=model) for model in (AIModel.GPT_4O, AIModel.GPT_4O_MINI)}
+    for model, service in services.items():
+        registry.services[f"openai_{model.value}"] = service
+
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Garden shed"}], "tasks": []})
+    validator = ValidatorService(db_service=DatabaseService(client=client), provider_registry=registry)
+    validator.cost_estimator = CostEstimator(settings)
+    return validator, services
+
+
+def make_request(**overrides) -> AIValidationRequest:
+    values = {
+        "project_id": "p1",
+        "component_type": "task",
+        "component_data": {"title": "Buy wood for the shed", "description": "Timber and screws"},
+        "ai_provider": "openai",
+        "ai_model": "gpt-4o"
+    }
+    values.update(overrides)
+    return AIValidationRequest(**values)
+
+
+def test_estimate_prices_input_and_output():
+    """Estimates price prompt and completion tokens at their own rates."""
+
+    estimator = CostEstimator(Settings(expected_completion_tokens=500, max_tokens_per_request=4000))
+    estimate = estimator.estimate("openai", "gpt-4o", ["word " * 400])
+
+    assert estimate.prompt_tokens > 0
+    assert estimate.expected_completion_tokens == 500 and estimate.max_completion_tokens == 4000
+    expected = estimate.prompt_tokens / 1000 * 0.0025 + 500 / 1000 * 0.01
+    assert abs(estimate.expected_cost - expected) < 1e-6
+    assert estimate.max_cost > estimate.expected_cost
+    assert estimate.within_budget and estimate.budget is None
+
+    # More prompt text costs more
+    assert estimator.estimate("openai", "gpt-4o", ["word " * 4000]).expected_cost > estimate.expected_cost
+    print("Estimate priced by input and output tokens")
+
+
+def test_plan_downgrades_or_rejects():
+    """Over-budget requests move to the cheaper model, or stay marked over budget."""
+
+    estimator = CostEstimator(Settings())
+    messages = ["Validate this task"]
+
+    plan = estimator.plan("openai", "gpt-4o", messages, budget=0.001)
+    assert plan.model == "gpt-4o-mini" and plan.downgraded_from == "gpt-4o" and plan.within_budget
+
+    plan = estimator.plan("openai", "gpt-4o", messages, budget=0.00001)
+    assert plan.model == "gpt-4o" and not plan.within_budget
+
+    plan = estimator.plan("anthropic", "claude-3-sonnet-20240229", messages, budget=0.001)
+    assert plan.model == "claude-3-haiku-20240307"
+
+    no_downgrade = CostEstimator(Settings(cost_downgrade_enabled=False))
+    assert not no_downgrade.plan("openai", "gpt-4o", messages, budget=0.001).within_budget
+    print("Over-budget requests downgraded or rejected")
+
+
+def test_validate_dry_run_skips_provider():
+    """A dry run returns the estimate without calling the provider."""
+
+    async def run():
+        validator, services = make_validator()
+        response = await validator.validate_component(make_request(dry_run=True))
+
+        assert response.success
+        assert response.usage_stats["dry_run"] is True
+        estimate = response.usage_stats["estimate"]
+        assert estimate["model"] == "gpt-4o" and estimate["prompt_tokens"] > 0
+        assert estimate["budget"] == validator.cost_estimator.settings.max_request_cost_usd
+        assert all(service.calls == 0 for service in services.values())
+
+    asyncio.run(run())
+    print("Dry run skipped the provider")
+
+
+def test_validate_downgrades_to_fit_budget():
+    """An over-budget validation runs on the cheaper model."""
+
+    async def run():
+        validator, services = make_validator(max_request_cost_usd=0.001)
+        response = await validator.validate_component(make_request())
+
+        assert response.success
+        assert response.usage_stats["model"] == AIModel.GPT_4O_MINI
+        assert response.usage_stats["downgraded_from"] == "gpt-4o"
+        assert services[AIModel.GPT_4O].calls == 0 and services[AIModel.GPT_4O_MINI].calls == 1
+
+    asyncio.run(run())
+    print("Validation downgraded to fit the budget")
+
+
+def test_validate_rejects_over_budget():
+    """A validation that no model fits is rejected before any provider call."""
+
+    async def run():
+        validator, services = make_validator(max_request_cost_usd=0.00001)
+        try:
+            await validator.validate_component(make_request())
+            raise AssertionError("over-budget validation should be rejected")
+        except BudgetExceeded as e:
+            assert not e.estimate.within_budget and e.estimate.budget == 0.00001
+        assert all(service.calls == 0 for service in services.values())
+
+        # Projects can raise their own budget
+        validator.db_service.supabase.tables["ai_configurations"] = [
+            {"project_id": "p1", "component_type": None, "max_request_cost_usd": 1.0}
+        ]
+        response = await validator.validate_component(make_request())
+        assert response.success and response.usage_stats["model"] == AIModel.GPT_4O
+
+    asyncio.run(run())
+    print("Over-budget validation rejected")
+
+
+def test_configuration_fetched_once():
+    """Budgets come from the AI configuration the caller already fetched, not another query."""
+
+    async def run():
+        validator, services = make_validator(max_request_cost_usd=0.00001)
+        db_service = validator.db_service
+        db_service.supabase.tables["ai_configurations"] = [
+            {"project_id": "p1", "component_type": None, "ai_provider": "openai", "ai_model": "gpt-4o",
+             "max_request_cost_usd": 1.0}
+        ]
+        fetches = []
+        get_ai_configuration = db_service.get_ai_configuration
+
+        async def counting_get_ai_configuration(project_id, component_type=None):
+            fetches.append(project_id)
+            return await get_ai_configuration(project_id, component_type)
+
+        db_service.get_ai_configuration = counting_get_ai_configuration
+
+        assessment_service = ProjectAssessmentService(db_service=db_service, provider_registry=validator.provider_registry)
+        assessment_service.cost_estimator = validator.cost_estimator
+        ai_config = await validator.get_ai_config("p1")
+        estimate = await assessment_service.estimate_assessment("p1", ai_config)
+        assert estimate.budget == 1.0 and estimate.within_budget
+        assert fetches == ["p1"], fetches
+
+        fetches.clear()
+        response = await validator.validate_component(make_request())
+        assert response.success and fetches == ["p1"], fetches
+
+    asyncio.run(run())
+    print("AI configuration fetched once per request")
+
+
+def main():
+    """Run all cost estimator tests."""
+
+    print("Helm AI Service - Cost Pre-flight Tests")
+    print("=" * 50)
+
+    tests = [
+        test_estimate_prices_input_and_output,
+        test_plan_downgrades_or_rejects,
+        test_validate_dry_run_skips_provider,
+        test_validate_downgrades_to_fit_budget,
+        test_validate_rejects_over_budget,
+        test_configuration_fetched_once
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
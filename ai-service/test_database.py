@@ -27,7 +27,7 @@ async def test_database_connection():
     try:
         print("\nTesting basic connection...")
         # Try to get a simple query
-        result = db_service.supabase.table("projects").select("id").limit(1).execute()
+        result = await db_service.supabase.table("projects").select("id").limit(1).execute()
         print(f"   SUCCESS: Connection successful")
     except Exception as e:
         print(f"   ERROR: Connection failed: {e}")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the dependency graph analysis.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from services.assessment_service import ProjectAssessmentService
+from services.dependency_graph import DependencyGraph, analyze_dependencies, format_dependency_analysis
+
+
+def task(task_id, hours=None, status="todo"):
+    return {"id": task_id, "title": f"Task {task_id}", "status": status, "estimated_hours": hours}
+
+
+def dep(task_id, depends_on):
+    return {"task_id": task_id, "depends_on_task_id": depends_on}
+
+
+def test_cycles_and_topological_order():
+    """Cycles are found as strongly connected components; prerequisites come first."""
+    tasks = [task(name) for name in "abcdef"]
+    dependencies = [
+        dep("b", "a"), dep("c", "b"), dep("d", "c"), dep("b", "d"),  # b -> c -> d -> b
+        dep("e", "d"), dep("f", "f"), dep("e", "missing"), dep("c", "b")
+    ]
+    graph = DependencyGraph(tasks, dependencies)
+    analysis = graph.analyze()
+
+    assert not analysis["is_acyclic"]
+    assert sorted(sorted(cycle) for cycle in analysis["cycles"]) == [["b", "c", "d"], ["f"]]
+    assert analysis["dependency_count"] == 6 and analysis["unknown_dependencies"] == 1
+
+    order = graph.topological_order()
+    cycle_positions = [order.index(name) for name in "bcd"]
+    assert order.index("a") < min(cycle_positions) and max(cycle_positions) < order.index("e")
+    assert max(cycle_positions) - min(cycle_positions) == 2
+
+    acyclic = analyze_dependencies(tasks[:3], [dep("b", "a"), dep("c", "b")])
+    assert acyclic["is_acyclic"] and acyclic["cycles"] == []
+    print("Cycles and topological order computed")
+
+
+def test_critical_path_chains_and_hotspots():
+    """The critical path follows remaining hours; chains, hotspots and blocked tasks are exact."""
+    tasks = [
+        task("design", 4, status="done"), task("api", 16), task("ui", 3), task("docs", 1),
+        task("tests", 5), task("release", 2), task("ops")
+    ]
+    dependencies = [
+        dep("api", "design"), dep("ui", "design"), dep("docs", "design"),
+        dep("tests", "api"), dep("tests", "ui"), dep("release", "tests"), dep("release", "docs"),
+        dep("release", "ops")
+    ]
+    analysis = analyze_dependencies(tasks, dependencies)
+
+    critical_path = analysis["critical_path"]
+    assert critical_path["task_ids"] == ["design", "api", "tests", "release"]
+    assert critical_path["hours"] == 23 and critical_path["unestimated_tasks"] == 0
+    assert analysis["longest_chains"][0] == {"task_ids": ["design", "api", "tests", "release"], "length": 4}
+    assert analysis["fan_out_hotspots"][0] == {"task_id": "design", "count": 3}
+    assert analysis["fan_in_hotspots"][0] == {"task_id": "release", "count": 3}
+    assert sorted(analysis["blocked_tasks"]) == ["release", "tests"]
+    assert analysis["ready_tasks"] == 4  # api, ui, docs, ops
+
+    text = format_dependency_analysis(analysis, tasks)
+    assert "Critical path (4 tasks, 23 remaining hours): Task design -> Task api -> Task tests -> Task release" in text
+    assert "Task design blocks 3" in text and "Circular dependencies: none" in text
+    print("Critical path, chains and hotspots computed")
+
+
+def test_large_graph_is_linear():
+    """A 10k-task chain plus cross edges is analyzed without recursion and in linear time."""
+    count = 10000
+    tasks = [task(f"t{i}", 1) for i in range(count)]
+    dependencies = [dep(f"t{i}", f"t{i - 1}") for i in range(1, count)]
+    dependencies += [dep(f"t{i}", f"t{i - 7}") for i in range(7, count, 3)]
+
+    started = time.perf_counter()
+    analysis = analyze_dependencies(tasks, dependencies)
+    elapsed = time.perf_counter() - started
+
+    assert analysis["is_acyclic"] and analysis["critical_path"]["hours"] == count
+    assert analysis["longest_chains"][0]["length"] == count
+    assert len(analysis["blocked_tasks"]) == count - 1 and analysis["ready_tasks"] == 1
+    assert elapsed < 2.0, elapsed
+    print(f"10k-task graph analyzed in {elapsed * 1000:.0f}ms")
+
+
+def test_assessment_prompt_uses_analysis():
+    """The assessment prompt carries the computed facts and only a few raw dependency lines."""
+    settings = Settings(openai_api_key="test-key", anthropic_api_key=None, prompt_dependency_lines=3)
+    service = ProjectAssessmentService(db_service=None, provider_registry=None)
+    service.settings = settings
+
+    tasks = [task(f"t{i}", 2) for i in range(12)]
+    dependencies = [dep(f"t{i}", f"t{i - 1}") for i in range(1, 12)] + [dep("t0", "t11")]
+    context_data = {
+        "project_name": "Loop", "project_status": "active", "project_description": None,
+        "task_count": 12, "completed_tasks": 0, "completion_percentage": 0.0,
+        "status_breakdown": {"todo": 12}, "priority_breakdown": {}, "total_estimated_hours": 24,
+        "total_dependencies": 12, "tasks": tasks, "dependencies": dependencies
+    }
+    prompt = service._build_assessment_prompt(context_data, {}, "gpt-4o-mini")
+
+    assert "Dependency Analysis (computed from the full dependency graph):" in prompt
+    assert "- Circular dependencies (1):" in prompt
+    assert prompt.count(" depends on ") == 3
+    assert "... and 9 more dependencies not shown" in prompt
+    print("Assessment prompt uses the dependency analysis")
+
+
+def main():
+    """Run all dependency graph tests."""
+
+    print("Helm AI Service - Dependency Graph Tests")
+    print("=" * 50)
+
+    tests = [
+        test_cycles_and_topological_order,
+        test_critical_path_chains_and_hotspots,
+        test_large_graph_is_linear,
+        test_assessment_prompt_uses_analysis
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for the background health prober and the health endpoints.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from models import AIProviderConfig, AIProvider, AIModel
+from services.container import ServiceContainer
+from services.database_service import DatabaseService
+from services.health_monitor import HealthMonitor
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+
+
+class ProbedAIService(FakeAIService):
+    """AI service that counts reachability checks and refuses paid test calls."""
+
+    def __init__(self, reachable: bool = True, delay: float = 0.0):
+        super().__init__()
+        self.reachable = reachable
+        self.delay = delay
+        self.checks = 0
+
+    async def check_reachability(self):
+        self.checks += 1
+        await asyncio.sleep(self.delay)
+        return self.reachable
+
+    async def test_connection(self):
+        raise AssertionError("health checks must not send completions")
+
+
+def make_container(service: ProbedAIService, **overrides) -> ServiceContainer:
+    settings = Settings(openai_api_key="test-key", anthropic_api_key=None, **overrides)
+    registry = ProviderClientRegistry(settings)
+    registry.services["openai_gpt-4o-mini"] = service
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Garden shed"}]})
+    return ServiceContainer(settings=settings, db_service=DatabaseService(client=client), provider_registry=registry)
+
+
+def test_probe_caches_results():
+    """A probe records provider and database health with timestamps."""
+
+    async def run():
+        service = ProbedAIService()
+        monitor = make_container(service).health_monitor
+        assert not monitor.is_ready() and monitor.snapshot()["checked_at"] is None
+
+        await monitor.probe()
+        snapshot = monitor.snapshot()
+        assert snapshot["ready"] and not snapshot["stale"]
+        assert snapshot["ai_providers"]["openai"]["healthy"]
+        assert snapshot["ai_providers"]["openai"]["checked_at"]
+        assert snapshot["ai_providers"]["anthropic"] == {"healthy": False, "configured": False}
+        assert snapshot["database"]["healthy"] and snapshot["database"]["pool"]["configured"]
+        assert service.checks == 1
+
+    asyncio.run(run())
+    print("Probe results cached")
+
+
+def test_unreachable_or_slow_provider_not_ready():
+    """A provider that fails or times out makes the service not ready."""
+
+    async def run():
+        monitor = make_container(ProbedAIService(reachable=False)).health_monitor
+        await monitor.probe()
+        assert not monitor.is_ready()
+
+        monitor = make_container(ProbedAIService(delay=0.2), health_probe_timeout_seconds=0.01).health_monitor
+        await monitor.probe()
+        assert not monitor.is_ready()
+        assert monitor.ai_providers["openai"]["error"].startswith("Timed out")
+
+    asyncio.run(run())
+    print("Unhealthy provider not ready")
+
+
+def test_background_probing_interval():
+    """The monitor probes immediately on start and then every interval."""
+
+    async def run():
+        service = ProbedAIService()
+        monitor = make_container(service, health_probe_interval_seconds=0.02).health_monitor
+        await monitor.start()
+        await asyncio.sleep(0.07)
+        await monitor.close()
+
+        assert 3 <= service.checks <= 5
+        assert monitor.probes == service.checks
+
+    asyncio.run(run())
+    print("Background probes run on the interval")
+
+
+def test_health_endpoints_read_cached_results():
+    """Health endpoints serve cached probe results without probing."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+
+    service = ProbedAIService()
+    container = make_container(service)
+
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            starting = test_client.get("/health/ready")
+            asyncio.run(container.health_monitor.probe())
+            responses = [test_client.get("/health") for _ in range(20)]
+            ready = test_client.get("/health/ready")
+            live = test_client.get("/health/live")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert starting.status_code == 503
+    assert all(response.status_code == 200 for response in responses)
+    health = responses[-1].json()
+    assert health["status"] == "healthy"
+    assert health["ai_providers"] == {"openai": True, "anthropic": False}
+    assert health["database"] is True and health["checked_at"]
+    assert ready.status_code == 200 and ready.json()["ready"]
+    assert live.json() == {"status": "alive"}
+
+    # Only the explicit probe reached the provider
+    assert service.checks == 1
+    print("Health endpoints served from cache")
+
+
+def test_anthropic_probe_sends_no_completion():
+    """The Anthropic reachability check is a GET of the models list through the shared client."""
+
+    import httpx
+    from anthropic import AsyncAnthropic
+    from services.anthropic_service import AnthropicService
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("x-api-key") != "good-key":
+            return httpx.Response(401, json={"error": {"type": "authentication_error"}})
+        return httpx.Response(200, json={"data": [], "has_more": False})
+
+    async def run(api_key):
+        client = AsyncAnthropic(
+            api_key=api_key, base_url="https://anthropic.test",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        service = AnthropicService(AIProviderConfig(
+            provider=AIProvider.ANTHROPIC, model=AIModel.CLAUDE_3_HAIKU, api_key=api_key, max_tokens=1000
+        ), client=client)
+        return await service.check_reachability()
+
+    assert asyncio.run(run("good-key")) is True
+    assert asyncio.run(run("bad-key")) is False
+    assert [(request.method, request.url.path) for request in requests] == [("GET", "/v1/models")] * 2
+    print("Anthropic probe spends no tokens")
+
+
+def main():
+    """Run all health monitor tests."""
+
+    print("Helm AI Service - Health Monitor Tests")
+    print("=" * 50)
+
+    tests = [
+        test_probe_caches_results,
+        test_unreachable_or_slow_provider_not_ready,
+        test_background_probing_interval,
+        test_health_endpoints_read_cached_results,
+        test_anthropic_probe_sends_no_completion
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Tests for DatabaseService running against the in-memory stand-in backend.
+No Supabase project or API keys are required.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import get_settings
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient, InMemoryQueryBuilder
+
+
+class RejectingQueryBuilder(InMemoryQueryBuilder):
+    """Query builder that rejects inserts containing a proposal marked "bad"."""
+
+    async def execute(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        if self.operation == "insert" and any(row.get("rationale") == "bad" for row in rows):
+            await self.client._round_trip()
+            raise ValueError("violates check constraint")
+        return await super().execute()
+
+
+class RejectingClient(InMemoryDatabaseClient):
+    """Stand-in client whose inserts fail for rows marked "bad"."""
+
+    def table(self, name: str) -> InMemoryQueryBuilder:
+        return RejectingQueryBuilder(self, name)
+
+
+def make_tables():
+    """Build a small project with tasks and dependencies."""
+    return {
+        "projects": [{"id": "p1", "name": "Garden shed", "status": "active"}],
+        "tasks": [
+            {"id": "t1", "project_id": "p1", "title": "Buy wood", "status": "done", "priority": "high", "estimated_hours": 2, "deleted_at": None},
+            {"id": "t2", "project_id": "p1", "title": "Build frame", "status": "in_progress", "priority": "medium", "estimated_hours": 6, "deleted_at": None},
+            {"id": "t3", "project_id": "p1", "title": "Old task", "status": "todo", "priority": "low", "estimated_hours": 1, "deleted_at": "2024-01-01"},
+            {"id": "t4", "project_id": "p2", "title": "Other project", "status": "todo", "priority": "low", "deleted_at": None},
+        ],
+        "task_dependencies": [
+            {"id": "d1", "task_id": "t2", "depends_on_task_id": "t1", "dependency_type": "finish_to_start", "created_at": "2024-01-01T00:00:00"},
+        ],
+    }
+
+
+def test_project_context():
+    """Project context is assembled from the stand-in tables."""
+
+    db_service = DatabaseService(client=InMemoryDatabaseClient(make_tables()))
+    context = asyncio.run(db_service.get_project_context("p1"))
+
+    assert context["project"]["name"] == "Garden shed"
+    assert [task["id"] for task in context["tasks"]] == ["t1", "t2"]
+    assert context["stats"]["total_tasks"] == 2
+    assert context["stats"]["completed_tasks"] == 1
+    assert context["stats"]["completion_percentage"] == 50.0
+    assert context["stats"]["total_estimated_hours"] == 8
+    assert context["stats"]["total_dependencies"] == 1
+    print("Project context built from in-memory backend")
+
+
+def test_proposal_round_trip():
+    """Proposals can be written, read back and updated."""
+
+    async def run():
+        db_service = DatabaseService(client=InMemoryDatabaseClient())
+        created = await db_service.create_proposal({"project_id": "p1", "rationale": "r", "status": "pending"})
+        assert created["id"]
+
+        updated = await db_service.update_proposal(created["id"], {"status": "accept"})
+        assert updated["status"] == "accept"
+
+        proposals = await db_service.get_proposals("p1", status="accept")
+        assert len(proposals) == 1
+
+    asyncio.run(run())
+    print("Proposal round trip succeeded")
+
+
+def test_bulk_proposals_in_order_with_fallback():
+    """Proposals are saved with one insert, falling back per row on failure."""
+
+    async def run():
+        client = RejectingClient()
+        db_service = DatabaseService(client=client)
+
+        proposals = [{"project_id": "p1", "rationale": f"r{i}", "status": "pending"} for i in range(15)]
+        saved = await db_service.create_proposals(proposals)
+        assert [row["rationale"] for row in saved] == [f"r{i}" for i in range(15)]
+        assert all(row["id"] for row in saved)
+        assert client.request_count == 1
+
+        # A rejected row fails the bulk insert; only that row stays unsaved
+        client.request_count = 0
+        proposals = [{"project_id": "p1", "rationale": rationale} for rationale in ("a", "bad", "c")]
+        saved = await db_service.create_proposals(proposals)
+        assert saved[0]["rationale"] == "a" and saved[1] == {} and saved[2]["rationale"] == "c"
+        assert client.request_count == 4
+        assert len(client.tables["proposals"]) == 17
+
+    asyncio.run(run())
+    print("Bulk proposal insert keeps order and isolates failed rows")
+
+
+def test_saved_proposal_rows_are_json():
+    """Proposal rows sent to the database encode as JSON, as PostgREST requires."""
+    import json
+    from models import AIProposal
+    from services.validator_service import ValidatorService
+
+    async def run():
+        db_service = DatabaseService(client=InMemoryDatabaseClient())
+        sent = []
+        create_proposals = db_service.create_proposals
+
+        async def recording_create_proposals(rows):
+            sent.extend(rows)
+            return await create_proposals(rows)
+
+        db_service.create_proposals = recording_create_proposals
+        validator = ValidatorService(db_service=db_service)
+        proposals = [AIProposal(proposal_type="field_improvement", rationale="Shorten the title", changes={"title": "Frame"})]
+        saved = await validator._save_proposals("p1", proposals, "task", "t1")
+
+        assert len(sent) == 1 and json.loads(json.dumps(sent))[0]["expires_at"] == sent[0]["expires_at"]
+        assert saved[0]["id"] and saved[0]["rationale"] == "Shorten the title"
+
+    asyncio.run(run())
+    print("Saved proposal rows encode as JSON")
+
+
+def test_payloads_must_be_json():
+    """Like PostgREST, the stand-in rejects writes and function calls it cannot JSON-encode."""
+    from datetime import datetime
+
+    async def run():
+        client = InMemoryDatabaseClient()
+        for query in (
+            client.table("proposals").insert({"project_id": "p1", "expires_at": datetime(2024, 1, 1)}),
+            client.table("proposals").update({"expires_at": datetime(2024, 1, 1)}).eq("project_id", "p1"),
+            client.rpc("ai_usage_summary", {"start_param": datetime(2024, 1, 1)})
+        ):
+            try:
+                await query.execute()
+                raise AssertionError("a datetime payload should be rejected")
+            except TypeError:
+                pass
+        assert client.tables["proposals"] == []
+
+    asyncio.run(run())
+    print("Payloads JSON-encoded like PostgREST")
+
+
+def test_dependencies_single_query_and_paging():
+    """Dependencies come from one joined query per page and skip deleted tasks."""
+
+    tables = make_tables()
+    tables["task_dependencies"] += [
+        {"id": "d2", "task_id": "t3", "depends_on_task_id": "t1", "dependency_type": "finish_to_start", "created_at": "2024-01-01T00:00:00"},
+        {"id": "d3", "task_id": "t2", "depends_on_task_id": "t3", "dependency_type": "finish_to_start", "created_at": "2024-01-01T00:00:00"},
+        {"id": "d4", "task_id": "t4", "depends_on_task_id": "t4", "dependency_type": "finish_to_start", "created_at": "2024-01-01T00:00:00"},
+    ]
+    client = InMemoryDatabaseClient(tables)
+    db_service = DatabaseService(client=client)
+
+    dependencies = asyncio.run(db_service.get_task_dependencies("p1"))
+    assert dependencies == [tables["task_dependencies"][0]]
+    assert client.request_count == 1
+
+    # Force paging with a tiny page size
+    tables["tasks"][2]["deleted_at"] = None
+    db_service.settings = get_settings().model_copy(update={"dependency_page_size": 2})
+    client.request_count = 0
+
+    dependencies = asyncio.run(db_service.get_task_dependencies("p1"))
+    assert [dependency["id"] for dependency in dependencies] == ["d1", "d2", "d3"]
+    assert client.request_count == 2
+    print("Dependencies fetched with one query per page")
+
+
+def test_queries_do_not_block_event_loop():
+    """Concurrent context fetches overlap instead of running back to back."""
+
+    async def run():
+        client = InMemoryDatabaseClient(make_tables(), latency=0.05)
+        db_service = DatabaseService(client=client)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[db_service.get_project_context("p1") for _ in range(10)])
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+
+    # 10 contexts x 4 round trips x 50ms would take 2s if serialized
+    assert elapsed < 0.5, f"context fetches were serialized ({elapsed:.2f}s)"
+    print(f"10 concurrent contexts fetched in {elapsed * 1000:.0f}ms")
+
+
+def main():
+    """Run all in-memory database tests."""
+
+    print("Helm AI Service - In-Memory Database Tests")
+    print("=" * 50)
+
+    tests = [
+        test_project_context,
+        test_proposal_round_trip,
+        test_bulk_proposals_in_order_with_fallback,
+        test_saved_proposal_rows_are_json,
+        test_payloads_must_be_json,
+        test_dependencies_single_query_and_paging,
+        test_queries_do_not_block_event_loop
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk portfolio assessments.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from models import AIModel
+from services.assessment_service import ProjectAssessmentService
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.portfolio_assessment import PortfolioAssessmentService
+from services.provider_registry import ProviderClientRegistry
+from services.rate_limiter import RateLimiter, RateLimitExceeded
+from services.validator_service import ValidatorService
+
+
+INSIGHTS = json.dumps([
+    {"rationale": "Most tasks have no estimate", "confidence": "high", "evidence": [], "estimated_impact": "Unclear timeline"},
+    {"rationale": "Nothing is in progress", "confidence": "medium", "evidence": [], "estimated_impact": "Slow start"}
+])
+
+
+def make_tables(projects=6):
+    tables = {"projects": [], "tasks": [], "task_dependencies": [], "ai_configurations": []}
+    for p in range(projects):
+        project_id = f"p{p}"
+        tables["projects"].append({"id": project_id, "name": f"Project {p}", "organization_id": "o1", "status": "active"})
+        for t in range(3):
+            tables["tasks"].append({
+                "id": f"{project_id}-t{t}", "project_id": project_id, "title": f"Task {t}",
+                "status": "done" if t == 0 else "todo", "priority": "medium", "estimated_hours": 2, "deleted_at": None
+            })
+        tables["task_dependencies"].append({
+            "id": f"{project_id}-d", "task_id": f"{project_id}-t1", "depends_on_task_id": f"{project_id}-t0",
+            "dependency_type": "finish_to_start"
+        })
+    tables["projects"].append({"id": "other", "name": "Other org", "organization_id": "o2"})
+    return tables
+
+
+def make_portfolio(tables, rate_limiter=None, **overrides):
+    values = {
+        "openai_api_key": "test-key", "anthropic_api_key": None, "llm_cache_enabled": False,
+        "portfolio_assessment_concurrency": 3, "portfolio_context_batch_size": 2, "portfolio_insight_batch_size": 4
+    }
+    values.update(overrides)
+    settings = Settings(**values)
+
+    registry = ProviderClientRegistry(settings)
+    service = FakeAIService(delay=0.01, insights=INSIGHTS)
+    registry.services[f"openai_{AIModel.GPT_4O_MINI.value}"] = service
+
+    client = InMemoryDatabaseClient(tables)
+    db_service = DatabaseService(client=client)
+    assessment_service = ProjectAssessmentService(db_service=db_service, provider_registry=registry)
+    validator_service = ValidatorService(db_service=db_service, provider_registry=registry)
+    portfolio = PortfolioAssessmentService(
+        assessment_service, validator_service, rate_limiter or RateLimiter(settings), settings
+    )
+    return portfolio, service, client
+
+
+def test_bulk_contexts_match_single_project_contexts():
+    """Bulk-loaded contexts are identical to per-project ones, with a few queries per batch."""
+
+    async def run():
+        tables = make_tables()
+        single = DatabaseService(client=InMemoryDatabaseClient(make_tables()))
+        single.context_cache = None
+        expected = {project_id: await single.get_project_context(project_id) for project_id in ("p0", "p1", "p2")}
+
+        client = InMemoryDatabaseClient(tables)
+        db_service = DatabaseService(client=client)
+        db_service.settings = db_service.settings.model_copy(update={"dependency_page_size": 2})
+        contexts = await db_service.get_project_contexts(["p0", "p1", "p2", "missing"])
+
+        for project_id, context in expected.items():
+            assert contexts[project_id] == context, project_id
+        assert contexts["missing"]["project"] is None and contexts["missing"]["tasks"] == []
+        # projects + 5 task pages + 2 dependency pages, instead of 3 queries per project
+        assert client.request_count == 8
+
+        # Loaded contexts are cached for the next request
+        requests = client.request_count
+        await db_service.get_project_context("p1")
+        assert client.request_count == requests
+
+    asyncio.run(run())
+    print("Bulk contexts match per-project contexts")
+
+
+def test_portfolio_run_assesses_organization():
+    """Every project of the organization is assessed with bounded concurrency and saved in batches."""
+
+    async def run():
+        tables = make_tables()
+        tables["ai_configurations"].append({"project_id": "p4", "component_type": None, "max_request_cost_usd": 0.0})
+        portfolio, service, client = make_portfolio(tables)
+
+        project_ids = await portfolio.db_service.get_organization_project_ids("o1")
+        run = await portfolio.start_run(project_ids + ["ghost"], organization_id="o1")
+        await run.task
+        status = run.to_dict(include_results=True)
+
+        assert status["status"] == "completed" and status["total_projects"] == 7
+        assert status["completed_projects"] == 5 and status["failed_projects"] == 2
+        assert status["results"]["p4"]["reason"] == "budget_exceeded"
+        assert status["results"]["ghost"]["error"] == "Project not found"
+        assert status["results"]["p0"] == {"status": "completed", "insights": 2, "insights_saved": 2}
+
+        assert service.calls == 5 and 1 < service.max_active <= 3
+        assert status["insights_saved"] == 10 and len(client.tables["proposals"]) == 10
+        assert {row["project_id"] for row in client.tables["proposals"]} == {"p0", "p1", "p2", "p3", "p5"}
+
+    asyncio.run(run())
+    print("Portfolio run assessed the organization")
+
+
+def test_portfolio_run_waits_out_rate_limits():
+    """A rate-limited project is retried after the advertised delay, up to the retry limit."""
+
+    class FlakyRateLimiter(RateLimiter):
+        def __init__(self, settings, rejections):
+            super().__init__(settings)
+            self.rejections = rejections
+
+        async def admit(self, project_id, organization_id=None):
+            if self.rejections.get(project_id, 0) > 0:
+                self.rejections[project_id] -= 1
+                raise RateLimitExceeded("project_requests", 0.01)
+            await super().admit(project_id, organization_id)
+
+    async def run():
+        settings = Settings(portfolio_rate_limit_retries=2)
+        limiter = FlakyRateLimiter(settings, {"p0": 2, "p1": 5})
+        portfolio, service, _ = make_portfolio(make_tables(projects=3), rate_limiter=limiter, portfolio_rate_limit_retries=2)
+
+        run = await portfolio.start_run(["p0", "p1", "p2"])
+        await run.task
+
+        assert run.results["p0"]["status"] == "completed"
+        assert run.results["p1"]["reason"] == "rate_limited"
+        assert run.results["p2"]["status"] == "completed"
+        assert run.rate_limit_waits == 4 and service.calls == 2
+
+    asyncio.run(run())
+    print("Rate limits waited out")
+
+
+def test_portfolio_endpoints():
+    """Runs start in the background and their progress can be polled."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+    from services.container import ServiceContainer
+
+    portfolio, service, client = make_portfolio(make_tables(projects=4))
+    container = ServiceContainer(db_service=portfolio.db_service, provider_registry=portfolio.assessment_service.provider_registry)
+    container.portfolio_service = portfolio
+
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            started = test_client.post("/assess-portfolio", json={"organization_id": "o1"})
+            run_id = started.json()["run_id"]
+            for _ in range(100):
+                status = test_client.get(f"/assess-portfolio/{run_id}").json()
+                if status["status"] == "completed":
+                    break
+                test_client.portal.call(asyncio.sleep, 0.01)
+            missing = test_client.get("/assess-portfolio/unknown")
+            invalid = test_client.post("/assess-portfolio", json={})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert started.status_code == 202 and started.json()["total_projects"] == 4
+    assert status["status"] == "completed" and status["completed_projects"] == 4
+    assert set(status["results"]) == {"p0", "p1", "p2", "p3"}
+    assert missing.status_code == 404 and invalid.status_code == 400
+    print("Portfolio endpoints served")
+
+
+def main():
+    """Run all portfolio assessment tests."""
+
+    print("Helm AI Service - Portfolio Assessment Tests")
+    print("=" * 50)
+
+    tests = [
+        test_bulk_contexts_match_single_project_contexts,
+        test_portfolio_run_assesses_organization,
+        test_portfolio_run_waits_out_rate_limits,
+        test_portfolio_endpoints
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
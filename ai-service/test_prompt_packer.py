@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for token-budgeted packing of tasks and dependencies into prompts.
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.assessment_service import ProjectAssessmentService
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.prompt_packer import PromptPacker, rank_tasks
+
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def make_tasks(count: int):
+    tasks = []
+    for index in range(count):
+        tasks.append({
+            "id": f"t{index}",
+            "title": f"Task number {index}",
+            "description": "Detailed description of the work involved. " * 20,
+            "status": "todo",
+            "priority": "low"
+        })
+    return tasks
+
+
+def test_rank_tasks_by_relevance():
+    """Overdue, in-progress, blocking and high-priority open tasks come first."""
+
+    tasks = [
+        {"id": "done", "title": "Done", "status": "done", "priority": "critical"},
+        {"id": "plain", "title": "Plain", "status": "todo", "priority": "low"},
+        {"id": "high", "title": "High", "status": "todo", "priority": "high"},
+        {"id": "doing", "title": "Doing", "status": "in_progress", "priority": "medium"},
+        {"id": "late", "title": "Late", "status": "todo", "priority": "high", "due_date": "2026-02-01"},
+        {"id": "blocker", "title": "Blocker", "status": "todo", "priority": "low"}
+    ]
+    dependencies = [
+        {"task_id": "plain", "depends_on_task_id": "blocker"},
+        {"task_id": "high", "depends_on_task_id": "blocker"},
+        {"task_id": "doing", "depends_on_task_id": "blocker"}
+    ]
+
+    order = [task["id"] for task in rank_tasks(tasks, dependencies, NOW)]
+    assert order == ["late", "doing", "high", "blocker", "plain", "done"], order
+    print("Tasks ranked by relevance")
+
+
+def test_pack_respects_budget_and_summarises_overflow():
+    """A large project is packed into the budget with an overflow summary."""
+
+    tasks = make_tasks(500)
+    tasks[400]["status"] = "in_progress"
+    dependencies = [{"task_id": f"t{index}", "depends_on_task_id": f"t{index + 1}"} for index in range(300)]
+
+    packer = PromptPacker("gpt-4o-mini", description_chars=100)
+    packed = packer.pack(tasks, dependencies, 2000, NOW)
+
+    assert packed["tokens"] <= 2000
+    assert packer.count(packed["tasks_text"]) <= 1500
+    assert 0 < packed["tasks_included"] < 500
+    assert packed["tasks_text"].splitlines()[0].startswith("- Task number 400 (in_progress")
+    assert packed["tasks_text"].splitlines()[-1].startswith(f"... and {500 - packed['tasks_included']} more tasks not shown")
+    assert "status: todo:" in packed["tasks_text"].splitlines()[-1]
+    assert "more dependencies not shown" in packed["dependencies_text"]
+    assert "Task number 0 depends on Task number 1" in packed["dependencies_text"]
+
+    # A bigger budget fits more tasks
+    assert packer.pack(tasks, dependencies, 8000, NOW)["tasks_included"] > packed["tasks_included"]
+    print("Large project packed into the budget")
+
+
+def test_small_project_fits_without_summary():
+    """Projects that fit the budget are included in full."""
+
+    packer = PromptPacker("claude-3-haiku-20240307")
+    packed = packer.pack(make_tasks(3), [{"task_id": "t0", "depends_on_task_id": "t1"}], 4000, NOW)
+    assert packed["tasks_included"] == 3 and packed["dependencies_included"] == 1
+    assert "not shown" not in packed["tasks_text"] + packed["dependencies_text"]
+
+    empty = packer.pack([], [], 4000, NOW)
+    assert empty["tasks_text"] == "No tasks found" and empty["dependencies_text"] == "No dependencies found"
+    print("Small project included in full")
+
+
+def test_assessment_prompt_within_budget():
+    """The whole assessment prompt stays within the configured input budget."""
+
+    service = ProjectAssessmentService(db_service=DatabaseService(client=InMemoryDatabaseClient({})))
+    tasks = make_tasks(1000)
+    context_data = {
+        'project_name': 'Big project',
+        'project_description': 'Lots of work',
+        'project_status': 'active',
+        'task_count': len(tasks),
+        'completed_tasks': 0,
+        'completion_percentage': 0.0,
+        'status_breakdown': {'todo': len(tasks)},
+        'priority_breakdown': {'low': len(tasks)},
+        'total_estimated_hours': 0,
+        'total_dependencies': 0,
+        'tasks': tasks,
+        'dependencies': []
+    }
+
+    prompt = service._build_assessment_prompt(context_data, {}, "gpt-4o-mini")
+    packer = PromptPacker("gpt-4o-mini")
+    assert packer.count(prompt) <= service.settings.assessment_prompt_token_budget
+    assert "more tasks not shown" in prompt
+    assert "Analysis Categories:" in prompt
+    print("Assessment prompt within budget")
+
+
+def main():
+    """Run all prompt packer tests."""
+
+    print("Helm AI Service - Prompt Packer Tests")
+    print("=" * 50)
+
+    tests = [
+        test_rank_tasks_by_relevance,
+        test_pack_respects_budget_and_summarises_overflow,
+        test_small_project_fits_without_summary,
+        test_assessment_prompt_within_budget
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
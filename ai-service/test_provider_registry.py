@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared AI provider client registry.
+No network access is needed; clients are created but never called.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from models import AIProvider, AIModel
+from services.provider_registry import ProviderClientRegistry
+
+
+def make_registry() -> ProviderClientRegistry:
+    return ProviderClientRegistry(Settings(anthropic_api_key="test-key", openai_api_key=None, ai_http_pool_size=7))
+
+
+def test_services_are_shared():
+    """Repeated lookups return the same service and SDK client."""
+
+    registry = make_registry()
+    first = registry.get_service(AIProvider.ANTHROPIC, AIModel.CLAUDE_3_HAIKU)
+    second = registry.get_service("anthropic", "claude-3-haiku-20240307")
+    sonnet = registry.get_service(AIProvider.ANTHROPIC, AIModel.CLAUDE_3_SONNET)
+
+    assert first is second
+    assert sonnet is not first
+    assert sonnet.client is first.client
+    print("Services and clients are reused across lookups")
+
+
+def test_missing_api_key():
+    """Providers without an API key are rejected."""
+
+    registry = make_registry()
+    try:
+        registry.get_service(AIProvider.OPENAI, AIModel.GPT_4O_MINI)
+    except ValueError as e:
+        assert "API key not configured" in str(e)
+    else:
+        raise AssertionError("expected ValueError for missing API key")
+    print("Missing API key rejected")
+
+
+def test_metrics_and_close():
+    """Pool metrics are reported per provider and cleared on close."""
+
+    registry = make_registry()
+    registry.get_service(AIProvider.ANTHROPIC, AIModel.CLAUDE_3_HAIKU)
+
+    metrics = registry.metrics()
+    assert metrics["anthropic"]["pool_size"] == 7
+    assert metrics["anthropic"]["in_flight"] == 0
+
+    asyncio.run(registry.close())
+    assert registry.metrics() == {}
+    assert registry.services == {}
+    print("Pool metrics reported and clients closed")
+
+
+def main():
+    """Run all provider registry tests."""
+
+    print("Helm AI Service - Provider Registry Tests")
+    print("=" * 50)
+
+    tests = [
+        test_services_are_shared,
+        test_missing_api_key,
+        test_metrics_and_close
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tests for provider failover, hedged requests and circuit breakers.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from models import AIProvider, AIModel
+from services.provider_registry import ProviderClientRegistry
+from services.provider_router import (
+    CircuitBreaker, ProviderRouter, RoutedAIService, UNAVAILABLE_ANSWER, parse_fallback_models
+)
+
+
+def make_settings(**overrides) -> Settings:
+    values = {
+        "openai_api_key": "test-key",
+        "ai_fallback_models": "anthropic:claude-3-haiku-20240307",
+        "circuit_breaker_min_requests": 4,
+        "circuit_breaker_error_rate": 0.5,
+        "circuit_breaker_open_seconds": 0.05,
+        "ai_hedge_min_samples": 5,
+        "ai_hedge_min_delay_ms": 0
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+def make_routed(primary: FakeAIService, fallback: FakeAIService, **overrides) -> RoutedAIService:
+    return RoutedAIService([primary, fallback], ProviderRouter(make_settings(**overrides)))
+
+
+def openai_service(**kwargs) -> FakeAIService:
+    return FakeAIService(AIProvider.OPENAI, AIModel.GPT_4O_MINI, **kwargs)
+
+
+def anthropic_service(**kwargs) -> FakeAIService:
+    return FakeAIService(AIProvider.ANTHROPIC, AIModel.CLAUDE_3_HAIKU, **kwargs)
+
+
+def test_parse_fallback_models():
+    """Fallback lists are parsed in order and invalid entries skipped."""
+
+    fallbacks = parse_fallback_models("anthropic:claude-3-haiku-20240307, bogus, openai:gpt-4o")
+    assert fallbacks == [(AIProvider.ANTHROPIC, AIModel.CLAUDE_3_HAIKU), (AIProvider.OPENAI, AIModel.GPT_4O)]
+    assert parse_fallback_models("") == []
+    print("Fallback models parsed")
+
+
+def test_failover_to_fallback():
+    """A failed call is retried on the fallback, which is reported in the usage."""
+
+    async def run():
+        primary, fallback = openai_service(fail=True), anthropic_service()
+        routed = make_routed(primary, fallback)
+
+        answer, _, usage = await routed.answer_question("Status?", "p1")
+        assert answer == "answer from anthropic"
+        assert usage.provider == "anthropic" and usage.model == "claude-3-haiku-20240307"
+        assert routed.router.failovers == 1
+
+        # Primary answers are not tagged with a provider
+        routed = make_routed(openai_service(), fallback)
+        _, _, usage = await routed.answer_question("Status?", "p1")
+        assert usage.provider is None
+
+    asyncio.run(run())
+    print("Failed call served by the fallback")
+
+
+def test_circuit_opens_and_recovers():
+    """An open circuit skips its provider until a half-open probe succeeds."""
+
+    async def run():
+        primary, fallback = openai_service(fail=True), anthropic_service()
+        routed = make_routed(primary, fallback)
+
+        for _ in range(4):
+            await routed.answer_question("Status?", "p1")
+        breaker = routed.router.breakers["openai"]
+        assert breaker.state == CircuitBreaker.OPEN
+        assert primary.calls == 4
+
+        await routed.answer_question("Status?", "p1")
+        assert primary.calls == 4
+        assert routed.router.short_circuited == 1
+
+        # After the cool-down one probe goes through and closes the circuit
+        primary.fail = False
+        await asyncio.sleep(0.06)
+        answer, _, _ = await routed.answer_question("Status?", "p1")
+        assert answer == "answer from openai"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(run())
+    print("Circuit opened and recovered")
+
+
+def test_half_open_allows_one_probe():
+    """Only one probe call is let through while half-open."""
+
+    breaker = CircuitBreaker(error_rate=0.5, min_requests=2, window_seconds=60, open_seconds=0)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.times_opened == 2
+
+    # A cancelled probe frees the slot for the next one
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    print("Half-open state allows one probe")
+
+
+def test_hedged_request_wins_and_cancels_primary():
+    """A slow call is hedged once it passes the latency percentile."""
+
+    async def run():
+        primary, fallback = openai_service(delay=0.3), anthropic_service(delay=0.01)
+        routed = make_routed(primary, fallback, ai_hedging_enabled=True)
+        for _ in range(5):
+            routed.router.record(primary, True, 0.02)
+
+        started = time.monotonic()
+        answer, _, usage = await routed.answer_question("Status?", "p1")
+        elapsed = time.monotonic() - started
+
+        assert answer == "answer from anthropic"
+        assert usage.provider == "anthropic"
+        assert elapsed < 0.2
+        assert routed.router.hedges == 1 and routed.router.hedge_wins == 1
+
+        await asyncio.sleep(0)
+        assert primary.cancelled == 1
+
+        # Without latency history there is nothing to hedge against
+        routed = make_routed(openai_service(delay=0.05), anthropic_service(), ai_hedging_enabled=True)
+        answer, _, _ = await routed.answer_question("Status?", "p1")
+        assert answer == "answer from openai" and routed.router.hedges == 0
+
+    asyncio.run(run())
+    print("Hedged request won and primary cancelled")
+
+
+def test_all_circuits_open_returns_unavailable():
+    """With every provider short-circuited the caller gets an empty result."""
+
+    async def run():
+        routed = make_routed(openai_service(), anthropic_service())
+        for breaker_service in routed.services:
+            breaker = routed.router.breaker(breaker_service)
+            for _ in range(4):
+                breaker.record(False)
+
+        answer, evidence, usage = await routed.answer_question("Status?", "p1")
+        assert answer == UNAVAILABLE_ANSWER and evidence == [] and usage.total_tokens == 0
+        assert routed.router.short_circuited == 2
+
+    asyncio.run(run())
+    print("All circuits open returns unavailable")
+
+
+def test_stream_fails_over_before_output():
+    """A stream that fails straight away is replaced by the fallback's stream."""
+
+    async def run():
+        routed = make_routed(openai_service(fail=True), anthropic_service())
+        events = [event async for event in routed.answer_question_stream("Status?", "p1")]
+
+        assert [event["text"] for event in events if event["type"] == "answer"] == ["answer from anthropic"]
+        assert events[-1]["token_usage"].provider == "anthropic"
+        assert routed.router.failovers == 1
+
+    asyncio.run(run())
+    print("Stream failed over before output")
+
+
+def test_stream_forwards_first_token_at_once():
+    """The first answer text reaches the client before the provider sends the next chunk."""
+
+    class GatedAIService(FakeAIService):
+        def __init__(self):
+            super().__init__()
+            self.gate = asyncio.Event()
+
+        async def answer_question_stream(self, question, project_id, context_data=None):
+            yield {"type": "answer", "text": "first "}
+            await self.gate.wait()
+            yield {"type": "answer", "text": "second"}
+            yield {"type": "complete", "answer": "first second", "evidence": [], "token_usage": self._usage()}
+
+    async def run():
+        primary = GatedAIService()
+        stream = make_routed(primary, anthropic_service()).answer_question_stream("Status?", "p1")
+
+        first = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        assert first["text"] == "first " and not primary.gate.is_set()
+        primary.gate.set()
+        rest = [event async for event in stream]
+        assert [event["type"] for event in rest] == ["answer", "complete"]
+
+    asyncio.run(run())
+    print("First token forwarded at once")
+
+
+def test_registry_skips_fallbacks_without_keys():
+    """Routed services only include fallbacks whose provider is configured."""
+
+    registry = ProviderClientRegistry(make_settings(llm_cache_enabled=False, anthropic_api_key=None))
+    routed = registry.get_routed_service("openai", "gpt-4o-mini")
+    assert [service.config.provider for service in routed.services] == [AIProvider.OPENAI]
+
+    registry = ProviderClientRegistry(make_settings(llm_cache_enabled=False, anthropic_api_key="test-key"))
+    routed = registry.get_routed_service("openai", "gpt-4o-mini")
+    assert [service.config.model for service in routed.services] == [AIModel.GPT_4O_MINI, AIModel.CLAUDE_3_HAIKU]
+    assert routed.router is registry.router
+    print("Fallbacks without API keys skipped")
+
+
+def main():
+    """Run all provider router tests."""
+
+    print("Helm AI Service - Provider Failover Tests")
+    print("=" * 50)
+
+    tests = [
+        test_parse_fallback_models,
+        test_failover_to_fallback,
+        test_circuit_opens_and_recovers,
+        test_half_open_allows_one_probe,
+        test_hedged_request_wins_and_cancels_primary,
+        test_all_circuits_open_returns_unavailable,
+        test_stream_fails_over_before_output,
+        test_stream_forwards_first_token_at_once,
+        test_registry_skips_fallbacks_without_keys
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
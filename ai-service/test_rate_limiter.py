@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Tests for per-project/per-organization rate limiting and the provider concurrency cap.
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from services.container import ServiceContainer
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+from services.rate_limiter import (
+    MemoryRateLimitBackend, RateLimiter, RateLimitExceeded, SQLiteRateLimitBackend, retry_after_header
+)
+
+
+def make_settings(**overrides) -> Settings:
+    values = {
+        "openai_api_key": "test-key",
+        "max_validation_requests_per_minute": 2,
+        "max_project_tokens_per_minute": 1000,
+        "max_organization_requests_per_minute": 3,
+        "max_organization_tokens_per_minute": 5000,
+        "max_concurrent_provider_calls": 1,
+        "provider_call_queue_timeout_ms": 20
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+def test_project_request_limit():
+    """A project's request bucket empties and reports when it refills."""
+
+    async def run():
+        limiter = RateLimiter(make_settings())
+        await limiter.admit("p1")
+        await limiter.admit("p1")
+        try:
+            await limiter.admit("p1")
+            raise AssertionError("third request should be rejected")
+        except RateLimitExceeded as e:
+            assert e.scope == "project_requests"
+            # One request refills every 30s at 2 per minute
+            assert 29 < e.retry_after <= 30
+            assert retry_after_header(e) == {"Retry-After": "30"}
+
+        # Other projects are unaffected
+        await limiter.admit("p2")
+        assert limiter.stats()["admitted"] == 3
+        assert limiter.stats()["rejected"] == {"project_requests": 1}
+
+    asyncio.run(run())
+    print("Project request limit enforced")
+
+
+def test_project_organizations_bounded():
+    """Only the most recently admitted projects' organizations are remembered."""
+
+    async def run():
+        limiter = RateLimiter(make_settings(context_cache_max_projects=2, max_organization_requests_per_minute=10))
+        for project_id in ("p1", "p2", "p1", "p3"):
+            await limiter.admit(project_id, "o1")
+        assert list(limiter.project_organizations) == ["p1", "p3"]
+
+        # Usage of a forgotten project is still debited from the project's bucket
+        await limiter.record_usage({"project_id": "p2", "total_tokens": 2000})
+        try:
+            await limiter.admit("p2", "o1")
+            raise AssertionError("p2 should be in token debt")
+        except RateLimitExceeded as e:
+            assert e.scope == "project_tokens"
+
+    asyncio.run(run())
+    print("Project organizations bounded")
+
+
+def test_organization_limit_spans_projects():
+    """Projects of one organization share its request bucket."""
+
+    async def run():
+        limiter = RateLimiter(make_settings())
+        for project_id in ("p1", "p2", "p3"):
+            await limiter.admit(project_id, "org1")
+        try:
+            await limiter.admit("p4", "org1")
+            raise AssertionError("fourth organization request should be rejected")
+        except RateLimitExceeded as e:
+            assert e.scope == "organization_requests"
+
+        # A rejected request does not consume the project's bucket
+        await limiter.admit("p4")
+        await limiter.admit("p4")
+
+    asyncio.run(run())
+    print("Organization limit spans projects")
+
+
+def test_token_debt_blocks_project():
+    """Tokens recorded from usage logs hold the project back until they refill."""
+
+    async def run():
+        limiter = RateLimiter(make_settings(max_validation_requests_per_minute=100))
+        await limiter.admit("p1", "org1")
+        await limiter.record_usage({"project_id": "p1", "total_tokens": 1500})
+
+        try:
+            await limiter.admit("p1")
+            raise AssertionError("project in token debt should be rejected")
+        except RateLimitExceeded as e:
+            assert e.scope == "project_tokens"
+            # 500 tokens of debt at 1000 per minute
+            assert 29 < e.retry_after <= 30
+
+        # The organization budget was debited too but is not exhausted
+        level, _ = limiter.backend.buckets["organization:org1:tokens"]
+        assert 3499 < level <= 3500
+
+    asyncio.run(run())
+    print("Token debt blocks the project")
+
+
+def test_concurrency_cap_rejects_after_queue_timeout():
+    """Requests wait briefly for a provider slot, then are rejected."""
+
+    async def run():
+        limiter = RateLimiter(make_settings(max_validation_requests_per_minute=100))
+        async with limiter.admission("p1"):
+            assert limiter.stats()["provider_calls_in_flight"] == 1
+            try:
+                async with limiter.admission("p2"):
+                    raise AssertionError("second call should not get a slot")
+            except RateLimitExceeded as e:
+                assert e.scope == "concurrency"
+
+        assert limiter.stats()["provider_calls_in_flight"] == 0
+        async with limiter.admission("p2"):
+            pass
+
+    asyncio.run(run())
+    print("Concurrency cap enforced")
+
+
+def test_idle_buckets_dropped():
+    """Buckets idle long enough to have refilled are dropped from both backends."""
+
+    async def run():
+        checks = [("project:p1:requests", 2, 1, 0)]
+
+        memory = MemoryRateLimitBackend()
+        await memory.consume(checks)
+        await memory.debit("project:old:tokens", 1000, 5000)
+        memory.buckets["project:old:tokens"] = (memory.buckets["project:old:tokens"][0], time.time() - 121)
+        memory.swept -= 121
+        await memory.consume(checks)
+        assert set(memory.buckets) == {"project:p1:requests"}
+
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite = SQLiteRateLimitBackend(str(Path(directory) / "limits.sqlite3"))
+            await sqlite.debit("project:old:tokens", 1000, 5000)
+            sqlite.connection.execute("UPDATE buckets SET updated = updated - 121")
+            await sqlite.consume(checks)
+            keys = [key for key, in sqlite.connection.execute("SELECT key FROM buckets")]
+            assert keys == ["project:p1:requests"]
+            await sqlite.close()
+
+    asyncio.run(run())
+    print("Idle buckets dropped")
+
+
+def test_sqlite_backend_shared_between_limiters():
+    """Two limiters on one SQLite file (e.g. two workers) share buckets."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "rate_limits.sqlite3")
+            first = RateLimiter(make_settings(), SQLiteRateLimitBackend(path))
+            second = RateLimiter(make_settings(), SQLiteRateLimitBackend(path))
+            try:
+                await first.admit("p1")
+                await second.admit("p1")
+                try:
+                    await first.admit("p1")
+                    raise AssertionError("shared bucket should be empty")
+                except RateLimitExceeded as e:
+                    assert e.scope == "project_requests"
+            finally:
+                await first.close()
+                await second.close()
+
+    asyncio.run(run())
+    print("SQLite buckets shared between limiters")
+
+
+def test_endpoint_returns_429_with_retry_after():
+    """Rejected requests get 429 with a Retry-After header."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+
+    settings = make_settings(max_validation_requests_per_minute=1)
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Garden shed"}], "tasks": []})
+    container = ServiceContainer(
+        settings=settings,
+        db_service=DatabaseService(client=client),
+        provider_registry=ProviderClientRegistry(settings)
+    )
+    request = {
+        "project_id": "p1",
+        "component_type": "task",
+        "component_data": {"title": "Buy wood"},
+        "validation_scope": "rules_only",
+        "ai_provider": "openai",
+        "ai_model": "gpt-4o-mini"
+    }
+
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            first = test_client.post("/validate", json=request)
+            second = test_client.post("/validate", json=request, headers={"X-Organization-Id": "org1"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 200, first.text
+    assert second.status_code == 429
+    assert second.json()["detail"] == "Rate limit exceeded (project_requests)"
+    assert 55 <= int(second.headers["Retry-After"]) <= 60
+    print("Endpoint returns 429 with Retry-After")
+
+
+def main():
+    """Run all rate limiter tests."""
+
+    print("Helm AI Service - Rate Limiter Tests")
+    print("=" * 50)
+
+    tests = [
+        test_project_request_limit,
+        test_project_organizations_bounded,
+        test_organization_limit_spans_projects,
+        test_token_debt_blocks_project,
+        test_concurrency_cap_rejects_after_queue_timeout,
+        test_idle_buckets_dropped,
+        test_sqlite_backend_shared_between_limiters,
+        test_endpoint_returns_429_with_retry_after
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
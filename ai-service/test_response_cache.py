@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the exact-match LLM response cache.
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import get_settings
+from fake_ai_service import FakeAIService
+from models import ValidationContext, ValidationIssue
+from services.response_cache import (
+    ResponseCache, CachedAIService, MemoryCacheBackend, SQLiteCacheBackend
+)
+
+
+class CountingAIService(FakeAIService):
+    """AI service that builds prompts the cache can key on."""
+
+    def __init__(self, fail: bool = False):
+        issue = ValidationIssue(field="title", issue_type="quality", message="Title is vague", severity="warning")
+        super().__init__(fail=fail, issues=[issue])
+
+    def _build_validation_prompt(self, context, validation_scope):
+        return f"Validate {context.component_type}:\n{context.component_data}\nScope: {validation_scope}"
+
+    def _build_answer_prompt(self, question, project_id, context_data=None):
+        return f"Question: {question}\nProject: {project_id}"
+
+
+def make_context(title: str):
+    return ValidationContext(
+        project_id="p1", component_type="task", component_data={"id": "t1", "title": title}
+    )
+
+
+def test_repeated_validation_served_from_cache():
+    """Identical validations hit the provider once and report zero cost."""
+
+    async def run():
+        service = CountingAIService()
+        cached = CachedAIService(service, ResponseCache(backend=MemoryCacheBackend()))
+
+        _, _, first_usage = await cached.validate_component(make_context("Build frame"))
+        issues, _, usage = await cached.validate_component(make_context("Build frame"))
+        assert service.calls == 1
+        assert issues[0].message == "Title is vague"
+        assert usage.cache_hit and usage.estimated_cost == 0.0 and usage.total_tokens == 0
+        assert not first_usage.cache_hit
+
+        # Editing the title misses; editing it back hits again
+        await cached.validate_component(make_context("Build frames"))
+        await cached.validate_component(make_context("Build frame"))
+        assert service.calls == 2
+        assert cached.cache.hits == 2 and cached.cache.misses == 2
+
+    asyncio.run(run())
+    print("Repeated validation served from cache")
+
+
+def test_key_normalizes_whitespace_and_separates_models():
+    """Whitespace differences share a key; provider, model and temperature do not."""
+
+    key = ResponseCache.make_key("validate_component", "openai", "gpt-4o-mini", 0.1, "a  b\n c ")
+    assert key == ResponseCache.make_key("validate_component", "openai", "gpt-4o-mini", 0.1, "a b c")
+    assert key != ResponseCache.make_key("validate_component", "openai", "gpt-4o", 0.1, "a b c")
+    assert key != ResponseCache.make_key("validate_component", "openai", "gpt-4o-mini", 0.7, "a b c")
+    assert key != ResponseCache.make_key("answer_question", "openai", "gpt-4o-mini", 0.1, "a b c")
+    print("Cache keys normalize whitespace")
+
+
+def test_failures_not_cached():
+    """Provider failures (zero usage) are never stored."""
+
+    async def run():
+        service = CountingAIService(fail=True)
+        cached = CachedAIService(service, ResponseCache(backend=MemoryCacheBackend()))
+        await cached.answer_question("What next?", "p1")
+        await cached.answer_question("What next?", "p1")
+        assert service.calls == 2
+        assert cached.cache.stores == 0
+
+    asyncio.run(run())
+    print("Failed responses are not cached")
+
+
+def test_memory_backend_lru_and_ttl():
+    """The memory backend evicts least recently used entries and expires old ones."""
+
+    async def run():
+        backend = MemoryCacheBackend(max_entries=2)
+        await backend.set("a", {"v": 1}, 60)
+        await backend.set("b", {"v": 2}, 60)
+        await backend.get("a")
+        await backend.set("c", {"v": 3}, 60)
+        assert await backend.get("b") is None
+        assert await backend.get("a") == {"v": 1}
+        assert backend.evictions == 1
+
+        await backend.set("d", {"v": 4}, 0.01)
+        time.sleep(0.02)
+        assert await backend.get("d") is None
+
+    asyncio.run(run())
+    print("Memory backend enforces LRU bound and TTL")
+
+
+def test_sqlite_backend_shared_between_workers():
+    """Two caches on the same SQLite file share entries and the LRU bound."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = str(Path(cache_dir) / "cache.sqlite3")
+            settings = get_settings().model_copy(update={
+                "llm_cache_backend": "sqlite", "llm_cache_path": path, "llm_cache_max_entries": 2
+            })
+            worker_a = ResponseCache(settings)
+            worker_b = ResponseCache(settings)
+
+            service_a = CountingAIService()
+            service_b = CountingAIService()
+            await CachedAIService(service_a, worker_a).generate_insights("Assess project p1", "p1")
+            insights, usage = await CachedAIService(service_b, worker_b).generate_insights("Assess project p1", "p1")
+            assert service_b.calls == 0 and usage.cache_hit and insights == "[]"
+
+            for key in ("x", "y", "z"):
+                await worker_a.set(key, {"v": key})
+            assert (await worker_b.stats())["size"] == 2
+
+            await worker_a.close()
+            await worker_b.close()
+
+    asyncio.run(run())
+    print("SQLite backend shared between workers")
+
+
+def main():
+    """Run all response cache tests."""
+
+    print("Helm AI Service - Response Cache Tests")
+    print("=" * 50)
+
+    tests = [
+        test_repeated_validation_served_from_cache,
+        test_key_normalizes_whitespace_and_separates_models,
+        test_failures_not_cached,
+        test_memory_backend_lru_and_ttl,
+        test_sqlite_backend_shared_between_workers
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
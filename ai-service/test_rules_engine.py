@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the local rules engine and its use in ValidatorService.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from models import AIValidationRequest, ValidationScope
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+from services.rules_engine import compile_rules, evaluate_rules
+from services.validator_service import ValidatorService
+
+
+RULES = [
+    {"type": "required_field", "field": "title"},
+    {"type": "max_length", "field": "description", "value": 10},
+    {"type": "min_length", "field": "title", "value": 3, "severity": "warning"},
+    {"type": "pattern", "field": "code", "value": "^[A-Z]+-[0-9]+$"},
+    {"type": "enum", "field": "priority", "value": ["low", "medium", "high"]},
+    {"type": "date_order", "start_field": "start_date", "end_field": "end_date"},
+    {"type": "required_field", "field": "name", "component_type": "project"},
+    {"type": "no_such_rule", "field": "title"},
+]
+
+
+def issue_types(component_data, component_type="task"):
+    return sorted(issue.issue_type for issue in evaluate_rules(RULES, component_data, component_type))
+
+
+def test_rule_types():
+    """Each rule type reports violations and passes valid data."""
+
+    valid = {
+        "title": "Build frame", "description": "Short", "code": "HELM-12", "priority": "high",
+        "start_date": "2024-01-01", "end_date": "2024-01-05T10:00:00Z"
+    }
+    assert issue_types(valid) == []
+
+    invalid = {
+        "title": "  ", "description": "Much too long", "code": "helm12", "priority": "urgent",
+        "start_date": "2024-02-01", "end_date": "2024-01-05"
+    }
+    assert issue_types(invalid) == ["date_order", "enum", "max_length", "min_length", "pattern", "required_field"]
+    assert issue_types({"title": "ab"}) == ["min_length"]
+    assert issue_types({"title": "Task", "start_date": "soon", "end_date": "2024-01-05"}) == ["date_format"]
+
+    # Component-scoped rules only apply to their component type
+    assert issue_types({"title": "Garden"}, "project") == ["required_field"]
+    print("All rule types evaluated")
+
+
+def test_enum_with_unhashable_values():
+    """Enum rules compare list and dict values instead of crashing on them."""
+
+    rules = [{"type": "enum", "field": "tags", "value": [["a", "b"], {"size": "L"}, "none"]}]
+    assert evaluate_rules(rules, {"tags": ["a", "b"]}, "task") == []
+    assert evaluate_rules(rules, {"tags": {"size": "L"}}, "task") == []
+    assert evaluate_rules(rules, {"tags": "none"}, "task") == []
+
+    issues = evaluate_rules(rules, {"tags": ["b", "a"]}, "task")
+    assert [issue.issue_type for issue in issues] == ["enum"]
+    assert [issue.issue_type for issue in evaluate_rules(RULES, {"title": "Task", "priority": ["high"]}, "task")] == ["enum"]
+    print("Enum rules handle unhashable values")
+
+
+def test_rules_compiled_once_and_fast():
+    """Identical rule lists share one compiled form and evaluate in microseconds."""
+
+    assert compile_rules(RULES) is compile_rules([dict(rule) for rule in RULES])
+
+    data = {"title": "Build frame", "description": "Short", "start_date": "2024-01-01", "end_date": "2024-01-05"}
+    compiled = compile_rules(RULES)
+    runs = 10000
+    start = time.perf_counter()
+    for _ in range(runs):
+        compiled.evaluate(data, "task")
+    per_call_us = (time.perf_counter() - start) / runs * 1e6
+
+    assert per_call_us < 100, f"rule evaluation took {per_call_us:.1f}us"
+    print(f"Rules evaluated in {per_call_us:.1f}us per component")
+
+
+def make_validator():
+    """Validator with no provider keys: any provider call would fail the request."""
+    return ValidatorService(
+        db_service=DatabaseService(client=InMemoryDatabaseClient()),
+        provider_registry=ProviderClientRegistry(Settings(openai_api_key=None, anthropic_api_key=None))
+    )
+
+
+def make_request(component_data, scope):
+    return AIValidationRequest(
+        project_id="p1", component_type="task", component_data=component_data,
+        validation_scope=scope, ai_provider="openai", ai_model="gpt-4o-mini"
+    )
+
+
+def test_rules_only_makes_no_provider_call():
+    """RULES_ONLY validation is answered locally."""
+
+    validator = make_validator()
+    response = asyncio.run(validator.validate_component(make_request(
+        {"title": "", "start_date": "2024-02-01", "end_date": "2024-01-01"}, ValidationScope.RULES_ONLY
+    )))
+
+    assert response.success
+    assert [issue.field for issue in response.issues] == ["title", "end_date"]
+    assert response.usage_stats["tokens_used"] == 0 and response.usage_stats["rules_only"]
+    assert validator.provider_registry.services == {}
+    print("RULES_ONLY validation made no provider call")
+
+
+def test_invalid_input_short_circuits_selective():
+    """SELECTIVE validation of input that fails the rules skips the provider."""
+
+    validator = make_validator()
+    response = asyncio.run(validator.validate_component(make_request({"description": "x"}, ValidationScope.SELECTIVE)))
+
+    assert response.success
+    assert response.issues[0].issue_type == "required_field"
+    assert validator.provider_registry.services == {}
+    print("Invalid input short-circuited before the provider call")
+
+
+def main():
+    """Run all rules engine tests."""
+
+    print("Helm AI Service - Rules Engine Tests")
+    print("=" * 50)
+
+    tests = [
+        test_rule_types,
+        test_enum_with_unhashable_values,
+        test_rules_compiled_once_and_fast,
+        test_rules_only_makes_no_provider_call,
+        test_invalid_input_short_circuits_selective
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
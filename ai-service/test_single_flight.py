@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of concurrent identical requests.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from fake_ai_service import FakeAIService
+from models import AIProposal, AIValidationRequest, ValidationScope
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.provider_registry import ProviderClientRegistry
+from services.single_flight import SingleFlight
+from services.validator_service import ValidatorService
+
+
+def test_concurrent_calls_share_one_execution():
+    """Concurrent calls with one key run the work once."""
+
+    async def run():
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"value": 42}
+
+        async def observe():
+            await asyncio.sleep(0.01)
+            return single_flight.stats()
+
+        *results, stats = await asyncio.gather(*[single_flight.run("k", work) for _ in range(5)], observe())
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert stats["waiters"] == {"k": 5}
+        assert single_flight.stats()["in_flight"] == 0
+        assert single_flight.leaders == 1 and single_flight.coalesced == 4
+
+        # Different keys do not coalesce
+        await asyncio.gather(single_flight.run("a", work), single_flight.run("b", work))
+        assert calls == 3
+
+    asyncio.run(run())
+    print("Concurrent identical calls coalesced")
+
+
+def test_leader_cancellation_does_not_fail_followers():
+    """A cancelled leader leaves the shared work running for the others."""
+
+    async def run():
+        single_flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(single_flight.run("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.run("k", work))
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        assert await follower == "done"
+        assert leader.cancelled()
+        assert single_flight.abandoned == 0
+
+    asyncio.run(run())
+    print("Follower completed after the leader disconnected")
+
+
+def test_abandoned_work_cancelled():
+    """The shared work is cancelled once every caller has gone away."""
+
+    async def run():
+        single_flight = SingleFlight()
+        finished = False
+
+        async def work():
+            nonlocal finished
+            await asyncio.sleep(0.05)
+            finished = True
+
+        callers = [asyncio.create_task(single_flight.run("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.sleep(0.06)
+
+        assert not finished
+        assert single_flight.abandoned == 1
+        assert single_flight.calls == {}
+
+    asyncio.run(run())
+    print("Abandoned work cancelled")
+
+
+def test_caller_after_abandon_starts_afresh():
+    """A caller arriving while abandoned work is being cancelled gets a new execution."""
+
+    async def run():
+        single_flight = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.02)
+            return runs
+
+        caller = asyncio.create_task(single_flight.run("k", work))
+        await asyncio.sleep(0.005)
+        caller.cancel()
+        await asyncio.sleep(0)
+
+        # The abandoned task has not finished cancelling yet, but its key is gone
+        assert single_flight.calls == {}
+        assert await single_flight.run("k", work) == 2
+        assert single_flight.leaders == 2 and single_flight.abandoned == 1
+
+    asyncio.run(run())
+    print("Caller after an abandoned call started afresh")
+
+
+def test_errors_shared_and_not_remembered():
+    """Every waiter sees the error, and the next call starts fresh."""
+
+    async def run():
+        single_flight = SingleFlight()
+        attempts = 0
+
+        async def work():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.01)
+            if attempts == 1:
+                raise RuntimeError("provider down")
+            return "ok"
+
+        results = await asyncio.gather(*[single_flight.run("k", work) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await single_flight.run("k", work) == "ok"
+
+    asyncio.run(run())
+    print("Errors shared with waiters and not remembered")
+
+
+def test_validator_coalesces_retries():
+    """Concurrent identical /validate requests make one provider call and save proposals once."""
+
+    async def run():
+        client = InMemoryDatabaseClient()
+        registry = ProviderClientRegistry(Settings(openai_api_key="test-key"))
+        proposal = AIProposal(rationale="Add a description", confidence="medium")
+        ai_service = FakeAIService(delay=0.05, proposals=[proposal])
+        registry.services["openai_gpt-4o-mini"] = ai_service
+        validator = ValidatorService(db_service=DatabaseService(client=client), provider_registry=registry)
+
+        request = AIValidationRequest(
+            project_id="p1", component_type="task", component_data={"title": "Build frame"},
+            validation_scope=ValidationScope.SELECTIVE, ai_provider="openai", ai_model="gpt-4o-mini"
+        )
+        responses = await asyncio.gather(*[validator.validate_component(request) for _ in range(4)])
+
+        assert ai_service.calls == 1
+        assert len(client.tables["proposals"]) == 1
+        assert all(response is responses[0] for response in responses)
+
+    asyncio.run(run())
+    print("Validator retries coalesced into one provider call")
+
+
+def main():
+    """Run all single-flight tests."""
+
+    print("Helm AI Service - Request Coalescing Tests")
+    print("=" * 50)
+
+    tests = [
+        test_concurrent_calls_share_one_execution,
+        test_leader_cancellation_does_not_fail_followers,
+        test_abandoned_work_cancelled,
+        test_caller_after_abandon_starts_afresh,
+        test_errors_shared_and_not_remembered,
+        test_validator_coalesces_retries
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the task retrieval index used by question answering.
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import Settings
+from models import AIModel, AIProvider, AIProviderConfig
+from services.anthropic_service import AnthropicService
+from services.openai_service import OpenAIService
+from services.task_index import TaskIndex, TaskRetriever, tokenize
+
+
+def task(task_id, title, description=None, status="todo", priority="medium"):
+    return {"id": task_id, "title": title, "description": description, "status": status, "priority": priority}
+
+
+def make_tasks(count, seed=11):
+    """Tasks with a realistic vocabulary: a few hundred distinct words, some very common."""
+    rng = random.Random(seed)
+    verbs = ["install", "review", "design", "fix", "paint", "order", "measure", "test", "deploy", "plan"]
+    things = [f"{word}{i}" for i in range(40) for word in ("roof", "door", "api", "window", "floor")]
+    filler = ["the", "task", "team", "needs", "before", "after", "check", "update", "with", "client", "work"]
+    return [
+        task(
+            f"t{i}",
+            f"{rng.choice(verbs).title()} the {rng.choice(things)}",
+            " ".join(rng.choice(filler + things) for _ in range(rng.randint(5, 40)))
+        )
+        for i in range(count)
+    ]
+
+
+def test_search_ranks_matching_tasks():
+    """Tasks sharing terms with the question rank by BM25, titles weigh more than descriptions."""
+    tasks = [
+        task("wood", "Buy wood for the shed", "Go to B&Q and purchase the timber"),
+        task("roof", "Install the shed roof", "Felt and battens for the roof"),
+        task("paint", "Paint the fence", "Two coats, mention the shed colour"),
+        task("plan", "Get planning permission")
+    ]
+    index = TaskIndex()
+    assert index.sync(tasks) == {"added": 4, "updated": 0, "removed": 0}
+
+    assert tokenize("What is installing the Doors?") == ["install", "door"]
+    assert tokenize("measured boxes; classes") == tokenize("Measure box, class")
+    results = index.search("When is the roof being installed?", top_k=3)
+    assert [found["id"] for found, _ in results] == ["roof"]
+
+    ranked = [found["id"] for found, _ in index.search("shed", top_k=10)]
+    assert set(ranked) == {"wood", "roof", "paint"} and ranked[-1] == "paint"
+    assert index.search("what is the status?") == [] and index.search("") == []
+    print("Search ranks matching tasks")
+
+
+def test_incremental_sync():
+    """Re-syncing re-indexes only changed tasks, drops removed ones and reuses their slots."""
+    tasks = [task(f"t{i}", f"Task {i} about apples") for i in range(5)]
+    index = TaskIndex()
+    index.sync(tasks)
+    slot_count = len(index.rows)
+
+    changed = [dict(row) for row in tasks[:4]]
+    changed[1]["title"] = "Task 1 about pears"
+    changed.append(task("t9", "Task 9 about pears"))
+    assert index.sync(changed) == {"added": 1, "updated": 1, "removed": 1}
+
+    assert sorted(found["id"] for found, _ in index.search("pears")) == ["t1", "t9"]
+    assert sorted(found["id"] for found, _ in index.search("apples")) == ["t0", "t2", "t3"]
+    assert len(index) == 5 and len(index.rows) == slot_count
+    assert len(index.postings["appl"]) == 3 and "pear" in index.postings
+
+    # Served rows follow the latest sync even when the text is unchanged
+    changed[0]["status"] = "done"
+    index.sync(changed)
+    assert next(found for found, _ in index.search("apples") if found["id"] == "t0")["status"] == "done"
+
+    settings = Settings(openai_api_key="test-key", anthropic_api_key=None)
+    retriever = TaskRetriever(settings)
+    first = retriever.get_index("p1", tasks)
+    assert retriever.get_index("p1", tasks) is first and first.source is tasks
+    print("Index kept in sync incrementally")
+
+
+def test_retrieval_is_fast_on_large_projects():
+    """Questions against a 10k-task index are answered in single-digit milliseconds."""
+    tasks = make_tasks(10000)
+    index = TaskIndex()
+    started = time.perf_counter()
+    index.sync(tasks)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    questions = [
+        "Who is installing the roof3 and when?", "What is left on api12?", "Which door7 tasks need a review?",
+        "Has the window25 been measured?", "Is anything blocking the floor0 deploy?"
+    ]
+    timings = []
+    for question in questions * 4:
+        started = time.perf_counter()
+        results = index.search(question, top_k=20)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert results
+
+    median_ms = statistics.median(timings)
+    assert median_ms < 10, timings
+    print(f"10k-task index built in {build_ms:.0f}ms, median query {median_ms:.2f}ms")
+
+
+def test_question_prompt_includes_relevant_tasks():
+    """The Q&A context carries the retrieved tasks under the token budget, and both providers use them."""
+    from main import build_question_context
+    from services.database_service import DatabaseService
+    from services.memory_database import InMemoryDatabaseClient
+    from services.validator_service import ValidatorService
+
+    rows = [dict(row, project_id="p1", deleted_at=None) for row in make_tasks(500)]
+    rows[42]["title"] = "Order the skylight glazing"
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Renovation", "status": "active"}], "tasks": rows})
+    validator = ValidatorService(db_service=DatabaseService(client=client))
+    settings = Settings(openai_api_key="test-key", anthropic_api_key=None, qa_retrieval_top_k=50, qa_retrieval_token_budget=300)
+    validator.task_retriever = TaskRetriever(settings)
+
+    question = "When does the skylight glazing arrive?"
+    context = asyncio.run(build_question_context(validator, "p1", question, "gpt-4o-mini"))
+    selection = context["relevant_tasks"]
+    assert selection["matched"] == 1 and selection["included"] == 1 and selection["task_count"] == 500
+
+    broad = asyncio.run(build_question_context(validator, "p1", "What about the roof3 and door7 work?", "gpt-4o-mini"))
+    assert 0 < broad["relevant_tasks"]["included"] < broad["relevant_tasks"]["matched"]
+    assert "more relevant tasks not shown" in broad["relevant_tasks"]["text"]
+
+    fallback = asyncio.run(build_question_context(validator, "p1", "How are we doing?", "gpt-4o-mini"))
+    assert fallback["relevant_tasks"]["matched"] == 0 and fallback["relevant_tasks"]["included"] > 0
+
+    for service in (
+        OpenAIService(AIProviderConfig(provider=AIProvider.OPENAI, model=AIModel.GPT_4O_MINI, api_key="test-key", max_tokens=1000)),
+        AnthropicService(AIProviderConfig(provider=AIProvider.ANTHROPIC, model=AIModel.CLAUDE_3_HAIKU, api_key="test-key", max_tokens=1000))
+    ):
+        prompt = service._build_answer_prompt(question, "p1", context)
+        assert "Tasks Relevant to the Question (1 of 500 tasks, best match first):" in prompt
+        assert "- Order the skylight glazing (todo, medium priority)" in prompt
+        assert rows[0]["title"] not in prompt
+
+    assert "Most Important Tasks (no task matched the question;" in OpenAIService(
+        AIProviderConfig(provider=AIProvider.OPENAI, model=AIModel.GPT_4O_MINI, api_key="test-key", max_tokens=1000)
+    )._build_answer_prompt("How are we doing?", "p1", fallback)
+    print("Q&A prompt includes the relevant tasks")
+
+
+def main():
+    """Run all task index tests."""
+
+    print("Helm AI Service - Task Index Tests")
+    print("=" * 50)
+
+    tests = [
+        test_search_ranks_matching_tasks,
+        test_incremental_sync,
+        test_retrieval_is_fast_on_large_projects,
+        test_question_prompt_includes_relevant_tasks
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
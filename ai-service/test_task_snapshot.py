@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar task snapshots.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.task_snapshot import TaskSnapshot, TaskView, measure_bytes
+from services.task_stats import NUMPY_AVAILABLE, compute_task_stats
+
+
+NOW = datetime(2026, 3, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def make_rows(count, seed=5):
+    """Task rows shaped like get_project_tasks results."""
+    rng = random.Random(seed)
+    owners = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(8)]
+    rows = []
+    for i in range(count):
+        created = NOW - timedelta(days=rng.randint(0, 120), seconds=rng.randint(0, 86400), microseconds=rng.randint(0, 999999))
+        status = rng.choice(["todo", "in_progress", "done", "blocked"])
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Task {i}: {rng.choice(['Install', 'Review', 'Design', 'Fix'])} the {rng.choice(['roof', 'API', 'door'])}",
+            "description": rng.choice([None, "Measure twice, cut once. " * rng.randint(1, 6)]),
+            "status": status,
+            "priority": rng.choice(["low", "medium", "high", "critical"]),
+            "progress_percentage": rng.choice([0, 25, 50, 100]),
+            "estimated_hours": rng.choice([None, 1, 2.5, 8]),
+            "start_date": (created + timedelta(days=1)).date().isoformat(),
+            "end_date": (created + timedelta(days=rng.randint(2, 30))).date().isoformat(),
+            "due_date": rng.choice([None, (created + timedelta(days=30)).date().isoformat()]),
+            "completed_at": (created + timedelta(days=rng.randint(1, 40))).isoformat() if status == "done" else None,
+            "parent_task_id": rows[rng.randrange(i)]["id"] if i and rng.random() < 0.2 else None,
+            "owner_id": rng.choice(owners + [None]),
+            "created_at": created.isoformat(),
+            "updated_at": (created + timedelta(hours=rng.randint(0, 500))).isoformat()
+        })
+    return rows
+
+
+def test_snapshot_round_trips_rows():
+    """Views read back exactly the rows the snapshot was built from."""
+    rows = [dict(row, labels=[]) for row in make_rows(300)]
+    rows[0].update({"estimated_hours": "4.5", "completed_at": "2026-03-01T10:00:00Z", "labels": ["urgent"]})
+    rows[1]["updated_at"] = "2026-03-02T10:00:00"
+    rows[2]["end_date"] = "not a date"
+    rows[3]["status"] = {"unexpected": True}
+
+    snapshot = TaskSnapshot.from_rows(rows)
+    assert len(snapshot) == 300 and snapshot
+    assert snapshot == rows and snapshot.to_dicts() == rows
+    assert snapshot[0]["estimated_hours"] == "4.5" and snapshot[0]["completed_at"] == "2026-03-01T10:00:00Z"
+    assert snapshot[0]["labels"] == ["urgent"] and snapshot[1]["labels"] == []
+    assert snapshot[1]["updated_at"] == "2026-03-02T10:00:00" and snapshot[2]["end_date"] == "not a date"
+    assert snapshot[3]["status"] == {"unexpected": True}
+    assert dict(snapshot[-1]) == rows[-1] and [dict(view) for view in snapshot[5:8]] == rows[5:8]
+    assert snapshot[10].get("missing", "default") == "default" and "title" in snapshot[10]
+
+    view = snapshot[4]
+    assert isinstance(view, TaskView) and not hasattr(view, "__dict__")
+    try:
+        snapshot[300]
+        assert False, "expected IndexError"
+    except IndexError:
+        pass
+
+    empty = TaskSnapshot.from_rows([])
+    assert not empty and empty == [] and empty.to_dicts() == []
+    print("Snapshot rows round-trip")
+
+
+def test_statistics_from_snapshot_match_rows():
+    """Statistics computed from a snapshot's columns equal those computed from the rows."""
+    rows = make_rows(2000)
+    snapshot = TaskSnapshot.from_rows(rows)
+    columns = snapshot.stats_columns()
+    assert columns.status is snapshot.columns["status"].codes
+    assert columns.estimated_hours is snapshot.columns["estimated_hours"].values
+
+    implementations = [False, True] if NUMPY_AVAILABLE else [False]
+    for use_numpy in implementations:
+        assert compute_task_stats(snapshot, now=NOW, use_numpy=use_numpy) == compute_task_stats(rows, now=NOW, use_numpy=use_numpy)
+    print("Snapshot statistics match row statistics")
+
+
+def test_snapshot_is_smaller_than_dicts():
+    """A snapshot takes well under half the memory of the task dicts."""
+    rows = make_rows(5000)
+    snapshot = TaskSnapshot.from_rows(rows)
+    # Measure the rows as the database client returns them, decoded from JSON
+    fresh_rows = json.loads(json.dumps(rows))
+
+    dict_bytes = measure_bytes(fresh_rows) / len(rows)
+    snapshot_bytes = measure_bytes(snapshot) / len(rows)
+    assert snapshot_bytes < dict_bytes / 2, (snapshot_bytes, dict_bytes)
+    print(f"Bytes per task: dicts {dict_bytes:.0f}, snapshot {snapshot_bytes:.0f}")
+
+
+def test_project_contexts_hold_snapshots():
+    """Project contexts hold snapshots that the cache, statistics and prompts consume."""
+    from config import Settings
+    from services.assessment_service import ProjectAssessmentService
+    from services.database_service import DatabaseService
+    from services.memory_database import InMemoryDatabaseClient
+
+    rows = [dict(row, project_id="p1", deleted_at=None) for row in make_rows(50)]
+    dependencies = [
+        {"id": "d1", "task_id": rows[1]["id"], "depends_on_task_id": rows[0]["id"], "dependency_type": "finish_to_start"}
+    ]
+    client = InMemoryDatabaseClient({
+        "projects": [{"id": "p1", "name": "Snapshots", "status": "active"}],
+        "tasks": rows,
+        "task_dependencies": dependencies
+    })
+    db_service = DatabaseService(client=client)
+
+    async def run():
+        context = await db_service.get_project_context("p1")
+        cached = await db_service.get_project_context("p1")
+        return context, cached
+
+    context, cached = asyncio.run(run())
+    assert isinstance(context["tasks"], TaskSnapshot) and cached is context
+    assert context["stats"]["total_tasks"] == 50 and db_service.context_cache.hits == 1
+
+    service = ProjectAssessmentService(db_service=db_service, provider_registry=None)
+    service.settings = Settings(openai_api_key="test-key", anthropic_api_key=None)
+    _, prompt, _ = asyncio.run(service._prepare_assessment("p1", {"provider": "openai", "model": "gpt-4o-mini"}))
+    assert rows[0]["title"] in prompt and "Graph: 50 tasks, 1 dependencies" in prompt
+    print("Project contexts hold snapshots")
+
+
+def main():
+    """Run all task snapshot tests."""
+
+    print("Helm AI Service - Task Snapshot Tests")
+    print("=" * 50)
+
+    tests = [
+        test_snapshot_round_trips_rows,
+        test_statistics_from_snapshot_match_rows,
+        test_snapshot_is_smaller_than_dicts,
+        test_project_contexts_hold_snapshots
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
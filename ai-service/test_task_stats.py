@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar task statistics.
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.task_stats import NUMPY_AVAILABLE, TaskColumns, compute_task_stats, format_task_stats
+
+
+NOW = datetime(2026, 3, 16, 12, 0, tzinfo=timezone.utc)
+
+
+def day(offset, time=False):
+    value = NOW + timedelta(days=offset)
+    return value.isoformat() if time else value.date().isoformat()
+
+
+def make_tasks():
+    return [
+        # Done on time, finished in half its planned duration
+        {"status": "done", "priority": "high", "estimated_hours": 4, "owner_id": "ana",
+         "start_date": day(-20), "end_date": day(-10), "completed_at": day(-15, time=True), "progress_percentage": 100},
+        # Done three days late
+        {"status": "done", "priority": "medium", "estimated_hours": 2, "owner_id": "ben",
+         "start_date": day(-12), "end_date": day(-6), "completed_at": day(-3, time=True)},
+        # Open and overdue
+        {"status": "in_progress", "priority": "high", "estimated_hours": 8, "owner_id": "ana",
+         "end_date": day(-1), "progress_percentage": 60},
+        {"status": "todo", "priority": "high", "owner_id": "ana", "end_date": day(5), "progress_percentage": 0},
+        {"status": "todo", "priority": "low", "estimated_hours": 3, "progress_percentage": 10},
+        {"status": "cancelled", "priority": "low", "estimated_hours": 5, "end_date": day(-30)},
+        {"title": "No status or priority"}
+    ]
+
+
+def test_task_statistics():
+    """Breakdowns, overdue work, owner load, velocity, drift and progress are computed."""
+    stats = compute_task_stats(make_tasks(), now=NOW, use_numpy=False)
+
+    assert stats["total_tasks"] == 7 and stats["completed_tasks"] == 2
+    assert stats["completion_percentage"] == 28.6
+    assert stats["status_breakdown"] == {"done": 2, "in_progress": 1, "todo": 2, "cancelled": 1, "unknown": 1}
+    assert stats["priority_breakdown"] == {"high": 3, "medium": 1, "low": 2, "unknown": 1}
+    assert stats["total_estimated_hours"] == 22 and stats["remaining_estimated_hours"] == 11
+    assert stats["open_tasks"] == 4 and stats["unestimated_open_tasks"] == 2
+    assert stats["overdue_tasks"] == 1
+
+    assert list(stats["owner_load"]) == ["unassigned", "ana"]
+    assert stats["owner_load"]["ana"] == {"open_tasks": 2, "remaining_hours": 8, "overdue_tasks": 1}
+    assert stats["owner_load"]["unassigned"] == {"open_tasks": 2, "remaining_hours": 3, "overdue_tasks": 0}
+
+    velocity = stats["weekly_velocity"]
+    assert [week["completed"] for week in velocity] == [0, 0, 0, 0, 0, 1, 0, 1]
+    assert velocity[-1]["week_start"] == day(-7)
+
+    assert stats["schedule_drift"] == {
+        "completed_with_end_date": 2, "late": 1, "median_days_late": -1, "p90_days_late": 2.2,
+        "median_duration_ratio": 1.07
+    }
+    assert stats["progress_distribution"] == {"0%": 1, "1-24%": 1, "25-49%": 0, "50-74%": 1, "75-99%": 0, "100%": 0}
+
+    text = format_task_stats(stats)
+    assert "Overdue (open past end date): 1" in text
+    assert "Completed per week, oldest first (last 8 weeks): 0, 0, 0, 0, 0, 1, 0, 1" in text
+    assert "ana: 2 tasks, 8h, 1 overdue" in text
+    assert format_task_stats({"total_tasks": 0}) == ""
+
+    empty = compute_task_stats([], now=NOW, use_numpy=False)
+    assert empty["completion_percentage"] == 0 and empty["schedule_drift"]["median_days_late"] is None
+    print("Task statistics computed")
+
+
+def test_numpy_matches_pure_python():
+    """The NumPy and pure-Python implementations give identical statistics."""
+    if not NUMPY_AVAILABLE:
+        print("NumPy not installed, skipped")
+        return
+
+    rng = random.Random(3)
+    statuses = ["todo", "in_progress", "done", "blocked", "cancelled", None]
+    tasks = []
+    for _ in range(2000):
+        start = rng.randint(-90, 10)
+        task = {
+            "status": rng.choice(statuses), "priority": rng.choice(["low", "medium", "high"]),
+            "owner_id": rng.choice([None, "u1", "u2", "u3"]),
+            "estimated_hours": rng.choice([None, 0.5, 1, 3, 8]),
+            "progress_percentage": rng.choice([None, 0, 20, 50, 80, 100]),
+            "start_date": rng.choice([None, day(start)]),
+            "end_date": rng.choice([None, day(start + rng.randint(0, 20))]),
+            "completed_at": rng.choice([None, day(start + rng.randint(0, 40), time=True)])
+        }
+        tasks.append(task)
+
+    columns = TaskColumns.from_tasks(tasks)
+    assert compute_task_stats(columns, now=NOW, use_numpy=True) == compute_task_stats(columns, now=NOW, use_numpy=False)
+    print("NumPy and pure-Python statistics match")
+
+
+def test_project_context_includes_statistics():
+    """get_project_context returns the extended statistics and the assessment prompt uses them."""
+    import asyncio
+
+    from config import Settings
+    from services.assessment_service import ProjectAssessmentService
+    from services.database_service import DatabaseService
+    from services.memory_database import InMemoryDatabaseClient
+
+    tasks = [dict(task, id=f"t{i}", project_id="p1", title=f"Task {i}", deleted_at=None) for i, task in enumerate(make_tasks()[:-1])]
+    client = InMemoryDatabaseClient({"projects": [{"id": "p1", "name": "Stats", "status": "active"}], "tasks": tasks})
+    db_service = DatabaseService(client=client)
+
+    context = asyncio.run(db_service.get_project_context("p1"))
+    stats = context["stats"]
+    assert stats["total_tasks"] == 6 and stats["total_dependencies"] == 0
+    assert stats["overdue_tasks"] >= 1 and "owner_load" in stats and len(stats["weekly_velocity"]) == 8
+
+    service = ProjectAssessmentService(db_service=db_service, provider_registry=None)
+    service.settings = Settings(openai_api_key="test-key", anthropic_api_key=None)
+    _, prompt, _ = asyncio.run(service._prepare_assessment("p1", {"provider": "openai", "model": "gpt-4o-mini"}))
+    assert "- Overdue (open past end date):" in prompt and "- Open work per owner: ana: 2 tasks, 8h" in prompt
+    print("Project context includes the statistics")
+
+
+def main():
+    """Run all task statistics tests."""
+
+    print("Helm AI Service - Task Statistics Tests")
+    print("=" * 50)
+
+    tests = [
+        test_task_statistics,
+        test_numpy_matches_pure_python,
+        test_project_context_includes_statistics
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind usage log writer.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import get_settings
+from models import AIProvider
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.usage_log_writer import UsageLogWriter, _process_alive
+
+
+class FlakyClient(InMemoryDatabaseClient):
+    """Stand-in client that can be switched to unreachable."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.down = False
+
+    async def _round_trip(self):
+        await super()._round_trip()
+        if self.down:
+            raise ConnectionError("database unreachable")
+
+
+def make_writer(spill_dir: str, latency: float = 0.0, **overrides):
+    """Build a writer over an in-memory backend with a temporary spill file."""
+    settings = get_settings().model_copy(update={
+        "usage_log_spill_path": str(Path(spill_dir) / "spill.jsonl"),
+        **overrides
+    })
+    client = FlakyClient(latency=latency)
+    return UsageLogWriter(DatabaseService(client=client), settings), client
+
+
+def usage_row(i: int):
+    """Build a usage row like the request handlers do."""
+    return {
+        "project_id": "p1",
+        "operation_type": "question_answer",
+        "ai_provider": AIProvider.OPENAI,
+        "total_tokens": i,
+        "timestamp": datetime(2024, 1, 1)
+    }
+
+
+def test_rows_batched_into_few_inserts():
+    """Queued rows are written as multi-row inserts."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as spill_dir:
+            writer, client = make_writer(spill_dir, usage_log_batch_size=50, usage_log_flush_interval_ms=20)
+            await writer.start()
+            for i in range(120):
+                await writer.log(usage_row(i))
+            await writer.close()
+
+            rows = client.tables["ai_usage_logs"]
+            assert len(rows) == 120
+            # One insert and one rollup update per batch
+            assert client.request_count == 6
+            assert rows[0]["ai_provider"] == "openai"
+            assert rows[0]["timestamp"] == "2024-01-01T00:00:00"
+
+    asyncio.run(run())
+    print("120 usage rows written in 3 inserts")
+
+
+def test_log_does_not_wait_for_database():
+    """Logging returns before the insert round trip."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as spill_dir:
+            writer, client = make_writer(spill_dir, latency=0.2)
+            await writer.start()
+
+            start = time.perf_counter()
+            await writer.log(usage_row(1))
+            elapsed = time.perf_counter() - start
+            assert elapsed < 0.05, f"log waited on the database ({elapsed:.2f}s)"
+
+            await writer.close()
+            assert len(client.tables["ai_usage_logs"]) == 1
+
+    asyncio.run(run())
+    print("Usage logging is off the request path")
+
+
+def test_spill_and_replay():
+    """Rows are spilled while the database is down and replayed on restart."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as spill_dir:
+            writer, client = make_writer(spill_dir)
+            client.down = True
+            await writer.start()
+            for i in range(5):
+                await writer.log(usage_row(i))
+            await writer.close()
+
+            assert "ai_usage_logs" not in client.tables or not client.tables["ai_usage_logs"]
+            with writer.spill_path.open() as spill_file:
+                spilled = [json.loads(line) for line in spill_file]
+            assert [row["total_tokens"] for row in spilled] == [0, 1, 2, 3, 4]
+
+            # Restart with the database back up
+            client.down = False
+            await writer.start()
+            await writer.close()
+
+            assert len(client.tables["ai_usage_logs"]) == 5
+            assert not writer.spill_path.exists()
+            assert writer.stats()["replayed"] == 5
+
+    asyncio.run(run())
+    print("Spilled usage rows replayed on restart")
+
+
+def test_backpressure_spills_when_queue_full():
+    """A full queue makes callers wait briefly, then spill instead of blocking."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as spill_dir:
+            writer, client = make_writer(spill_dir, usage_log_queue_size=2, usage_log_enqueue_timeout_ms=10)
+            writer.queue = asyncio.Queue(maxsize=2)  # queue without a consumer
+
+            for i in range(4):
+                await writer.log(usage_row(i))
+
+            assert writer.queue.qsize() == 2
+            assert writer.stats()["spilled"] == 2
+
+            # Flushing the queue also replays the spilled rows
+            await writer.close()
+            assert len(client.tables["ai_usage_logs"]) == 4
+            assert not writer.spill_path.exists()
+
+    asyncio.run(run())
+    print("Full queue spills overflow rows")
+
+
+def test_close_finishes_batch_in_hand():
+    """Closing mid-batch writes the rows the flush loop already took and any insert in flight."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as spill_dir:
+            writer, client = make_writer(spill_dir, usage_log_flush_interval_ms=5000)
+            await writer.start()
+            for i in range(3):
+                await writer.log(usage_row(i))
+            await asyncio.sleep(0.01)
+            assert writer.queue.empty()  # the rows are in the loop's batch, not the queue
+            await writer.close()
+            assert len(client.tables["ai_usage_logs"]) == 3 and writer.stats()["spilled"] == 0
+
+            writer, client = make_writer(spill_dir, latency=0.1, usage_log_batch_size=2)
+            await writer.start()
+            for i in range(3):
+                await writer.log(usage_row(i))
+            await asyncio.sleep(0.05)  # first insert in flight
+            await writer.close()
+            assert len(client.tables["ai_usage_logs"]) == 3
+
+    asyncio.run(run())
+    print("Close writes the batch in hand")
+
+
+def test_spill_files_per_process():
+    """Each process spills to its own file; files of exited processes are replayed."""
+
+    async def run():
+        with tempfile.TemporaryDirectory() as spill_dir:
+            writer, client = make_writer(spill_dir)
+            assert writer.spill_path.name == f"spill.{os.getpid()}.jsonl"
+
+            dead_pid = next(pid for pid in range(4194000, 4194304) if not _process_alive(pid))
+            live_pid = os.getppid()
+            for pid, total in ((dead_pid, 7), (live_pid, 8)):
+                path = Path(spill_dir) / f"spill.{pid}.jsonl"
+                path.write_text(json.dumps({"project_id": "p1", "total_tokens": total}) + "\n")
+            # Left by a version that shared one file between workers
+            (Path(spill_dir) / "spill.jsonl").write_text(json.dumps({"project_id": "p1", "total_tokens": 9}) + "\n")
+
+            await writer.start()
+            await writer.close()
+
+            assert sorted(row["total_tokens"] for row in client.tables["ai_usage_logs"]) == [7, 9]
+            assert sorted(path.name for path in Path(spill_dir).iterdir()) == [f"spill.{live_pid}.jsonl"]
+
+    asyncio.run(run())
+    print("Spill files kept per process")
+
+
+def main():
+    """Run all usage log writer tests."""
+
+    print("Helm AI Service - Usage Log Writer Tests")
+    print("=" * 50)
+
+    tests = [
+        test_rows_batched_into_few_inserts,
+        test_log_does_not_wait_for_database,
+        test_spill_and_replay,
+        test_backpressure_spills_when_queue_full,
+        test_close_finishes_batch_in_hand,
+        test_spill_files_per_process
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
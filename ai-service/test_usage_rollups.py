@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Tests for incrementally maintained hourly/daily usage rollups.
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+from services.usage_log_writer import UsageLogWriter
+from services.usage_rollups import (
+    bucket_start, build_rollup_deltas, latency_percentile, rebuild_usage_rollups, summarize_rollups, LATENCY_BUCKETS_MS,
+    RollupRebuildFailed
+)
+
+
+def usage_row(project_id="p1", hour=10, latency_ms=400, success=True, model="gpt-4o-mini", day=2):
+    return {
+        "project_id": project_id,
+        "operation_type": "question_answer",
+        "ai_provider": "openai",
+        "ai_model": model,
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "total_tokens": 150,
+        "estimated_cost": 0.001,
+        "latency_ms": latency_ms,
+        "success": success,
+        "timestamp": datetime(2026, 3, day, hour, 30, tzinfo=timezone.utc)
+    }
+
+
+def rollup(client, granularity, start, project_id="p1"):
+    return next(
+        row for row in client.tables["ai_usage_rollups"]
+        if row["granularity"] == granularity and row["bucket_start"] == start and row["project_id"] == project_id
+    )
+
+
+def test_buckets_and_percentiles():
+    """Timestamps map to hour/day buckets; percentiles come from the histogram."""
+
+    timestamp = datetime(2026, 3, 2, 10, 30, 15, tzinfo=timezone.utc)
+    assert bucket_start(timestamp, "hour") == datetime(2026, 3, 2, 10, tzinfo=timezone.utc)
+    assert bucket_start(timestamp, "day") == datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+    rows = [usage_row(latency_ms=latency) for latency in [90] * 90 + [1500] * 9 + [45000]]
+    deltas = build_rollup_deltas(rows)
+    assert len(deltas) == 2 and {delta["granularity"] for delta in deltas} == {"hour", "day"}
+    buckets = deltas[0]["latency_buckets"]
+    assert latency_percentile(buckets, 50) == 100
+    assert latency_percentile(buckets, 95) == 2000
+    assert latency_percentile(buckets, 99.5) == 60000
+    assert latency_percentile([0] * (len(LATENCY_BUCKETS_MS) + 1), 50) is None
+    print("Buckets and percentiles computed")
+
+
+def test_rollups_maintained_as_logs_are_written():
+    """Every written usage batch is added to the rollups without rescanning the logs."""
+
+    async def run():
+        client = InMemoryDatabaseClient()
+        writer = UsageLogWriter(DatabaseService(client=client))
+
+        await writer.log(usage_row(hour=10))
+        await writer.log(usage_row(hour=10, success=False, latency_ms=3000))
+        await writer.log(usage_row(hour=11, latency_ms=0))
+
+        hour = rollup(client, "hour", "2026-03-02T10:00:00+00:00")
+        assert hour["requests"] == 2 and hour["failures"] == 1 and hour["total_tokens"] == 300
+        assert hour["latency_count"] == 2 and hour["latency_sum_ms"] == 3400
+
+        day = rollup(client, "day", "2026-03-02T00:00:00+00:00")
+        assert day["requests"] == 3 and abs(day["estimated_cost"] - 0.003) < 1e-9
+        # Rows without a recorded latency are left out of the latency stats
+        assert day["latency_count"] == 2
+        assert len(client.tables["ai_usage_rollups"]) == 3
+
+    asyncio.run(run())
+    print("Rollups maintained incrementally")
+
+
+def test_backfill_rebuilds_range():
+    """A backfill replaces the rollups of whole days with totals recomputed from the logs."""
+
+    async def run():
+        logs = []
+        for day in (1, 2, 3):
+            for hour in (9, 15):
+                row = usage_row(hour=hour, day=day)
+                logs.append(dict(row, id=f"{day}-{hour}", timestamp=row["timestamp"].isoformat()))
+        client = InMemoryDatabaseClient({"ai_usage_logs": logs})
+        db_service = DatabaseService(client=client)
+
+        # Stale rollups: day 2 is wrong, day 3 must not be touched
+        await db_service.apply_usage_rollups(build_rollup_deltas(logs[2:6] * 2))
+
+        result = await rebuild_usage_rollups(
+            db_service, datetime(2026, 3, 1, 12), datetime(2026, 3, 2, 8), page_size=3
+        )
+        assert result["start_date"] == "2026-03-01T00:00:00+00:00" and result["end_date"] == "2026-03-03T00:00:00+00:00"
+        assert result["scanned"] == 4
+
+        assert rollup(client, "day", "2026-03-01T00:00:00+00:00")["requests"] == 2
+        assert rollup(client, "day", "2026-03-02T00:00:00+00:00")["requests"] == 2
+        assert rollup(client, "hour", "2026-03-02T15:00:00+00:00")["requests"] == 1
+        assert rollup(client, "day", "2026-03-03T00:00:00+00:00")["requests"] == 4
+
+    asyncio.run(run())
+    print("Backfill rebuilt the range")
+
+
+def test_failed_backfill_leaves_days_whole():
+    """A write failure stops the backfill with every day either rebuilt or unchanged."""
+
+    class FailingRpcClient(InMemoryDatabaseClient):
+        def rpc(self, name, params=None):
+            if name == "replace_ai_usage_rollups" and params["start_param"].startswith("2026-03-02"):
+                raise ConnectionError("database unreachable")
+            return super().rpc(name, params)
+
+    async def run():
+        logs = []
+        for day in (1, 2, 3):
+            row = usage_row(day=day)
+            logs.append(dict(row, id=str(day), timestamp=row["timestamp"].isoformat()))
+        client = FailingRpcClient({"ai_usage_logs": logs})
+        db_service = DatabaseService(client=client)
+        await db_service.apply_usage_rollups(build_rollup_deltas(logs * 3))
+
+        try:
+            await rebuild_usage_rollups(db_service, datetime(2026, 3, 1), datetime(2026, 3, 3))
+            raise AssertionError("the backfill should fail on day 2")
+        except RollupRebuildFailed as e:
+            assert e.start_date == datetime(2026, 3, 2, tzinfo=timezone.utc)
+            assert e.end_date == datetime(2026, 3, 4, tzinfo=timezone.utc)
+
+        assert rollup(client, "day", "2026-03-01T00:00:00+00:00")["requests"] == 1
+        assert rollup(client, "day", "2026-03-02T00:00:00+00:00")["requests"] == 3
+        assert rollup(client, "hour", "2026-03-02T10:00:00+00:00")["requests"] == 3
+
+    asyncio.run(run())
+    print("Failed backfill left days whole")
+
+
+def test_rollup_endpoint_reads_rollups_only():
+    """The report is built from the rollup table, per bucket and per project/provider/model."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+    from services.container import ServiceContainer
+
+    async def seed(db_service):
+        rows = [usage_row(hour=10), usage_row(hour=11, success=False), usage_row(project_id="p2", latency_ms=9000)]
+        await db_service.apply_usage_rollups(build_rollup_deltas(rows))
+
+    client = InMemoryDatabaseClient()
+    db_service = DatabaseService(client=client)
+    asyncio.run(seed(db_service))
+    container = ServiceContainer(db_service=db_service)
+
+    params = {"start_date": "2026-03-01T00:00:00+00:00", "end_date": "2026-03-05T00:00:00+00:00"}
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            client.tables["ai_usage_logs"] = []
+            daily = test_client.get("/usage/rollups", params=params).json()
+            hourly = test_client.get("/usage/rollups", params={**params, "granularity": "hour", "project_id": "p1"}).json()
+            invalid = test_client.get("/usage/rollups", params={"granularity": "week"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert daily["totals"]["requests"] == 3 and daily["totals"]["success_rate"] == round(2 / 3, 4)
+    assert daily["totals"]["p99_latency_ms"] == 10000 and daily["totals"]["p50_latency_ms"] == 500
+    assert len(daily["series"]) == 1 and set(daily["by_project"]) == {"p1", "p2"}
+    assert [point["requests"] for point in hourly["series"]] == [1, 1]
+    assert hourly["by_model"]["gpt-4o-mini"]["failures"] == 1
+    assert invalid.status_code == 422
+    assert summarize_rollups([])["totals"]["success_rate"] is None
+    print("Rollup report served from rollups")
+
+
+def main():
+    """Run all usage rollup tests."""
+
+    print("Helm AI Service - Usage Rollup Tests")
+    print("=" * 50)
+
+    tests = [
+        test_buckets_and_percentiles,
+        test_rollups_maintained_as_logs_are_written,
+        test_backfill_rebuilds_range,
+        test_failed_backfill_leaves_days_whole,
+        test_rollup_endpoint_reads_rollups_only
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
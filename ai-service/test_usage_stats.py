@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for database-side usage aggregation and paginated usage logs.
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.database_service import DatabaseService
+from services.memory_database import InMemoryDatabaseClient
+
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+END = datetime(2026, 3, 31, tzinfo=timezone.utc)
+
+
+def make_logs():
+    return [
+        # Validation row
+        {"id": "a", "project_id": "p1", "operation_type": "validation", "ai_provider": "openai", "ai_model": "gpt-4o-mini",
+         "input_tokens": 100, "output_tokens": 50, "total_tokens": 150, "estimated_cost": 0.001,
+         "timestamp": "2026-03-02T10:00:00"},
+        # Q&A and assessment rows
+        {"id": "b", "project_id": "p1", "operation_type": "question_answer", "ai_provider": "openai", "ai_model": "gpt-4o-mini",
+         "input_tokens": 200, "output_tokens": 100, "total_tokens": 300, "estimated_cost": 0.002, "success": True,
+         "timestamp": "2026-03-02T11:00:00"},
+        {"id": "c", "project_id": "p1", "operation_type": "project_assessment", "ai_provider": "anthropic",
+         "ai_model": "claude-3-haiku-20240307", "input_tokens": 1000, "output_tokens": 500, "estimated_cost": 0.01,
+         "success": False, "timestamp": "2026-03-03T09:00:00"},
+        # Outside the range and another project
+        {"id": "d", "project_id": "p1", "operation_type": "validation", "ai_provider": "openai", "ai_model": "gpt-4o-mini",
+         "input_tokens": 1, "output_tokens": 1, "total_tokens": 2, "estimated_cost": 5.0, "timestamp": "2026-01-01T00:00:00"},
+        {"id": "e", "project_id": "p2", "operation_type": "validation", "ai_provider": "openai", "ai_model": "gpt-4o-mini",
+         "input_tokens": 1, "output_tokens": 1, "total_tokens": 2, "estimated_cost": 5.0, "timestamp": "2026-03-02T10:00:00"}
+    ]
+
+
+def test_usage_stats_aggregated_in_database():
+    """Totals and breakdowns come from one summary call, counting every log path's tokens."""
+
+    async def run():
+        client = InMemoryDatabaseClient({"ai_usage_logs": make_logs()})
+        db_service = DatabaseService(client=client)
+
+        stats = await db_service.get_usage_stats("p1", START, END)
+        assert client.request_count == 1
+        assert stats["total_requests"] == 3 and stats["failed_requests"] == 1
+        assert stats["total_tokens"] == 150 + 300 + 1500
+        assert stats["total_input_tokens"] == 1300 and stats["total_output_tokens"] == 650
+        assert abs(stats["total_cost"] - 0.013) < 1e-9
+        assert "usage_logs" not in stats
+
+        assert [day["day"] for day in stats["daily"]] == ["2026-03-02", "2026-03-03"]
+        assert stats["daily"][0]["requests"] == 2 and stats["daily"][0]["total_tokens"] == 450
+        assert set(stats["by_operation"]) == {"validation", "question_answer", "project_assessment"}
+        assert stats["by_provider"]["anthropic"]["failures"] == 1
+        assert stats["by_model"]["gpt-4o-mini"]["requests"] == 2
+        assert stats["start_date"] == START.isoformat()
+
+    asyncio.run(run())
+    print("Usage aggregated in the database")
+
+
+def test_usage_stats_default_range_and_errors():
+    """Without a start date only recent usage is summarised; failures return empty totals."""
+
+    async def run():
+        db_service = DatabaseService(client=InMemoryDatabaseClient({"ai_usage_logs": make_logs()}))
+        stats = await db_service.get_usage_stats("p1", end_date=END)
+        assert stats["total_requests"] == 3
+        assert stats["start_date"] == datetime(2026, 3, 1, tzinfo=timezone.utc).isoformat()
+
+        # The summary function is missing from this database
+        class NoFunctions(InMemoryDatabaseClient):
+            def rpc(self, name, params=None):
+                raise RuntimeError("function ai_usage_summary does not exist")
+
+        stats = await DatabaseService(client=NoFunctions({})).get_usage_stats("p1")
+        assert stats["total_requests"] == 0 and stats["daily"] == [] and stats["total_cost"] == 0.0
+
+    asyncio.run(run())
+    print("Default range and errors handled")
+
+
+def test_usage_log_maintenance_without_database():
+    """Usage log paging, cost updates and rollup rebuilds report failure instead of raising."""
+
+    class FailingClient(InMemoryDatabaseClient):
+        def table(self, name):
+            raise ConnectionError("database unreachable")
+
+        def rpc(self, name, params=None):
+            raise ConnectionError("database unreachable")
+
+    async def run():
+        for client in (None, FailingClient()):
+            db_service = DatabaseService(client=InMemoryDatabaseClient())
+            db_service.supabase = client
+            assert await db_service.get_usage_logs_page(0, 10, START, END) is None
+            assert await db_service.update_usage_costs({"a": 0.1, "b": 0.2}) == 2
+            assert await db_service.replace_usage_rollups(START, END, []) is False
+
+    asyncio.run(run())
+    print("Usage log maintenance handles a missing database")
+
+
+def test_usage_logs_endpoint_paginates():
+    """Raw logs are served newest first, one bounded page at a time."""
+
+    from fastapi.testclient import TestClient
+    from main import app, get_container
+    from services.container import ServiceContainer
+
+    client = InMemoryDatabaseClient({"ai_usage_logs": make_logs()})
+    container = ServiceContainer(db_service=DatabaseService(client=client))
+
+    app.dependency_overrides[get_container] = lambda: container
+    try:
+        with TestClient(app) as test_client:
+            first = test_client.get("/usage/p1/logs", params={"limit": 2}).json()
+            second = test_client.get("/usage/p1/logs", params={"limit": 2, "offset": 2}).json()
+            ranged = test_client.get("/usage/p1/logs", params={"start_date": "2026-03-01T00:00:00"}).json()
+            capped = test_client.get("/usage/p1/logs", params={"limit": 100000}).json()
+            stats = test_client.get("/usage/p1", params={"start_date": "2026-03-01T00:00:00Z", "end_date": "2026-03-31T00:00:00Z"}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [row["id"] for row in first["logs"]] == ["c", "b"] and first["has_more"]
+    assert [row["id"] for row in second["logs"]] == ["a", "d"] and not second["has_more"]
+    assert "project_id" not in first["logs"][0]
+    assert len(ranged["logs"]) == 3
+    assert capped["limit"] == container.settings.usage_logs_max_page_size
+    assert stats["total_requests"] == 3
+    print("Usage logs paginated")
+
+
+def main():
+    """Run all usage stats tests."""
+
+    print("Helm AI Service - Usage Stats Tests")
+    print("=" * 50)
+
+    tests = [
+        test_usage_stats_aggregated_in_database,
+        test_usage_stats_default_range_and_errors,
+        test_usage_log_maintenance_without_database,
+        test_usage_logs_endpoint_paginates
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"{test.__name__} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+-- AI Usage Rollups
+-- Hourly and daily usage totals per project, provider and model, maintained
+-- by the AI service as usage logs are written. Backfill existing logs with
+-- `python backfill_usage_rollups.py --since <date>` in ai-service.
+-- Run this in your Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS ai_usage_rollups (
+  granularity TEXT NOT NULL CHECK (granularity IN ('hour', 'day')),
+  bucket_start TIMESTAMPTZ NOT NULL,
+  project_id UUID NOT NULL,
+  ai_provider TEXT NOT NULL,
+  ai_model TEXT NOT NULL,
+  requests BIGINT NOT NULL DEFAULT 0,
+  failures BIGINT NOT NULL DEFAULT 0,
+  input_tokens BIGINT NOT NULL DEFAULT 0,
+  output_tokens BIGINT NOT NULL DEFAULT 0,
+  total_tokens BIGINT NOT NULL DEFAULT 0,
+  estimated_cost NUMERIC NOT NULL DEFAULT 0,
+  latency_count BIGINT NOT NULL DEFAULT 0,
+  latency_sum_ms BIGINT NOT NULL DEFAULT 0,
+  -- Request counts per latency bucket (bounds in services/usage_rollups.py)
+  latency_buckets BIGINT[] NOT NULL DEFAULT '{}',
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (granularity, bucket_start, project_id, ai_provider, ai_model)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_usage_rollups_project
+  ON ai_usage_rollups(granularity, project_id, bucket_start);
+
+ALTER TABLE ai_usage_rollups ENABLE ROW LEVEL SECURITY;
+
+-- Add a batch of deltas (one per bucket) in a single statement. Concurrent
+-- workers can apply deltas to the same bucket; each adds to the stored totals.
+DROP FUNCTION IF EXISTS apply_ai_usage_rollups(JSONB);
+
+CREATE OR REPLACE FUNCTION apply_ai_usage_rollups(deltas JSONB)
+RETURNS INTEGER AS $$
+  WITH applied AS (
+    INSERT INTO ai_usage_rollups AS r (
+      granularity, bucket_start, project_id, ai_provider, ai_model,
+      requests, failures, input_tokens, output_tokens, total_tokens,
+      estimated_cost, latency_count, latency_sum_ms, latency_buckets
+    )
+    SELECT
+      d.granularity, d.bucket_start, d.project_id, d.ai_provider, d.ai_model,
+      d.requests, d.failures, d.input_tokens, d.output_tokens, d.total_tokens,
+      d.estimated_cost, d.latency_count, d.latency_sum_ms, d.latency_buckets
+    FROM jsonb_to_recordset(deltas) AS d(
+      granularity TEXT, bucket_start TIMESTAMPTZ, project_id UUID, ai_provider TEXT, ai_model TEXT,
+      requests BIGINT, failures BIGINT, input_tokens BIGINT, output_tokens BIGINT, total_tokens BIGINT,
+      estimated_cost NUMERIC, latency_count BIGINT, latency_sum_ms BIGINT, latency_buckets BIGINT[]
+    )
+    ON CONFLICT (granularity, bucket_start, project_id, ai_provider, ai_model) DO UPDATE SET
+      requests = r.requests + EXCLUDED.requests,
+      failures = r.failures + EXCLUDED.failures,
+      input_tokens = r.input_tokens + EXCLUDED.input_tokens,
+      output_tokens = r.output_tokens + EXCLUDED.output_tokens,
+      total_tokens = r.total_tokens + EXCLUDED.total_tokens,
+      estimated_cost = r.estimated_cost + EXCLUDED.estimated_cost,
+      latency_count = r.latency_count + EXCLUDED.latency_count,
+      latency_sum_ms = r.latency_sum_ms + EXCLUDED.latency_sum_ms,
+      latency_buckets = ARRAY(
+        SELECT COALESCE(a, 0) + COALESCE(b, 0)
+        FROM unnest(r.latency_buckets, EXCLUDED.latency_buckets) WITH ORDINALITY AS t(a, b, i)
+        ORDER BY i
+      ),
+      updated_at = now()
+    RETURNING 1
+  )
+  SELECT COUNT(*)::integer FROM applied;
+$$ LANGUAGE sql;
+
+GRANT EXECUTE ON FUNCTION apply_ai_usage_rollups(JSONB) TO service_role;
+
+-- Replace the rollups of buckets starting in [start_param, end_param) with a
+-- batch of deltas. The delete and the insert run in one transaction, so a
+-- failed rebuild leaves the range as it was.
+CREATE OR REPLACE FUNCTION replace_ai_usage_rollups(start_param TIMESTAMPTZ, end_param TIMESTAMPTZ, deltas JSONB)
+RETURNS INTEGER AS $$
+BEGIN
+  DELETE FROM ai_usage_rollups WHERE bucket_start >= start_param AND bucket_start < end_param;
+  RETURN apply_ai_usage_rollups(deltas);
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION replace_ai_usage_rollups(TIMESTAMPTZ, TIMESTAMPTZ, JSONB) TO service_role;
@@ -0,0 +1,50 @@
+-- AI Usage Summary
+-- Aggregates ai_usage_logs in the database for GET /usage/{project_id}, so the
+-- AI service reads one row per day, operation, provider and model instead of
+-- every logged request.
+-- Run this in your Supabase SQL Editor
+
+-- Range scans by project and time
+CREATE INDEX IF NOT EXISTS idx_ai_usage_logs_project_timestamp
+  ON ai_usage_logs(project_id, "timestamp");
+
+DROP FUNCTION IF EXISTS ai_usage_summary(UUID, TIMESTAMPTZ, TIMESTAMPTZ);
+
+CREATE OR REPLACE FUNCTION ai_usage_summary(
+  project_id_param UUID,
+  start_param TIMESTAMPTZ DEFAULT NULL,
+  end_param TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (
+  day DATE,
+  operation_type TEXT,
+  ai_provider TEXT,
+  ai_model TEXT,
+  requests BIGINT,
+  failures BIGINT,
+  input_tokens BIGINT,
+  output_tokens BIGINT,
+  total_tokens BIGINT,
+  estimated_cost NUMERIC
+) AS $$
+  SELECT
+    (l."timestamp" AT TIME ZONE 'UTC')::date,
+    l.operation_type::text,
+    l.ai_provider::text,
+    l.ai_model::text,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE l.success = false),
+    COALESCE(SUM(l.input_tokens), 0)::bigint,
+    COALESCE(SUM(l.output_tokens), 0)::bigint,
+    -- Older rows may only have the input/output split
+    COALESCE(SUM(COALESCE(l.total_tokens, COALESCE(l.input_tokens, 0) + COALESCE(l.output_tokens, 0))), 0)::bigint,
+    COALESCE(SUM(l.estimated_cost), 0)::numeric
+  FROM ai_usage_logs l
+  WHERE l.project_id = project_id_param
+    AND (start_param IS NULL OR l."timestamp" >= start_param)
+    AND (end_param IS NULL OR l."timestamp" <= end_param)
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 2, 3, 4;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION ai_usage_summary(UUID, TIMESTAMPTZ, TIMESTAMPTZ) TO service_role;
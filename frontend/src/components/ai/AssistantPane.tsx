@@ -182,7 +182,21 @@ export function AssistantPane({
         throw new Error(error.detail || 'Failed to assess project');
       }
 
-      const data = await response.json();
+      // The assessment runs as a background job; poll until it finishes
+      let data = await response.json();
+      while (response.status === 202 && data.status !== 'succeeded') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const result = await fetch(`http://localhost:8001/assess-project/jobs/${data.job_id}/result`);
+        if (result.status === 202) {
+          continue;
+        }
+        if (!result.ok) {
+          const error = await result.json();
+          console.error('[AssistantPane] Assessment job failed:', error);
+          throw new Error(error.detail?.message || error.detail || 'Failed to assess project');
+        }
+        data = { ...(await result.json()), status: 'succeeded' };
+      }
       console.log('[AssistantPane] Assessment completed:', data);
 
       // Refresh to load new insights